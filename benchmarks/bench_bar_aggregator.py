@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+K线合成吞吐基准
+
+生成覆盖一个上午交易时段的随机快照行情(累计成交量)，分别测量
+批量输入(on_ticks)和逐条输入(on_tick)的处理速度。
+
+用法:
+  python benchmarks/bench_bar_aggregator.py --symbols 5000 --ticks 500000 --freqs 1m 5m 1d
+  python benchmarks/bench_bar_aggregator.py --batch 1000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from libs.config.consts import MARKET_UTC_OFFSET, MORNING_OPEN  # noqa: E402
+from libs.data.bar_aggregator import BarAggregator  # noqa: E402
+
+
+def make_ticks(n_symbols: int, n_ticks: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    session_start = 19724 * 86400 + MORNING_OPEN - MARKET_UTC_OFFSET  # 2024-01-02 09:30 北京时间
+    symbols = [f"{600000 + i}.SH" for i in range(n_symbols)]
+    index = rng.integers(0, n_symbols, n_ticks)
+    ts = np.sort(session_start + rng.uniform(0, 2 * 3600, n_ticks))
+    price = 10 * np.exp(np.cumsum(rng.standard_normal(n_ticks) * 1e-4))
+    volume = np.cumsum(rng.integers(1, 50, n_ticks) * 100).astype(np.float64)  # 单调递增的累计量
+    return [symbols[i] for i in index], ts, price, volume
+
+
+def main():
+    parser = argparse.ArgumentParser(description='K线合成基准')
+    parser.add_argument('--symbols', type=int, default=5000, help='股票数量')
+    parser.add_argument('--ticks', type=int, default=500000, help='行情条数')
+    parser.add_argument('--freqs', nargs='+', default=['1m', '5m', '1d'], help='合成频率')
+    parser.add_argument('--batch', type=int, default=5000, help='on_ticks 每批条数')
+    args = parser.parse_args()
+
+    symbols, ts, price, volume = make_ticks(args.symbols, args.ticks)
+
+    aggregator = BarAggregator(args.freqs, capacity=args.symbols)
+    start = time.perf_counter()
+    for i in range(0, args.ticks, args.batch):
+        j = i + args.batch
+        aggregator.on_ticks(symbols[i:j], ts[i:j], price[i:j], volume[i:j])
+    aggregator.close_all()
+    elapsed = time.perf_counter() - start
+    print(f"on_ticks: {args.ticks / elapsed:,.0f} 条/秒  K线: {aggregator.bars_emitted:,}  耗时: {elapsed:.3f}s")
+
+    aggregator = BarAggregator(args.freqs, capacity=args.symbols)
+    on_tick = aggregator.on_tick
+    start = time.perf_counter()
+    for i in range(args.ticks):
+        on_tick(symbols[i], ts[i], price[i], volume[i])
+    aggregator.close_all()
+    elapsed = time.perf_counter() - start
+    print(f"on_tick:  {args.ticks / elapsed:,.0f} 条/秒  K线: {aggregator.bars_emitted:,}  耗时: {elapsed:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
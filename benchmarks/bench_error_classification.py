@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+券商错误分类微基准
+
+对比逐个关键字子串匹配与预编译分类表在拒单风暴场景下的耗时，
+并校验两者分类结果一致。
+
+用法:
+  python benchmarks/bench_error_classification.py --iterations 200000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from libs.config.consts import (  # noqa: E402
+    ERROR_KEYWORDS_MAPPING, OrderError, get_error_type, get_error_suggestion,
+    format_error_message, is_retryable_error
+)
+
+
+def linear_error_type(error_message: str) -> OrderError:
+    """逐个关键字匹配的参考实现"""
+    for keyword, error_type in ERROR_KEYWORDS_MAPPING.items():
+        if keyword in error_message:
+            return error_type
+    return OrderError.UNKNOWN
+
+
+def make_messages(count: int, seed: int = 7):
+    """生成模拟券商拒单消息(带随机订单号，基本互不相同)"""
+    rng = random.Random(seed)
+    keywords = list(ERROR_KEYWORDS_MAPPING) + ['未定义错误']
+    templates = ['[{code}] 委托失败: {kw}', '下单被拒绝，原因: {kw}，订单号{code}',
+                 '错误码{code}: {kw}; {kw2}']
+    return [rng.choice(templates).format(code=rng.randint(10000, 99999),
+                                         kw=rng.choice(keywords), kw2=rng.choice(keywords))
+            for _ in range(count)]
+
+
+def bench(name: str, func, messages) -> float:
+    start = time.perf_counter()
+    for message in messages:
+        func(message)
+    elapsed = time.perf_counter() - start
+    per_call = elapsed / len(messages) * 1e9
+    print(f"{name:<28} {per_call:10.1f} ns/次  {len(messages) / elapsed:14,.0f} 次/秒")
+    return per_call
+
+
+def full_path(message: str):
+    """分类 + 是否重试 + 用户提示 + 处理建议(拒单处理完整路径)"""
+    error_type = get_error_type(message)
+    is_retryable_error(error_type)
+    format_error_message(error_type, message)
+    get_error_suggestion(error_type)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='券商错误分类微基准')
+    parser.add_argument('--iterations', type=int, default=200000, help='调用次数')
+    args = parser.parse_args()
+
+    messages = make_messages(args.iterations)
+
+    mismatched = [m for m in messages if linear_error_type(m) != get_error_type(m)]
+    if mismatched:
+        print(f"分类结果不一致: {mismatched[:3]}")
+        return 1
+
+    print(f"消息数: {args.iterations}")
+    bench('逐个匹配(参考实现)', linear_error_type, messages)
+    bench('get_error_type', get_error_type, messages)
+    bench('完整拒单处理路径', full_path, messages)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
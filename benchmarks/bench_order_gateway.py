@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+下单网关吞吐与尾延迟基准
+
+在本进程内启动模拟券商TCP服务，通过 RemoteBroker 流水线下单，
+统计吞吐量、各状态订单数量和延迟分位数。
+
+用法:
+  python benchmarks/bench_order_gateway.py --orders 5000 --latency 0.002 --error 系统繁忙=0.05
+  python benchmarks/bench_order_gateway.py --orders 2000 --rate 500 --inflight 32
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from libs.config.consts import TradeDirection  # noqa: E402
+from libs.execution import AsyncOrderGateway, FakeBroker, FakeBrokerServer, RemoteBroker  # noqa: E402
+from libs.execution.fake_broker import _parse_error_rates  # noqa: E402
+
+
+async def run(args) -> None:
+    server = FakeBrokerServer(FakeBroker(args.latency, args.sigma, _parse_error_rates(args.error), seed=1),
+                              port=0)
+    host, port = await server.start()
+    broker = RemoteBroker(host, port)
+    await broker.connect()
+    gateway = AsyncOrderGateway(broker, retry_delay=args.retry_delay, max_retry_delay=args.retry_delay * 8,
+                                order_timeout=args.timeout, max_orders_per_second=args.rate,
+                                max_inflight=args.inflight, seed=1)
+    requests = [gateway.new_request(f"{600000 + i % 500}.SH", TradeDirection.BUY, 100, 10.0)
+                for i in range(args.orders)]
+
+    start = time.perf_counter()
+    acks = await gateway.place_many(requests)
+    elapsed = time.perf_counter() - start
+
+    await gateway.close()
+    await server.stop()
+
+    print(f"订单数: {len(acks)}  耗时: {elapsed:.3f}s  吞吐: {len(acks) / elapsed:,.0f} 笔/秒")
+    print(f"券商收到请求: {server.broker.requests}  重试: {gateway.stats['retries']}")
+    print("状态:", dict(Counter(ack.status.value for ack in acks)))
+    for p, value in gateway.latency_percentiles((50, 90, 99, 99.9, 100)).items():
+        print(f"  p{p:<5} {value * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='下单网关基准')
+    parser.add_argument('--orders', type=int, default=5000, help='订单数量')
+    parser.add_argument('--latency', type=float, default=0.002, help='模拟券商延迟中位数(秒)')
+    parser.add_argument('--sigma', type=float, default=0.5, help='延迟对数正态分布sigma')
+    parser.add_argument('--error', action='append', metavar='消息=概率', help='注入错误(可重复)')
+    parser.add_argument('--rate', type=float, default=None, help='限流(笔/秒)，默认不限')
+    parser.add_argument('--inflight', type=int, default=256, help='最大在途订单数')
+    parser.add_argument('--retry-delay', type=float, default=0.005, help='重试基础延迟(秒)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='订单截止时间(秒)')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
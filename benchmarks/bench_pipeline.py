@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全链路吞吐基准 - 分阶段测量每秒处理条数与尾延迟
+
+用合成行情、拒单消息和订单驱动交易链路的各个阶段，逐阶段统计
+records/sec 与单次调用延迟的 p50/p99/p999，并与仓库中的回归阈值
+(benchmarks/thresholds.json)比较。end_to_end 阶段把行情解码、策略分发、
+风控、下单和成交日志串起来，验证"每秒10,000条数据处理"。
+
+阶段:
+  quote_ingest          QMT整体行情解码 + 写入共享行情平面(每次调用一批)
+  config_lookup         读取配置快照中的热路径参数
+  error_classification  券商错误消息分类(get_error_type)
+  indicator_update      逐笔更新 SMA / RSI(SymbolIndicators)
+  strategy_dispatch     多策略引擎按订阅关系分发行情并执行策略回调(每次调用一批)
+  risk_check            向量化事前风控(每次调用一批订单)
+  order_submit          经 AsyncOrderGateway 向进程内模拟券商下单(延迟为下单到回报)
+  order_expiry          订单超时定时器的登记与取消(定时轮中保持 --orders 笔在途)
+  logging               成交日志写入日志管道(延迟为入队，吞吐含写盘)
+  output                output_manager 经 DeferredOutput 输出(延迟为入队，吞吐含执行)
+  end_to_end            行情 -> 策略 -> 风控 -> 下单 -> 成交日志(吞吐按行情条数计)
+
+依赖缺失的阶段记为 skipped 并注明原因，不影响其余阶段；
+--check 时阈值文件中未运行(跳过或未选择)的阶段一并列出并视为未达标。
+
+用法:
+  python benchmarks/bench_pipeline.py
+  python benchmarks/bench_pipeline.py --records 200000 --stages quote_ingest risk_check
+  python benchmarks/bench_pipeline.py --json results.json --check
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from libs.monitoring.latency import ORDER_TO_ACK, LatencyHistogram, LatencyRecorder  # noqa: E402
+
+DEFAULT_THRESHOLDS = Path(__file__).resolve().parent / 'thresholds.json'
+DEFAULT_RECORDS = 100000  # 每个阶段处理的记录数
+DEFAULT_BATCH = 100  # 批量阶段每次调用的记录数
+DEFAULT_SYMBOLS = 5000
+PERCENTILES = (50, 99, 99.9)
+
+_clock = time.perf_counter_ns
+
+
+class StageSkipped(Exception):
+    """阶段依赖的模块不可用"""
+
+
+class StageMeter:
+    """一个阶段的计时: 单次调用延迟直方图 + 记录数"""
+
+    def __init__(self, name: str, unit: str = 'record'):
+        self.name = name
+        self.unit = unit  # 单次调用处理的单位: record / batch
+        self.histogram = LatencyHistogram()
+        self.records = 0
+        self.busy_ns = 0  # 被测调用的累计耗时
+        self.wall_ns: Optional[int] = None  # 含异步完成时间的总耗时(覆盖 busy_ns 计算吞吐)
+        self.notes: List[str] = []
+
+    def record(self, elapsed_ns: int, records: int = 1):
+        self.histogram.record(elapsed_ns)
+        self.busy_ns += elapsed_ns
+        self.records += records
+
+    def result(self) -> Dict[str, Any]:
+        hist = self.histogram
+        elapsed_ns = self.wall_ns if self.wall_ns is not None else self.busy_ns
+        result = {
+            'stage': self.name,
+            'status': 'ok',
+            'unit': self.unit,
+            'records': self.records,
+            'calls': hist.count,
+            'seconds': elapsed_ns / 1e9,
+            'records_per_sec': self.records / (elapsed_ns / 1e9) if elapsed_ns else 0.0,
+            'mean_us': hist.mean / 1e3,
+        }
+        for p in PERCENTILES:
+            result[f'p{p:g}_us'.replace('.', '')] = hist.percentile(p) / 1e3
+        result['max_us'] = hist.max / 1e3
+        if self.notes:
+            result['notes'] = self.notes
+        return result
+
+
+# ==================== 合成数据 ====================
+def make_symbols(count: int) -> List[str]:
+    half = count // 2
+    return [f"{600000 + i}.SH" for i in range(half)] + [f"{i + 1:06d}.SZ" for i in range(count - half)]
+
+
+def make_prices(rng: np.random.Generator, n_symbols: int, n_records: int):
+    """随机游走的逐笔行情: (股票下标, 价格)"""
+    index = rng.integers(0, n_symbols, n_records)
+    base = rng.uniform(5, 50, n_symbols)
+    price = base[index] * np.exp(rng.standard_normal(n_records) * 2e-3)
+    return index, np.round(price, 2)
+
+
+def make_qmt_pushes(symbols: List[str], n_records: int, batch: int, seed: int = 0) -> List[Dict[str, Dict]]:
+    """QMT整体行情推送格式的批次(字段见 libs.engine.quote_plane)"""
+    rng = np.random.default_rng(seed)
+    index, price = make_prices(rng, len(symbols), n_records)
+    volume = rng.integers(1, 1000, n_records) * 100
+    now_ms = int(time.time() * 1000)
+    pushes = []
+    for start in range(0, n_records, batch):
+        push = {}
+        for i in range(start, min(start + batch, n_records)):
+            last = float(price[i])
+            push[symbols[index[i]]] = {
+                'lastPrice': last, 'bidPrice': [round(last - 0.01, 2)] * 5,
+                'askPrice': [round(last + 0.01, 2)] * 5, 'volume': int(volume[i]), 'time': now_ms + i,
+            }
+        pushes.append(push)
+    return pushes
+
+
+def make_error_messages(count: int, distinct: int = 500, seed: int = 7) -> List[str]:
+    """模拟券商拒单消息"""
+    from libs.config.consts import ERROR_KEYWORDS_MAPPING
+    rng = random.Random(seed)
+    keywords = list(ERROR_KEYWORDS_MAPPING) + ['未定义错误']
+    pool = [f"[{rng.randint(10000, 99999)}] 委托失败: {rng.choice(keywords)}" for _ in range(distinct)]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def _require(module: str, *names: str):
+    """导入阶段依赖，缺失时跳过该阶段"""
+    try:
+        imported = __import__(module, fromlist=list(names) or ['*'])
+    except ImportError as e:
+        raise StageSkipped(f"{module} 不可用: {e}") from None
+    return [getattr(imported, name) for name in names] if len(names) > 1 else getattr(imported, names[0])
+
+
+def _risk_engine(symbols: List[str]):
+    RiskConfig = _require('libs.config.config_manager', 'RiskConfig')
+    RiskEngine = _require('libs.risk.risk_engine', 'RiskEngine')
+    risk = RiskEngine(RiskConfig(max_single_position=1.0, max_total_positions=1.0, max_positions_count=10 ** 6,
+                                 max_daily_loss=1.0, max_drawdown=1.0, position_risk_pct=1.0),
+                      initial_equity=1e12, capacity=len(symbols))
+    risk.set_prev_close(symbols, np.full(len(symbols), 20.0))
+    return risk
+
+
+# ==================== 阶段 ====================
+STAGES: Dict[str, Callable[[argparse.Namespace], StageMeter]] = {}
+
+
+def stage(name: str):
+    def decorator(func):
+        STAGES[name] = func
+        return func
+    return decorator
+
+
+@stage('quote_ingest')
+def bench_quote_ingest(args) -> StageMeter:
+    from libs.engine.quote_plane import SharedQuotePlane, decode_qmt_quotes
+    symbols = make_symbols(args.symbols)
+    pushes = make_qmt_pushes(symbols, args.records, args.batch)
+    meter = StageMeter('quote_ingest', 'batch')
+    plane = SharedQuotePlane.create(symbols)
+    try:
+        slot_map = plane.slots
+        for push in pushes:
+            start = _clock()
+            plane.write(*decode_qmt_quotes(push, slot_map))
+            meter.record(_clock() - start, len(push))
+    finally:
+        plane.close()
+    return meter
+
+
+@stage('config_lookup')
+def bench_config_lookup(args) -> StageMeter:
+    ConfigManager = _require('libs.config.config_manager', 'ConfigManager')
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = ConfigManager()
+    meter = StageMeter('config_lookup')
+    for _ in range(args.records):
+        start = _clock()
+        snapshot = manager.snapshot
+        _ = (snapshot.risk.max_single_position, snapshot.network.max_retry_attempts, snapshot.is_live)
+        meter.record(_clock() - start)
+    return meter
+
+
+@stage('error_classification')
+def bench_error_classification(args) -> StageMeter:
+    from libs.config.consts import get_error_type
+    messages = make_error_messages(args.records)
+    meter = StageMeter('error_classification')
+    for message in messages:
+        start = _clock()
+        get_error_type(message)
+        meter.record(_clock() - start)
+    return meter
+
+
+@stage('indicator_update')
+def bench_indicator_update(args) -> StageMeter:
+    from libs.indicators.streaming import RSI, SMA, SymbolIndicators
+    symbols = make_symbols(args.symbols)
+    index, price = make_prices(np.random.default_rng(1), len(symbols), args.records)
+    ticks = list(zip([symbols[i] for i in index.tolist()], price.tolist()))
+    sma = SymbolIndicators(lambda: SMA(20))
+    rsi = SymbolIndicators(lambda: RSI(14))
+    meter = StageMeter('indicator_update')
+    for symbol, last in ticks:
+        start = _clock()
+        sma.update(symbol, last)
+        rsi.update(symbol, last)
+        meter.record(_clock() - start)
+    return meter
+
+
+@stage('strategy_dispatch')
+def bench_strategy_dispatch(args) -> StageMeter:
+    from libs.engine.multi_engine import MultiStrategyEngine
+    from strategies.multi import MomentumStrategy
+    symbols = make_symbols(args.symbols)
+    engine = MultiStrategyEngine(workers=0, recorder=LatencyRecorder())
+    engine.add_account('BENCH')
+    n_strategies = 10
+    per_strategy = max(1, len(symbols) // n_strategies)
+    for k in range(n_strategies):
+        engine.add_strategy(MomentumStrategy, name=f'momentum_{k}',
+                            symbols=symbols[k * per_strategy:(k + 1) * per_strategy], threshold=0.002)
+    meter = StageMeter('strategy_dispatch', 'batch')
+    engine.start()
+    try:
+        rng = np.random.default_rng(2)
+        slots, price = make_prices(rng, len(engine.symbols), args.records)
+        for start_index in range(0, args.records, args.batch):
+            stop_index = start_index + args.batch
+            batch_slots, batch_price = slots[start_index:stop_index], price[start_index:stop_index]
+            start = _clock()
+            engine.publish(batch_slots, batch_price)
+            meter.record(_clock() - start, len(batch_slots))
+    finally:
+        engine.stop()
+    meter.notes.append(f"{n_strategies} 个策略，下单意图 {engine.stats['orders']} 笔")
+    return meter
+
+
+@stage('risk_check')
+def bench_risk_check(args) -> StageMeter:
+    from libs.config.consts import TradeDirection
+    symbols = make_symbols(args.symbols)
+    risk = _risk_engine(symbols)
+    rng = np.random.default_rng(3)
+    index, price = make_prices(rng, len(symbols), args.records)
+    meter = StageMeter('risk_check', 'batch')
+    directions = [TradeDirection.BUY] * args.batch
+    for start_index in range(0, args.records, args.batch):
+        stop_index = start_index + args.batch
+        batch_symbols = [symbols[i] for i in index[start_index:stop_index].tolist()]
+        volumes = np.full(len(batch_symbols), 100, dtype=np.int64)
+        start = _clock()
+        risk.check(batch_symbols, directions[:len(batch_symbols)], volumes, price[start_index:stop_index])
+        meter.record(_clock() - start, len(batch_symbols))
+    return meter
+
+
+@stage('order_submit')
+def bench_order_submit(args) -> StageMeter:
+    from libs.config.consts import TradeDirection
+    from libs.execution import AsyncOrderGateway, FakeBroker
+
+    async def run(meter: StageMeter):
+        recorder = LatencyRecorder()
+        gateway = AsyncOrderGateway(FakeBroker(latency=0.0, seed=1), max_orders_per_second=None,
+                                    max_inflight=args.inflight, recorder=recorder, seed=1)
+        requests = [gateway.new_request(f"{600000 + i % 500}.SH", TradeDirection.BUY, 100, 10.0)
+                    for i in range(args.orders)]
+        # 按在途上限分批提交，延迟不包含在网关内排队的时间
+        start = _clock()
+        for i in range(0, len(requests), args.inflight):
+            acks = await gateway.place_many(requests[i:i + args.inflight])
+            meter.records += len(acks)
+        meter.wall_ns = _clock() - start
+        await gateway.close()
+        meter.histogram = recorder.histogram(ORDER_TO_ACK)
+        meter.notes.append(f"每批 {args.inflight} 笔，模拟券商零延迟")
+
+    meter = StageMeter('order_submit')
+    asyncio.run(run(meter))
+    return meter
+
+
+@stage('order_expiry')
+def bench_order_expiry(args) -> StageMeter:
+    from libs.execution import OrderExpiry, TimerWheel
+    now = [0.0]
+    expiry = OrderExpiry(TimerWheel(tick=0.05, clock=lambda: now[0]), order_timeout=30.0)
+    for i in range(args.orders):  # 在途订单底数，登记/取消的成本不应随其增长
+        expiry.watch_order(f"BASE-{i}")
+    meter = StageMeter('order_expiry')
+    for i in range(args.records):
+        order_id = f"GW-{i}"
+        start = _clock()
+        expiry.watch_order(order_id)
+        expiry.done(order_id)
+        meter.record(_clock() - start)
+        now[0] += 0.0001
+    start = _clock()
+    expiry.wheel.advance(now[0] + 31.0)
+    meter.notes.append(f"在途 {args.orders} 笔，全部到期触发耗时 {(_clock() - start) / 1e6:.1f} ms")
+    return meter
+
+
+@stage('logging')
+def bench_logging(args) -> StageMeter:
+    from libs.output.log_pipeline import LogPipeline
+    meter = StageMeter('logging')
+    with tempfile.TemporaryDirectory(prefix='bench_logs_') as log_dir:
+        pipeline = LogPipeline(log_dir, console_output=False, max_queue_size=args.records + 1)
+        pipeline.start()
+        logger = pipeline.get_logger('trade', 'bench')
+        wall = _clock()
+        for i in range(args.records):
+            start = _clock()
+            logger.info("成交 %s %d股 @ %.2f", '600000.SH', 100, 10.52, order_id=i)
+            meter.record(_clock() - start)
+        pipeline.flush(timeout=60.0)
+        meter.wall_ns = _clock() - wall
+        pipeline.stop()
+        if pipeline.dropped:
+            meter.notes.append(f"丢弃 {pipeline.dropped} 条")
+    return meter
+
+
+@stage('output')
+def bench_output(args) -> StageMeter:
+    output_manager = _require('libs.output.output_manager', 'output_manager')
+    from libs.output.log_pipeline import DeferredOutput, LogPipeline
+    meter = StageMeter('output')
+    records = min(args.records, 20000)  # 每条都会格式化并打印，控制总量
+    with tempfile.TemporaryDirectory(prefix='bench_logs_') as log_dir, \
+            contextlib.redirect_stdout(io.StringIO()):
+        pipeline = LogPipeline(log_dir, console_output=False, max_queue_size=records + 1)
+        pipeline.start()
+        output = DeferredOutput(output_manager, pipeline)
+        wall = _clock()
+        for i in range(records):
+            start = _clock()
+            output.info(f"订单 {i} 已提交")
+            meter.record(_clock() - start)
+        pipeline.flush(timeout=60.0)
+        meter.wall_ns = _clock() - wall
+        pipeline.stop()
+    return meter
+
+
+@stage('end_to_end')
+def bench_end_to_end(args) -> StageMeter:
+    """行情推送 -> 共享行情平面 -> 策略 -> 风控 -> 下单网关 -> 成交日志"""
+    from libs.config.consts import OrderStatus
+    from libs.engine.multi_engine import MultiStrategyEngine
+    from libs.execution import AsyncOrderGateway, FakeBroker
+    from libs.execution.order_gateway import GatewayThread
+    from libs.output.log_pipeline import LogPipeline
+    from strategies.multi import MomentumStrategy
+
+    symbols = make_symbols(args.symbols)
+    try:
+        risk = _risk_engine(symbols)
+    except StageSkipped as e:
+        risk = None
+        skipped_risk = str(e)
+    pushes = make_qmt_pushes(symbols, args.records, args.batch, seed=4)
+    gateway = AsyncOrderGateway(FakeBroker(latency=0.0, seed=1), max_orders_per_second=None,
+                                max_inflight=args.inflight, recorder=LatencyRecorder(), seed=1)
+    runner = GatewayThread(gateway).start()
+    meter = StageMeter('end_to_end', 'batch')
+    futures = []
+    with tempfile.TemporaryDirectory(prefix='bench_logs_') as log_dir:
+        pipeline = LogPipeline(log_dir, console_output=False)
+        pipeline.start()
+        trade_log = pipeline.get_logger('trade', 'bench')
+
+        def handle(intent):
+            volume = intent.volume
+            if risk is not None:
+                checked = risk.check([intent.symbol], [intent.direction], [volume], [intent.price])
+                if not checked.all_accepted:
+                    return
+                volume = int(checked.volumes[0])
+            future = runner.place(intent.symbol, intent.direction, volume, intent.price)
+            future.add_done_callback(lambda f, i=intent: trade_log.info(
+                "%s %s %d股 @ %.2f", i.symbol, i.direction.value, i.volume, i.price))
+            futures.append(future)
+
+        engine = MultiStrategyEngine(workers=0, recorder=LatencyRecorder())
+        engine.add_account('BENCH', handle)
+        n_strategies = 10
+        per_strategy = max(1, len(symbols) // n_strategies)
+        for k in range(n_strategies):
+            engine.add_strategy(MomentumStrategy, name=f'momentum_{k}',
+                                symbols=symbols[k * per_strategy:(k + 1) * per_strategy],
+                                threshold=0.002, size=100)
+        engine.start()
+        try:
+            wall = _clock()
+            for push in pushes:
+                start = _clock()
+                engine.on_qmt_quotes(push)
+                meter.record(_clock() - start, len(push))
+            for future in futures:
+                future.result(timeout=60.0)
+            pipeline.flush(timeout=60.0)
+            meter.wall_ns = _clock() - wall
+        finally:
+            engine.stop()
+            runner.stop()
+            pipeline.stop()
+    accepted = sum(1 for f in futures if f.result().status == OrderStatus.ACCEPTED)
+    meter.notes.append(f"行情 {meter.records} 条，下单 {len(futures)} 笔，券商受理 {accepted} 笔")
+    if risk is None:
+        meter.notes.append(f"未包含风控: {skipped_risk}")
+    return meter
+
+
+# ==================== 报告 ====================
+def run_stages(names: List[str], args) -> List[Dict[str, Any]]:
+    results = []
+    for name in names:
+        try:
+            result = STAGES[name](args).result()
+        except StageSkipped as e:
+            result = {'stage': name, 'status': 'skipped', 'reason': str(e)}
+        except Exception as e:
+            result = {'stage': name, 'status': 'error', 'reason': f"{type(e).__name__}: {e}"}
+        results.append(result)
+        print_result(result)
+    return results
+
+
+def print_result(result: Dict[str, Any]):
+    if result['status'] != 'ok':
+        print(f"{result['stage']:<22} {result['status']}: {result['reason']}")
+        return
+    print(f"{result['stage']:<22} {result['records_per_sec']:>14,.0f} 条/秒  "
+          f"p50 {result['p50_us']:>9.2f}us  p99 {result['p99_us']:>9.2f}us  "
+          f"p999 {result['p999_us']:>9.2f}us  ({result['calls']} 次调用/{result['unit']})")
+    for note in result.get('notes', ()):
+        print(f"{'':<22} {note}")
+
+
+def check_thresholds(results: List[Dict[str, Any]], thresholds: Dict[str, Dict[str, float]]) -> List[str]:
+    """与回归阈值比较，返回未达标项(阈值文件中跳过或未运行的阶段也计为未达标)"""
+    failures = []
+    ran = {result['stage'] for result in results}
+    for stage in thresholds:
+        if stage not in ran:
+            failures.append(f"{stage}: 未运行")
+    for result in results:
+        limits = thresholds.get(result['stage'])
+        if not limits:
+            continue
+        if result['status'] != 'ok':
+            failures.append(f"{result['stage']}: {result['status']}: {result['reason']}")
+            continue
+        minimum = limits.get('min_records_per_sec')
+        if minimum is not None and result['records_per_sec'] < minimum:
+            failures.append(f"{result['stage']}: {result['records_per_sec']:,.0f} 条/秒 < {minimum:,.0f}")
+        for key in ('p99_us', 'p999_us'):
+            maximum = limits.get(f'max_{key}')
+            if maximum is not None and result[key] > maximum:
+                failures.append(f"{result['stage']}: {key} {result[key]:.2f} > {maximum:.2f}")
+    return failures
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit,
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'numpy': np.__version__}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='全链路吞吐基准')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES), help='运行的阶段')
+    parser.add_argument('--records', type=int, default=DEFAULT_RECORDS, help='每个阶段的记录数')
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH, help='批量阶段每次调用的记录数')
+    parser.add_argument('--symbols', type=int, default=DEFAULT_SYMBOLS, help='股票数量')
+    parser.add_argument('--orders', type=int, default=20000, help='order_submit 阶段的订单数')
+    parser.add_argument('--inflight', type=int, default=256, help='下单网关最大在途订单数')
+    parser.add_argument('--json', metavar='PATH', help='结果写入JSON文件("-"表示标准输出)')
+    parser.add_argument('--thresholds', default=str(DEFAULT_THRESHOLDS), help='回归阈值文件')
+    parser.add_argument('--check', action='store_true', help='与回归阈值比较，未达标或有阶段未运行时返回非零退出码')
+    args = parser.parse_args()
+
+    results = run_stages(args.stages, args)
+    report = {'environment': environment(),
+              'parameters': {k: getattr(args, k) for k in ('records', 'batch', 'symbols', 'orders', 'inflight')},
+              'stages': results}
+
+    failures = []
+    if args.check:
+        with open(args.thresholds, encoding='utf-8') as f:
+            failures = check_thresholds(results, json.load(f)['stages'])
+        report['regressions'] = failures
+        print("\n回归检查:", "通过" if not failures else f"{len(failures)} 项未达标")
+        for failure in failures:
+            print(f"  {failure}")
+
+    if args.json == '-':
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    elif args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
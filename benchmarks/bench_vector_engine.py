@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+向量化回测基准
+
+在随机面板(含停牌缺失)上分别运行逐K线参考实现(MyStrategy 在事件驱动路径上的语义)
+和向量化引擎，校验两者的成交、手续费与权益一致，并输出加速比。
+
+用法:
+  python benchmarks/bench_vector_engine.py --bars 500 --symbols 200
+  python benchmarks/bench_vector_engine.py --fill-price close
+"""
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from libs.backtest.vector_engine import VectorBacktestEngine  # noqa: E402
+from libs.data.bar_store import BarPanel  # noqa: E402
+from strategies.vector import MyVectorStrategy  # noqa: E402
+
+
+def make_panel(n_bars: int, n_symbols: int, halt_ratio: float = 0.02, seed: int = 0) -> BarPanel:
+    """生成随机日线面板，halt_ratio 比例的K线为停牌(NaN)"""
+    rng = np.random.default_rng(seed)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_bars, n_symbols)), axis=0))
+    open_ = close * np.exp(rng.normal(0, 0.005, close.shape))
+    high = np.maximum(open_, close) * 1.01
+    low = np.minimum(open_, close) * 0.99
+    volume = rng.integers(1, 1000, close.shape) * 100.0
+    halted = rng.random(close.shape) < halt_ratio
+    for column in (open_, high, low, close, volume):
+        column[halted] = np.nan
+    ts = (np.datetime64('2020-01-01', 'ns') + np.arange(n_bars) * np.timedelta64(1, 'D')).astype(np.int64)
+    return BarPanel([f"{600000 + j}.SH" for j in range(n_symbols)], '1d', ts, open_, high, low, close, volume)
+
+
+def reference_backtest(panel: BarPanel, size: int, initial_cash: float, commission: float,
+                       volume_unit: int, fill_price: str = 'open'):
+    """逐K线参考实现，逐品种按 MyStrategy.next() 的语义撮合
+
+    空仓且收盘价高于前一根时买入 size 股(整手取整)，持仓且收盘价低于前一根时全部卖出；
+    'open' 模式下委托在下一根开盘成交，'close' 模式下当根收盘成交，无法成交的委托作废。
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: (成交数量, 手续费, 权益)
+    """
+    lots = int(size // volume_unit) * volume_unit
+    n_bars, n_symbols = panel.shape
+    trades = np.zeros((n_bars, n_symbols))
+    fees = np.zeros((n_bars, n_symbols))
+    equity = np.empty((n_bars, n_symbols))
+    next_open = fill_price == 'open'
+    for j in range(n_symbols):
+        open_ = panel.open[:, j].tolist()
+        close = panel.close[:, j].tolist()
+        cash, position, pending, mark = initial_cash, 0, 0, 0.0
+        for t in range(n_bars):
+            if pending:
+                value = pending * open_[t]
+                fee = abs(value) * commission
+                cash -= value + fee
+                position += pending
+                trades[t, j], fees[t, j] = pending, fee
+                pending = 0
+
+            order = 0
+            prev = close[t - 1] if t else math.nan
+            if not position and close[t] > prev:
+                order = lots
+            elif position and close[t] < prev:
+                order = -position
+            if order and next_open:
+                if t + 1 < n_bars and not math.isnan(open_[t + 1]):
+                    pending = order
+            elif order:
+                value = order * close[t]
+                fee = abs(value) * commission
+                cash -= value + fee
+                position += order
+                trades[t, j], fees[t, j] = order, fee
+
+            if not math.isnan(close[t]):
+                mark = close[t]
+            equity[t, j] = cash + position * mark
+    return trades, fees, equity
+
+
+def main():
+    parser = argparse.ArgumentParser(description='向量化回测基准')
+    parser.add_argument('--bars', type=int, default=500, help='K线数量')
+    parser.add_argument('--symbols', type=int, default=200, help='品种数量')
+    parser.add_argument('--fill-price', choices=['open', 'close'], default='open', help='成交价模式')
+    parser.add_argument('--repeat', type=int, default=5, help='向量化引擎重复次数(取最快一次)')
+    args = parser.parse_args()
+
+    panel = make_panel(args.bars, args.symbols)
+    engine = VectorBacktestEngine(fill_price=args.fill_price)
+    strategy = MyVectorStrategy()
+
+    start = time.perf_counter()
+    trades, fees, equity = reference_backtest(panel, strategy.size, engine.initial_cash, engine.commission,
+                                              engine.volume_unit, args.fill_price)
+    reference_elapsed = time.perf_counter() - start
+
+    vector_elapsed = math.inf
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = engine.run(strategy, panel)
+        vector_elapsed = min(vector_elapsed, time.perf_counter() - start)
+
+    mismatched = not (np.array_equal(result.trades, trades) and np.allclose(result.commission, fees, atol=1e-9)
+                      and np.allclose(result.equity, equity, rtol=0, atol=1e-6))
+    if mismatched:
+        print("向量化结果与逐K线参考实现不一致")
+        return 1
+
+    print(f"面板: {args.bars} 根K线 × {args.symbols} 个品种  成交: {np.count_nonzero(trades):,} 笔")
+    print(f"逐K线参考实现  {reference_elapsed * 1e3:10.2f} ms")
+    print(f"向量化引擎      {vector_elapsed * 1e3:10.2f} ms")
+    print(f"加速比          {reference_elapsed / vector_elapsed:10.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+冷启动导入耗时检查
+
+以 -X importtime 运行 main.py --help，统计导入总耗时并检查
+回测/实盘等重型依赖没有被提前导入。超出预算时返回非零退出码，可接入CI。
+
+用法:
+  python benchmarks/check_import_time.py
+  python benchmarks/check_import_time.py --budget-ms 80 --runs 5
+"""
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_BUDGET_MS = 100  # 导入总耗时预算(毫秒)
+
+# --help 路径上不允许出现的模块(及其子模块)
+FORBIDDEN_MODULES = (
+    'trading_engine', 'strategies', 'libs.common_imports', 'libs.output', 'libs.core',
+    'libs.backtest', 'libs.data', 'numpy', 'pandas', 'yaml', 'terminaltables3',
+    'simple_chalk', 'xtquant', 'backtrader',
+)
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)')
+
+
+def measure(args_list):
+    """运行一次并返回 (顶层导入累计耗时微秒, 已导入模块列表)"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', str(ROOT / 'main.py')] + args_list,
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    total_us = 0
+    modules = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, module = int(match.group(2)), match.group(3), match.group(4)
+        modules.append(module)
+        if len(indent) <= 1:  # 顶层导入(嵌套导入已计入其父模块的累计耗时)
+            total_us += cumulative
+    return total_us, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='冷启动导入耗时检查')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help='导入耗时预算(毫秒)')
+    parser.add_argument('--runs', type=int, default=5, help='运行次数(取最小值以降低抖动)')
+    args = parser.parse_args()
+
+    timings = []
+    modules = []
+    for _ in range(max(1, args.runs)):
+        total_us, modules = measure(['--help'])
+        timings.append(total_us)
+    best_ms = min(timings) / 1000
+
+    leaked = sorted({m for m in modules
+                     if any(m == f or m.startswith(f + '.') for f in FORBIDDEN_MODULES)})
+    print(f"main.py --help 导入耗时: {best_ms:.1f} ms (预算 {args.budget_ms:.0f} ms)，共导入 {len(modules)} 个模块")
+
+    failed = False
+    if leaked:
+        print(f"不应在启动时导入的模块: {', '.join(leaked)}")
+        failed = True
+    if best_ms > args.budget_ms:
+        print("导入耗时超出预算")
+        failed = True
+    print('FAIL' if failed else 'OK')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
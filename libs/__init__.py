@@ -1,13 +1,63 @@
 # 统一导出常用模块
-from .common_imports import *
-from .config import ConfigManager
-from .core.context import Context
-from .core.trader import Trader
-from .errors.error_handler import ErrorManager
+# OPTIMIZED: 使用 PEP 562 模块级 __getattr__ 延迟加载，
+# "import libs" 或只使用某个子模块时不再连带导入日志、模型、输出管理器等全部依赖
+import importlib
+import importlib.util
+
+# 导出名称 -> (所在模块, 模块内属性名；None表示导出模块本身)
+_LAZY_EXPORTS = {
+    'ConfigManager': ('libs.config', 'ConfigManager'),
+    'Context': ('libs.core.context', 'Context'),
+    'Trader': ('libs.core.trader', 'Trader'),
+    'ErrorManager': ('libs.errors.error_handler', 'ErrorManager'),
+    'output_manager': ('libs.output.output_manager', 'output_manager'),
+    'OutputManager': ('libs.output.output_manager', 'OutputManager'),
+    'logger': ('libs.output.logger', None),
+    'Order': ('libs.core.models', 'Order'),
+    'Trade': ('libs.core.models', 'Trade'),
+    'Position': ('libs.core.models', 'Position'),
+    'AccountAsset': ('libs.core.models', 'AccountAsset'),
+    'OrderStatus': ('libs.config.consts', 'OrderStatus'),
+    'TradeDirection': ('libs.config.consts', 'TradeDirection'),
+    'PriceType': ('libs.config.consts', 'PriceType'),
+    'configure_logging': ('libs.output.log_pipeline', 'configure'),
+    'get_app_logger': ('libs.output.log_pipeline', 'get_app_logger'),
+    'get_trade_logger': ('libs.output.log_pipeline', 'get_trade_logger'),
+    'get_error_logger': ('libs.output.log_pipeline', 'get_error_logger'),
+}
 
 __all__ = [
     'ConfigManager', 'Context', 'Trader', 'ErrorManager',
     'output_manager', 'OutputManager', 'logger',
     'Order', 'Trade', 'Position', 'AccountAsset',
-    'OrderStatus', 'TradeDirection', 'PriceType'
-]
\ No newline at end of file
+    'OrderStatus', 'TradeDirection', 'PriceType',
+    'configure_logging', 'get_app_logger', 'get_trade_logger', 'get_error_logger',
+]
+
+
+def __getattr__(name):
+    """首次访问导出名称时才导入对应模块，结果缓存到模块命名空间"""
+    if name.startswith('__'):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    target = _LAZY_EXPORTS.get(name)
+    if target is not None:
+        module = importlib.import_module(target[0])
+        value = module if target[1] is None else getattr(module, target[1])
+    else:
+        # 子模块交给导入系统处理，避免 "from libs import xxx" 连带加载 common_imports
+        if importlib.util.find_spec(f'{__name__}.{name}') is not None:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+        # 兼容旧代码: 原先通过 common_imports 星号导入的其余名称
+        common_imports = importlib.import_module('libs.common_imports')
+        try:
+            value = getattr(common_imports, name)
+        except AttributeError:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
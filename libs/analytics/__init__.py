@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+绩效分析模块
+包含基于权益曲线的批量向量化绩效指标及实盘增量统计
+"""
+
+from .performance import (
+    PerformanceMetrics, StreamingPerformance, METRIC_NAMES, LOWER_IS_BETTER,
+    compute_metrics, period_risk_free
+)
+
+__all__ = [
+    'PerformanceMetrics', 'StreamingPerformance', 'METRIC_NAMES', 'LOWER_IS_BETTER',
+    'compute_metrics', 'period_risk_free',
+]
@@ -0,0 +1,267 @@
+"""
+绩效分析 - 基于权益曲线的向量化绩效指标
+
+compute_metrics() 接收形状为 (时间, 曲线数) 的权益矩阵，对成千上万条曲线
+(参数扫描的每组参数、面板中的每只股票)一次性计算全部指标，每个指标只需
+沿时间轴的一次 NumPy 运算，共用收益率、回撤等中间结果。
+StreamingPerformance 为实盘使用的增量版本，每根K线 O(1) 更新，公式与批量版本一致。
+
+约定(与 empyrical 一致):
+    - 收益率为相邻两期权益的简单收益率，波动率使用样本标准差(ddof=1)
+    - 无风险利率按 (1 + 年化利率) ** (1 / 年化期数) - 1 折算为每期利率
+    - 标准差为0等无法计算的比率记为0
+"""
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+
+from libs.config.consts import RISK_FREE_RATE, TRADING_DAYS_PER_YEAR
+
+METRIC_NAMES = (
+    'total_return', 'annual_return', 'annual_volatility', 'sharpe', 'sortino',
+    'max_drawdown', 'max_drawdown_duration', 'calmar', 'win_rate', 'turnover', 'commission_drag',
+)
+# 越小越好的指标(排序/选参时升序)
+LOWER_IS_BETTER = frozenset({
+    'annual_volatility', 'max_drawdown', 'max_drawdown_duration', 'turnover', 'commission_drag',
+})
+
+
+def period_risk_free(risk_free_rate: float, periods_per_year: int) -> float:
+    """年化无风险利率折算为每期利率"""
+    return (1.0 + risk_free_rate) ** (1.0 / periods_per_year) - 1.0
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """逐元素相除，分母不为正时结果为0"""
+    numerator, denominator = np.broadcast_arrays(np.asarray(numerator, dtype=np.float64),
+                                                 np.asarray(denominator, dtype=np.float64))
+    out = np.zeros(numerator.shape)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def _as_2d(values: np.ndarray) -> np.ndarray:
+    """一维数组视为单条曲线，NaN视为0"""
+    values = np.nan_to_num(np.asarray(values, dtype=np.float64))
+    return values.reshape(-1, 1) if values.ndim == 1 else values
+
+
+class PerformanceMetrics(NamedTuple):
+    """绩效指标，每个字段为与曲线一一对应的数组"""
+    total_return: np.ndarray  # 总收益率
+    annual_return: np.ndarray  # 年化收益率(复合)
+    annual_volatility: np.ndarray  # 年化波动率
+    sharpe: np.ndarray  # 夏普比率
+    sortino: np.ndarray  # 索提诺比率
+    max_drawdown: np.ndarray  # 最大回撤(正数)
+    max_drawdown_duration: np.ndarray  # 最长水下时间(K线根数)
+    calmar: np.ndarray  # 卡玛比率 = 年化收益率 / 最大回撤
+    win_rate: np.ndarray  # 盈利期数 / 权益有变化的期数
+    turnover: np.ndarray  # 年化换手率(单边成交金额 / 平均权益)
+    commission_drag: np.ndarray  # 手续费年化拖累(手续费 / 平均权益)
+
+    def row(self, i: int = 0) -> Dict[str, float]:
+        """第 i 条曲线的指标字典"""
+        return {name: float(getattr(self, name)[i]) for name in METRIC_NAMES}
+
+
+# ==================== 批量计算 ====================
+def compute_metrics(equity: np.ndarray, traded_value: Optional[np.ndarray] = None,
+                    commission: Optional[np.ndarray] = None,
+                    periods_per_year: int = TRADING_DAYS_PER_YEAR,
+                    risk_free_rate: float = RISK_FREE_RATE) -> PerformanceMetrics:
+    """批量计算多条权益曲线的绩效指标
+
+    Args:
+        equity: 权益，形状 (时间, 曲线数)，一维数组视为一条曲线
+        traded_value: 每期成交金额(买卖双边绝对值之和)，形状同 equity，None表示不计算换手率
+        commission: 每期手续费，形状同 equity，None表示不计算手续费拖累
+        periods_per_year: 每年期数(日线252，分钟线按每日K线数相乘)
+        risk_free_rate: 年化无风险利率
+
+    Returns:
+        PerformanceMetrics: 各字段形状为 (曲线数,)
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    if equity.ndim == 1:
+        equity = equity.reshape(-1, 1)
+    n_bars, n_curves = equity.shape
+    zeros = np.zeros(n_curves)
+    if n_bars < 2:
+        return PerformanceMetrics(*([zeros] * len(METRIC_NAMES)))
+    n_periods = n_bars - 1
+    years = n_periods / periods_per_year
+
+    # 收益率(前一期权益不为正时记为0)
+    prev = equity[:-1]
+    returns = _ratio(equity[1:] - prev, prev)
+    excess = returns - period_risk_free(risk_free_rate, periods_per_year)
+
+    initial = equity[0]
+    final = equity[-1]
+    total_return = _ratio(final - initial, initial)
+    growth = _ratio(final, initial)
+    annual_return = np.full(n_curves, -1.0)  # 权益归零记为-100%
+    grown = growth > 0
+    annual_return[grown] = growth[grown] ** (1.0 / years) - 1.0
+
+    scale = np.sqrt(periods_per_year)
+    if n_periods > 1:
+        volatility = returns.std(axis=0, ddof=1)
+        excess_std = excess.std(axis=0, ddof=1)
+    else:
+        volatility = excess_std = zeros
+    excess_mean = excess.mean(axis=0)
+    downside = np.sqrt(np.mean(np.square(np.minimum(excess, 0.0)), axis=0))
+
+    # 回撤: 水下时长 = 当前行号 - 最近一次创新高的行号
+    peak = np.maximum.accumulate(equity, axis=0)
+    drawdown = 1.0 - _ratio(equity, peak)
+    drawdown[peak <= 0] = 0.0
+    max_drawdown = drawdown.max(axis=0)
+    rows = np.arange(n_bars).reshape(-1, 1)
+    last_high = np.where(drawdown <= 0, rows, 0)
+    np.maximum.accumulate(last_high, axis=0, out=last_high)
+    max_duration = (rows - last_high).max(axis=0).astype(np.float64)
+
+    nonzero = np.count_nonzero(returns, axis=0)
+    mean_equity = equity.mean(axis=0)
+    annualize = periods_per_year / n_bars
+    turnover = zeros if traded_value is None else \
+        _ratio(np.abs(_as_2d(traded_value)).sum(axis=0) / 2.0, mean_equity) * annualize
+    drag = zeros if commission is None else \
+        _ratio(_as_2d(commission).sum(axis=0), mean_equity) * annualize
+
+    return PerformanceMetrics(
+        total_return=total_return,
+        annual_return=annual_return,
+        annual_volatility=volatility * scale,
+        sharpe=_ratio(excess_mean, excess_std) * scale,
+        sortino=_ratio(excess_mean, downside) * scale,
+        max_drawdown=max_drawdown,
+        max_drawdown_duration=max_duration,
+        calmar=_ratio(annual_return, max_drawdown),
+        win_rate=_ratio(np.count_nonzero(returns > 0, axis=0), nonzero),
+        turnover=turnover,
+        commission_drag=drag,
+    )
+
+
+# ==================== 增量计算 ====================
+class StreamingPerformance:
+    """单条权益曲线的增量绩效统计(实盘逐K线更新)
+
+    使用示例:
+        perf = StreamingPerformance()
+        for bar in bars:
+            perf.update(account_equity, traded_value, commission)
+        perf.metrics()
+    """
+
+    __slots__ = ('periods_per_year', 'risk_free', '_bars', '_initial', '_last', '_n', '_mean', '_m2',
+                 '_return_m2', '_return_mean', '_downside_sq', '_wins', '_nonzero', '_peak',
+                 '_max_drawdown', '_last_high', '_max_duration', '_equity_sum', '_traded', '_commission')
+
+    def __init__(self, periods_per_year: int = TRADING_DAYS_PER_YEAR,
+                 risk_free_rate: float = RISK_FREE_RATE):
+        self.periods_per_year = periods_per_year
+        self.risk_free = period_risk_free(risk_free_rate, periods_per_year)
+        self.reset()
+
+    def reset(self):
+        """清空统计"""
+        self._bars = 0
+        self._initial = self._last = 0.0
+        self._n = 0  # 收益率期数
+        self._mean = self._m2 = 0.0  # 超额收益的均值与离差平方和(Welford)
+        self._return_mean = self._return_m2 = 0.0  # 收益率的均值与离差平方和
+        self._downside_sq = 0.0
+        self._wins = self._nonzero = 0
+        self._peak = float('-inf')
+        self._max_drawdown = 0.0
+        self._last_high = 0
+        self._max_duration = 0
+        self._equity_sum = self._traded = self._commission = 0.0
+
+    def update(self, equity: float, traded_value: float = 0.0, commission: float = 0.0):
+        """追加一期权益
+
+        Args:
+            equity: 本期期末权益
+            traded_value: 本期成交金额(买卖双边绝对值之和)
+            commission: 本期手续费
+        """
+        if self._bars:
+            prev = self._last
+            ret = (equity - prev) / prev if prev > 0 else 0.0
+            self._n += 1
+            n = self._n
+            delta = ret - self._return_mean
+            self._return_mean += delta / n
+            self._return_m2 += delta * (ret - self._return_mean)
+            excess = ret - self.risk_free
+            delta = excess - self._mean
+            self._mean += delta / n
+            self._m2 += delta * (excess - self._mean)
+            if excess < 0:
+                self._downside_sq += excess * excess
+            if ret != 0:
+                self._nonzero += 1
+                if ret > 0:
+                    self._wins += 1
+        else:
+            self._initial = equity
+        if equity >= self._peak:
+            self._peak = equity
+            self._last_high = self._bars
+        elif self._peak > 0:
+            drawdown = 1.0 - equity / self._peak
+            if drawdown > self._max_drawdown:
+                self._max_drawdown = drawdown
+            duration = self._bars - self._last_high
+            if duration > self._max_duration:
+                self._max_duration = duration
+        self._last = equity
+        self._bars += 1
+        self._equity_sum += equity
+        self._traded += abs(traded_value)
+        self._commission += commission
+
+    @property
+    def bars(self) -> int:
+        return self._bars
+
+    @property
+    def drawdown(self) -> float:
+        """当前回撤"""
+        return 1.0 - self._last / self._peak if self._peak > 0 else 0.0
+
+    def metrics(self) -> Dict[str, float]:
+        """当前的全部指标(与 compute_metrics 对同一曲线的结果一致)"""
+        result = dict.fromkeys(METRIC_NAMES, 0.0)
+        n = self._n
+        if n < 1:
+            return result
+        ppy = self.periods_per_year
+        scale = ppy ** 0.5
+        growth = self._last / self._initial if self._initial > 0 else 0.0
+        annual_return = growth ** (ppy / n) - 1.0 if growth > 0 else -1.0
+        excess_std = (self._m2 / (n - 1)) ** 0.5 if n > 1 else 0.0
+        downside = (self._downside_sq / n) ** 0.5
+        mean_equity = self._equity_sum / self._bars
+        annualize = ppy / self._bars
+        result.update(
+            total_return=growth - 1.0 if self._initial > 0 else 0.0,
+            annual_return=annual_return,
+            annual_volatility=(self._return_m2 / (n - 1)) ** 0.5 * scale if n > 1 else 0.0,
+            sharpe=self._mean / excess_std * scale if excess_std > 0 else 0.0,
+            sortino=self._mean / downside * scale if downside > 0 else 0.0,
+            max_drawdown=self._max_drawdown,
+            max_drawdown_duration=float(self._max_duration),
+            calmar=annual_return / self._max_drawdown if self._max_drawdown > 0 else 0.0,
+            win_rate=self._wins / self._nonzero if self._nonzero else 0.0,
+            turnover=self._traded / 2.0 / mean_equity * annualize if mean_equity > 0 else 0.0,
+            commission_drag=self._commission / mean_equity * annualize if mean_equity > 0 else 0.0,
+        )
+        return result
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回测模块
+包含向量化批量回测引擎及相关工具
+"""
+
+from .vector_engine import (
+    VectorBacktestEngine, VectorBacktestResult, VectorStrategy,
+    shift, ffill, rolling_mean, latch
+)
+from .strategies import SmaCrossStrategy
+from .fill_simulator import (
+    AShareFillSimulator, FillResult, SlippageModel, FixedSlippage, PercentSlippage,
+    VolumeImpactSlippage, make_slippage, prev_day_close
+)
+from .sweep import (
+    SweepRunner, Uniform, parse_param_spec, grid_search, random_search,
+    load_results, rank_results, evaluate_result
+)
+from .walk_forward import (
+    Fold, FoldResult, WalkForwardReport, WalkForwardRunner, make_folds, evaluate_folds
+)
+
+__all__ = [
+    'VectorBacktestEngine', 'VectorBacktestResult', 'VectorStrategy',
+    'shift', 'ffill', 'rolling_mean', 'latch',
+    'SmaCrossStrategy',
+    'AShareFillSimulator', 'FillResult', 'SlippageModel', 'FixedSlippage', 'PercentSlippage',
+    'VolumeImpactSlippage', 'make_slippage', 'prev_day_close',
+    'SweepRunner', 'Uniform', 'parse_param_spec', 'grid_search', 'random_search',
+    'load_results', 'rank_results', 'evaluate_result',
+    'Fold', 'FoldResult', 'WalkForwardReport', 'WalkForwardRunner', 'make_folds', 'evaluate_folds',
+]
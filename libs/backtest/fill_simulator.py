@@ -0,0 +1,250 @@
+"""
+A股成交模拟器 - 涨跌停、整手、成交量占比与T+1约束下的逐K线撮合
+
+每根K线对全部品种一次性撮合(数组运算)，供向量化回测引擎逐K线调用:
+    - 涨跌停: 按板块(主板/科创板/创业板/北交所/ST)的涨跌幅计算价格带，
+      参考价封涨停时买单无法成交，封跌停时卖单无法成交，滑点后的成交价不超出价格带
+    - 整手: 买入按 volume_unit 向下取整；卖出同样取整，清仓时允许卖出零股
+    - 成交量占比: 单根K线成交不超过该K线成交量 × participation，超出部分为部分成交
+    - T+1: 当日买入的股票当日不可卖出，start_day() 后转为可卖
+    - 滑点: FixedSlippage / PercentSlippage / VolumeImpactSlippage
+
+成交量(volume)与持仓、订单数量的单位均为股。
+"""
+from typing import Dict, NamedTuple, Optional, Sequence, Type
+
+import numpy as np
+
+from libs.backtest.vector_engine import ffill
+from libs.config.consts import DEFAULT_VOLUME_UNIT, get_price_limit_ratio
+from libs.risk.risk_engine import price_limits, round_price
+
+DEFAULT_PARTICIPATION = 0.1  # 默认单根K线最大成交占比
+_DAY_NS = 86400 * 10 ** 9
+
+
+# ==================== 滑点模型 ====================
+class SlippageModel:
+    """滑点模型基类: 返回成交价(买入上浮、卖出下浮)"""
+
+    def apply(self, price: np.ndarray, signs: np.ndarray, volume: np.ndarray,
+              bar_volume: np.ndarray) -> np.ndarray:
+        """计算含滑点的成交价
+
+        Args:
+            price: 参考价
+            signs: 买入+1，卖出-1，无订单0
+            volume: 成交数量(股)
+            bar_volume: K线成交量(股)
+        """
+        return price
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{k}={v}' for k, v in vars(self).items())})"
+
+
+class FixedSlippage(SlippageModel):
+    """固定价差滑点(元)，如 0.01 表示每股偏离一个最小价位"""
+
+    def __init__(self, value: float = 0.01):
+        self.value = float(value)
+
+    def apply(self, price, signs, volume, bar_volume):
+        return price + signs * self.value
+
+
+class PercentSlippage(SlippageModel):
+    """按参考价比例的滑点，value=0.001 表示千分之一"""
+
+    def __init__(self, value: float = 0.001):
+        self.value = float(value)
+
+    def apply(self, price, signs, volume, bar_volume):
+        return price * (1.0 + signs * self.value)
+
+
+class VolumeImpactSlippage(SlippageModel):
+    """平方根冲击模型: 偏离比例 = value × sqrt(成交数量 / K线成交量)"""
+
+    def __init__(self, value: float = 0.1):
+        self.value = float(value)
+
+    def apply(self, price, signs, volume, bar_volume):
+        share = np.zeros(len(price))
+        np.divide(volume, bar_volume, out=share, where=bar_volume > 0)
+        return price * (1.0 + signs * self.value * np.sqrt(share))
+
+
+SLIPPAGE_MODELS: Dict[str, Type[SlippageModel]] = {
+    'none': SlippageModel,
+    'fixed': FixedSlippage,
+    'percent': PercentSlippage,
+    'impact': VolumeImpactSlippage,
+}
+
+
+def make_slippage(name: str, value: Optional[float] = None) -> SlippageModel:
+    """按名称创建滑点模型(对应配置 backtest.fill.slippage)"""
+    if name not in SLIPPAGE_MODELS:
+        raise ValueError(f"不支持的滑点模型: {name}，可选: {', '.join(SLIPPAGE_MODELS)}")
+    cls = SLIPPAGE_MODELS[name]
+    if cls is SlippageModel or value is None:
+        return cls()
+    return cls(value)
+
+
+# ==================== 撮合 ====================
+class FillResult(NamedTuple):
+    """一根K线的撮合结果，各数组与品种一一对应"""
+    volume: np.ndarray  # 成交数量(正为买入，负为卖出)
+    price: np.ndarray  # 成交价(无成交为NaN)
+    blocked: np.ndarray  # 因涨跌停无法成交
+    capped: np.ndarray  # 因成交量占比或T+1限制部分成交
+
+
+def prev_day_close(ts: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """每根K线对应的昨收价(前一交易日最后一根K线的收盘价，停牌沿用更早的收盘价)
+
+    Args:
+        ts: 时间戳(纳秒，本地时间)，形状 (时间,)
+        close: 收盘价，形状 (时间, 品种)
+
+    Returns:
+        np.ndarray: 形状同 close，首个交易日为NaN
+    """
+    close = ffill(np.asarray(close, dtype=np.float64))
+    day = np.asarray(ts, dtype=np.int64) // _DAY_NS
+    first = np.flatnonzero(np.diff(day, prepend=day[:1] - 1))  # 每个交易日的第一根K线
+    last_of_prev = np.repeat(first - 1, np.diff(np.append(first, len(day))))
+    result = close[np.maximum(last_of_prev, 0)]
+    result[last_of_prev < 0] = np.nan
+    return result
+
+
+class AShareFillSimulator:
+    """A股成交模拟器
+
+    使用示例:
+        sim = AShareFillSimulator(participation=0.05, slippage=PercentSlippage(0.0005))
+        sim.reset(symbols)
+        for t in range(n_bars):
+            if new_day:
+                sim.start_day(prev_close[t])
+            fills = sim.execute(orders, open_[t], volume[t])
+    """
+
+    def __init__(self, participation: float = DEFAULT_PARTICIPATION,
+                 slippage: Optional[SlippageModel] = None,
+                 volume_unit: int = DEFAULT_VOLUME_UNIT, t_plus_one: bool = True):
+        """初始化模拟器
+
+        Args:
+            participation: 单根K线成交量占比上限，0表示不限制
+            slippage: 滑点模型，默认无滑点
+            volume_unit: 最小交易单位(股)
+            t_plus_one: 是否启用T+1卖出限制
+        """
+        if participation < 0:
+            raise ValueError(f"成交量占比不能为负数: {participation}")
+        self.participation = float(participation)
+        self.slippage = slippage or SlippageModel()
+        self.volume_unit = int(volume_unit)
+        self.t_plus_one = t_plus_one
+        self.reset([])
+
+    @classmethod
+    def from_config(cls, fill_config, **kwargs) -> 'AShareFillSimulator':
+        """根据 FillConfig 创建模拟器"""
+        return cls(participation=fill_config.participation,
+                   slippage=make_slippage(fill_config.slippage, fill_config.slippage_value),
+                   t_plus_one=fill_config.t_plus_one, **kwargs)
+
+    def reset(self, symbols: Sequence[str], st: Optional[Sequence[bool]] = None):
+        """重置为空仓并绑定品种(每次回测开始时调用)
+
+        Args:
+            symbols: 品种列表
+            st: 是否为ST股票
+        """
+        self.symbols = list(symbols)
+        n = len(self.symbols)
+        st = st if st is not None else [False] * n
+        self.limit_ratio = np.array([get_price_limit_ratio(s, bool(flag))
+                                     for s, flag in zip(self.symbols, st)], dtype=np.float64)
+        self.limit_down = np.full(n, -np.inf)
+        self.limit_up = np.full(n, np.inf)
+        self.position = np.zeros(n, dtype=np.int64)
+        self.bought_today = np.zeros(n, dtype=np.int64)
+        self.stats = {'blocked_buys': 0, 'blocked_sells': 0, 'capped': 0}
+
+    @property
+    def sellable(self) -> np.ndarray:
+        """当前可卖数量"""
+        if self.t_plus_one:
+            return self.position - self.bought_today
+        return self.position.copy()
+
+    def start_day(self, prev_close: Optional[np.ndarray] = None):
+        """新交易日: 前一日买入转为可卖，按昨收价更新涨跌停价格带(NaN表示无价格带)"""
+        self.bought_today[:] = 0
+        if prev_close is not None:
+            prev_close = np.asarray(prev_close, dtype=np.float64)
+            known = ~np.isnan(prev_close)
+            self.limit_down[:] = -np.inf
+            self.limit_up[:] = np.inf
+            self.limit_down[known], self.limit_up[known] = price_limits(
+                prev_close[known], self.limit_ratio[known])
+
+    def execute(self, orders: np.ndarray, price: np.ndarray, bar_volume: np.ndarray) -> FillResult:
+        """撮合一根K线上的全部订单
+
+        Args:
+            orders: 各品种的委托数量(正为买入，负为卖出，0为无委托)
+            price: 参考成交价(开盘价或收盘价，NaN表示停牌)
+            bar_volume: K线成交量(股)，为0或NaN时视为停牌
+
+        Returns:
+            FillResult: 撮合结果(持仓已更新)
+        """
+        orders = np.asarray(orders, dtype=np.int64)
+        price = np.asarray(price, dtype=np.float64)
+        bar_volume = np.nan_to_num(np.asarray(bar_volume, dtype=np.float64))
+        unit = self.volume_unit
+        signs = np.sign(orders)
+        buy = signs > 0
+        sell = signs < 0
+        requested = np.abs(orders)
+
+        # 停牌、封涨停(买)、封跌停(卖)
+        halted = np.isnan(price) | (bar_volume <= 0)
+        blocked = (buy & (price >= self.limit_up)) | (sell & (price <= self.limit_down))
+
+        # 可成交数量: 卖出不超过可卖数量，单根K线不超过成交量占比
+        allowed = np.where(sell, np.minimum(requested, np.maximum(self.sellable, 0)), requested)
+        if self.participation > 0:
+            allowed = np.minimum(allowed, (bar_volume * self.participation).astype(np.int64))
+        # 整手取整，清仓卖出允许零股
+        lots = allowed - allowed % unit
+        close_out = sell & (allowed == self.position) & (allowed == requested)
+        volume = np.where(close_out, allowed, lots)
+        volume[halted | blocked] = 0
+        capped = (volume < requested) & ~(halted | blocked)
+
+        filled = volume > 0
+        fill_price = np.full(len(price), np.nan)
+        if filled.any():
+            raw = self.slippage.apply(price[filled], signs[filled], volume[filled], bar_volume[filled])
+            fill_price[filled] = np.clip(round_price(raw), self.limit_down[filled], self.limit_up[filled])
+
+        signed = volume * signs
+        self.position += signed
+        self.bought_today += np.where(buy, volume, 0)
+        stats = self.stats
+        stats['blocked_buys'] += int(np.count_nonzero(blocked & buy))
+        stats['blocked_sells'] += int(np.count_nonzero(blocked & sell))
+        stats['capped'] += int(np.count_nonzero(capped))
+        return FillResult(signed, fill_price, blocked, capped)
+
+    def __repr__(self) -> str:
+        return (f"AShareFillSimulator(participation={self.participation}, slippage={self.slippage!r}, "
+                f"t_plus_one={self.t_plus_one})")
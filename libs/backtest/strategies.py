@@ -0,0 +1,35 @@
+"""
+内置向量化策略
+"""
+from typing import Tuple
+
+import numpy as np
+
+from libs.backtest.vector_engine import VectorStrategy, rolling_mean
+
+
+class SmaCrossStrategy(VectorStrategy):
+    """双均线交叉策略
+
+    快线高于慢线超过 signal_threshold 时入场，低于慢线超过阈值时离场，
+    参数与配置模板 strategy.parameters 一致。
+    """
+
+    params = {
+        'fast_period': 10,  # 快速均线周期
+        'slow_period': 30,  # 慢速均线周期
+        'signal_threshold': 0.02,  # 信号阈值
+    }
+
+    def signals(self, data) -> Tuple[np.ndarray, np.ndarray]:
+        fast_period = int(self.p['fast_period'])
+        slow_period = int(self.p['slow_period'])
+        threshold = float(self.p['signal_threshold'])
+        if fast_period >= slow_period:
+            # 无效参数组合: 不产生任何信号
+            empty = np.zeros(data.close.shape, dtype=bool)
+            return empty, empty
+
+        fast = rolling_mean(data.close, fast_period)
+        slow = rolling_mean(data.close, slow_period)
+        return fast > slow * (1 + threshold), fast < slow * (1 - threshold)
@@ -0,0 +1,294 @@
+"""
+参数扫描 - 基于进程池的策略参数网格/随机搜索
+
+行情面板只在主进程加载一次并落地为 .npy 列文件，工作进程通过内存映射只读共享，
+任务之间只传递参数字典，不序列化行情数据。每组参数的结果完成即追加写入
+JSONL结果文件，中断后重新运行会跳过已完成的参数组合。
+"""
+import itertools
+import json
+import os
+import random
+import shutil
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Type, Union
+
+import numpy as np
+
+from libs.analytics.performance import METRIC_NAMES, compute_metrics
+from libs.backtest.vector_engine import VectorBacktestEngine, VectorBacktestResult, VectorStrategy
+from libs.data.bar_store import BarPanel, open_panel, save_panel
+
+DEFAULT_RANK_METRIC = 'sharpe'  # 默认排序指标
+DEFAULT_BATCH_SIZE = 4  # 每个任务包含的参数组数
+
+
+class Uniform(NamedTuple):
+    """连续均匀分布取值区间(仅用于随机搜索)"""
+    low: float
+    high: float
+
+
+ParamSpace = Dict[str, Union[List[Any], Uniform]]
+
+
+# ==================== 参数空间 ====================
+def _parse_number(text: str) -> Union[int, float]:
+    """解析数字，整数优先"""
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def parse_param_spec(specs: Iterable[str]) -> ParamSpace:
+    """解析命令行参数空间描述
+
+    支持三种写法:
+        fast_period=5,10,20         枚举取值
+        fast_period=5:30:5          闭区间等步长 (起始:结束:步长)
+        signal_threshold=0.0~0.05   连续区间(仅随机搜索，两端均为整数时按整数采样)
+
+    Args:
+        specs: 形如 "name=spec" 的字符串列表
+
+    Returns:
+        ParamSpace: 参数名到取值列表或 Uniform 的映射
+    """
+    space: ParamSpace = {}
+    for spec in specs:
+        if '=' not in spec:
+            raise ValueError(f"参数格式错误，应为 name=values: {spec}")
+        name, values = (part.strip() for part in spec.split('=', 1))
+        if '~' in values:
+            low, high = (_parse_number(v) for v in values.split('~', 1))
+            space[name] = Uniform(low, high)
+        elif ':' in values:
+            parts = [_parse_number(v) for v in values.split(':')]
+            if len(parts) != 3 or parts[2] <= 0:
+                raise ValueError(f"区间格式错误，应为 起始:结束:步长: {spec}")
+            start, stop, step = parts
+            count = int(np.floor((stop - start) / step + 1e-9)) + 1
+            grid = [start + i * step for i in range(max(count, 0))]
+            if not all(isinstance(v, int) for v in parts):
+                grid = [round(v, 10) for v in grid]
+            space[name] = grid
+        else:
+            space[name] = [_parse_number(v) for v in values.split(',') if v.strip()]
+    return space
+
+
+def grid_search(space: ParamSpace) -> List[Dict[str, Any]]:
+    """生成参数网格的全部组合"""
+    for name, values in space.items():
+        if isinstance(values, Uniform):
+            raise ValueError(f"网格搜索不支持连续区间参数: {name}")
+    names = list(space)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(space[n] for n in names))]
+
+
+def random_search(space: ParamSpace, n_samples: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """在参数空间内随机采样(结果去重，固定seed可复现)"""
+    rng = random.Random(seed)
+    samples: List[Dict[str, Any]] = []
+    seen = set()
+    max_attempts = n_samples * 20
+    attempts = 0
+    while len(samples) < n_samples and attempts < max_attempts:
+        attempts += 1
+        params = {}
+        for name, values in space.items():
+            if isinstance(values, Uniform):
+                if isinstance(values.low, int) and isinstance(values.high, int):
+                    params[name] = rng.randint(values.low, values.high)
+                else:
+                    params[name] = rng.uniform(values.low, values.high)
+            else:
+                params[name] = rng.choice(values)
+        key = params_key(params)
+        if key not in seen:
+            seen.add(key)
+            samples.append(params)
+    return samples
+
+
+def params_key(params: Dict[str, Any]) -> str:
+    """参数组合的唯一键(用于断点续跑去重)"""
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+# ==================== 结果评估 ====================
+def evaluate_result(result: VectorBacktestResult) -> Dict[str, float]:
+    """将回测结果汇总为排序指标
+
+    组合指标基于全部品种等权合成的权益曲线计算，见 libs.analytics.compute_metrics。
+    每个品种的账户大部分资金为现金，扣除无风险利率会让夏普比率被现金部分主导，
+    因此排序指标不扣除无风险利率。
+    """
+    total_return = result.total_return
+    metrics = {
+        'mean_return': float(np.mean(total_return)) if len(total_return) else 0.0,
+        'median_return': float(np.median(total_return)) if len(total_return) else 0.0,
+        'win_ratio': float(np.mean(total_return > 0)) if len(total_return) else 0.0,
+        'avg_trades': float(np.mean(result.trade_count)) if len(total_return) else 0.0,
+    }
+    if result.equity.shape[1] > 0:
+        traded_value = np.abs(np.where(result.trades != 0, result.trades * result.fill_price, 0.0))
+        portfolio = compute_metrics(result.equity.mean(axis=1), traded_value.mean(axis=1),
+                                    result.commission.mean(axis=1), risk_free_rate=0.0)
+        metrics.update(portfolio.row())
+    else:
+        metrics.update(dict.fromkeys(METRIC_NAMES, 0.0))
+    return metrics
+
+
+# ==================== 结果文件 ====================
+def load_results(path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """读取JSONL结果文件(忽略崩溃时写了一半的行)"""
+    path = Path(path)
+    if not path.exists():
+        return []
+    results = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict) and 'params' in record and 'metrics' in record:
+                results.append(record)
+    return results
+
+
+def rank_results(results: List[Dict[str, Any]], metric: str = DEFAULT_RANK_METRIC,
+                 ascending: bool = False) -> List[Dict[str, Any]]:
+    """按指定指标排序(同一参数组合只保留最后一条)"""
+    latest = {params_key(r['params']): r for r in results}
+    missing = float('inf') if ascending else float('-inf')
+    return sorted(latest.values(), key=lambda r: r['metrics'].get(metric, missing),
+                  reverse=not ascending)
+
+
+# ==================== 工作进程 ====================
+_worker_state: Dict[str, Any] = {}  # 工作进程内的共享只读状态
+
+
+def _init_worker(panel_dir: str, strategy_cls: Type[VectorStrategy], engine_kwargs: Dict[str, Any]):
+    """工作进程初始化: 映射行情面板，创建引擎"""
+    _worker_state['panel'] = open_panel(panel_dir)
+    _worker_state['strategy_cls'] = strategy_cls
+    _worker_state['engine'] = VectorBacktestEngine(**engine_kwargs)
+
+
+def _run_batch(param_batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """在工作进程中执行一批参数组合"""
+    panel = _worker_state['panel']
+    strategy_cls = _worker_state['strategy_cls']
+    engine = _worker_state['engine']
+    records = []
+    for params in param_batch:
+        try:
+            result = engine.run(strategy_cls(**params), panel)
+            records.append({'params': params, 'metrics': evaluate_result(result)})
+        except Exception as e:
+            records.append({'params': params, 'metrics': {}, 'error': str(e)})
+    return records
+
+
+# ==================== 扫描器 ====================
+class SweepRunner:
+    """参数扫描器
+
+    使用示例:
+        runner = SweepRunner(SmaCrossStrategy, panel, engine_kwargs, 'sweep_results.jsonl')
+        ranked = runner.run(grid_search(parse_param_spec(['fast_period=5:20:5'])))
+    """
+
+    def __init__(self, strategy_cls: Type[VectorStrategy], panel: BarPanel,
+                 engine_kwargs: Optional[Dict[str, Any]] = None,
+                 results_path: Union[str, Path] = 'sweep_results.jsonl',
+                 max_workers: Optional[int] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 base_params: Optional[Dict[str, Any]] = None):
+        """初始化扫描器
+
+        Args:
+            strategy_cls: 向量化策略类
+            panel: K线面板
+            engine_kwargs: VectorBacktestEngine 构造参数
+            results_path: JSONL结果文件路径(已存在时断点续跑)
+            max_workers: 进程数，默认为CPU核数
+            batch_size: 每个任务包含的参数组数
+            base_params: 固定参数，被扫描参数覆盖
+        """
+        self.strategy_cls = strategy_cls
+        self.panel = panel
+        self.engine_kwargs = dict(engine_kwargs or {})
+        self.results_path = Path(results_path)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.batch_size = max(1, batch_size)
+        self.base_params = {k: v for k, v in (base_params or {}).items()
+                            if k in strategy_cls.params}
+
+    def pending(self, param_sets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """过滤出尚未完成的参数组合"""
+        done = {params_key(r['params']) for r in load_results(self.results_path)
+                if 'error' not in r}
+        pending = []
+        for params in param_sets:
+            merged = {**self.base_params, **params}
+            key = params_key(merged)
+            if key not in done:
+                done.add(key)
+                pending.append(merged)
+        return pending
+
+    def run(self, param_sets: List[Dict[str, Any]], metric: str = DEFAULT_RANK_METRIC,
+            progress: Optional[Callable[[int, int], None]] = None,
+            ascending: bool = False) -> List[Dict[str, Any]]:
+        """执行扫描并返回按指标排序的全部结果
+
+        Args:
+            param_sets: 参数组合列表
+            metric: 排序指标
+            ascending: 指标越小越好(如 max_drawdown)时为True
+            progress: 进度回调 progress(已完成数, 总数)
+        """
+        todo = self.pending(param_sets)
+        batches = [todo[i:i + self.batch_size] for i in range(0, len(todo), self.batch_size)]
+        if batches:
+            self.results_path.parent.mkdir(parents=True, exist_ok=True)
+            panel_dir = tempfile.mkdtemp(prefix='sweep_panel_')
+            try:
+                save_panel(self.panel, panel_dir)
+                self._execute(batches, panel_dir, len(todo), progress)
+            finally:
+                shutil.rmtree(panel_dir, ignore_errors=True)
+        return rank_results(load_results(self.results_path), metric, ascending)
+
+    def _execute(self, batches: List[List[Dict[str, Any]]], panel_dir: str, total: int,
+                 progress: Optional[Callable[[int, int], None]]):
+        """提交任务并流式写入结果，在途任务数受限以控制内存"""
+        finished = 0
+        max_in_flight = self.max_workers * 2
+        batch_iter = iter(batches)
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                 initargs=(panel_dir, self.strategy_cls, self.engine_kwargs)) as pool, \
+                open(self.results_path, 'a', encoding='utf-8') as out:
+            in_flight = set()
+            for batch in itertools.islice(batch_iter, max_in_flight):
+                in_flight.add(pool.submit(_run_batch, batch))
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    records = future.result()
+                    for record in records:
+                        out.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+                    out.flush()
+                    finished += len(records)
+                    if progress:
+                        progress(finished, total)
+                    batch = next(batch_iter, None)
+                    if batch is not None:
+                        in_flight.add(pool.submit(_run_batch, batch))
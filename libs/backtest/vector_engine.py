@@ -0,0 +1,324 @@
+"""
+向量化批量回测引擎
+
+策略以 NumPy 数组表达式一次性给出整个面板(时间 × 品种)的进出场信号，
+引擎在一次批量计算中得到所有品种的持仓、成交、手续费和权益曲线，
+适合将同一信号扫描数千只股票的场景。
+
+与事件驱动(逐K线回调 next())路径的约定保持一致:
+    - 收盘产生信号，下一根K线开盘价成交(fill_price='open'，与backtrader默认一致)，
+      或当根收盘价成交(fill_price='close'，对应cheat-on-close)
+    - 空仓时才响应买入信号，持仓时才响应卖出信号，卖出即全部平仓
+    - 成交数量按 DEFAULT_VOLUME_UNIT 整手取整，手续费 = 成交金额 × commission
+    - 每个品种视为独立账户，各自以 initial_cash 起始
+    - 指定 fill_simulator 时改为逐K线撮合(各品种仍批量计算)，委托数量为目标持仓与
+      当前持仓之差，未成交部分在后续K线继续委托，见 libs.backtest.fill_simulator
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+
+import numpy as np
+
+from libs.config.consts import DEFAULT_TRADE_SIZE, DEFAULT_VOLUME_UNIT
+from libs.data.bar_store import BarPanel
+
+FILL_PRICE_MODES = ('open', 'close')  # 支持的成交价模式
+
+
+# ==================== 数组工具函数 ====================
+def shift(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    """沿时间轴平移，空出的位置填充NaN (等价于 data.close[-periods])"""
+    result = np.full(values.shape, np.nan)
+    if periods > 0:
+        result[periods:] = values[:-periods]
+    elif periods < 0:
+        result[:periods] = values[-periods:]
+    else:
+        result[:] = values
+    return result
+
+
+def ffill(values: np.ndarray) -> np.ndarray:
+    """沿时间轴前向填充NaN(停牌期间沿用最近价格)"""
+    mask = np.isnan(values)
+    if not mask.any():
+        return values
+    idx = np.where(mask, 0, np.arange(values.shape[0]).reshape(-1, *([1] * (values.ndim - 1))))
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return np.take_along_axis(values, idx, axis=0)
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """沿时间轴计算简单移动平均
+
+    停牌(NaN)处沿用最近价格，窗口内有效数据不足 window 个时结果为NaN。
+    """
+    if window <= 0:
+        raise ValueError(f"窗口长度必须为正数: {window}")
+    result = np.full(values.shape, np.nan)
+    if window > values.shape[0]:
+        return result
+    filled = ffill(np.asarray(values, dtype=np.float64))
+    valid = ~np.isnan(filled)
+    csum = np.cumsum(np.where(valid, filled, 0.0), axis=0)
+    count = np.cumsum(valid, axis=0)
+    result[window - 1] = csum[window - 1]
+    result[window:] = csum[window:] - csum[:-window]
+    count[window:] = count[window:] - count[:-window]
+    result[window - 1:] /= window
+    result[count < window] = np.nan
+    return result
+
+
+def latch(entries: np.ndarray, exits: np.ndarray) -> np.ndarray:
+    """将进出场信号转换为持仓状态(True表示持仓)
+
+    空仓时仅入场信号生效，持仓时仅出场信号生效，
+    因此状态等于最近一次有效事件的方向，可通过前向累积最大值向量化求得。
+    同一根K线同时出现进出场信号时视为无信号。
+    """
+    event = entries.astype(np.int8) - exits.astype(np.int8)
+    rows = np.arange(event.shape[0]).reshape(-1, 1)
+    last = np.where(event != 0, rows, -1)
+    np.maximum.accumulate(last, axis=0, out=last)
+    state = np.take_along_axis(event, np.maximum(last, 0), axis=0) > 0
+    state &= last >= 0
+    return state
+
+
+# ==================== 策略基类 ====================
+class VectorStrategy:
+    """向量化策略基类
+
+    子类通过类属性 params 声明参数及默认值，实现 signals() 返回二维布尔数组。
+
+    使用示例:
+        class Momentum(VectorStrategy):
+            params = {'lookback': 1}
+
+            def signals(self, data):
+                prev = shift(data.close, self.p['lookback'])
+                return data.close > prev, data.close < prev
+    """
+
+    params: Dict[str, Any] = {}  # 参数默认值
+    size: int = DEFAULT_TRADE_SIZE  # 每次买入数量(股)
+
+    def __init__(self, **kwargs):
+        """初始化策略参数
+
+        Args:
+            **kwargs: 覆盖 params 中的默认参数
+        """
+        unknown = set(kwargs) - set(self.params)
+        if unknown:
+            raise ValueError(f"{type(self).__name__} 未知参数: {sorted(unknown)}")
+        self.p = dict(self.params)
+        self.p.update(kwargs)
+
+    def signals(self, data: BarPanel) -> Tuple[np.ndarray, np.ndarray]:
+        """计算进出场信号
+
+        Args:
+            data: K线面板，各列形状为 (时间, 品种)
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (入场信号, 出场信号)，布尔数组
+        """
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.p})"
+
+
+# ==================== 回测结果 ====================
+@dataclass
+class VectorBacktestResult:
+    """向量化回测结果，所有二维数组形状为 (时间, 品种)"""
+    symbols: List[str]  # 品种列表
+    ts: np.ndarray  # 时间戳(纳秒)
+    position: np.ndarray  # 持仓数量(股)
+    trades: np.ndarray  # 成交数量(正为买入，负为卖出)
+    fill_price: np.ndarray  # 成交价格(无成交为NaN)
+    commission: np.ndarray  # 手续费
+    cash: np.ndarray  # 现金
+    equity: np.ndarray  # 权益
+    initial_cash: float  # 初始资金
+
+    @property
+    def final_equity(self) -> np.ndarray:
+        """各品种期末权益"""
+        if len(self.equity) == 0:
+            return np.full(len(self.symbols), self.initial_cash)
+        return self.equity[-1]
+
+    @property
+    def total_return(self) -> np.ndarray:
+        """各品种总收益率"""
+        return self.final_equity / self.initial_cash - 1.0
+
+    @property
+    def trade_count(self) -> np.ndarray:
+        """各品种成交笔数"""
+        return np.count_nonzero(self.trades, axis=0)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """按品种汇总结果"""
+        final_equity = self.final_equity
+        total_return = self.total_return
+        trade_count = self.trade_count
+        total_commission = self.commission.sum(axis=0)
+        return {
+            symbol: {
+                'final_equity': float(final_equity[j]),
+                'total_return': float(total_return[j]),
+                'trade_count': int(trade_count[j]),
+                'commission': float(total_commission[j]),
+            }
+            for j, symbol in enumerate(self.symbols)
+        }
+
+
+# ==================== 回测引擎 ====================
+class VectorBacktestEngine:
+    """向量化批量回测引擎
+
+    使用示例:
+        engine = VectorBacktestEngine.from_config(config_manager.config.backtest)
+        result = engine.run(MyVectorStrategy, panel)
+    """
+
+    def __init__(self, initial_cash: float = 1000000, commission: float = 0.0003,
+                 volume_unit: int = DEFAULT_VOLUME_UNIT, fill_price: str = 'open',
+                 fill_simulator=None):
+        """初始化引擎
+
+        Args:
+            initial_cash: 每个品种的初始资金
+            commission: 手续费率
+            volume_unit: 最小交易单位(股)
+            fill_price: 成交价模式，'open'为次日开盘，'close'为当根收盘
+            fill_simulator: AShareFillSimulator，None表示按信号全部成交
+        """
+        if fill_price not in FILL_PRICE_MODES:
+            raise ValueError(f"不支持的成交价模式: {fill_price}")
+        self.initial_cash = float(initial_cash)
+        self.commission = float(commission)
+        self.volume_unit = int(volume_unit)
+        self.fill_price = fill_price
+        self.fill_simulator = fill_simulator
+
+    @staticmethod
+    def config_kwargs(backtest_config) -> Dict[str, Any]:
+        """BacktestConfig 对应的构造参数(参数扫描等场景传给工作进程)"""
+        kwargs = {'initial_cash': backtest_config.initial_cash,
+                  'commission': backtest_config.commission}
+        if backtest_config.fill.enabled:
+            from libs.backtest.fill_simulator import AShareFillSimulator
+            kwargs['fill_simulator'] = AShareFillSimulator.from_config(backtest_config.fill)
+        return kwargs
+
+    @classmethod
+    def from_config(cls, backtest_config, **kwargs) -> 'VectorBacktestEngine':
+        """根据 BacktestConfig 创建引擎"""
+        return cls(**{**cls.config_kwargs(backtest_config), **kwargs})
+
+    def round_lot(self, size: float) -> int:
+        """按最小交易单位向下取整"""
+        return int(size // self.volume_unit) * self.volume_unit
+
+    def run(self, strategy: Union[VectorStrategy, Type[VectorStrategy]], data: BarPanel,
+            entries: Optional[np.ndarray] = None,
+            exits: Optional[np.ndarray] = None) -> VectorBacktestResult:
+        """执行回测
+
+        Args:
+            strategy: 策略实例或策略类(使用默认参数实例化)
+            data: K线面板
+            entries/exits: 预先计算好的信号，提供时跳过 strategy.signals()
+
+        Returns:
+            VectorBacktestResult: 回测结果
+        """
+        if isinstance(strategy, type):
+            strategy = strategy()
+        if entries is None or exits is None:
+            entries, exits = strategy.signals(data)
+        entries = np.asarray(entries, dtype=bool)
+        exits = np.asarray(exits, dtype=bool)
+        if entries.shape != data.close.shape or exits.shape != data.close.shape:
+            raise ValueError(f"信号形状 {entries.shape}/{exits.shape} 与面板 {data.close.shape} 不一致")
+
+        size = self.round_lot(strategy.size)
+        if size <= 0:
+            raise ValueError(f"交易数量 {strategy.size} 不足一手({self.volume_unit}股)")
+
+        if self.fill_simulator is not None:
+            return self._run_simulated(data, latch(entries, exits), size)
+
+        # 成交价: 信号在第t根产生，对应的成交价格序列
+        if self.fill_price == 'open':
+            price = shift(data.open, -1)
+        else:
+            price = np.asarray(data.close, dtype=np.float64)
+        # 无法成交(停牌/最后一根K线)的信号作废
+        tradable = ~np.isnan(price)
+        state = latch(entries & tradable, exits & tradable)
+
+        # 持仓变化发生在成交的那根K线
+        position = state.astype(np.float64) * size
+        if self.fill_price == 'open':
+            position = shift(position, 1)
+            position[0] = 0.0
+            price = data.open
+        trades = np.diff(position, axis=0, prepend=0.0)
+        traded = trades != 0
+        fill_price = np.where(traded, price, np.nan)
+
+        return self._settle(data, position, trades, fill_price)
+
+    def _run_simulated(self, data: BarPanel, state: np.ndarray, size: int) -> VectorBacktestResult:
+        """逐K线撮合: 每根K线对全部品种调用一次成交模拟器"""
+        from libs.backtest.fill_simulator import prev_day_close
+
+        sim = self.fill_simulator
+        sim.reset(data.symbols)
+        n_bars, n_symbols = data.close.shape
+        trades = np.zeros((n_bars, n_symbols))
+        fill_price = np.full((n_bars, n_symbols), np.nan)
+        prev_close = prev_day_close(data.ts, data.close)
+        new_day = np.ones(n_bars, dtype=bool)
+        if n_bars:
+            day = np.asarray(data.ts, dtype=np.int64) // (86400 * 10 ** 9)
+            new_day[1:] = day[1:] != day[:-1]
+        target = state.astype(np.int64) * size
+        # 'open': 第t根的信号在第t+1根开盘撮合；'close': 当根收盘撮合
+        offset = 1 if self.fill_price == 'open' else 0
+        price = data.open if offset else data.close
+        volume = data.volume
+        for t in range(offset, n_bars):
+            if new_day[t]:
+                sim.start_day(prev_close[t])
+            orders = target[t - offset] - sim.position
+            if not orders.any():
+                continue
+            fills = sim.execute(orders, price[t], volume[t])
+            trades[t] = fills.volume
+            fill_price[t] = fills.price
+        position = np.cumsum(trades, axis=0)
+        return self._settle(data, position, trades, fill_price)
+
+    def _settle(self, data: BarPanel, position: np.ndarray, trades: np.ndarray,
+                fill_price: np.ndarray) -> VectorBacktestResult:
+        """根据成交计算手续费、现金与权益"""
+        trade_value = np.where(trades != 0, trades * fill_price, 0.0)
+        commission = np.abs(trade_value) * self.commission
+        cash = self.initial_cash - np.cumsum(trade_value + commission, axis=0)
+        mark = np.nan_to_num(ffill(np.asarray(data.close, dtype=np.float64)))
+        equity = cash + position * mark
+
+        return VectorBacktestResult(
+            symbols=list(data.symbols), ts=data.ts, position=position, trades=trades,
+            fill_price=fill_price, commission=commission, cash=cash, equity=equity,
+            initial_cash=self.initial_cash,
+        )
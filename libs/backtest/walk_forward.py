@@ -0,0 +1,282 @@
+"""
+滚动前向(walk-forward)回测 - 训练窗口选参、下一测试窗口样本外验证
+
+把回测区间切分为依次滚动的 训练/测试 窗口对(fold)，在每个训练窗口上按指标选出
+最优参数，再用该参数在紧随其后的测试窗口上评估。anchored=True 时训练窗口起点
+固定在数据开头、逐步扩展，即时间序列交叉验证。
+
+性能要点:
+    - 行情面板只加载一次，与参数扫描一样落地为 .npy 列文件，工作进程内存映射共享
+    - 任务按参数组划分: 每组参数在整段面板上只计算一次信号，各窗口直接截取
+      信号与面板视图回测。指标在窗口起点之前已由前面的数据预热，重叠窗口之间
+      不重复计算均线等指标(要求信号只依赖当前及之前的数据，与向量化引擎约定一致)
+    - 同一组参数的全部训练/测试窗口在一个任务中完成，选参只需在主进程比较指标，
+      不必为测试窗口再提交一轮回测
+"""
+import itertools
+import os
+import shutil
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Type
+
+import numpy as np
+
+from libs.backtest.sweep import DEFAULT_RANK_METRIC, evaluate_result, params_key
+from libs.backtest.vector_engine import VectorBacktestEngine, VectorStrategy
+from libs.data.bar_store import BarPanel, open_panel, save_panel
+
+DEFAULT_BATCH_SIZE = 2  # 每个任务包含的参数组数(每组已包含全部窗口)
+
+
+class Fold(NamedTuple):
+    """一个训练/测试窗口对，行号区间均为左闭右开"""
+    index: int
+    train_start: int
+    train_stop: int
+    test_start: int
+    test_stop: int
+
+
+class FoldResult(NamedTuple):
+    """一个窗口对的选参与样本外结果"""
+    fold: Fold
+    params: Dict[str, Any]  # 训练窗口上的最优参数
+    train: Dict[str, float]  # 最优参数的训练窗口指标
+    test: Dict[str, float]  # 最优参数的测试窗口指标
+
+
+class WalkForwardReport(NamedTuple):
+    """滚动前向回测汇总"""
+    metric: str
+    folds: List[FoldResult]
+    errors: List[Dict[str, Any]]  # 执行失败的参数组
+
+    def summary(self) -> Dict[str, float]:
+        """样本外汇总指标
+
+        oos_return 为各测试窗口平均收益率的连乘复合，efficiency 为测试窗口与训练窗口
+        选参指标均值之比(walk-forward efficiency，越接近1说明过拟合越轻)。
+        """
+        if not self.folds:
+            return {}
+        train = np.array([f.train.get(self.metric, np.nan) for f in self.folds])
+        test = np.array([f.test.get(self.metric, np.nan) for f in self.folds])
+        returns = np.array([f.test.get('mean_return', 0.0) for f in self.folds])
+        train_mean = float(np.nanmean(train))
+        return {
+            'folds': len(self.folds),
+            f'train_{self.metric}': train_mean,
+            f'test_{self.metric}': float(np.nanmean(test)),
+            'efficiency': float(np.nanmean(test) / train_mean) if train_mean else float('nan'),
+            'oos_return': float(np.prod(1.0 + returns) - 1.0),
+            'oos_win_folds': float(np.mean(returns > 0)),
+        }
+
+
+# ==================== 窗口切分 ====================
+def make_folds(n_bars: int, train_bars: int, test_bars: int, step_bars: int = 0,
+               anchored: bool = False) -> List[Fold]:
+    """把 n_bars 根K线切分为滚动的训练/测试窗口对
+
+    Args:
+        n_bars: K线总数
+        train_bars: 训练窗口长度(anchored=True 时为首个训练窗口长度)
+        test_bars: 测试窗口长度，最后一个不足长度的测试窗口被舍弃
+        step_bars: 滚动步长，0表示等于 test_bars(测试窗口首尾相接、互不重叠)
+        anchored: 训练窗口起点固定为0
+
+    Returns:
+        List[Fold]: 窗口对列表
+    """
+    if train_bars <= 0 or test_bars <= 0:
+        raise ValueError(f"窗口长度必须为正数: train_bars={train_bars}, test_bars={test_bars}")
+    step = step_bars if step_bars > 0 else test_bars
+    folds = []
+    train_stop = train_bars
+    while train_stop + test_bars <= n_bars:
+        train_start = 0 if anchored else train_stop - train_bars
+        folds.append(Fold(len(folds), train_start, train_stop, train_stop, train_stop + test_bars))
+        train_stop += step
+    return folds
+
+
+# ==================== 工作进程 ====================
+_worker_state: Dict[str, Any] = {}  # 工作进程内的共享只读状态
+
+
+def _init_worker(panel_dir: str, strategy_cls: Type[VectorStrategy], engine_kwargs: Dict[str, Any],
+                 folds: List[Fold]):
+    """工作进程初始化: 映射行情面板，创建引擎"""
+    _worker_state['panel'] = open_panel(panel_dir)
+    _worker_state['strategy_cls'] = strategy_cls
+    _worker_state['engine'] = VectorBacktestEngine(**engine_kwargs)
+    _worker_state['folds'] = folds
+
+
+def evaluate_folds(engine: VectorBacktestEngine, strategy: VectorStrategy, panel: BarPanel,
+                   folds: List[Fold]) -> List[Dict[str, Dict[str, float]]]:
+    """在全部窗口上评估一组参数
+
+    信号在整段面板上只计算一次，各窗口截取信号回测，每个窗口以空仓和初始资金起始。
+
+    Returns:
+        List[Dict]: 与 folds 一一对应的 {'train': 指标, 'test': 指标}
+    """
+    entries, exits = strategy.signals(panel)
+    entries = np.asarray(entries, dtype=bool)
+    exits = np.asarray(exits, dtype=bool)
+    # 相同区间只回测一次(step_bars < test_bars 或扩展窗口时训练/测试区间会重复出现)
+    cache: Dict[tuple, Dict[str, float]] = {}
+
+    def window(start: int, stop: int) -> Dict[str, float]:
+        key = (start, stop)
+        if key not in cache:
+            result = engine.run(strategy, panel.slice(start, stop),
+                                entries[start:stop], exits[start:stop])
+            cache[key] = evaluate_result(result)
+        return cache[key]
+
+    return [{'train': window(f.train_start, f.train_stop), 'test': window(f.test_start, f.test_stop)}
+            for f in folds]
+
+
+def _run_batch(param_batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """在工作进程中对一批参数组合评估全部窗口"""
+    panel = _worker_state['panel']
+    strategy_cls = _worker_state['strategy_cls']
+    engine = _worker_state['engine']
+    folds = _worker_state['folds']
+    records = []
+    for params in param_batch:
+        try:
+            records.append({'params': params,
+                            'folds': evaluate_folds(engine, strategy_cls(**params), panel, folds)})
+        except Exception as e:
+            records.append({'params': params, 'folds': [], 'error': str(e)})
+    return records
+
+
+# ==================== 执行器 ====================
+class WalkForwardRunner:
+    """滚动前向回测执行器
+
+    使用示例:
+        runner = WalkForwardRunner.from_config(SmaCrossStrategy, panel, backtest_config)
+        report = runner.run(grid_search(parse_param_spec(['fast_period=5:20:5'])))
+        print(report.summary())
+    """
+
+    def __init__(self, strategy_cls: Type[VectorStrategy], panel: BarPanel, folds: List[Fold],
+                 engine_kwargs: Optional[Dict[str, Any]] = None,
+                 max_workers: Optional[int] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 base_params: Optional[Dict[str, Any]] = None):
+        """初始化执行器
+
+        Args:
+            strategy_cls: 向量化策略类
+            panel: K线面板(整个回测区间)
+            folds: 窗口对列表，见 make_folds()
+            engine_kwargs: VectorBacktestEngine 构造参数
+            max_workers: 进程数，默认为CPU核数，1表示在当前进程内执行
+            batch_size: 每个任务包含的参数组数
+            base_params: 固定参数，被优化参数覆盖
+        """
+        if not folds:
+            raise ValueError(f"K线数量 {panel.shape[0]} 不足以切分出一个训练/测试窗口对")
+        self.strategy_cls = strategy_cls
+        self.panel = panel
+        self.folds = list(folds)
+        self.engine_kwargs = dict(engine_kwargs or {})
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.batch_size = max(1, batch_size)
+        self.base_params = {k: v for k, v in (base_params or {}).items()
+                            if k in strategy_cls.params}
+
+    @classmethod
+    def from_config(cls, strategy_cls: Type[VectorStrategy], panel: BarPanel, backtest_config,
+                    **kwargs) -> 'WalkForwardRunner':
+        """根据 BacktestConfig(含 walk_forward 小节)创建执行器"""
+        wf = backtest_config.walk_forward
+        folds = make_folds(panel.shape[0], wf.train_bars, wf.test_bars, wf.step_bars, wf.anchored)
+        kwargs.setdefault('engine_kwargs', VectorBacktestEngine.config_kwargs(backtest_config))
+        return cls(strategy_cls, panel, folds, **kwargs)
+
+    def run(self, param_sets: List[Dict[str, Any]], metric: str = DEFAULT_RANK_METRIC,
+            ascending: bool = False,
+            progress: Optional[Callable[[int, int], None]] = None) -> WalkForwardReport:
+        """评估全部参数组合并逐窗口选参
+
+        Args:
+            param_sets: 候选参数组合列表
+            metric: 训练窗口上的选参指标
+            ascending: 指标越小越好(如 max_drawdown)时为True
+            progress: 进度回调 progress(已完成参数组数, 总数)
+        """
+        todo = []
+        seen = set()
+        for params in param_sets or [{}]:
+            merged = {**self.base_params, **params}
+            key = params_key(merged)
+            if key not in seen:
+                seen.add(key)
+                todo.append(merged)
+        batches = [todo[i:i + self.batch_size] for i in range(0, len(todo), self.batch_size)]
+
+        if self.max_workers <= 1:
+            _worker_state.update(panel=self.panel, strategy_cls=self.strategy_cls,
+                                 engine=VectorBacktestEngine(**self.engine_kwargs), folds=self.folds)
+            records = []
+            for batch in batches:
+                records.extend(_run_batch(batch))
+                if progress:
+                    progress(len(records), len(todo))
+            _worker_state.clear()
+        else:
+            panel_dir = tempfile.mkdtemp(prefix='walkforward_panel_')
+            try:
+                save_panel(self.panel, panel_dir)
+                records = self._execute(batches, panel_dir, len(todo), progress)
+            finally:
+                shutil.rmtree(panel_dir, ignore_errors=True)
+        # 并行时结果按完成顺序返回，恢复为提交顺序，指标相同时的选择与进程调度无关
+        index = {params_key(params): i for i, params in enumerate(todo)}
+        records.sort(key=lambda r: index[params_key(r['params'])])
+        return self._select(records, metric, ascending)
+
+    def _execute(self, batches: List[List[Dict[str, Any]]], panel_dir: str, total: int,
+                 progress: Optional[Callable[[int, int], None]]) -> List[Dict[str, Any]]:
+        """提交任务并收集结果，在途任务数受限以控制内存"""
+        records: List[Dict[str, Any]] = []
+        max_in_flight = self.max_workers * 2
+        batch_iter = iter(batches)
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                 initargs=(panel_dir, self.strategy_cls, self.engine_kwargs,
+                                           self.folds)) as pool:
+            in_flight = {pool.submit(_run_batch, batch)
+                         for batch in itertools.islice(batch_iter, max_in_flight)}
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    records.extend(future.result())
+                    if progress:
+                        progress(len(records), total)
+                    batch = next(batch_iter, None)
+                    if batch is not None:
+                        in_flight.add(pool.submit(_run_batch, batch))
+        return records
+
+    def _select(self, records: List[Dict[str, Any]], metric: str, ascending: bool) -> WalkForwardReport:
+        """逐窗口按训练指标选出最优参数(records 按提交顺序排列，指标相同时取先提交的参数组)"""
+        errors = [r for r in records if 'error' in r]
+        valid = [r for r in records if 'error' not in r]
+        missing = float('inf') if ascending else float('-inf')
+        pick = min if ascending else max
+        results = []
+        for i, fold in enumerate(self.folds):
+            if not valid:
+                break
+            best = pick(valid, key=lambda r: r['folds'][i]['train'].get(metric, missing))
+            scores = best['folds'][i]
+            results.append(FoldResult(fold, best['params'], scores['train'], scores['test']))
+        return WalkForwardReport(metric, results, errors)
@@ -5,10 +5,17 @@
 包含配置管理器和常量定义
 """
 
-from .config_manager import ConfigManager
 from .consts import *
 
 __all__ = [
     'ConfigManager',
     # 从consts导入的常量
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    """PEP 562: 延迟导入配置管理器(依赖yaml和输出管理器)，仅使用常量时不加载"""
+    if name == 'ConfigManager':
+        from .config_manager import ConfigManager
+        return ConfigManager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
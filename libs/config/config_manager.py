@@ -1,10 +1,18 @@
 """\n统一配置管理器 - 管理应用程序的所有配置参数\n"""
-from typing import Dict, Any, Optional  # 导入类型提示工具，用于函数参数和返回值的类型声明
-from dataclasses import dataclass, field  # 导入数据类装饰器，简化类的定义
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple  # 导入类型提示工具，用于函数参数和返回值的类型声明
+from dataclasses import asdict, dataclass, field, fields, is_dataclass  # 导入数据类装饰器，简化类的定义
 from pathlib import Path  # 导入路径处理模块，用于文件路径操作
+from threading import Event, Lock, Thread  # 导入线程工具，用于配置文件监控
+import copy  # 导入拷贝模块，用于隔离缓存的配置数据
+import hashlib  # 导入哈希模块，用于识别配置文件内容变化
 import json  # 导入JSON处理模块，用于JSON格式配置文件的读写
+import os  # 导入系统模块，用于读取文件状态
 import yaml  # 导入YAML处理模块，用于YAML格式配置文件的读写
-from libs.output.output_manager import output_manager  # 导入输出管理器
+from libs.output.output_manager import output_manager as _output_manager  # 导入输出管理器
+from libs.output.log_pipeline import DeferredOutput  # 导入日志管道的非阻塞输出代理
+
+# OPTIMIZED: 配置相关输出(含热更新线程中的输出)交由日志管道写线程执行，不阻塞调用方
+output_manager = DeferredOutput(_output_manager)
 
 # 这些默认值应该保留在数据类中，但可以从配置文件覆盖
 @dataclass
@@ -17,15 +25,42 @@ class RiskConfig:
     max_drawdown: float = 0.1 #  最大回撤比例
     position_risk_pct: float = 0.02 #   单笔交易风险比例
 
+@dataclass
+class WalkForwardConfig:
+    """滚动前向(walk-forward)回测配置 - 窗口长度均以K线根数计"""
+    train_bars: int = 500  # 训练(参数优化)窗口长度
+    test_bars: int = 120  # 测试(样本外)窗口长度
+    step_bars: int = 0  # 窗口滚动步长，0表示等于 test_bars
+    anchored: bool = False  # 训练窗口起点固定在数据开头(扩展窗口，即时间序列交叉验证)
+    metric: str = 'sharpe'  # 训练窗口上选择参数的指标
+    param_space: Dict[str, Any] = field(default_factory=dict)  # 参数空间，写法同 --param，如 {fast_period: "5:30:5"}
+
+@dataclass
+class FillConfig:
+    """A股成交模拟配置 - 启用后向量化回测逐K线按涨跌停、整手、成交量占比与T+1撮合"""
+    enabled: bool = False  # 是否启用成交模拟，关闭时信号全部按成交价成交
+    participation: float = 0.1  # 单根K线成交量占比上限，0表示不限制
+    slippage: str = 'none'  # 滑点模型: none, fixed(元), percent(比例), impact(平方根冲击)
+    slippage_value: Optional[float] = None  # 滑点参数，None使用模型默认值
+    t_plus_one: bool = True  # T+1: 当日买入次日才可卖出
+
 @dataclass
 class BacktestConfig:
     """回测配置 - 定义回测模式下的参数设置"""
     initial_cash: float = 1000000  # 初始资金，默认100万
     commission: float = 0.0003  # 交易佣金比例，默认万分之三
     data_source: str = 'qmt_historical'  # 数据源，默认使用QMT历史数据
+    data_dir: str = 'data/bars'  # 本地K线仓库目录(qmt_historical数据落地位置)
+    panel_cache_dir: str = 'data/panels'  # 对齐后面板的内存映射缓存目录，为空时在内存中复制对齐
+    start_date: Optional[str] = None  # 回测开始日期，None表示从最早数据开始
+    end_date: Optional[str] = None  # 回测结束日期(含)，None表示到最新数据
+    frequency: str = '1d'  # 回测K线频率
+    symbols: List[str] = field(default_factory=list)  # 回测股票池，为空时使用仓库中全部品种
     debug_mode: bool = False  # 调试模式开关，默认关闭
     error_output_interval: int = 30  # 错误输出间隔(秒)，默认30秒
     risk_management: RiskConfig = field(default_factory=RiskConfig)  # 风险管理配置，使用默认工厂函数创建
+    walk_forward: WalkForwardConfig = field(default_factory=WalkForwardConfig)  # 滚动前向回测配置
+    fill: FillConfig = field(default_factory=FillConfig)  # A股成交模拟配置
 
 @dataclass
 class LiveConfig:
@@ -38,13 +73,232 @@ class LiveConfig:
     error_output_interval: int = 30  # 错误输出间隔(秒)，默认30秒
     risk_management: RiskConfig = field(default_factory=RiskConfig)  # 风险管理配置
 
+@dataclass
+class DataManagementConfig:
+    """数据管理配置 - 定义内存中各类记录的容量上限"""
+    max_temp_orders: int = 1000  # 最大临时订单数量
+    max_trades_history: int = 10000  # 最大交易历史记录数
+    max_order_records: int = 5000  # 最大订单记录数
+    max_quote_cache: int = 1000  # 最大行情缓存数量
+
+@dataclass
+class SystemTimingConfig:
+    """系统时间配置 - 定义清理、过期、超时及行情刷新间隔"""
+    auto_clean_interval: int = 300  # 历史记录清理间隔(秒)，订单超时/过期由定时轮即时触发，不依赖此间隔
+    temp_order_expire_minutes: int = 1  # 临时订单过期时间(分钟)
+    order_timeout_seconds: int = 30  # 订单超时时间(秒)
+    quote_update_interval: int = 1  # 行情更新间隔(秒)
+    timer_tick_ms: int = 50  # 超时/过期定时轮刻度(毫秒)，回调最多迟到一个刻度
+
+@dataclass
+class NetworkConfig:
+    """网络和重试配置 - 定义下单重试、超时及限流参数"""
+    max_retry_attempts: int = 3  # 最大重试次数
+    retry_delay_seconds: float = 1  # 重试基础延迟(秒)，按指数退避递增
+    max_retry_delay_seconds: float = 10  # 重试延迟上限(秒)
+    connection_timeout: float = 10  # 连接超时时间(秒)
+    request_timeout: float = 5  # 单次请求超时时间(秒)
+    max_orders_per_second: float = 50  # 下单限流(笔/秒)
+    max_inflight_orders: int = 64  # 同时在途的最大订单数
+
+@dataclass
+class LoggingConfig:
+    """日志配置 - 定义日志管道的级别、输出和滚动参数"""
+    max_file_size: int = 10485760  # 单个日志文件最大字节数
+    backup_count: int = 5  # 日志文件备份数量
+    log_level: str = 'INFO'  # 日志级别
+    console_output: bool = True  # 是否输出到控制台
+    file_output: bool = True  # 是否输出到文件
+    log_dir: str = 'logs'  # 日志目录
+    flush_interval: float = 0.2  # 后台批量写出间隔(秒)
+    max_queue_size: int = 100000  # 日志队列最大积压记录数，超过后丢弃(ERROR 及以上改为同步写出)
+
+@dataclass
+class PerformanceConfig:
+    """性能监控配置 - 定义延迟与资源告警阈值"""
+    enable_monitoring: bool = True  # 是否启用性能监控
+    cpu_threshold: float = 80  # CPU使用率阈值(%)
+    memory_threshold: float = 80  # 内存使用率阈值(%)
+    response_time_threshold: float = 100  # 响应时间阈值(毫秒)
+    sample_interval: float = 5  # 资源采样间隔(秒)
+
+@dataclass
+class DebugConfig:
+    """调试配置"""
+    enable_debug_mode: bool = False  # 是否启用调试模式
+    log_sql_queries: bool = False  # 是否记录SQL查询
+    enable_profiling: bool = False  # 是否启用性能分析(等同 --profile)
+    save_debug_data: bool = False  # 是否保存调试数据
+
+@dataclass
+class StrategyConfig:
+    """策略配置 - 定义策略名称及参数"""
+    name: str = 'MyStrategy'  # 策略名称
+    parameters: Dict[str, Any] = field(default_factory=dict)  # 策略参数
+
+@dataclass
+class AccountConfig:
+    """交易账户配置 - 多账户时每个账户一项"""
+    account_id: str = ''  # 交易账户ID
+    account_type: str = 'STOCK'  # 账户类型
+
+@dataclass
+class StrategyInstanceConfig:
+    """策略实例配置 - 多策略引擎中的一个策略实例"""
+    name: str = ''  # 实例名称(唯一)
+    strategy: str = ''  # 策略类，格式 "模块:类名"，如 strategies.multi:MomentumStrategy
+    account: str = ''  # 下单账户ID，为空时使用第一个账户
+    symbols: List[str] = field(default_factory=list)  # 订阅的股票
+    parameters: Dict[str, Any] = field(default_factory=dict)  # 策略参数
+    worker: Optional[int] = None  # 指定工作进程编号，None表示自动分配
+
+@dataclass
+class EngineConfig:
+    """多策略引擎配置"""
+    workers: int = 0  # 策略工作进程数，0表示在主进程内运行全部策略
+    checkpoint_dir: str = ''  # 状态快照与增量日志目录，为空时不启用
+    checkpoint_interval: float = 60.0  # 状态快照间隔(秒)，0表示只在停止时快照
+
+@dataclass
+class DataSourceConfig:
+    """历史数据源配置 - 定义K线下载的数据提供商、并发、限流和缓存"""
+    provider: str = 'tushare'  # 数据提供商: tushare, akshare, wind (fake 为本地模拟)
+    api_token: str = ''  # API Token
+    max_workers: int = 8  # 并发请求数
+    rate_limit: float = 0.0  # 请求频率上限(次/秒)，0表示使用数据源默认限额
+    cache_dir: str = 'data/cache/providers'  # 响应缓存目录，为空时不缓存
+    open_range_ttl: float = 3600.0  # 包含当天的请求缓存有效期(秒)
+
+@dataclass
+class FactorConfig:
+    """因子引擎配置 - 定义因子缓存、分块内存预算和行业分组数据"""
+    cache_dir: str = 'data/cache/factors'  # 因子缓存目录(按表达式哈希)，为空时写入临时目录
+    memory_limit_mb: float = 2048  # 分块计算的内存预算(MB)
+    chunk_rows: int = 0  # 每块行数，0表示按内存预算自动推算
+    dtype: str = 'float32'  # 因子落盘数据类型
+    cache_intermediates: bool = True  # 是否落盘被多个因子共用的中间结果
+    industry_file: str = ''  # 行业分组CSV(股票代码,行业)，作为 industry 字段供分组算子使用
+
 @dataclass
 class AppConfig:
     """应用配置 - 整合所有配置，定义应用运行模式和配置"""
     mode: str = 'backtest'  # 运行模式，'backtest'为回测模式，'live'为实盘模式
     backtest: BacktestConfig = field(default_factory=BacktestConfig)  # 回测配置
     live: LiveConfig = field(default_factory=LiveConfig)  # 实盘配置
+    strategy: StrategyConfig = field(default_factory=StrategyConfig)  # 策略配置
+    data_management: DataManagementConfig = field(default_factory=DataManagementConfig)  # 数据管理配置
+    system_timing: SystemTimingConfig = field(default_factory=SystemTimingConfig)  # 系统时间配置
+    network: NetworkConfig = field(default_factory=NetworkConfig)  # 网络和重试配置
+    data_source: DataSourceConfig = field(default_factory=DataSourceConfig)  # 历史数据源配置
+    factors: FactorConfig = field(default_factory=FactorConfig)  # 因子引擎配置
+    logging: LoggingConfig = field(default_factory=LoggingConfig)  # 日志配置
+    performance: PerformanceConfig = field(default_factory=PerformanceConfig)  # 性能监控配置
+    debug: DebugConfig = field(default_factory=DebugConfig)  # 调试配置
+    engine: EngineConfig = field(default_factory=EngineConfig)  # 多策略引擎配置
+    accounts: List[AccountConfig] = field(default_factory=list)  # 交易账户，为空时使用 live.account_id
+    strategies: List[StrategyInstanceConfig] = field(default_factory=list)  # 策略实例，为空时使用 strategy
+
+
+# ==================== 只读配置快照 ====================
+# OPTIMIZED: 热路径(下单风控等)直接读取快照的普通属性，无需按模式分支和字典查找
+class _FrozenSnapshot:
+    """只读快照基类 - 使用 __slots__，创建后不可修改"""
+    __slots__ = ()
+    
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} 是只读快照，请通过 ConfigManager 更新配置")
+    
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} 是只读快照，请通过 ConfigManager 更新配置")
+    
+    @classmethod
+    def from_config(cls, config):
+        """从对应的数据类配置创建快照"""
+        return cls(**{name: copy.deepcopy(getattr(config, name)) for name in cls.__slots__})
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    def __repr__(self) -> str:
+        values = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+
+class RiskSnapshot(_FrozenSnapshot):
+    """风险管理配置快照"""
+    __slots__ = tuple(f.name for f in fields(RiskConfig))
+
+
+class DataManagementSnapshot(_FrozenSnapshot):
+    """数据管理配置快照"""
+    __slots__ = tuple(f.name for f in fields(DataManagementConfig))
+
+
+class SystemTimingSnapshot(_FrozenSnapshot):
+    """系统时间配置快照"""
+    __slots__ = tuple(f.name for f in fields(SystemTimingConfig))
+
+
+class NetworkSnapshot(_FrozenSnapshot):
+    """网络和重试配置快照"""
+    __slots__ = tuple(f.name for f in fields(NetworkConfig))
+
+
+class ConfigSnapshot(_FrozenSnapshot):
+    """当前运行模式下预先解析的只读配置快照
     
+    配置变化(加载、动态更新、热更新)时整体重建并原子替换，
+    读取方拿到的快照在其生命周期内保持一致。
+    """
+    __slots__ = (
+        'version', 'source', 'mode', 'is_backtest', 'is_live',
+        'data_source', 'debug_mode', 'error_output_interval',
+        'initial_cash', 'commission', 'account_id', 'account_type',
+        'risk', 'data_management', 'system_timing', 'network',
+        'strategy_name', 'strategy_parameters',
+    )
+    
+    @classmethod
+    def build(cls, config: AppConfig, version: int, source: Optional[str] = None) -> 'ConfigSnapshot':
+        """根据应用配置生成快照"""
+        is_backtest = config.mode == 'backtest'
+        current = config.backtest if is_backtest else config.live
+        return cls(
+            version=version,
+            source=source,
+            mode=config.mode,
+            is_backtest=is_backtest,
+            is_live=config.mode == 'live',
+            data_source=current.data_source,
+            debug_mode=current.debug_mode,
+            error_output_interval=current.error_output_interval,
+            initial_cash=getattr(current, 'initial_cash', None),
+            commission=getattr(current, 'commission', None),
+            account_id=getattr(current, 'account_id', None),
+            account_type=getattr(current, 'account_type', None),
+            risk=RiskSnapshot.from_config(current.risk_management),
+            data_management=DataManagementSnapshot.from_config(config.data_management),
+            system_timing=SystemTimingSnapshot.from_config(config.system_timing),
+            network=NetworkSnapshot.from_config(config.network),
+            strategy_name=config.strategy.name,
+            strategy_parameters=copy.deepcopy(config.strategy.parameters),
+        )
+
+
+# ==================== 配置文件解析缓存 ====================
+CONFIG_ENCODINGS = ('utf-8', 'utf-8-sig', 'gbk', 'gb2312', 'cp1252')  # YAML配置文件支持的编码(按顺序尝试)
+DEFAULT_WATCH_INTERVAL = 1.0  # 配置文件监控轮询间隔(秒)
+
+# 绝对路径 -> (mtime_ns, 文件大小, 内容sha1, 解析结果)
+_parsed_config_cache: Dict[str, Tuple[int, int, str, Dict[str, Any]]] = {}
+_parsed_config_lock = Lock()
+
+
 class ConfigManager:
     """配置管理器 - 负责加载、管理和更新应用配置"""
     
@@ -55,6 +309,15 @@ class ConfigManager:
             config_path: 配置文件路径，如果为None则自动查找
         """
         self._config = AppConfig()  # 创建默认应用配置
+        self._config_path: Optional[Path] = None  # 已加载的配置文件路径
+        self._sections: Set[str] = set()  # 配置文件中出现过的顶层小节(热更新时校验完整性)
+        self._version = 0  # 快照版本号
+        # (应用配置, 当前模式配置, 只读快照)，热更新时整体原子替换
+        self._state: Optional[Tuple[AppConfig, Any, ConfigSnapshot]] = None
+        self._reload_listeners: List[Callable[[ConfigSnapshot], None]] = []  # 热更新回调
+        self._watch_thread: Optional[Thread] = None  # 配置文件监控线程
+        self._watch_stop = Event()
+        self._publish()
         
         # 如果没有指定配置文件，自动查找默认配置文件
         if not config_path:
@@ -83,89 +346,300 @@ class ConfigManager:
         output_manager.info(f"📖 正在加载配置文件: {config_path}")  # 打印加载消息
         
         try:
-            if path.suffix.lower() == '.json':  # 如果是JSON文件
-                with open(path, 'r', encoding='utf-8') as f:  # 以UTF-8编码打开文件
-                    data = json.load(f)  # 加载JSON数据
-            elif path.suffix.lower() in ['.yml', '.yaml']:  # 如果是YAML文件
-                # 尝试多种编码方式，提高兼容性
-                encodings = ['utf-8', 'utf-8-sig', 'gbk', 'gb2312', 'cp1252']  # 支持的编码列表
-                data = None  # 初始化数据变量
-                
-                for encoding in encodings:  # 尝试每种编码
-                    try:
-                        with open(path, 'r', encoding=encoding) as f:  # 以当前编码打开文件
-                            data = yaml.safe_load(f)  # 安全加载YAML数据
-                        output_manager.success(f"✅ 使用 {encoding} 编码成功加载配置文件")  # 打印成功消息
-                        break  # 成功加载后跳出循环
-                    except UnicodeDecodeError:
-                        continue  # 编码错误则尝试下一种编码
-                    except Exception as e:
-                        output_manager.error(f"❌ 使用 {encoding} 编码加载失败: {e}")
-                        continue
-                
-                if data is None:
-                    raise ValueError(f"无法使用任何编码方式读取配置文件: {config_path}")
-            else:
-                raise ValueError(f"Unsupported config file format: {path.suffix}")
-            
+            data = self._read_config_data(path)
             self._update_config_from_dict(data)
+            self._config_path = path
+            self._sections = set(data) if isinstance(data, dict) else set()
+            self._publish()
             output_manager.success(f"✅ 配置文件加载成功")
             
         except Exception as e:
             output_manager.error(f"❌ 配置文件加载失败: {e}")
             raise
     
-    def _update_config_from_dict(self, data: Dict[str, Any]):
-        """从字典更新配置"""
+    @staticmethod
+    def _read_config_data(path: Path) -> Dict[str, Any]:
+        """读取并解析配置文件
+        
+        OPTIMIZED: 解析结果按 (修改时间, 大小) 和内容哈希缓存，文件未变化时不再重复读取和解析；
+        多编码尝试只读取一次文件字节，在内存中依次解码
+        """
+        key = str(path.resolve())
+        stat = path.stat()
+        with _parsed_config_lock:
+            cached = _parsed_config_cache.get(key)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return copy.deepcopy(cached[3])
+        
+        raw = path.read_bytes()
+        digest = hashlib.sha1(raw).hexdigest()
+        if cached and cached[2] == digest:
+            data = cached[3]  # 仅修改时间变化，内容相同
+        elif path.suffix.lower() == '.json':  # 如果是JSON文件
+            data = json.loads(raw.decode('utf-8'))  # 加载JSON数据
+        elif path.suffix.lower() in ['.yml', '.yaml']:  # 如果是YAML文件
+            # 尝试多种编码方式，提高兼容性
+            data = None  # 初始化数据变量
+            
+            for encoding in CONFIG_ENCODINGS:  # 尝试每种编码
+                try:
+                    data = yaml.safe_load(raw.decode(encoding))  # 安全加载YAML数据
+                    output_manager.success(f"✅ 使用 {encoding} 编码成功加载配置文件")  # 打印成功消息
+                    break  # 成功加载后跳出循环
+                except UnicodeDecodeError:
+                    continue  # 编码错误则尝试下一种编码
+                except Exception as e:
+                    output_manager.error(f"❌ 使用 {encoding} 编码加载失败: {e}")
+                    continue
+            
+            if data is None:
+                raise ValueError(f"无法使用任何编码方式读取配置文件: {path}")
+        else:
+            raise ValueError(f"Unsupported config file format: {path.suffix}")
+        
+        with _parsed_config_lock:
+            _parsed_config_cache[key] = (stat.st_mtime_ns, stat.st_size, digest, data)
+        return copy.deepcopy(data)
+    
+    def _update_config_from_dict(self, data: Dict[str, Any], config: Optional[AppConfig] = None):
+        """从字典更新配置
+        
+        Args:
+            data: 配置字典
+            config: 被更新的配置对象，默认为当前配置
+        """
+        config = config if config is not None else self._config
+        
         # 更新运行模式
         if 'mode' in data:
-            self._config.mode = data['mode']
+            config.mode = data['mode']
         
         # 更新回测配置
-        if 'backtest' in data:
-            backtest_data = data['backtest']
-            for key, value in backtest_data.items():
-                if hasattr(self._config.backtest, key):
-                    setattr(self._config.backtest, key, value)
+        self._update_section(config.backtest, data.get('backtest'))
         
         # 更新实盘配置
-        if 'live' in data:
-            live_data = data['live']
-            for key, value in live_data.items():
-                if hasattr(self._config.live, key):
-                    setattr(self._config.live, key, value)
+        self._update_section(config.live, data.get('live'))
+        
+        # 更新策略配置
+        if 'strategy' in data:
+            strategy_data = data['strategy'] or {}
+            if 'name' in strategy_data:
+                config.strategy.name = strategy_data['name']
+            if 'parameters' in strategy_data:
+                config.strategy.parameters = dict(strategy_data['parameters'] or {})
+        
+        # 更新数据管理、系统时间、网络、日志、性能监控与调试配置
+        self._update_section(config.data_management, data.get('data_management'))
+        self._update_section(config.system_timing, data.get('system_timing'))
+        self._update_section(config.network, data.get('network'))
+        self._update_section(config.data_source, data.get('data_source'))
+        self._update_section(config.factors, data.get('factors'))
+        self._update_section(config.logging, data.get('logging'))
+        self._update_section(config.performance, data.get('performance'))
+        self._update_section(config.debug, data.get('debug'))
+        
+        # 更新多策略引擎、账户与策略实例列表
+        self._update_section(config.engine, data.get('engine'))
+        if 'accounts' in data:
+            config.accounts = self._parse_list(AccountConfig, data['accounts'])
+        if 'strategies' in data:
+            config.strategies = self._parse_list(StrategyInstanceConfig, data['strategies'])
+    
+    @classmethod
+    def _parse_list(cls, item_type, items) -> list:
+        """把配置文件中的列表解析为数据类列表"""
+        result = []
+        for item in items or []:
+            entry = item_type()
+            cls._update_section(entry, item)
+            result.append(entry)
+        return result
+    
+    @classmethod
+    def _update_section(cls, target, section_data: Optional[Dict[str, Any]]):
+        """用配置文件中的一个小节更新对应的数据类(忽略未知字段，嵌套数据类逐字段更新)"""
+        if not section_data:
+            return
+        for key, value in section_data.items():
+            if not hasattr(target, key):
+                continue
+            current = getattr(target, key)
+            if is_dataclass(current) and isinstance(value, dict):
+                cls._update_section(current, value)
+            else:
+                setattr(target, key, value)
+    
+    # ==================== 快照与热更新 ====================
+    def _publish(self, config: Optional[AppConfig] = None):
+        """根据配置重建只读快照，与配置一起原子替换
+        
+        Args:
+            config: 新的应用配置，默认为当前配置(原地修改后重建快照)
+        """
+        config = config if config is not None else self._config
+        self._version += 1
+        source = str(self._config_path) if self._config_path else None
+        current = config.backtest if config.mode == 'backtest' else config.live
+        self._state = (config, current, ConfigSnapshot.build(config, self._version, source))
+        self._config = config
+    
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """当前只读配置快照(热路径请读取此属性)"""
+        return self._state[2]
+    
+    def reload(self) -> bool:
+        """重新从配置文件加载(合并到当前配置之上)，成功后原子替换快照并通知监听者
+        
+        文件缺少已加载过的顶层小节(如编辑器保存到一半)或字段类型不合法时拒绝更新，
+        继续使用当前配置；文件中未出现的字段与运行时 update_config 的修改保持不变。
+        
+        Returns:
+            bool: 是否成功加载
+        """
+        if self._config_path is None:
+            output_manager.warning("⚠️  未加载配置文件，无法重新加载")
+            return False
+        try:
+            data = self._read_config_data(self._config_path)
+            if not isinstance(data, dict):
+                raise ValueError("配置文件内容不是映射")
+            missing = self._sections - set(data)
+            if missing:
+                raise ValueError(f"配置文件缺少小节 {sorted(missing)}，可能仍在写入")
+            new_config = copy.deepcopy(self._config)
+            self._update_config_from_dict(data, new_config)
+            errors = self._validate(new_config)
+            if errors:
+                raise ValueError('; '.join(errors))
+        except Exception as e:
+            output_manager.error(f"❌ 配置热更新失败，继续使用当前配置: {e}")
+            return False
+        
+        self._sections |= set(data)
+        self._publish(new_config)
+        snapshot = self.snapshot
+        output_manager.info(f"🔄 配置已热更新 (版本 {snapshot.version})")
+        for listener in list(self._reload_listeners):
+            try:
+                listener(snapshot)
+            except Exception as e:
+                output_manager.error(f"❌ 配置热更新回调执行失败: {e}")
+        return True
+    
+    @classmethod
+    def _validate(cls, config: AppConfig) -> List[str]:
+        """检查运行模式和数值/布尔字段的类型(与默认值一致，整数字段可为浮点数)，返回错误列表"""
+        errors = []
+        if config.mode not in ('backtest', 'live'):
+            errors.append(f"mode 无效: {config.mode!r}")
+        cls._validate_section(config, type(config)(), 'config', errors)
+        return errors
+    
+    @classmethod
+    def _validate_section(cls, target, default, path: str, errors: List[str]):
+        for item in fields(target):
+            value, expected = getattr(target, item.name), getattr(default, item.name)
+            name = f"{path}.{item.name}"
+            if is_dataclass(expected):
+                cls._validate_section(value, expected, name, errors)
+            elif value is None:  # 可选数值(如 max_orders_per_second: null 表示不限)
+                continue
+            elif isinstance(expected, bool):
+                if not isinstance(value, bool):
+                    errors.append(f"{name} 应为布尔值: {value!r}")
+            elif isinstance(expected, (int, float)):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    errors.append(f"{name} 应为数值: {value!r}")
+    
+    def add_reload_listener(self, listener: Callable[[ConfigSnapshot], None]):
+        """注册配置热更新回调，参数为新的快照"""
+        self._reload_listeners.append(listener)
+    
+    def remove_reload_listener(self, listener: Callable[[ConfigSnapshot], None]):
+        """移除配置热更新回调"""
+        if listener in self._reload_listeners:
+            self._reload_listeners.remove(listener)
+    
+    def start_watching(self, interval: float = DEFAULT_WATCH_INTERVAL) -> bool:
+        """启动配置文件监控线程，文件变化时自动热更新
+        
+        Args:
+            interval: 轮询间隔(秒)
+        
+        Returns:
+            bool: 是否成功启动
+        """
+        if self._config_path is None:
+            output_manager.warning("⚠️  未加载配置文件，无法监控配置变化")
+            return False
+        if self._watch_thread is not None and self._watch_thread.is_alive():
+            return True
+        
+        self._watch_stop.clear()
+        self._watch_thread = Thread(target=self._watch_loop, args=(interval,),
+                                    name='ConfigWatcher', daemon=True)
+        self._watch_thread.start()
+        output_manager.info(f"👀 开始监控配置文件: {self._config_path}")
+        return True
+    
+    def stop_watching(self):
+        """停止配置文件监控"""
+        self._watch_stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join(timeout=5)
+            self._watch_thread = None
+    
+    def _watch_loop(self, interval: float):
+        """轮询配置文件的修改时间和大小"""
+        last_state = self._file_state()
+        while not self._watch_stop.wait(interval):
+            state = self._file_state()
+            if state is not None and state != last_state:
+                last_state = state
+                self.reload()
+    
+    def _file_state(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self._config_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
     
     @property
     def config(self) -> AppConfig:
         """获取当前配置"""
-        return self._config
+        return self._state[0]
     
     @property
     def mode(self) -> str:
         """获取运行模式"""
-        return self._config.mode
+        return self.snapshot.mode
     
     @property
     def is_backtest(self) -> bool:
         """是否为回测模式"""
-        return self._config.mode == 'backtest'
+        return self.snapshot.is_backtest
     
     @property
     def is_live(self) -> bool:
         """是否为实盘模式"""
-        return self._config.mode == 'live'
+        return self.snapshot.is_live
     
     @property
     def current_config(self):
-        """获取当前模式的配置"""
-        if self.is_backtest:
-            return self._config.backtest
-        else:
-            return self._config.live
+        """获取当前模式的配置(随快照一起替换)"""
+        return self._state[1]
     
     def get_risk_config(self) -> RiskConfig:
-        """获取风险管理配置"""
-        return self.current_config.risk_management
+        """获取风险管理配置(随快照一起替换)"""
+        return self._state[1].risk_management
+    
+    def get_accounts(self) -> List[AccountConfig]:
+        """获取交易账户列表(未配置 accounts 时为 live 段的单账户)"""
+        if self._config.accounts:
+            return list(self._config.accounts)
+        return [AccountConfig(self._config.live.account_id, self._config.live.account_type)]
     
     def update_config(self, **kwargs):
         """动态更新配置"""
@@ -176,6 +650,7 @@ class ConfigManager:
                 output_manager.info(f"📝 配置已更新: {key} = {value}")
             else:
                 output_manager.warning(f"⚠️  未知配置项: {key}")
+        self._publish()
     
     def save_to_file(self, config_path: str):
         """保存配置到文件"""
@@ -188,8 +663,15 @@ class ConfigManager:
                 'initial_cash': self._config.backtest.initial_cash,
                 'commission': self._config.backtest.commission,
                 'data_source': self._config.backtest.data_source,
+                'data_dir': self._config.backtest.data_dir,
+                'start_date': self._config.backtest.start_date,
+                'end_date': self._config.backtest.end_date,
+                'frequency': self._config.backtest.frequency,
+                'symbols': list(self._config.backtest.symbols),
                 'debug_mode': self._config.backtest.debug_mode,
                 'error_output_interval': self._config.backtest.error_output_interval,
+                'walk_forward': asdict(self._config.backtest.walk_forward),
+                'fill': asdict(self._config.backtest.fill),
             },
             'live': {
                 'mini_qmt_path': self._config.live.mini_qmt_path,
@@ -198,7 +680,22 @@ class ConfigManager:
                 'data_source': self._config.live.data_source,
                 'debug_mode': self._config.live.debug_mode,
                 'error_output_interval': self._config.live.error_output_interval,
-            }
+            },
+            'strategy': {
+                'name': self._config.strategy.name,
+                'parameters': dict(self._config.strategy.parameters),
+            },
+            'data_management': asdict(self._config.data_management),
+            'system_timing': asdict(self._config.system_timing),
+            'network': asdict(self._config.network),
+            'data_source': asdict(self._config.data_source),
+            'factors': asdict(self._config.factors),
+            'logging': asdict(self._config.logging),
+            'performance': asdict(self._config.performance),
+            'debug': asdict(self._config.debug),
+            'engine': asdict(self._config.engine),
+            'accounts': [asdict(account) for account in self._config.accounts],
+            'strategies': [asdict(strategy) for strategy in self._config.strategies],
         }
         
         try:
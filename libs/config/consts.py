@@ -17,6 +17,7 @@ DEFAULT_VOLUME_UNIT = 100  # 默认交易单位（手）
 DEFAULT_TRADE_SIZE = 100  # 默认交易数量
 RISK_FREE_RATE = 0.03  # 无风险利率
 TRADING_DAYS_PER_YEAR = 252  # 年交易日数
+QUOTE_EXPIRE_INTERVALS = 5  # 行情超过N个更新间隔未刷新视为过期
 
 # 涨跌停限制常量
 LIMIT_UP_RATIO = {
@@ -27,6 +28,22 @@ LIMIT_UP_RATIO = {
     'ST_STOCK': 0.05        # ST股5%
 }
 
+# 代码前缀 -> 板块(按交易所区分)
+STAR_MARKET_PREFIXES = ('688', '689')  # 上交所科创板
+GROWTH_BOARD_PREFIXES = ('300', '301')  # 深交所创业板
+BEIJING_BOARD_PREFIXES = ('4', '8', '920')  # 北交所
+
+# A股交易时段(距当日零点的秒数，北京时间)
+MARKET_UTC_OFFSET = 8 * 3600  # 北京时间相对UTC的偏移(秒)
+OPEN_AUCTION_START = 9 * 3600 + 15 * 60  # 09:15 开盘集合竞价开始
+OPEN_AUCTION_MATCH = 9 * 3600 + 25 * 60  # 09:25 开盘集合竞价撮合
+MORNING_OPEN = 9 * 3600 + 30 * 60  # 09:30 上午连续竞价开始
+MORNING_CLOSE = 11 * 3600 + 30 * 60  # 11:30 上午收盘
+AFTERNOON_OPEN = 13 * 3600  # 13:00 下午开盘
+CLOSE_AUCTION_START = 14 * 3600 + 57 * 60  # 14:57 收盘集合竞价开始
+AFTERNOON_CLOSE = 15 * 3600  # 15:00 收盘
+TRADING_SECONDS_PER_DAY = (MORNING_CLOSE - MORNING_OPEN) + (AFTERNOON_CLOSE - AFTERNOON_OPEN)  # 4小时
+
 
 # ==================== 枚举类定义 ====================
 class PriceType(Enum):
@@ -161,18 +178,68 @@ ERROR_USER_MESSAGES = {
 }
 
 
-# ==================== 工具函数 ====================
-def get_error_type(error_message: str) -> OrderError:
-    """根据错误消息获取错误类型"""
-    for keyword, error_type in ERROR_KEYWORDS_MAPPING.items():
+ERROR_SUGGESTIONS = {
+    OrderError.INSUFFICIENT_FUNDS: '建议: 1) 检查账户余额 2) 减少交易数量 3) 充值资金',
+    OrderError.INVALID_STOCK: '建议: 1) 检查股票代码格式 2) 确认股票是否存在 3) 检查市场类型',
+    OrderError.MARKET_CLOSED: '建议: 1) 等待市场开盘 2) 检查交易时间 3) 确认节假日安排',
+    OrderError.PRICE_LIMIT: '建议: 1) 调整委托价格 2) 使用市价单 3) 等待价格回调',
+    OrderError.VOLUME_LIMIT: '建议: 1) 调整为100的整数倍 2) 检查最小交易单位 3) 确认持仓限制',
+    OrderError.NETWORK: '建议: 1) 检查网络连接 2) 重启交易软件 3) 联系网络服务商',
+    OrderError.SYSTEM: '建议: 1) 稍后重试 2) 联系券商客服 3) 检查系统公告',
+    OrderError.ACCOUNT: '建议: 1) 联系券商客服 2) 检查账户状态 3) 确认资金账户',
+    OrderError.UNKNOWN: '建议: 1) 记录错误信息 2) 联系技术支持 3) 稍后重试',
+}
+
+ORDER_STATUS_DISPLAY = {
+    OrderStatus.SUBMITTED: '📝 已提交',
+    OrderStatus.ACCEPTED: '✅ 已接受',
+    OrderStatus.PARTIAL: '🔄 部分成交',
+    OrderStatus.COMPLETED: '✅ 全部成交',
+    OrderStatus.CANCELED: '❌ 已撤销',
+    OrderStatus.REJECTED: '❌ 已拒绝',
+    OrderStatus.EXPIRED: '⏰ 已过期',
+}
+
+TRADE_ACTION_DISPLAY = {
+    TradeDirection.BUY: '🟢 买入',
+    TradeDirection.SELL: '🔴 卖出',
+}
+
+
+# ==================== 错误分类匹配器 ====================
+# OPTIMIZED: 关键字表预编译为有序元组，分类时不再逐次遍历映射表字典
+_error_keyword_table = ()  # ((关键字, 错误类型), ...)，保持映射表顺序
+_retryable_errors = frozenset()  # 可重试的错误类型
+
+
+def compile_error_keywords():
+    """根据 ERROR_KEYWORDS_MAPPING / ERROR_HANDLING_STRATEGY 重建分类表
+
+    模块加载时自动调用；运行时修改上述映射表后需再次调用使其生效。
+    """
+    global _error_keyword_table, _retryable_errors
+    _error_keyword_table = tuple(ERROR_KEYWORDS_MAPPING.items())
+    _retryable_errors = frozenset(error_type for error_type, strategy in ERROR_HANDLING_STRATEGY.items()
+                                  if strategy == ErrorStrategy.RETRY)
+
+
+def _classify_error_message(error_message: str) -> OrderError:
+    """按映射表顺序匹配，第一个命中的关键字决定错误类型"""
+    for keyword, error_type in _error_keyword_table:
         if keyword in error_message:
             return error_type
     return OrderError.UNKNOWN
 
 
+# ==================== 工具函数 ====================
+def get_error_type(error_message: str) -> OrderError:
+    """根据错误消息获取错误类型"""
+    return _classify_error_message(error_message)
+
+
 def is_retryable_error(error_type: OrderError) -> bool:
     """判断错误是否可重试"""
-    return ERROR_HANDLING_STRATEGY.get(error_type) == ErrorStrategy.RETRY
+    return error_type in _retryable_errors
 
 
 def format_error_message(error_type: OrderError, original_message: str = '') -> str:
@@ -185,41 +252,43 @@ def format_error_message(error_type: OrderError, original_message: str = '') ->
 
 def get_error_suggestion(error_type: OrderError) -> str:
     """获取错误处理建议"""
-    suggestions = {
-        OrderError.INSUFFICIENT_FUNDS: '建议: 1) 检查账户余额 2) 减少交易数量 3) 充值资金',
-        OrderError.INVALID_STOCK: '建议: 1) 检查股票代码格式 2) 确认股票是否存在 3) 检查市场类型',
-        OrderError.MARKET_CLOSED: '建议: 1) 等待市场开盘 2) 检查交易时间 3) 确认节假日安排',
-        OrderError.PRICE_LIMIT: '建议: 1) 调整委托价格 2) 使用市价单 3) 等待价格回调',
-        OrderError.VOLUME_LIMIT: '建议: 1) 调整为100的整数倍 2) 检查最小交易单位 3) 确认持仓限制',
-        OrderError.NETWORK: '建议: 1) 检查网络连接 2) 重启交易软件 3) 联系网络服务商',
-        OrderError.SYSTEM: '建议: 1) 稍后重试 2) 联系券商客服 3) 检查系统公告',
-        OrderError.ACCOUNT: '建议: 1) 联系券商客服 2) 检查账户状态 3) 确认资金账户',
-        OrderError.UNKNOWN: '建议: 1) 记录错误信息 2) 联系技术支持 3) 稍后重试',
-    }
-    return suggestions.get(error_type, '建议联系技术支持')
+    return ERROR_SUGGESTIONS.get(error_type, '建议联系技术支持')
+
+
+def get_board(symbol: str, is_st: bool = False) -> str:
+    """根据股票代码判断所属板块(LIMIT_UP_RATIO 的键)
+
+    Args:
+        symbol: 股票代码，如 '600000.SH'
+        is_st: 是否为ST股票(仅主板ST股适用5%涨跌幅)
+    """
+    code, _, exchange = symbol.partition('.')
+    exchange = exchange.upper()
+    if exchange == 'BJ' or (not exchange and code.startswith(BEIJING_BOARD_PREFIXES)):
+        return 'BEIJING_BOARD'
+    if exchange in ('SH', '') and code.startswith(STAR_MARKET_PREFIXES):
+        return 'STAR_MARKET'
+    if exchange in ('SZ', '') and code.startswith(GROWTH_BOARD_PREFIXES):
+        return 'GROWTH_BOARD'
+    return 'ST_STOCK' if is_st else 'MAIN_BOARD'
+
+
+def get_price_limit_ratio(symbol: str, is_st: bool = False) -> float:
+    """获取股票的涨跌停幅度"""
+    return LIMIT_UP_RATIO[get_board(symbol, is_st)]
 
 
 def format_order_status(status: OrderStatus) -> str:
     """格式化订单状态显示"""
-    status_map = {
-        OrderStatus.SUBMITTED: '📝 已提交',
-        OrderStatus.ACCEPTED: '✅ 已接受',
-        OrderStatus.PARTIAL: '🔄 部分成交',
-        OrderStatus.COMPLETED: '✅ 全部成交',
-        OrderStatus.CANCELED: '❌ 已撤销',
-        OrderStatus.REJECTED: '❌ 已拒绝',
-        OrderStatus.EXPIRED: '⏰ 已过期',
-    }
-    return status_map.get(status, str(status.value))
+    return ORDER_STATUS_DISPLAY.get(status, str(status.value))
 
 
 def format_trade_action(direction: TradeDirection) -> str:
     """格式化交易动作显示"""
-    action_map = {
-        TradeDirection.BUY: '🟢 买入',
-        TradeDirection.SELL: '🔴 卖出',
-    }
-    return action_map.get(direction, str(direction.value))
+    return TRADE_ACTION_DISPLAY.get(direction, str(direction.value))
+
+
+compile_error_keywords()
 
 
 # ==================== 导出列表 ====================
@@ -227,7 +296,10 @@ __all__ = [
     # 常量
     'MAX_RETRY_ATTEMPTS', 'DEFAULT_RISK_PCT', 'MAX_POSITIONS',
     'DEFAULT_PRICE_PRECISION', 'DEFAULT_VOLUME_UNIT', 'DEFAULT_TRADE_SIZE',
-    'RISK_FREE_RATE', 'TRADING_DAYS_PER_YEAR', 'LIMIT_UP_RATIO',
+    'RISK_FREE_RATE', 'TRADING_DAYS_PER_YEAR', 'QUOTE_EXPIRE_INTERVALS', 'LIMIT_UP_RATIO',
+    'STAR_MARKET_PREFIXES', 'GROWTH_BOARD_PREFIXES', 'BEIJING_BOARD_PREFIXES',
+    'MARKET_UTC_OFFSET', 'OPEN_AUCTION_START', 'OPEN_AUCTION_MATCH', 'MORNING_OPEN', 'MORNING_CLOSE',
+    'AFTERNOON_OPEN', 'CLOSE_AUCTION_START', 'AFTERNOON_CLOSE', 'TRADING_SECONDS_PER_DAY',
     
     # 枚举类
     'PriceType', 'OrderError', 'ErrorStrategy', 'OrderStatus',
@@ -235,9 +307,10 @@ __all__ = [
     
     # 错误处理常量
     'CONNECTION_MESSAGES', 'ERROR_KEYWORDS_MAPPING', 'ERROR_HANDLING_STRATEGY',
-    'ERROR_USER_MESSAGES',
+    'ERROR_USER_MESSAGES', 'ERROR_SUGGESTIONS', 'ORDER_STATUS_DISPLAY', 'TRADE_ACTION_DISPLAY',
     
     # 工具函数
     'get_error_type', 'is_retryable_error', 'format_error_message',
     'get_error_suggestion', 'format_order_status', 'format_trade_action',
+    'compile_error_keywords', 'get_board', 'get_price_limit_ratio',
 ]
\ No newline at end of file
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据模块
+包含本地行情存储、行情缓存、实时K线合成、行情录制回放、订单/成交记录等数据管理组件
+"""
+
+from .bar_store import (
+    BarStore, BarSeries, BarPanel, load_panel, write_panel, save_panel, open_panel,
+    SUPPORTED_FREQUENCIES
+)
+from .bar_aggregator import BarAggregator, BarBatch, Bar, FREQUENCY_SECONDS
+from .quote_cache import QuoteCache, Quote, QuoteSnapshot
+from .record_history import RecordHistory, SpillJournal
+from .tick_replay import TickWriter, TickFile, TickBatch, TickReplayer, ReplayStats, VirtualClock
+
+__all__ = [
+    'BarStore', 'BarSeries', 'BarPanel', 'load_panel', 'write_panel', 'save_panel', 'open_panel',
+    'SUPPORTED_FREQUENCIES',
+    'BarAggregator', 'BarBatch', 'Bar', 'FREQUENCY_SECONDS',
+    'QuoteCache', 'Quote', 'QuoteSnapshot',
+    'RecordHistory', 'SpillJournal',
+    'TickWriter', 'TickFile', 'TickBatch', 'TickReplayer', 'ReplayStats', 'VirtualClock',
+]
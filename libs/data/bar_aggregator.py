@@ -0,0 +1,535 @@
+"""
+K线合成 - 实盘逐笔/快照行情流式合成 1s/1m/5m/日线 等K线
+
+每只股票、每个频率的当前K线状态保存在预分配的 numpy 数组中(按槽位索引)，
+行情按批处理: 一批行情按 (槽位, 时间) 排序后用 reduceat 分段求 OHLCV，
+再与各股票的当前K线合并，整批只有几次向量运算，没有逐笔的 Python 循环。
+完成的K线按频率打包成 BarBatch 一次性推送给订阅者。
+
+A股交易时段处理(时间均为北京时间):
+    09:15-09:25  开盘集合竞价的虚拟撮合行情，丢弃
+    09:25-09:30  开盘集合竞价成交，并入第一根K线
+    11:30-13:00  午间休市，收盘后的快照并入 11:30 结束的K线
+    14:57-15:00  收盘集合竞价，15:00 及之后的快照并入最后一根K线
+K线按结束时间标记(如 09:30-09:31 的1分钟K线标记为 09:31)，日线标记为交易日零点。
+
+K线的完成有两种触发: 同一股票出现下一周期的行情，或调用 advance(now) 时钟推进
+(适用于成交稀疏的股票和午休/收盘)。已完成K线之后迟到的行情被丢弃并计数。
+
+使用示例:
+    aggregator = BarAggregator(freqs=('1m', '5m'), capacity=5000)
+    aggregator.subscribe(strategy.on_bars, '1m')
+    aggregator.on_tick('600000.SH', tick_time, last_price, cum_volume)  # 行情回调
+    aggregator.advance(time.time())  # 每秒由定时器调用
+"""
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from libs.config.consts import (
+    AFTERNOON_CLOSE, AFTERNOON_OPEN, MARKET_UTC_OFFSET, MORNING_CLOSE, MORNING_OPEN,
+    OPEN_AUCTION_MATCH, TRADING_SECONDS_PER_DAY,
+)
+
+SECONDS_PER_DAY = 86400
+MORNING_SECONDS = MORNING_CLOSE - MORNING_OPEN  # 上午连续竞价时长(秒)
+
+# 频率 -> 每根K线的交易秒数(均能整除上午/下午时段长度)
+FREQUENCY_SECONDS = {
+    '1s': 1, '1m': 60, '5m': 300, '15m': 900, '30m': 1800, '60m': 3600,
+    '1d': TRADING_SECONDS_PER_DAY,
+}
+
+DEFAULT_BATCH_SIZE = 4096  # on_tick 累积的行情条数达到该值时批量处理
+DEFAULT_CLOSE_DELAY = 1.0  # 时钟推进收K线前等待迟到行情的宽限(秒)
+
+
+def trading_offset(sod: np.ndarray, clock: bool = False) -> np.ndarray:
+    """当日时刻(距零点秒数) -> 距开盘的连续交易秒数
+
+    Args:
+        sod: 距当日零点的秒数(本地时间)
+        clock: False 时按行情归属计算(休市时段并入前一根K线，取值 [0, 交易秒数))；
+            True 时按时钟计算(休市时段视为下一时段开始，用于判断K线是否已结束)
+
+    Returns:
+        连续交易秒数数组
+    """
+    sod = np.asarray(sod, dtype=np.float64)
+    afternoon = MORNING_SECONDS + (sod - AFTERNOON_OPEN)
+    if clock:
+        lunch, after_close = float(MORNING_SECONDS), float(TRADING_SECONDS_PER_DAY)
+    else:
+        # 并入前一根K线: 取时段结束前的最后一个时刻
+        lunch, after_close = MORNING_SECONDS - 0.5, TRADING_SECONDS_PER_DAY - 0.5
+    return np.select(
+        [sod < MORNING_OPEN, sod < MORNING_CLOSE, sod < AFTERNOON_OPEN, sod < AFTERNOON_CLOSE],
+        [0.0, sod - MORNING_OPEN, lunch, afternoon],
+        after_close)
+
+
+class Bar(NamedTuple):
+    """单根K线"""
+    symbol: str
+    freq: str
+    ts: np.datetime64  # 结束时间(日线为交易日零点)
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+class BarBatch(NamedTuple):
+    """一批已完成的K线(同一频率)，各数组与 symbols 一一对应，按时间、槽位排序"""
+    freq: str
+    symbols: List[str]
+    ts: np.ndarray  # datetime64[ns]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @property
+    def size(self) -> int:
+        return len(self.symbols)
+
+    def bars(self) -> Iterator[Bar]:
+        """逐根迭代(便于按K线编写的策略使用)"""
+        for i, symbol in enumerate(self.symbols):
+            yield Bar(symbol, self.freq, self.ts[i], float(self.open[i]), float(self.high[i]),
+                      float(self.low[i]), float(self.close[i]), float(self.volume[i]))
+
+
+class _FrequencyState:
+    """单个频率下各槽位的当前K线"""
+
+    __slots__ = ('freq', 'period', 'buckets_per_day', 'key', 'is_open',
+                 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, freq: str, capacity: int):
+        self.freq = freq
+        self.period = FREQUENCY_SECONDS[freq]
+        self.buckets_per_day = TRADING_SECONDS_PER_DAY // self.period
+        self.key = np.full(capacity, -1, dtype=np.int64)  # 交易日序号 × 每日K线数 + K线序号
+        self.is_open = np.zeros(capacity, dtype=bool)
+        self.open = np.full(capacity, np.nan)
+        self.high = np.full(capacity, np.nan)
+        self.low = np.full(capacity, np.nan)
+        self.close = np.full(capacity, np.nan)
+        self.volume = np.zeros(capacity)
+
+    def grow(self, capacity: int):
+        for name, fill in (('key', -1), ('is_open', False), ('open', np.nan), ('high', np.nan),
+                           ('low', np.nan), ('close', np.nan), ('volume', 0.0)):
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def keys_for(self, day: np.ndarray, offset: np.ndarray) -> np.ndarray:
+        bucket = np.minimum((offset // self.period).astype(np.int64), self.buckets_per_day)
+        return day * self.buckets_per_day + bucket
+
+    def labels(self, keys: np.ndarray) -> np.ndarray:
+        """K线键 -> 结束时间标签(datetime64[ns]，本地时间)"""
+        day, bucket = np.divmod(keys, self.buckets_per_day)
+        if self.freq == '1d':
+            sod = np.zeros_like(bucket)
+        else:
+            end = (bucket + 1) * self.period
+            sod = np.where(end <= MORNING_SECONDS, MORNING_OPEN + end,
+                           AFTERNOON_OPEN + end - MORNING_SECONDS)
+        return ((day * SECONDS_PER_DAY + sod) * 1_000_000_000).astype('datetime64[ns]')
+
+
+class BarAggregator:
+    """多股票多频率的流式K线合成器"""
+
+    def __init__(self, freqs: Iterable[str] = ('1m',), capacity: int = 1000,
+                 cumulative_volume: bool = True, close_delay: float = DEFAULT_CLOSE_DELAY,
+                 utc_offset: int = MARKET_UTC_OFFSET, batch_size: int = DEFAULT_BATCH_SIZE):
+        """初始化合成器
+
+        Args:
+            freqs: 合成的K线频率，取值见 FREQUENCY_SECONDS
+            capacity: 预分配的股票数量(不足时按倍数扩容)
+            cumulative_volume: 行情中的成交量是否为当日累计量(QMT快照为累计量)
+            close_delay: advance 收K线前等待迟到行情的宽限(秒)
+            utc_offset: 数值时间戳(epoch秒)转换为本地时间的偏移
+            batch_size: on_tick 缓冲的行情条数
+        """
+        freqs = tuple(dict.fromkeys(freqs))
+        unknown = [f for f in freqs if f not in FREQUENCY_SECONDS]
+        if unknown or not freqs:
+            raise ValueError(f"不支持的K线频率: {unknown or freqs}，可选: {list(FREQUENCY_SECONDS)}")
+        self.freqs = freqs
+        self.cumulative_volume = cumulative_volume
+        self.close_delay = close_delay
+        self.utc_offset = utc_offset
+        self.batch_size = batch_size
+
+        self._capacity = max(1, int(capacity))
+        self._states = {freq: _FrequencyState(freq, self._capacity) for freq in freqs}
+        self._last_cum = np.zeros(self._capacity)  # 各槽位最近的累计成交量
+        self._last_day = np.full(self._capacity, -1, dtype=np.int64)  # 累计量所属交易日
+        self._slots: Dict[str, int] = {}
+        self._symbols: List[str] = []
+
+        self._subscribers: Dict[str, List[Callable[[BarBatch], None]]] = {freq: [] for freq in freqs}
+        self._lock = threading.Lock()
+        self._buffer: List[tuple] = []  # on_tick 缓冲: (槽位, 时间, 价格, 成交量)
+
+        self.ticks = 0  # 处理的行情条数
+        self.auction_ticks = 0  # 丢弃的集合竞价虚拟撮合行情
+        self.invalid_ticks = 0  # 价格无效的行情
+        self.late_ticks = 0  # 所属K线已完成的迟到行情(按频率累计)
+        self.bars_emitted = 0
+
+    @classmethod
+    def from_config(cls, app_config, freqs: Iterable[str] = ('1m',), **kwargs) -> 'BarAggregator':
+        """按 data_management.max_quote_cache 预分配股票容量"""
+        kwargs.setdefault('capacity', app_config.data_management.max_quote_cache)
+        return cls(freqs, **kwargs)
+
+    # ==================== 订阅 ====================
+    def subscribe(self, callback: Callable[[BarBatch], None], freqs: Optional[Iterable[str]] = None):
+        """订阅已完成的K线批次
+
+        Args:
+            callback: 回调函数，参数为 BarBatch
+            freqs: 订阅的频率(字符串或列表)，None表示全部
+        """
+        for freq in self._select(freqs):
+            self._subscribers[freq].append(callback)
+
+    def unsubscribe(self, callback: Callable[[BarBatch], None], freqs: Optional[Iterable[str]] = None):
+        for freq in self._select(freqs):
+            if callback in self._subscribers[freq]:
+                self._subscribers[freq].remove(callback)
+
+    def _select(self, freqs) -> Sequence[str]:
+        if freqs is None:
+            return self.freqs
+        freqs = (freqs,) if isinstance(freqs, str) else tuple(freqs)
+        unknown = [f for f in freqs if f not in self._states]
+        if unknown:
+            raise ValueError(f"未合成的K线频率: {unknown}")
+        return freqs
+
+    # ==================== 槽位 ====================
+    def slot(self, symbol: str) -> int:
+        """股票代码 -> 槽位号(新股票自动分配)"""
+        slot = self._slots.get(symbol)
+        if slot is None:
+            slot = self._slots[symbol] = len(self._symbols)
+            self._symbols.append(symbol)
+            if slot >= self._capacity:
+                self._grow(slot + 1)
+        return slot
+
+    def _grow(self, needed: int):
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        for state in self._states.values():
+            state.grow(capacity)
+        last_cum, last_day = self._last_cum, self._last_day
+        self._last_cum = np.zeros(capacity)
+        self._last_cum[:len(last_cum)] = last_cum
+        self._last_day = np.full(capacity, -1, dtype=np.int64)
+        self._last_day[:len(last_day)] = last_day
+        self._capacity = capacity
+
+    # ==================== 输入 ====================
+    def on_tick(self, symbol: str, ts: float, price: float, volume: float = 0.0) -> Dict[str, BarBatch]:
+        """输入一条行情(缓冲，累积到 batch_size 条后批量处理)
+
+        Args:
+            symbol: 股票代码
+            ts: 时间戳(epoch秒)
+            price: 最新价
+            volume: 成交量(cumulative_volume 为 True 时为当日累计量)
+
+        Returns:
+            本次触发处理时完成的K线 {频率: BarBatch}，未触发时为空字典
+        """
+        with self._lock:
+            self._buffer.append((self.slot(symbol), ts, price, volume))
+            if len(self._buffer) < self.batch_size:
+                return {}
+            batches = self._flush_buffer()
+        self._emit(batches)
+        return batches
+
+    def on_ticks(self, symbols: Sequence[str], ts, price, volume=None) -> Dict[str, BarBatch]:
+        """批量输入行情
+
+        Args:
+            symbols: 股票代码序列
+            ts: 时间戳数组(epoch秒，或 datetime64 本地时间)
+            price: 最新价数组
+            volume: 成交量数组(默认为0)
+
+        Returns:
+            完成的K线 {频率: BarBatch}
+        """
+        with self._lock:
+            slots = np.fromiter((self.slot(s) for s in symbols), dtype=np.int64, count=len(symbols))
+            batches = self._merge(self._flush_buffer(), self._process(slots, ts, price, volume))
+        self._emit(batches)
+        return batches
+
+    def flush(self) -> Dict[str, BarBatch]:
+        """立即处理 on_tick 缓冲中的行情"""
+        with self._lock:
+            batches = self._flush_buffer()
+        self._emit(batches)
+        return batches
+
+    def advance(self, now: float) -> Dict[str, BarBatch]:
+        """时钟推进: 完成结束时间早于 now - close_delay 的K线
+
+        Args:
+            now: 当前时间(epoch秒)
+
+        Returns:
+            完成的K线 {频率: BarBatch}
+        """
+        local = now + self.utc_offset - self.close_delay
+        day = int(local // SECONDS_PER_DAY)
+        offset = trading_offset(np.array([local - day * SECONDS_PER_DAY]), clock=True)
+        with self._lock:
+            batches = self._flush_buffer()
+            closed = {}
+            for freq, state in self._states.items():
+                boundary = state.keys_for(np.array([day]), offset)[0]
+                n = len(self._symbols)
+                done = np.flatnonzero(state.is_open[:n] & (state.key[:n] < boundary))
+                if len(done):
+                    closed[freq] = self._close_state(state, done)
+            batches = self._merge(batches, closed)
+        self._emit(batches)
+        return batches
+
+    def close_all(self) -> Dict[str, BarBatch]:
+        """完成所有未完成的K线(收盘或停止时调用)"""
+        with self._lock:
+            batches = self._flush_buffer()
+            closed = {}
+            for freq, state in self._states.items():
+                done = np.flatnonzero(state.is_open[:len(self._symbols)])
+                if len(done):
+                    closed[freq] = self._close_state(state, done)
+            batches = self._merge(batches, closed)
+        self._emit(batches)
+        return batches
+
+    def current(self, symbol: str, freq: str) -> Optional[Bar]:
+        """股票当前未完成的K线"""
+        slot = self._slots.get(symbol)
+        state = self._states[freq]
+        if slot is None or not state.is_open[slot]:
+            return None
+        return Bar(symbol, freq, state.labels(state.key[slot:slot + 1])[0], float(state.open[slot]),
+                   float(state.high[slot]), float(state.low[slot]), float(state.close[slot]),
+                   float(state.volume[slot]))
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._symbols)
+
+    # ==================== 批处理 ====================
+    def _flush_buffer(self) -> Dict[str, BarBatch]:
+        if not self._buffer:
+            return {}
+        buffer, self._buffer = self._buffer, []
+        slots, ts, price, volume = zip(*buffer)
+        return self._process(np.array(slots, dtype=np.int64), np.array(ts, dtype=np.float64),
+                             price, volume)
+
+    def _process(self, slots: np.ndarray, ts, price, volume) -> Dict[str, BarBatch]:
+        n = len(slots)
+        if n == 0:
+            return {}
+        self.ticks += n
+        ts = np.asarray(ts)
+        if np.issubdtype(ts.dtype, np.datetime64):
+            local = ts.astype('datetime64[ns]').view(np.int64) / 1e9
+        else:
+            local = ts.astype(np.float64, copy=False) + self.utc_offset
+        price = np.asarray(price, dtype=np.float64)
+        volume = np.zeros(n) if volume is None else np.asarray(volume, dtype=np.float64)
+
+        day = (local // SECONDS_PER_DAY).astype(np.int64)
+        sod = local - day * SECONDS_PER_DAY
+
+        # 丢弃集合竞价虚拟撮合行情与无效价格
+        auction = sod < OPEN_AUCTION_MATCH
+        invalid = ~(price > 0)
+        keep = ~(auction | invalid)
+        self.auction_ticks += int(auction.sum())
+        self.invalid_ticks += int((invalid & ~auction).sum())
+        # 按 (槽位, 时间) 稳定排序，同一时间保持到达顺序
+        order = np.lexsort((local, slots))
+        order = order[keep[order]]
+        if len(order) == 0:
+            return {}
+        slots, day, price, volume = slots[order], day[order], price[order], volume[order]
+        offset = trading_offset(sod[order])
+
+        first = np.empty(len(slots), dtype=bool)
+        first[0] = True
+        np.not_equal(slots[1:], slots[:-1], out=first[1:])
+        if self.cumulative_volume:
+            volume = self._volume_delta(slots, day, volume, first)
+
+        batches = {}
+        for freq, state in self._states.items():
+            batch = self._aggregate(state, slots, state.keys_for(day, offset), price, volume)
+            if batch is not None:
+                batches[freq] = batch
+        return batches
+
+    def _volume_delta(self, slots: np.ndarray, day: np.ndarray, cum: np.ndarray,
+                      first: np.ndarray) -> np.ndarray:
+        """当日累计成交量 -> 每条行情的增量(跨日从0开始)
+
+        增量相对于该槽位当日已见过的最大累计量计算，乱序或重复的行情增量为0，
+        且不会把记录的累计量拉低，避免之后的行情重复计入成交量。
+        """
+        n = len(cum)
+        # 按 (槽位, 交易日) 分组，组内已按时间排序
+        start = first.copy()
+        np.not_equal(day[1:], day[:-1], out=start[1:], where=~first[1:])
+        group = np.cumsum(start) - 1
+        # 组起点的基准: 同一交易日沿用记录的累计量，否则从0开始
+        seed = np.where(self._last_day[slots[start]] == day[start], self._last_cum[slots[start]], 0.0)
+        # 组内累计量的前缀最大值: 按 (组, 累计量) 排名后取排名的前缀最大值
+        ranked = np.lexsort((cum, group))
+        rank = np.empty(n, dtype=np.int64)
+        rank[ranked] = np.arange(n)
+        high = cum[ranked[np.maximum.accumulate(rank)]]
+        base = np.empty(n)
+        base[0] = 0.0
+        base[1:] = high[:-1]
+        base[start] = 0.0
+        base = np.maximum(base, seed[group])
+
+        last = np.append(first[1:], True)  # 各槽位的最后一条
+        newer = day[last] >= self._last_day[slots[last]]  # 迟到的前一交易日行情不覆盖记录
+        self._last_cum[slots[last][newer]] = np.maximum(base[last], cum[last])[newer]
+        self._last_day[slots[last][newer]] = day[last][newer]
+        return np.maximum(cum - base, 0.0)
+
+    def _aggregate(self, state: _FrequencyState, slots: np.ndarray, keys: np.ndarray,
+                   price: np.ndarray, volume: np.ndarray) -> Optional[BarBatch]:
+        """合并一个频率的行情，返回完成的K线"""
+        # 迟到行情: 所属K线早于当前K线，或当前K线已由时钟完成
+        state_key = state.key[slots]
+        late = (keys < state_key) | ((keys == state_key) & ~state.is_open[slots])
+        if late.any():
+            self.late_ticks += int(late.sum())
+            on_time = ~late
+            slots, keys, price, volume = slots[on_time], keys[on_time], price[on_time], volume[on_time]
+            if len(slots) == 0:
+                return None
+
+        # 按 (槽位, K线) 分段
+        n = len(slots)
+        boundary = np.empty(n, dtype=bool)
+        boundary[0] = True
+        boundary[1:] = (slots[1:] != slots[:-1]) | (keys[1:] != keys[:-1])
+        starts = np.flatnonzero(boundary)
+        seg_slot, seg_key = slots[starts], keys[starts]
+        seg_open = price[starts]
+        seg_close = price[np.append(starts[1:], n) - 1]
+        seg_high = np.maximum.reduceat(price, starts)
+        seg_low = np.minimum.reduceat(price, starts)
+        seg_volume = np.add.reduceat(volume, starts)
+
+        m = len(starts)
+        slot_first = np.empty(m, dtype=bool)
+        slot_first[0] = True
+        np.not_equal(seg_slot[1:], seg_slot[:-1], out=slot_first[1:])
+        slot_last = np.append(slot_first[1:], True)
+
+        # 各槽位第一段: 与当前K线同一周期则合并，否则当前K线完成
+        idx = np.flatnonzero(slot_first)
+        s = seg_slot[idx]
+        was_open = state.is_open[s]
+        same = was_open & (seg_key[idx] == state.key[s])
+        merge_idx, merge_slot = idx[same], s[same]
+        seg_open[merge_idx] = state.open[merge_slot]
+        seg_high[merge_idx] = np.maximum(seg_high[merge_idx], state.high[merge_slot])
+        seg_low[merge_idx] = np.minimum(seg_low[merge_idx], state.low[merge_slot])
+        seg_volume[merge_idx] += state.volume[merge_slot]
+        closed_slot = s[was_open & ~same]
+        out_key = [state.key[closed_slot]]
+        out_slot = [closed_slot]
+        out_cols = [[state.open[closed_slot]], [state.high[closed_slot]], [state.low[closed_slot]],
+                    [state.close[closed_slot]], [state.volume[closed_slot]]]
+
+        # 各槽位最后一段成为新的当前K线，其余段均已完成
+        done = ~slot_last
+        out_key.append(seg_key[done])
+        out_slot.append(seg_slot[done])
+        for col, seg in zip(out_cols, (seg_open, seg_high, seg_low, seg_close, seg_volume)):
+            col.append(seg[done])
+
+        s = seg_slot[slot_last]
+        state.key[s] = seg_key[slot_last]
+        state.is_open[s] = True
+        state.open[s] = seg_open[slot_last]
+        state.high[s] = seg_high[slot_last]
+        state.low[s] = seg_low[slot_last]
+        state.close[s] = seg_close[slot_last]
+        state.volume[s] = seg_volume[slot_last]
+
+        return self._make_batch(state, np.concatenate(out_slot), np.concatenate(out_key),
+                                [np.concatenate(col) for col in out_cols])
+
+    def _close_state(self, state: _FrequencyState, slots: np.ndarray) -> Optional[BarBatch]:
+        """由时钟完成指定槽位的当前K线(保留键值，用于识别之后的迟到行情)"""
+        state.is_open[slots] = False
+        cols = [state.open[slots], state.high[slots], state.low[slots], state.close[slots],
+                state.volume[slots]]
+        return self._make_batch(state, slots, state.key[slots], cols)
+
+    def _make_batch(self, state: _FrequencyState, slots: np.ndarray, keys: np.ndarray,
+                    cols: List[np.ndarray]) -> Optional[BarBatch]:
+        if len(slots) == 0:
+            return None
+        order = np.lexsort((slots, keys))
+        if not np.all(order[:-1] < order[1:]):
+            slots, keys = slots[order], keys[order]
+            cols = [col[order] for col in cols]
+        self.bars_emitted += len(slots)
+        symbols = self._symbols
+        return BarBatch(state.freq, [symbols[i] for i in slots], state.labels(keys), *cols)
+
+    @staticmethod
+    def _merge(first: Dict[str, BarBatch], second: Dict[str, BarBatch]) -> Dict[str, BarBatch]:
+        """合并两组结果(同一频率的批次按先后拼接)"""
+        if not first:
+            return second
+        merged = dict(first)
+        for freq, batch in second.items():
+            prior = merged.get(freq)
+            if prior is None:
+                merged[freq] = batch
+            else:
+                merged[freq] = BarBatch(freq, prior.symbols + batch.symbols,
+                                        *(np.concatenate((a, b)) for a, b in zip(prior[2:], batch[2:])))
+        return merged
+
+    def _emit(self, batches: Dict[str, BarBatch]):
+        for freq, batch in batches.items():
+            for callback in list(self._subscribers[freq]):
+                callback(batch)
+
+    def __repr__(self) -> str:
+        return (f"BarAggregator(freqs={list(self.freqs)}, symbols={len(self._symbols)}, "
+                f"ticks={self.ticks}, bars={self.bars_emitted})")
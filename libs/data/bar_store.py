@@ -0,0 +1,426 @@
+"""
+列式K线存储 - 基于内存映射的本地历史行情仓库
+
+每个 (频率, 股票代码) 对应一个文件，文件内按列连续存放:
+    ts(int64, 纳秒时间戳) | open | high | low | close | volume (float64)
+
+读取时通过 numpy.memmap 映射，不做任何解析和拷贝，回测区间
+(backtest.start_date / end_date) 通过对有序时间戳二分查找得到零拷贝切片。
+多个回测进程读取同一文件时共享操作系统页缓存。
+
+多品种对齐后的面板(时间 × 品种)通过 load_panel(cache_dir=...) 按行块写入
+.npy 列文件缓存并以内存映射返回，同样不在进程内持有整块副本。
+"""
+import hashlib
+import os
+import shutil
+import struct
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+# ==================== 文件格式常量 ====================
+BAR_FILE_MAGIC = b'PQBAR001'  # 文件魔数(含版本号)
+BAR_FILE_SUFFIX = '.bar'  # 文件后缀
+BAR_HEADER_SIZE = 64  # 文件头大小(字节)，保证数据区按64字节对齐
+BAR_COLUMNS = ('ts', 'open', 'high', 'low', 'close', 'volume')  # 列顺序
+PRICE_COLUMNS = BAR_COLUMNS[1:]  # 以float64存储的列
+
+# 支持的K线频率(同时作为子目录名)
+SUPPORTED_FREQUENCIES = ('1s', '1m', '5m', '15m', '30m', '60m', '1d')
+
+_HEADER_STRUCT = struct.Struct('<8sQ')  # 魔数 + 行数
+
+PANEL_BLOCK_BYTES = 64 << 20  # 写入面板缓存时单个行块(每列)的内存上限
+PANEL_UNION_GROUP = 64  # 合并时间戳并集时每组拼接的品种数
+
+DateLike = Union[str, date, datetime, np.datetime64, None]
+
+
+def to_datetime64(value: DateLike) -> Optional[np.datetime64]:
+    """将各种日期表示统一转换为 datetime64[ns]"""
+    if value is None:
+        return None
+    if isinstance(value, np.datetime64):
+        return value.astype('datetime64[ns]')
+    return np.datetime64(value, 'ns')
+
+
+def _is_date_only(value: DateLike) -> bool:
+    """判断日期参数是否只包含日期部分(用于结束日期的闭区间处理)"""
+    if isinstance(value, str):
+        return len(value.strip()) <= 10
+    return isinstance(value, date) and not isinstance(value, datetime)
+
+
+class BarSeries:
+    """单个品种单个频率的K线序列
+
+    所有列均为只读的内存映射视图(或其切片)，不持有数据副本。
+    """
+
+    __slots__ = ('symbol', 'freq', 'ts', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, symbol: str, freq: str, ts: np.ndarray, open_: np.ndarray,
+                 high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray):
+        self.symbol = symbol
+        self.freq = freq
+        self.ts = ts
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def __repr__(self) -> str:
+        return f"BarSeries(symbol={self.symbol}, freq={self.freq}, bars={len(self)})"
+
+    @property
+    def datetimes(self) -> np.ndarray:
+        """以 datetime64[ns] 视图返回时间戳(零拷贝)"""
+        return self.ts.view('datetime64[ns]')
+
+    def index_range(self, start: DateLike = None, end: DateLike = None) -> Tuple[int, int]:
+        """根据日期区间计算行号范围 [lo, hi)
+
+        Args:
+            start: 开始日期(含)，None表示不限
+            end: 结束日期(含)，只给日期时包含当天全部K线，None表示不限
+        """
+        ts = self.ts
+        lo = 0
+        hi = len(ts)
+        if start is not None:
+            lo = int(np.searchsorted(ts, to_datetime64(start).astype(np.int64), side='left'))
+        if end is not None:
+            end_ts = to_datetime64(end)
+            if _is_date_only(end):
+                # 仅日期: 取到下一自然日零点之前
+                end_ts = end_ts + np.timedelta64(1, 'D')
+                hi = int(np.searchsorted(ts, end_ts.astype(np.int64), side='left'))
+            else:
+                hi = int(np.searchsorted(ts, end_ts.astype(np.int64), side='right'))
+        return lo, max(lo, hi)
+
+    def slice(self, start: DateLike = None, end: DateLike = None) -> 'BarSeries':
+        """按日期区间返回零拷贝切片"""
+        lo, hi = self.index_range(start, end)
+        return BarSeries(self.symbol, self.freq, self.ts[lo:hi], self.open[lo:hi],
+                         self.high[lo:hi], self.low[lo:hi], self.close[lo:hi],
+                         self.volume[lo:hi])
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """以字典形式返回所有列"""
+        return {name: getattr(self, name) for name in BAR_COLUMNS}
+
+
+class BarStore:
+    """本地K线仓库
+
+    目录结构: ``<root>/<freq>/<symbol>.bar``
+
+    使用示例:
+        store = BarStore('data/bars')
+        bars = store.load('600000.SH', '1d', '2023-01-01', '2023-12-31')
+        bars.close  # numpy只读视图，直接映射自磁盘
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        """初始化K线仓库
+
+        Args:
+            root: 仓库根目录
+        """
+        self.root = Path(root)
+        self._cache: Dict[Tuple[str, str], BarSeries] = {}  # 已映射文件缓存
+
+    # ==================== 路径 ====================
+    def path_for(self, symbol: str, freq: str) -> Path:
+        """获取品种文件路径"""
+        if freq not in SUPPORTED_FREQUENCIES:
+            raise ValueError(f"不支持的K线频率: {freq}")
+        return self.root / freq / f"{symbol}{BAR_FILE_SUFFIX}"
+
+    def exists(self, symbol: str, freq: str) -> bool:
+        """判断品种数据是否存在"""
+        return self.path_for(symbol, freq).exists()
+
+    def symbols(self, freq: str) -> List[str]:
+        """列出指定频率下所有已存储的品种"""
+        freq_dir = self.root / freq
+        if not freq_dir.is_dir():
+            return []
+        return sorted(p.name[:-len(BAR_FILE_SUFFIX)] for p in freq_dir.iterdir()
+                      if p.name.endswith(BAR_FILE_SUFFIX))
+
+    # ==================== 写入 ====================
+    def write(self, symbol: str, freq: str, ts: Iterable, open_: Iterable, high: Iterable,
+              low: Iterable, close: Iterable, volume: Iterable) -> Path:
+        """写入(覆盖)品种K线
+
+        数据按时间戳排序后落盘，先写临时文件再原子替换，
+        正在映射旧文件的读者不受影响。
+
+        Args:
+            symbol: 股票代码
+            freq: K线频率
+            ts: 时间戳序列(datetime64 或 纳秒整数)
+            open_/high/low/close/volume: 对应列
+        """
+        ts_arr = np.asarray(ts)
+        if np.issubdtype(ts_arr.dtype, np.datetime64):
+            ts_arr = ts_arr.astype('datetime64[ns]').view(np.int64)
+        ts_arr = ts_arr.astype(np.int64, copy=False)
+        cols = [np.asarray(c, dtype=np.float64) for c in (open_, high, low, close, volume)]
+        n = len(ts_arr)
+        if any(len(c) != n for c in cols):
+            raise ValueError(f"{symbol} 各列长度不一致")
+
+        order = np.argsort(ts_arr, kind='stable')
+        if not np.all(order[:-1] < order[1:]):
+            ts_arr = ts_arr[order]
+            cols = [c[order] for c in cols]
+
+        path = self.path_for(symbol, freq)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER_STRUCT.pack(BAR_FILE_MAGIC, n).ljust(BAR_HEADER_SIZE, b'\0'))
+            f.write(ts_arr.tobytes())
+            for col in cols:
+                f.write(col.tobytes())
+        os.replace(tmp_path, path)
+        self._cache.pop((symbol, freq), None)
+        return path
+
+    def write_series(self, series: BarSeries) -> Path:
+        """写入 BarSeries"""
+        return self.write(series.symbol, series.freq, series.ts, series.open, series.high,
+                          series.low, series.close, series.volume)
+
+    # ==================== 读取 ====================
+    def open(self, symbol: str, freq: str) -> BarSeries:
+        """以内存映射方式打开品种全部K线(结果缓存)"""
+        key = (symbol, freq)
+        series = self._cache.get(key)
+        if series is not None:
+            return series
+
+        path = self.path_for(symbol, freq)
+        if not path.exists():
+            raise FileNotFoundError(f"K线数据不存在: {path}")
+        with open(path, 'rb') as f:
+            magic, n = _HEADER_STRUCT.unpack(f.read(_HEADER_STRUCT.size))
+        if magic != BAR_FILE_MAGIC:
+            raise ValueError(f"无效的K线文件: {path}")
+
+        if n == 0:
+            empty = np.empty(0, dtype=np.float64)
+            series = BarSeries(symbol, freq, np.empty(0, dtype=np.int64),
+                               empty, empty, empty, empty, empty)
+        else:
+            # 一次映射整个数据区，按列切分为视图
+            data = np.memmap(path, dtype=np.float64, mode='r', offset=BAR_HEADER_SIZE,
+                             shape=(len(BAR_COLUMNS), n))
+            series = BarSeries(symbol, freq, data[0].view(np.int64), data[1], data[2],
+                               data[3], data[4], data[5])
+        self._cache[key] = series
+        return series
+
+    def load(self, symbol: str, freq: str, start: DateLike = None,
+             end: DateLike = None) -> BarSeries:
+        """加载品种指定区间K线(零拷贝切片)"""
+        return self.open(symbol, freq).slice(start, end)
+
+    def load_many(self, symbols: Iterable[str], freq: str, start: DateLike = None,
+                  end: DateLike = None, skip_missing: bool = True) -> Dict[str, BarSeries]:
+        """批量加载多个品种
+
+        Args:
+            skip_missing: 为True时跳过不存在的品种，否则抛出异常
+        """
+        result = {}
+        for symbol in symbols:
+            try:
+                result[symbol] = self.load(symbol, freq, start, end)
+            except FileNotFoundError:
+                if not skip_missing:
+                    raise
+        return result
+
+    def close(self):
+        """释放所有映射(仅清理本实例引用，页缓存由操作系统管理)"""
+        self._cache.clear()
+
+    @classmethod
+    def from_config(cls, backtest_config) -> 'BarStore':
+        """根据 BacktestConfig 创建仓库"""
+        return cls(backtest_config.data_dir)
+
+
+class BarPanel:
+    """多品种对齐后的K线面板 (时间 × 品种)
+
+    各列均为二维数组，形状为 (len(ts), len(symbols))，缺失(停牌)处为NaN。
+    """
+
+    __slots__ = ('symbols', 'freq', 'ts', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, symbols: List[str], freq: str, ts: np.ndarray, open_: np.ndarray,
+                 high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray):
+        self.symbols = symbols
+        self.freq = freq
+        self.ts = ts
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.close.shape
+
+    def slice(self, start: int, stop: int) -> 'BarPanel':
+        """按行号截取 [start, stop) 区间(各列为视图，不复制数据)"""
+        return BarPanel(self.symbols, self.freq, self.ts[start:stop], self.open[start:stop],
+                        self.high[start:stop], self.low[start:stop], self.close[start:stop],
+                        self.volume[start:stop])
+
+    def __repr__(self) -> str:
+        return f"BarPanel(freq={self.freq}, bars={self.shape[0]}, symbols={self.shape[1]})"
+
+    @classmethod
+    def from_series(cls, series_list: List[BarSeries], freq: str) -> 'BarPanel':
+        """将多个 BarSeries 按时间戳并集对齐为面板
+
+        复制路径: 为五个价格列各分配一个稠密的 (时间, 品种) float64 数组并拷贝数据，
+        仅适合小样本；大股票池请使用 load_panel(cache_dir=...) 得到内存映射面板。
+        """
+        symbols = [s.symbol for s in series_list]
+        ts = _union_ts(series_list)
+        shape = (len(ts), len(series_list))
+        panel_cols = {name: np.full(shape, np.nan) for name in PRICE_COLUMNS}
+        for j, s in enumerate(series_list):
+            rows = np.searchsorted(ts, s.ts)
+            for name in PRICE_COLUMNS:
+                panel_cols[name][rows, j] = getattr(s, name)
+        return cls(symbols, freq, ts, panel_cols['open'], panel_cols['high'],
+                   panel_cols['low'], panel_cols['close'], panel_cols['volume'])
+
+
+def _union_ts(series_list: List[BarSeries]) -> np.ndarray:
+    """分组合并各品种时间戳的并集(有序)，不一次性拼接全部品种的时间戳"""
+    ts = np.empty(0, dtype=np.int64)
+    for i in range(0, len(series_list), PANEL_UNION_GROUP):
+        group = [s.ts for s in series_list[i:i + PANEL_UNION_GROUP]]
+        ts = np.unique(np.concatenate([ts] + group))
+    return ts
+
+
+def load_panel(store: BarStore, symbols: Iterable[str], freq: str, start: DateLike = None,
+               end: DateLike = None, cache_dir: Union[str, Path, None] = None) -> BarPanel:
+    """从仓库加载多个品种并对齐为面板(缺失品种自动跳过)
+
+    Args:
+        cache_dir: 面板缓存目录。指定时对齐结果按 (品种, 频率, 区间, 源文件版本) 缓存为
+            .npy 列文件并以只读内存映射返回(零拷贝，多进程共享页缓存)；
+            None 时经 BarPanel.from_series 在内存中复制对齐
+    """
+    series = store.load_many(symbols, freq, start, end)
+    if cache_dir is None:
+        return BarPanel.from_series(list(series.values()), freq)
+
+    directory = Path(cache_dir) / _panel_cache_key(store, list(series), freq, start, end)
+    if not directory.is_dir():
+        tmp_dir = directory.with_name(f"{directory.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        write_panel(list(series.values()), freq, tmp_dir)
+        try:
+            os.replace(tmp_dir, directory)
+        except OSError:
+            # 其他进程已写入同一缓存
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return open_panel(directory)
+
+
+def _panel_cache_key(store: BarStore, symbols: List[str], freq: str, start: DateLike,
+                     end: DateLike) -> str:
+    """面板缓存键: 品种列表、频率、区间及各源文件的大小与修改时间(重新下载后自动失效)"""
+    digest = hashlib.sha1(f"{freq}\0{start}\0{end}\n".encode('utf-8'))
+    for symbol in symbols:
+        stat = store.path_for(symbol, freq).stat()
+        digest.update(f"{symbol}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode('utf-8'))
+    return f"{freq}_{digest.hexdigest()[:16]}"
+
+
+def _write_panel_meta(directory: Path, symbols: List[str], freq: str):
+    (directory / 'symbols.txt').write_text('\n'.join(symbols), encoding='utf-8')
+    (directory / 'freq.txt').write_text(freq, encoding='utf-8')
+
+
+def write_panel(series_list: List[BarSeries], freq: str, directory: Union[str, Path]) -> Path:
+    """将多个 BarSeries 按时间戳并集对齐，直接写为 save_panel() 格式的列文件
+
+    按行块对齐后写入 .npy 内存映射，常驻内存为每列一个行块(PANEL_BLOCK_BYTES)，
+    不为整个面板分配稠密数组。
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    ts = _union_ts(series_list)
+    np.save(directory / 'ts.npy', ts)
+    shape = (len(ts), len(series_list))
+    if 0 in shape:
+        for name in PRICE_COLUMNS:
+            np.save(directory / f'{name}.npy', np.empty(shape))
+        _write_panel_meta(directory, [s.symbol for s in series_list], freq)
+        return directory
+
+    outputs = {name: np.lib.format.open_memmap(directory / f'{name}.npy', mode='w+',
+                                               dtype=np.float64, shape=shape)
+               for name in PRICE_COLUMNS}
+    block_rows = max(1, PANEL_BLOCK_BYTES // (8 * shape[1]))
+    for r0 in range(0, shape[0], block_rows):
+        block_ts = ts[r0:r0 + block_rows]
+        blocks = {name: np.full((len(block_ts), shape[1]), np.nan) for name in PRICE_COLUMNS}
+        for j, s in enumerate(series_list):
+            lo = int(np.searchsorted(s.ts, block_ts[0], side='left'))
+            hi = int(np.searchsorted(s.ts, block_ts[-1], side='right'))
+            if lo == hi:
+                continue
+            rows = np.searchsorted(block_ts, s.ts[lo:hi])
+            for name in PRICE_COLUMNS:
+                blocks[name][rows, j] = getattr(s, name)[lo:hi]
+        for name in PRICE_COLUMNS:
+            outputs[name][r0:r0 + len(block_ts)] = blocks[name]
+    for out in outputs.values():
+        out.flush()
+    _write_panel_meta(directory, [s.symbol for s in series_list], freq)
+    return directory
+
+
+def save_panel(panel: BarPanel, directory: Union[str, Path]) -> Path:
+    """将面板以 .npy 列文件保存，供其他进程以内存映射方式共享读取"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    np.save(directory / 'ts.npy', np.asarray(panel.ts))
+    for name in PRICE_COLUMNS:
+        np.save(directory / f'{name}.npy', np.ascontiguousarray(getattr(panel, name)))
+    _write_panel_meta(directory, list(panel.symbols), panel.freq)
+    return directory
+
+
+def open_panel(directory: Union[str, Path]) -> BarPanel:
+    """以只读内存映射方式打开 save_panel() 保存的面板(零拷贝，多进程共享页缓存)"""
+    directory = Path(directory)
+    symbols_text = (directory / 'symbols.txt').read_text(encoding='utf-8')
+    symbols = symbols_text.split('\n') if symbols_text else []
+    freq = (directory / 'freq.txt').read_text(encoding='utf-8')
+    cols = {name: np.load(directory / f'{name}.npy', mmap_mode='r') for name in PRICE_COLUMNS}
+    return BarPanel(symbols, freq, np.load(directory / 'ts.npy', mmap_mode='r'),
+                    cols['open'], cols['high'], cols['low'], cols['close'], cols['volume'])
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+历史数据源模块
+包含 Tushare / AKShare / Wind 数据源适配、本地模拟数据源、响应缓存和批量下载器
+"""
+
+from .base import HistoryProvider, HistoryRequest, ProviderError, ThreadRateLimiter
+from .cache import ResponseCache
+from .fake import FakeProvider
+from .tushare_provider import TushareProvider
+from .akshare_provider import AkshareProvider
+from .wind_provider import WindProvider
+from .fetcher import BulkFetcher, FetchReport, refresh_store, make_provider, PROVIDERS
+
+__all__ = [
+    'HistoryProvider', 'HistoryRequest', 'ProviderError', 'ThreadRateLimiter',
+    'ResponseCache',
+    'FakeProvider', 'TushareProvider', 'AkshareProvider', 'WindProvider',
+    'BulkFetcher', 'FetchReport', 'refresh_store', 'make_provider', 'PROVIDERS',
+]
@@ -0,0 +1,62 @@
+"""
+AKShare 数据源 - 东方财富A股日线(免费，无需Token)
+
+akshare 为可选依赖，创建数据源时才导入。AKShare 内部使用 requests，
+各线程的连接池由 requests 管理；这里只负责限流与列映射。成交量单位为手，转换为股。
+"""
+from typing import Any, List
+
+from libs.data.bar_store import BarSeries
+
+from .base import HistoryProvider, HistoryRequest, ProviderError, bars_from_rows
+
+SHARES_PER_LOT = 100  # 1手 = 100股
+
+
+class AkshareProvider(HistoryProvider):
+    """AKShare A股日线数据源"""
+
+    name = 'akshare'
+    frequencies = ('1d',)
+    default_rate_limit = 5.0  # 东方财富接口无公开限额，过快会被封IP
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        try:
+            import akshare
+        except ImportError as e:
+            raise ImportError("AKShare 数据源需要安装 akshare: pip install akshare") from e
+        self._ak = akshare
+
+    def _fetch(self, request: HistoryRequest, session: Any) -> BarSeries:
+        code = request.symbol.split('.')[0]
+        try:
+            df = self._ak.stock_zh_a_hist(symbol=code, period='daily',
+                                          start_date=request.start.replace('-', ''),
+                                          end_date=request.end.replace('-', ''),
+                                          adjust=request.adjust)
+        except (KeyError, ValueError) as e:
+            raise ProviderError(f"akshare 返回数据异常 {request.symbol}: {e}") from e
+        except Exception as e:
+            # requests 的连接/超时异常不继承 OSError 时统一按可重试处理
+            if type(e).__module__.startswith(('requests', 'urllib3')):
+                raise ProviderError(f"akshare 网络错误 {request.symbol}: {e}", retryable=True) from e
+            raise
+        if df is None or df.empty:
+            return bars_from_rows(request.symbol, request.freq, [], [], [], [], [], [])
+        bars = bars_from_rows(request.symbol, request.freq, df['日期'].astype(str).to_numpy(),
+                              df['开盘'], df['最高'], df['最低'], df['收盘'], df['成交量'])
+        bars.volume *= SHARES_PER_LOT
+        return bars
+
+    def list_symbols(self) -> List[str]:
+        df = self._ak.stock_info_a_code_name()
+        symbols = []
+        for code in df['code'].astype(str):
+            if code.startswith(('6', '9')):
+                symbols.append(f"{code}.SH")
+            elif code.startswith(('4', '8')):
+                symbols.append(f"{code}.BJ")
+            else:
+                symbols.append(f"{code}.SZ")
+        return sorted(symbols)
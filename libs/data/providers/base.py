@@ -0,0 +1,199 @@
+"""
+历史数据源接口 - 数据源基类、请求定义与多线程限流
+
+数据源实现 _fetch()，把一只股票一段区间的K线请求转换为 BarSeries(内存数组)。
+每个工作线程持有自己的连接(session)，同一线程的后续请求复用该连接；
+全部线程共享数据源实例上的令牌桶，保证整体请求频率不超过数据源的限额。
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from libs.data.bar_store import BarSeries, DateLike, to_datetime64
+
+EARLIEST_DATE = '1990-12-19'  # 上交所开业日，未指定起始日期时的默认值
+
+
+class ProviderError(Exception):
+    """数据源返回的错误"""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable  # 限流、超时等可重试的错误
+
+
+class HistoryRequest(NamedTuple):
+    """一只股票一段区间的K线请求(日期为闭区间，格式 YYYY-MM-DD)"""
+    symbol: str
+    freq: str = '1d'
+    start: str = EARLIEST_DATE
+    end: str = ''
+    adjust: str = ''  # 复权方式: '' 不复权, 'qfq' 前复权, 'hfq' 后复权
+
+    @classmethod
+    def make(cls, symbol: str, freq: str = '1d', start: DateLike = None, end: DateLike = None,
+             adjust: str = '') -> 'HistoryRequest':
+        """创建请求并规范化日期(未指定结束日期时为今天)"""
+        return cls(symbol, freq, format_date(start) if start is not None else EARLIEST_DATE,
+                   format_date(end) if end is not None else date.today().isoformat(), adjust)
+
+    @property
+    def closed(self) -> bool:
+        """区间是否已完全结束(结束日期早于今天，数据不会再变化)"""
+        return self.end < date.today().isoformat()
+
+
+def format_date(value: DateLike) -> str:
+    """日期 -> 'YYYY-MM-DD'"""
+    if isinstance(value, str) and len(value) == 8 and value.isdigit():
+        return f"{value[:4]}-{value[4:6]}-{value[6:]}"
+    return str(to_datetime64(value).astype('datetime64[D]'))
+
+
+def next_date(value: str) -> str:
+    """后一天 'YYYY-MM-DD'"""
+    return (datetime.strptime(value, '%Y-%m-%d').date() + timedelta(days=1)).isoformat()
+
+
+def bars_from_rows(symbol: str, freq: str, dates, open_, high, low, close, volume) -> BarSeries:
+    """由各列序列构造 BarSeries(日期可为 'YYYYMMDD' / 'YYYY-MM-DD' / datetime64)，按时间排序"""
+    dates = np.asarray(dates)
+    if dates.dtype.kind in 'US' and len(dates) and len(str(dates[0])) == 8:
+        dates = np.array([format_date(str(d)) for d in dates])
+    ts = dates.astype('datetime64[ns]').view(np.int64) if len(dates) else np.empty(0, dtype=np.int64)
+    columns = [np.asarray(c, dtype=np.float64) for c in (open_, high, low, close, volume)]
+    order = np.argsort(ts, kind='stable')
+    return BarSeries(symbol, freq, ts[order], *(c[order] for c in columns))
+
+
+# ==================== 限流 ====================
+class ThreadRateLimiter:
+    """线程安全的令牌桶限流器(语义同 libs.execution.RateLimiter 的同步版本)"""
+
+    def __init__(self, rate: Optional[float], burst: Optional[int] = None):
+        """初始化限流器
+
+        Args:
+            rate: 每秒允许的次数，None或0表示不限流
+            burst: 令牌桶容量，默认为 max(1, rate)
+        """
+        self.rate = rate if rate and rate > 0 else None
+        self.burst = burst if burst is not None else max(1, int(self.rate or 1))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """获取一个令牌，必要时等待"""
+        if self.rate is None:
+            return
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                time.sleep((1.0 - self._tokens) / self.rate)
+
+
+# ==================== 数据源基类 ====================
+class HistoryProvider:
+    """历史K线数据源基类
+
+    子类设置 name / frequencies / default_rate_limit，实现 _fetch()，
+    需要长连接的数据源实现 connect() 返回本线程使用的连接。
+    """
+
+    name = 'base'
+    frequencies: Tuple[str, ...] = ('1d',)
+    default_rate_limit = 0.0  # 默认限流(次/秒)，0表示不限
+
+    def __init__(self, rate_limit: Optional[float] = None, connection_timeout: float = 10.0,
+                 request_timeout: float = 5.0):
+        """初始化数据源
+
+        Args:
+            rate_limit: 全部线程合计的请求频率上限(次/秒)，None或0使用数据源默认值
+            connection_timeout: 建立连接超时(秒)
+            request_timeout: 单次请求超时(秒)
+        """
+        self.rate_limit = rate_limit or self.default_rate_limit
+        self.limiter = ThreadRateLimiter(self.rate_limit)
+        self.connection_timeout = connection_timeout
+        self.request_timeout = request_timeout
+        self._local = threading.local()
+        self._sessions: List[Any] = []
+        self._sessions_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, data_source_config, network_config=None, **kwargs) -> 'HistoryProvider':
+        """根据 DataSourceConfig 与 NetworkConfig 创建数据源"""
+        if network_config is not None:
+            kwargs.setdefault('connection_timeout', network_config.connection_timeout)
+            kwargs.setdefault('request_timeout', network_config.request_timeout)
+        kwargs.setdefault('rate_limit', data_source_config.rate_limit)
+        return cls(**kwargs)
+
+    # ==================== 连接 ====================
+    def connect(self) -> Any:
+        """创建一个连接(每个线程调用一次)，无需连接的数据源返回None"""
+        return None
+
+    def session(self) -> Any:
+        """本线程的连接(首次使用时创建，之后复用)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self.connect()
+            if session is not None:
+                with self._sessions_lock:
+                    self._sessions.append(session)
+        return session
+
+    def reset_session(self):
+        """丢弃本线程的连接(连接异常后调用，下次请求重新建立)"""
+        session = getattr(self._local, 'session', None)
+        self._local.session = None
+        if session is not None:
+            with self._sessions_lock:
+                if session in self._sessions:
+                    self._sessions.remove(session)
+            self._close_session(session)
+
+    def _close_session(self, session: Any):
+        close = getattr(session, 'close', None)
+        if close is not None:
+            close()
+
+    def close(self):
+        """关闭全部线程的连接"""
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            self._close_session(session)
+
+    # ==================== 请求 ====================
+    def fetch(self, request: HistoryRequest) -> BarSeries:
+        """限流后请求一段K线"""
+        if request.freq not in self.frequencies:
+            raise ProviderError(f"{self.name} 不支持的K线频率: {request.freq}")
+        self.limiter.acquire()
+        try:
+            return self._fetch(request, self.session())
+        except (OSError, TimeoutError) as e:
+            self.reset_session()
+            raise ProviderError(f"{self.name} 网络连接失败: {e}", retryable=True) from e
+
+    def _fetch(self, request: HistoryRequest, session: Any) -> BarSeries:
+        raise NotImplementedError
+
+    def list_symbols(self) -> List[str]:
+        """全市场股票代码(不支持的数据源抛出 NotImplementedError)"""
+        raise NotImplementedError(f"{self.name} 不支持获取股票列表")
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(rate_limit={self.rate_limit})"
@@ -0,0 +1,98 @@
+"""
+数据源响应缓存 - 按请求内容寻址的磁盘缓存
+
+缓存键为 (数据源, 股票代码, 频率, 起止日期, 复权) 规范化后的 SHA-256，
+同一请求无论何时、由哪个进程发起都落到同一文件，命中后不再访问数据源。
+文件格式与 BarStore 的数据区相同(ts | open | high | low | close | volume 按列连续)，
+以 .npy 保存并内存映射读取，先写临时文件再原子替换。
+
+写入时已结束的区间(文件修改日期晚于结束日期)永久有效；写入时尚未结束的区间
+(包含写入当天)数据可能不完整，即使之后区间已经结束，仍按 max_age 判断是否过期。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from libs.data.bar_store import BAR_COLUMNS, BarSeries
+
+from .base import HistoryRequest
+
+CACHE_SUFFIX = '.npy'
+
+
+class ResponseCache:
+    """数据源响应缓存
+
+    使用示例:
+        cache = ResponseCache('data/cache/providers')
+        series = cache.get('tushare', request)
+        if series is None:
+            series = provider.fetch(request)
+            cache.put('tushare', request, series)
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(provider: str, request: HistoryRequest) -> str:
+        """请求内容的摘要"""
+        content = json.dumps([provider, *request], ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{CACHE_SUFFIX}"
+
+    def get(self, provider: str, request: HistoryRequest,
+            max_age: Optional[float] = None) -> Optional[BarSeries]:
+        """读取缓存(内存映射)，不存在或已过期时返回None
+
+        Args:
+            max_age: 写入时未结束区间的最长有效期(秒)，None表示不过期
+        """
+        path = self.path_for(self.key(provider, request))
+        try:
+            if max_age is not None:
+                mtime = path.stat().st_mtime
+                if not self.written_closed(request, mtime) and time.time() - mtime > max_age:
+                    self.misses += 1
+                    return None
+            data = np.load(path, mmap_mode='r')
+        except (FileNotFoundError, ValueError, OSError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        if data.shape[1] == 0:
+            data = np.empty((len(BAR_COLUMNS), 0))
+        return BarSeries(request.symbol, request.freq, data[0].view(np.int64), *data[1:])
+
+    @staticmethod
+    def written_closed(request: HistoryRequest, mtime: float) -> bool:
+        """缓存写入时区间是否已结束(写入日期晚于结束日期)"""
+        return date.fromtimestamp(mtime).isoformat() > request.end
+
+    def put(self, provider: str, request: HistoryRequest, series: BarSeries) -> Path:
+        """写入缓存(原子替换)"""
+        path = self.path_for(self.key(provider, request))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = np.empty((len(BAR_COLUMNS), len(series)), dtype=np.float64)
+        data[0] = np.asarray(series.ts, dtype=np.int64).view(np.float64)
+        for row, column in enumerate((series.open, series.high, series.low, series.close, series.volume), 1):
+            data[row] = column
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.save(f, data)
+        os.replace(tmp_path, path)
+        return path
+
+    def __repr__(self) -> str:
+        return f"ResponseCache(root={str(self.root)!r}, hits={self.hits}, misses={self.misses})"
@@ -0,0 +1,272 @@
+"""
+批量历史数据下载 - 有界并发、按数据源限流、失败重试、响应缓存
+
+BulkFetcher 用线程池并发请求数千只股票：缓存命中的请求在提交前直接返回，
+相同请求只下载一次；在途请求数受 max_workers 限制，整体频率由数据源的令牌桶
+控制；限流、超时等可重试错误按指数退避重试。结果在调用线程中按完成顺序
+回调(on_result)，写入 BarStore 等非线程安全操作无需加锁。
+
+refresh_store() 做增量更新: 只请求本地仓库最后一根K线之后的区间，
+与已有数据合并后原子写回。
+"""
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Type
+
+import numpy as np
+
+from libs.data.bar_store import BarSeries, BarStore, DateLike
+
+from .akshare_provider import AkshareProvider
+from .base import HistoryProvider, HistoryRequest, ProviderError, format_date, next_date
+from .cache import ResponseCache
+from .fake import FakeProvider
+from .tushare_provider import TushareProvider
+from .wind_provider import WindProvider
+
+DEFAULT_MAX_WORKERS = 8  # 默认并发请求数
+DEFAULT_OPEN_RANGE_TTL = 3600.0  # 未结束区间的缓存有效期(秒)
+
+# 数据源名称(data_source.provider) -> 实现类
+PROVIDERS: Dict[str, Type[HistoryProvider]] = {
+    'tushare': TushareProvider,
+    'akshare': AkshareProvider,
+    'wind': WindProvider,
+    'fake': FakeProvider,
+}
+
+
+def make_provider(data_source_config, network_config=None, **kwargs) -> HistoryProvider:
+    """根据 data_source.provider 创建数据源"""
+    name = data_source_config.provider.lower()
+    if name not in PROVIDERS:
+        raise ValueError(f"未知的数据源: {data_source_config.provider}，可选: {', '.join(PROVIDERS)}")
+    return PROVIDERS[name].from_config(data_source_config, network_config, **kwargs)
+
+
+class FetchReport(NamedTuple):
+    """批量下载结果"""
+    series: Dict[HistoryRequest, BarSeries]  # 成功的请求(未指定 keep_results=False 时)
+    errors: Dict[HistoryRequest, str]  # 失败的请求及原因
+    stats: Dict[str, float]
+
+
+class BulkFetcher:
+    """批量历史数据下载器
+
+    使用示例:
+        provider = TushareProvider(token)
+        fetcher = BulkFetcher(provider, ResponseCache('data/cache/providers'), max_workers=16)
+        report = fetcher.fetch_many([HistoryRequest.make(s, '1d', '2015-01-01') for s in symbols])
+        provider.close()
+    """
+
+    def __init__(self, provider: HistoryProvider, cache: Optional[ResponseCache] = None,
+                 max_workers: int = DEFAULT_MAX_WORKERS, max_retries: int = 3,
+                 retry_delay: float = 1.0, max_retry_delay: float = 10.0,
+                 open_range_ttl: Optional[float] = DEFAULT_OPEN_RANGE_TTL, seed: Optional[int] = None):
+        """初始化下载器
+
+        Args:
+            provider: 数据源
+            cache: 响应缓存，None表示不缓存
+            max_workers: 并发请求数(线程数)
+            max_retries: 可重试错误的最大重试次数
+            retry_delay: 指数退避的基础延迟(秒)
+            max_retry_delay: 退避延迟上限(秒)
+            open_range_ttl: 包含今天的区间的缓存有效期(秒)，None表示不过期
+            seed: 退避抖动的随机种子
+        """
+        self.provider = provider
+        self.cache = cache
+        self.max_workers = max(1, int(max_workers))
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.open_range_ttl = open_range_ttl
+        self._rng = random.Random(seed)
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, float] = {}
+
+    @classmethod
+    def from_config(cls, provider: HistoryProvider, data_source_config, network_config,
+                    **kwargs) -> 'BulkFetcher':
+        """根据 DataSourceConfig / NetworkConfig 创建下载器"""
+        cache_dir = data_source_config.cache_dir
+        kwargs.setdefault('cache', ResponseCache(cache_dir) if cache_dir else None)
+        kwargs.setdefault('max_workers', data_source_config.max_workers)
+        kwargs.setdefault('open_range_ttl', data_source_config.open_range_ttl)
+        kwargs.setdefault('max_retries', network_config.max_retry_attempts)
+        kwargs.setdefault('retry_delay', network_config.retry_delay_seconds)
+        kwargs.setdefault('max_retry_delay', network_config.max_retry_delay_seconds)
+        return cls(provider, **kwargs)
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次失败后的退避时间: 指数增长并带一半幅度的随机抖动"""
+        delay = min(self.max_retry_delay, self.retry_delay * (2 ** (attempt - 1)))
+        return delay / 2 + self._rng.uniform(0, delay / 2)
+
+    def _count(self, key: str, value: float = 1):
+        with self._stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + value
+
+    def fetch(self, request: HistoryRequest) -> BarSeries:
+        """请求一段K线(不查缓存)，可重试错误按退避重试，成功后写入缓存"""
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                series = self.provider.fetch(request)
+                break
+            except ProviderError as e:
+                if not e.retryable or attempt > self.max_retries:
+                    raise
+                self._count('retries')
+                time.sleep(self.backoff(attempt))
+        self._count('fetched')
+        self._count('bars', len(series))
+        if self.cache is not None:
+            self.cache.put(self.provider.name, request, series)
+        return series
+
+    def fetch_many(self, requests: Iterable[HistoryRequest],
+                   on_result: Optional[Callable[[HistoryRequest, BarSeries], None]] = None,
+                   on_error: Optional[Callable[[HistoryRequest, str], None]] = None,
+                   refresh: bool = False, keep_results: bool = True,
+                   progress: Optional[Callable[[int, int], None]] = None) -> FetchReport:
+        """并发下载一批请求
+
+        Args:
+            requests: 请求列表(重复的请求只下载一次)
+            on_result: 每个成功请求的回调(在调用线程中执行)
+            on_error: 每个失败请求的回调(在调用线程中执行)
+            refresh: 为True时忽略缓存重新下载
+            keep_results: 为False时结果只交给 on_result，不保存在报告中(全市场下载时节省内存)
+            progress: 进度回调 progress(已完成数, 总数)
+        """
+        started = time.perf_counter()
+        self.stats = {'requests': 0, 'cache_hits': 0, 'fetched': 0, 'retries': 0, 'bars': 0, 'errors': 0}
+        todo = list(dict.fromkeys(requests))
+        self.stats['requests'] = len(todo)
+        series: Dict[HistoryRequest, BarSeries] = {}
+        errors: Dict[HistoryRequest, str] = {}
+        done_count = 0
+
+        def finish(request: HistoryRequest, result: Optional[BarSeries], error: Optional[str]):
+            nonlocal done_count
+            done_count += 1
+            if error is None:
+                if keep_results:
+                    series[request] = result
+                if on_result is not None:
+                    on_result(request, result)
+            else:
+                errors[request] = error
+                self.stats['errors'] += 1
+                if on_error is not None:
+                    on_error(request, error)
+            if progress is not None:
+                progress(done_count, len(todo))
+
+        pending: List[HistoryRequest] = []
+        for request in todo:
+            cached = None
+            if self.cache is not None and not refresh:
+                cached = self.cache.get(self.provider.name, request, self.open_range_ttl)
+            if cached is not None:
+                self.stats['cache_hits'] += 1
+                finish(request, cached, None)
+            else:
+                pending.append(request)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='Fetcher') as pool:
+                max_in_flight = self.max_workers * 2
+                request_iter = iter(pending)
+                in_flight = {}
+                for request in request_iter:
+                    in_flight[pool.submit(self.fetch, request)] = request
+                    if len(in_flight) >= max_in_flight:
+                        break
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        request = in_flight.pop(future)
+                        try:
+                            result, error = future.result(), None
+                        except Exception as e:
+                            result, error = None, f"{type(e).__name__}: {e}"
+                        finish(request, result, error)
+                        next_request = next(request_iter, None)
+                        if next_request is not None:
+                            in_flight[pool.submit(self.fetch, next_request)] = next_request
+        self.stats['elapsed'] = time.perf_counter() - started
+        return FetchReport(series, errors, dict(self.stats))
+
+
+# ==================== 本地仓库增量更新 ====================
+def _merge(existing: Optional[BarSeries], new: BarSeries) -> Tuple[np.ndarray, ...]:
+    """已有K线 + 新K线(时间戳相同时以新数据为准)"""
+    if existing is None or len(existing) == 0:
+        return new.ts, new.open, new.high, new.low, new.close, new.volume
+    keep = np.asarray(existing.ts) < (new.ts[0] if len(new) else np.iinfo(np.int64).max)
+    return tuple(np.concatenate([np.asarray(old)[keep], np.asarray(fresh)])
+                 for old, fresh in zip((existing.ts, existing.open, existing.high, existing.low,
+                                        existing.close, existing.volume),
+                                       (new.ts, new.open, new.high, new.low, new.close, new.volume)))
+
+
+def refresh_store(fetcher: BulkFetcher, store: BarStore, symbols: Iterable[str], freq: str = '1d',
+                  start: DateLike = None, end: DateLike = None, adjust: str = '',
+                  full: bool = False, progress: Optional[Callable[[int, int], None]] = None) -> FetchReport:
+    """把本地K线仓库更新到 end
+
+    已有数据的股票只请求最后一根K线之后的日期，新股票请求 [start, end]。
+
+    Args:
+        fetcher: 批量下载器
+        store: 本地K线仓库
+        symbols: 股票代码
+        freq: K线频率
+        start: 新股票的起始日期
+        end: 结束日期，默认今天
+        adjust: 复权方式(复权数据会整体变化，增量合并只适用于不复权数据，复权时请使用 full=True)
+        full: 为True时忽略本地数据，整段重新下载并覆盖
+        progress: 进度回调
+
+    Returns:
+        FetchReport: 不保存K线数据，stats 中 written 为写入的股票数，up_to_date 为无需更新的股票数
+    """
+    end = format_date(end) if end is not None else date.today().isoformat()
+    existing: Dict[str, BarSeries] = {}
+    requests = []
+    up_to_date = 0
+    for symbol in dict.fromkeys(symbols):
+        request = HistoryRequest.make(symbol, freq, start, end, adjust)
+        if not full and store.exists(symbol, freq):
+            series = store.open(symbol, freq)
+            if len(series):
+                last_day = str(np.datetime64(int(series.ts[-1]), 'ns').astype('datetime64[D]'))
+                if last_day >= end:
+                    up_to_date += 1
+                    continue
+                existing[symbol] = series
+                request = request._replace(start=next_date(last_day))
+        requests.append(request)
+
+    written = 0
+
+    def write(request: HistoryRequest, series: BarSeries):
+        nonlocal written
+        old = existing.pop(request.symbol, None)
+        if len(series) == 0 and old is not None:
+            return
+        store.write(request.symbol, freq, *_merge(old, series))
+        written += 1
+
+    report = fetcher.fetch_many(requests, on_result=write, keep_results=False, progress=progress)
+    report.stats.update(written=written, up_to_date=up_to_date)
+    return report
@@ -0,0 +1,115 @@
+"""
+Tushare Pro 数据源 - 直接调用 HTTP 接口，每个线程一条 keep-alive 长连接
+
+不依赖 tushare SDK(SDK 每次请求新建连接)。接口协议:
+    POST http://api.tushare.pro
+    {"api_name": "daily", "token": "...", "params": {...}, "fields": "..."}
+    -> {"code": 0, "msg": "", "data": {"fields": [...], "items": [[...], ...]}}
+
+日线成交量单位为手，转换为股。
+"""
+import http.client
+import json
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from libs.data.bar_store import BarSeries
+
+from .base import HistoryProvider, HistoryRequest, ProviderError, bars_from_rows
+
+TUSHARE_HOST = 'api.tushare.pro'
+SHARES_PER_LOT = 100  # 1手 = 100股
+RATE_LIMIT_CODES = {40203}  # 超过每分钟访问次数
+RATE_LIMIT_KEYWORDS = ('每分钟', '频率', '访问次数')
+
+
+class TushareProvider(HistoryProvider):
+    """Tushare Pro 日线数据源"""
+
+    name = 'tushare'
+    frequencies = ('1d',)
+    default_rate_limit = 480 / 60.0  # 积分2000档位每分钟500次，留一点余量
+
+    def __init__(self, api_token: str = '', host: str = TUSHARE_HOST, **kwargs):
+        """初始化数据源
+
+        Args:
+            api_token: Tushare Pro 的 Token
+            host: 接口地址
+            **kwargs: 传给 HistoryProvider (rate_limit / connection_timeout / request_timeout)
+        """
+        super().__init__(**kwargs)
+        if not api_token:
+            raise ValueError("Tushare 数据源需要配置 data_source.api_token")
+        self.api_token = api_token
+        self.host = host
+
+    @classmethod
+    def from_config(cls, data_source_config, network_config=None, **kwargs) -> 'TushareProvider':
+        kwargs.setdefault('api_token', data_source_config.api_token)
+        return super().from_config(data_source_config, network_config, **kwargs)
+
+    def connect(self) -> http.client.HTTPConnection:
+        return http.client.HTTPConnection(self.host, timeout=self.connection_timeout)
+
+    def query(self, api_name: str, params: Dict[str, Any], fields: str = '',
+              session: Optional[http.client.HTTPConnection] = None) -> Dict[str, Any]:
+        """调用一个 Tushare 接口，返回 data 字段 {'fields': [...], 'items': [...]}"""
+        conn = session if session is not None else self.session()
+        body = json.dumps({'api_name': api_name, 'token': self.api_token, 'params': params,
+                           'fields': fields}).encode('utf-8')
+        if conn.sock is not None:
+            conn.sock.settimeout(self.request_timeout)
+        try:
+            conn.request('POST', '/', body, {'Content-Type': 'application/json', 'Connection': 'keep-alive'})
+            response = conn.getresponse()
+            payload = response.read()
+        except http.client.HTTPException as e:
+            raise OSError(f"HTTP 协议错误: {e!r}") from e  # 由 fetch() 重建连接后重试
+        if response.status >= 500 or response.status == 429:
+            raise ProviderError(f"tushare HTTP {response.status}", retryable=True)
+        if response.status != 200:
+            raise ProviderError(f"tushare HTTP {response.status}")
+        result = json.loads(payload)
+        code = result.get('code', 0)
+        if code != 0:
+            message = result.get('msg') or ''
+            retryable = code in RATE_LIMIT_CODES or any(k in message for k in RATE_LIMIT_KEYWORDS)
+            raise ProviderError(f"tushare {api_name} 错误 {code}: {message}", retryable=retryable)
+        return result.get('data') or {'fields': [], 'items': []}
+
+    def _fetch(self, request: HistoryRequest, session: Any) -> BarSeries:
+        params = {'ts_code': request.symbol, 'start_date': request.start.replace('-', ''),
+                  'end_date': request.end.replace('-', '')}
+        data = self.query('daily', params, 'trade_date,open,high,low,close,vol', session)
+        index = {name: i for i, name in enumerate(data['fields'])}
+        items = data['items']
+        column = lambda name: [row[index[name]] for row in items]  # noqa: E731
+        bars = bars_from_rows(request.symbol, request.freq, column('trade_date'), column('open'),
+                              column('high'), column('low'), column('close'), column('vol'))
+        bars.volume *= SHARES_PER_LOT
+        if request.adjust:
+            self._apply_adjust(request, bars, session)
+        return bars
+
+    def _apply_adjust(self, request: HistoryRequest, bars: BarSeries, session: Any):
+        """按复权因子调整价格(前复权以区间最后一天为基准)"""
+        if len(bars) == 0:
+            return
+        params = {'ts_code': request.symbol, 'start_date': request.start.replace('-', ''),
+                  'end_date': request.end.replace('-', '')}
+        self.limiter.acquire()
+        data = self.query('adj_factor', params, 'trade_date,adj_factor', session)
+        index = {name: i for i, name in enumerate(data['fields'])}
+        factors = {str(row[index['trade_date']]): float(row[index['adj_factor']]) for row in data['items']}
+        days = bars.ts.astype('datetime64[ns]').astype('datetime64[D]').astype(str)
+        factor = np.array([factors.get(day.replace('-', ''), np.nan) for day in days], dtype=np.float64)
+        if request.adjust == 'qfq':
+            factor = factor / factor[-1]
+        for prices in (bars.open, bars.high, bars.low, bars.close):
+            prices *= factor
+
+    def list_symbols(self) -> List[str]:
+        data = self.query('stock_basic', {'list_status': 'L'}, 'ts_code')
+        return sorted(row[0] for row in data['items'])
@@ -0,0 +1,63 @@
+"""
+Wind 数据源 - 通过 WindPy 终端接口获取日线
+
+WindPy 为可选依赖(随 Wind 终端安装)，创建数据源时才导入并启动。
+WindPy 是进程级单连接，多线程请求在其内部串行，并发数设置过大没有收益。
+成交量单位为股。
+"""
+from typing import Any, List
+
+import numpy as np
+
+from libs.data.bar_store import BarSeries
+
+from .base import HistoryProvider, HistoryRequest, ProviderError, bars_from_rows
+
+WIND_FIELDS = 'open,high,low,close,volume'
+WIND_ADJUST = {'': '', 'qfq': 'PriceAdj=F', 'hfq': 'PriceAdj=B'}
+WIND_RETRYABLE_CODES = {-40520007, -40521010}  # 网络超时 / 请求过于频繁
+
+
+class WindProvider(HistoryProvider):
+    """Wind 日线数据源"""
+
+    name = 'wind'
+    frequencies = ('1d',)
+    default_rate_limit = 0.0
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        try:
+            from WindPy import w
+        except ImportError as e:
+            raise ImportError("Wind 数据源需要安装 Wind 终端并配置 WindPy") from e
+        self._w = w
+        if not w.isconnected():
+            result = w.start(waitTime=int(self.connection_timeout))
+            if result.ErrorCode != 0:
+                raise ProviderError(f"WindPy 启动失败: {result.ErrorCode}")
+
+    def _fetch(self, request: HistoryRequest, session: Any) -> BarSeries:
+        result = self._w.wsd(request.symbol, WIND_FIELDS, request.start, request.end,
+                             WIND_ADJUST.get(request.adjust, ''))
+        if result.ErrorCode != 0:
+            raise ProviderError(f"wind wsd 错误 {result.ErrorCode} {request.symbol}",
+                                retryable=result.ErrorCode in WIND_RETRYABLE_CODES)
+        if not result.Times:
+            return bars_from_rows(request.symbol, request.freq, [], [], [], [], [], [])
+        dates = np.array([t.strftime('%Y-%m-%d') for t in result.Times])
+        columns = [np.array([np.nan if v is None else v for v in column], dtype=np.float64)
+                   for column in result.Data]
+        traded = ~np.isnan(columns[3])  # 停牌日 wsd 返回空值，与其他数据源一致地剔除
+        return bars_from_rows(request.symbol, request.freq, dates[traded], *(c[traded] for c in columns))
+
+    def list_symbols(self) -> List[str]:
+        result = self._w.wset('sectorconstituent', 'sectorid=a001010100000000')
+        if result.ErrorCode != 0:
+            raise ProviderError(f"wind wset 错误 {result.ErrorCode}")
+        fields = [f.lower() for f in result.Fields]
+        return sorted(result.Data[fields.index('wind_code')])
+
+    def close(self):
+        super().close()
+        self._w.stop()
@@ -0,0 +1,375 @@
+"""
+行情缓存 - 容量受限、带过期时间的最新行情缓存
+
+按 data_management.max_quote_cache 限制缓存的股票数量，按
+system_timing.quote_update_interval × QUOTE_EXPIRE_INTERVALS 判定行情过期。
+
+内部采用结构数组(struct-of-arrays)布局: 每个字段(bid/ask/last/volume/时间)
+各是一个预分配的 numpy 数组，股票代码只映射到槽位号。批量快照直接对数组
+做花式索引，一次返回多只股票的 numpy 数组，避免逐只查字典。
+
+并发: 单只股票读写使用分段锁(按槽位号取模)，不同段互不阻塞；批量读写只获取
+涉及的槽位所在的分段锁。只有新股票分配槽位或淘汰时才获取全局分配锁，
+同一批新分配的槽位不会互相淘汰。
+"""
+import time
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from libs.config.consts import QUOTE_EXPIRE_INTERVALS
+
+DEFAULT_LOCK_STRIPES = 16  # 默认分段锁数量
+
+QUOTE_FIELDS = ('bid', 'ask', 'last', 'volume')  # 缓存的行情字段
+
+
+class Quote(NamedTuple):
+    """单只股票的最新行情"""
+    symbol: str
+    bid: float  # 买一价
+    ask: float  # 卖一价
+    last: float  # 最新价
+    volume: float  # 成交量
+    ts: float  # 更新时间(秒)
+
+
+class QuoteSnapshot(NamedTuple):
+    """多只股票的行情快照，各数组与请求的股票列表一一对应
+
+    缺失或过期的股票对应 valid 为 False，价格字段为 NaN。
+    """
+    symbols: List[str]
+    bid: np.ndarray
+    ask: np.ndarray
+    last: np.ndarray
+    volume: np.ndarray
+    ts: np.ndarray
+    valid: np.ndarray
+
+
+class QuoteCache:
+    """最新行情缓存(LRU + TTL)
+
+    使用示例:
+        cache = QuoteCache.from_config(config_manager.config)
+        cache.update('600000.SH', last=10.52, bid=10.51, ask=10.52, volume=12000)
+        snap = cache.snapshot(['600000.SH', '000001.SZ'])
+        snap.last  # numpy数组
+    """
+
+    def __init__(self, capacity: int = 1000, ttl: Optional[float] = None,
+                 stripes: int = DEFAULT_LOCK_STRIPES, clock: Callable[[], float] = time.time):
+        """初始化行情缓存
+
+        Args:
+            capacity: 最多缓存的股票数量
+            ttl: 行情有效期(秒)，None表示不过期
+            stripes: 分段锁数量
+            clock: 时间函数(便于回放时注入虚拟时钟)
+        """
+        if capacity <= 0:
+            raise ValueError(f"缓存容量必须为正数: {capacity}")
+        self.capacity = int(capacity)
+        self.ttl = ttl
+        self._clock = clock
+
+        # 结构数组: 每个字段一个连续数组
+        self._bid = np.full(self.capacity, np.nan)
+        self._ask = np.full(self.capacity, np.nan)
+        self._last = np.full(self.capacity, np.nan)
+        self._volume = np.full(self.capacity, np.nan)
+        self._ts = np.full(self.capacity, -np.inf)  # 行情更新时间
+        self._access = np.full(self.capacity, -np.inf)  # 最近访问时间(近似LRU)
+
+        self._slots: Dict[str, int] = {}  # 股票代码 -> 槽位
+        self._symbols: List[Optional[str]] = [None] * self.capacity  # 槽位 -> 股票代码
+        self._free: List[int] = list(range(self.capacity - 1, -1, -1))  # 空闲槽位栈
+        self._alloc_lock = Lock()  # 槽位分配/淘汰锁
+        self._stripes = [Lock() for _ in range(max(1, stripes))]  # 分段锁
+        self.evictions = 0  # 淘汰次数统计
+        self._released = 0  # 槽位被淘汰或移除的累计次数(持有分段锁时递增)
+
+    @classmethod
+    def from_config(cls, app_config, **kwargs) -> 'QuoteCache':
+        """根据 AppConfig 的 data_management / system_timing 创建缓存"""
+        interval = app_config.system_timing.quote_update_interval
+        ttl = interval * QUOTE_EXPIRE_INTERVALS if interval and interval > 0 else None
+        return cls(capacity=app_config.data_management.max_quote_cache, ttl=ttl, **kwargs)
+
+    # ==================== 槽位管理 ====================
+    def _allocate(self, symbol: str, now: float) -> int:
+        """为新股票分配槽位，缓存已满时淘汰过期或最久未访问的股票"""
+        with self._alloc_lock:
+            slot = self._slots.get(symbol)
+            if slot is not None:
+                return slot
+            return self._assign(symbol, now, ())
+
+    def _allocate_many(self, symbols: Iterable[str], now: float):
+        """为一批新股票分配槽位，本批分配的槽位不会被本批后续的股票淘汰"""
+        with self._alloc_lock:
+            batch: List[int] = []
+            for symbol in symbols:
+                if symbol not in self._slots:
+                    batch.append(self._assign(symbol, now, batch))
+
+    def _assign(self, symbol: str, now: float, exclude: Sequence[int]) -> int:
+        """分配槽位(需持有分配锁)，新槽位的访问时间记为 now"""
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = self._pick_victim(now, exclude)
+            with self._stripes[slot % len(self._stripes)]:
+                del self._slots[self._symbols[slot]]
+                self._reset_slot(slot)
+            self.evictions += 1
+        self._symbols[slot] = symbol
+        self._access[slot] = now
+        self._slots[symbol] = slot
+        return slot
+
+    def _pick_victim(self, now: float, exclude: Sequence[int] = ()) -> int:
+        """选择被淘汰的槽位: 优先过期行情，其次最久未访问
+
+        exclude 中的槽位(本批刚分配、尚未写入)不参与淘汰，除非已占满全部槽位。
+        """
+        access = self._access
+        if 0 < len(exclude) < self.capacity:
+            access = access.copy()
+            access[list(exclude)] = np.inf
+        if self.ttl is not None:
+            expired = np.flatnonzero((self._ts < now - self.ttl) & (access < np.inf))
+            if len(expired):
+                return int(expired[np.argmin(access[expired])])
+        return int(np.argmin(access))
+
+    def _reset_slot(self, slot: int):
+        self._released += 1
+        self._symbols[slot] = None
+        self._bid[slot] = self._ask[slot] = self._last[slot] = self._volume[slot] = np.nan
+        self._ts[slot] = self._access[slot] = -np.inf
+
+    def _is_fresh(self, ts: float, now: float) -> bool:
+        return self.ttl is None or now - ts <= self.ttl
+
+    # ==================== 写入 ====================
+    def update(self, symbol: str, last: float, bid: float = np.nan, ask: float = np.nan,
+               volume: float = np.nan, ts: Optional[float] = None):
+        """写入一只股票的最新行情
+
+        Args:
+            symbol: 股票代码
+            last: 最新价
+            bid/ask: 买一/卖一价
+            volume: 成交量
+            ts: 行情时间(秒)，默认为当前时间
+        """
+        now = self._clock()
+        if ts is None:
+            ts = now
+        while True:
+            slot = self._slots.get(symbol)
+            if slot is None:
+                slot = self._allocate(symbol, now)
+            with self._stripes[slot % len(self._stripes)]:
+                if self._symbols[slot] != symbol:
+                    continue  # 槽位刚被淘汰，重新分配
+                self._bid[slot] = bid
+                self._ask[slot] = ask
+                self._last[slot] = last
+                self._volume[slot] = volume
+                self._ts[slot] = ts
+                self._access[slot] = now
+                return
+
+    def update_many(self, symbols: Sequence[str], last: Sequence[float],
+                    bid: Optional[Sequence[float]] = None, ask: Optional[Sequence[float]] = None,
+                    volume: Optional[Sequence[float]] = None, ts: Optional[float] = None):
+        """批量写入行情(一次行情推送包含多只股票时使用)
+
+        一批超过容量时只写入最后出现的 capacity 只股票(其余写入后也会被本批淘汰)。
+        """
+        now = self._clock()
+        if ts is None:
+            ts = now
+        if len(symbols) > self.capacity:
+            keep = self._latest_unique(symbols)
+            if len(keep) < len(symbols):
+                take = (lambda a: None if a is None else np.asarray(a)[keep])
+                symbols = [symbols[i] for i in keep.tolist()]
+                last, bid, ask, volume = take(last), take(bid), take(ask), take(volume)
+        slot_map = self._slots
+        if any(symbol not in slot_map for symbol in symbols):
+            self._allocate_many(symbols, now)
+
+        count = len(symbols)
+        missing = np.full(count, np.nan)
+        released = self._released
+        slots = self._resolve(symbols)
+        with self._stripes_for(slots):
+            # 分配后到加锁前被淘汰的股票槽位为-1，稍后单独写入
+            owned = self._owned(slots, symbols, released)
+            target = slots[owned]
+            self._last[target] = np.asarray(last, dtype=np.float64)[owned]
+            self._bid[target] = np.asarray(bid if bid is not None else missing, dtype=np.float64)[owned]
+            self._ask[target] = np.asarray(ask if ask is not None else missing, dtype=np.float64)[owned]
+            self._volume[target] = np.asarray(volume if volume is not None else missing,
+                                              dtype=np.float64)[owned]
+            self._ts[target] = ts
+            self._access[target] = now
+        if not owned.all():
+            for i in np.flatnonzero(~owned):
+                self.update(symbols[i], last[i],
+                            bid[i] if bid is not None else np.nan,
+                            ask[i] if ask is not None else np.nan,
+                            volume[i] if volume is not None else np.nan, ts)
+
+    def _latest_unique(self, symbols: Sequence[str]) -> np.ndarray:
+        """最后出现的 capacity 只股票各自最后一次出现的下标(升序)"""
+        seen = set()
+        keep = []
+        for i in range(len(symbols) - 1, -1, -1):
+            if symbols[i] not in seen:
+                seen.add(symbols[i])
+                keep.append(i)
+                if len(keep) == self.capacity:
+                    break
+        return np.array(keep[::-1], dtype=np.intp)
+
+    # ==================== 读取 ====================
+    def get(self, symbol: str) -> Optional[Quote]:
+        """获取一只股票的最新行情，不存在或已过期时返回None"""
+        slot = self._slots.get(symbol)
+        if slot is None:
+            return None
+        now = self._clock()
+        with self._stripes[slot % len(self._stripes)]:
+            if self._symbols[slot] != symbol:
+                return None
+            ts = self._ts[slot]
+            if not self._is_fresh(ts, now):
+                return None
+            self._access[slot] = now
+            return Quote(symbol, float(self._bid[slot]), float(self._ask[slot]),
+                         float(self._last[slot]), float(self._volume[slot]), float(ts))
+
+    def last_price(self, symbol: str) -> float:
+        """获取最新价，不存在或已过期时返回NaN"""
+        quote = self.get(symbol)
+        return quote.last if quote is not None else np.nan
+
+    def snapshot(self, symbols: Sequence[str]) -> QuoteSnapshot:
+        """批量获取多只股票的行情快照
+
+        Args:
+            symbols: 股票代码列表
+
+        Returns:
+            QuoteSnapshot: 与 symbols 顺序一致的数组快照
+        """
+        symbols = list(symbols)
+        now = self._clock()
+        released = self._released
+        slots = self._resolve(symbols)
+        with self._stripes_for(slots):
+            owned = self._owned(slots, symbols, released)
+            safe = np.where(owned, slots, 0)
+            ts = self._ts[safe]
+            bid = self._bid[safe]
+            ask = self._ask[safe]
+            last = self._last[safe]
+            volume = self._volume[safe]
+            self._access[slots[owned]] = now
+        valid = owned if self.ttl is None else owned & (now - ts <= self.ttl)
+        invalid = ~valid
+        for arr in (bid, ask, last, volume):
+            arr[invalid] = np.nan
+        ts[invalid] = np.nan
+        return QuoteSnapshot(symbols, bid, ask, last, volume, ts, valid)
+
+    # ==================== 维护 ====================
+    def evict_expired(self) -> int:
+        """主动清除所有过期行情，返回清除数量"""
+        if self.ttl is None:
+            return 0
+        now = self._clock()
+        removed = 0
+        with self._alloc_lock:
+            for slot in np.flatnonzero(self._ts < now - self.ttl):
+                symbol = self._symbols[slot]
+                if symbol is None:
+                    continue
+                with self._stripes[slot % len(self._stripes)]:
+                    del self._slots[symbol]
+                    self._reset_slot(slot)
+                self._free.append(int(slot))
+                removed += 1
+        return removed
+
+    def remove(self, symbol: str) -> bool:
+        """移除一只股票(如取消订阅)"""
+        with self._alloc_lock:
+            slot = self._slots.get(symbol)
+            if slot is None:
+                return False
+            with self._stripes[slot % len(self._stripes)]:
+                del self._slots[symbol]
+                self._reset_slot(slot)
+            self._free.append(slot)
+            return True
+
+    def symbols(self) -> List[str]:
+        """当前缓存的股票代码"""
+        return list(self._slots)
+
+    def _resolve(self, symbols: Sequence[str]) -> np.ndarray:
+        """股票代码 -> 槽位号(未缓存为-1)，加锁前解析，需在加锁后用 _owned 复核"""
+        get = self._slots.get
+        return np.array([get(s, -1) for s in symbols], dtype=np.intp)
+
+    def _owned(self, slots: np.ndarray, symbols: Sequence[str], released: int) -> np.ndarray:
+        """持有对应分段锁时复核槽位仍属于对应股票(淘汰需要持有分段锁)
+
+        released 为解析槽位前的 _released，其间没有槽位被释放时无需逐只复核。
+        """
+        if self._released == released:
+            return slots >= 0
+        table = self._symbols
+        pairs = zip(slots.tolist(), symbols)
+        return np.fromiter((slot >= 0 and table[slot] == symbol for slot, symbol in pairs),
+                           dtype=bool, count=len(symbols))
+
+    def _stripes_for(self, slots: np.ndarray) -> '_MultiLock':
+        """槽位所在的分段锁(按编号升序获取，避免死锁)"""
+        stripes = self._stripes
+        return _MultiLock(stripes[i] for i in np.unique(slots[slots >= 0] % len(stripes)).tolist())
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._slots
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __repr__(self) -> str:
+        return f"QuoteCache(size={len(self)}, capacity={self.capacity}, ttl={self.ttl})"
+
+
+class _MultiLock:
+    """按固定顺序获取全部分段锁(批量读写时使用，避免死锁)"""
+
+    __slots__ = ('_locks',)
+
+    def __init__(self, locks: Iterable[Lock]):
+        self._locks = list(locks)
+
+    def __enter__(self):
+        for lock in self._locks:
+            lock.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for lock in reversed(self._locks):
+            lock.release()
+        return False
@@ -0,0 +1,340 @@
+"""
+定长记录历史 - 订单/成交/临时订单的环形缓冲区
+
+按 data_management 中的 max_trades_history / max_order_records / max_temp_orders
+预分配固定容量，追加为 O(1)，写满后最旧的记录被挤出并批量交给后台写线程，
+压缩后写入磁盘上只追加的日志(gzip多成员格式)，追加路径不等待压缩和磁盘IO，
+内存占用恒定，不再需要定时清理线程。
+
+支持按 order_id 和 symbol 的索引查询，索引随记录淘汰同步维护。
+"""
+import dataclasses
+import gzip
+import json
+import queue
+import threading
+import time
+from collections import deque
+from enum import Enum
+from pathlib import Path
+from threading import RLock
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Union
+
+DEFAULT_SPILL_BATCH = 256  # 淘汰记录累计到该数量后批量写盘
+SERIALIZE_YIELD_EVERY = 16  # 每序列化N条记录主动让出一次GIL，避免追加线程等待整个线程切换间隔(默认5ms)
+
+
+def record_to_dict(record: Any) -> Dict[str, Any]:
+    """将记录对象浅层转换为字典(嵌套对象交由JSON序列化兜底处理)"""
+    if isinstance(record, dict):
+        return dict(record)
+    if hasattr(record, '__dict__'):
+        return dict(vars(record))
+    if dataclasses.is_dataclass(record):
+        return {f.name: getattr(record, f.name) for f in dataclasses.fields(record)}
+    return {'value': record}
+
+
+def _json_default(value: Any) -> Any:
+    """JSON序列化兜底: 枚举取值，其余转为字符串"""
+    if isinstance(value, Enum):
+        return value.value
+    if dataclasses.is_dataclass(value) or hasattr(value, '__dict__'):
+        return record_to_dict(value)
+    return str(value)
+
+
+class SpillJournal:
+    """只追加的压缩日志
+
+    每次 flush 写入一个独立的gzip成员，整个文件仍可用 gzip.open 顺序读取，
+    进程崩溃最多丢失最后一个未完成的成员。
+    """
+
+    def __init__(self, path: Union[str, Path], compresslevel: int = 1):
+        """初始化日志
+
+        Args:
+            path: 日志文件路径(.jsonl.gz)
+            compresslevel: gzip压缩级别
+        """
+        self.path = Path(path)
+        self.compresslevel = compresslevel
+        self.records_written = 0
+
+    def write(self, records: List[Any]):
+        """将一批记录写入一个gzip成员"""
+        if not records:
+            return
+        parts = []
+        for i, record in enumerate(records, 1):
+            parts.append(json.dumps(record_to_dict(record), ensure_ascii=False, default=_json_default) + '\n')
+            if i % SERIALIZE_YIELD_EVERY == 0:
+                time.sleep(0)
+        lines = ''.join(parts)
+        payload = gzip.compress(lines.encode('utf-8'), compresslevel=self.compresslevel)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'ab') as f:
+            f.write(payload)
+        self.records_written += len(records)
+
+    def read(self) -> Iterator[Dict[str, Any]]:
+        """按写入顺序读取日志中的全部记录(以字典形式)"""
+        if not self.path.exists():
+            return
+        try:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    yield json.loads(line)
+        except (EOFError, gzip.BadGzipFile):
+            # 末尾成员未写完(进程崩溃)，忽略残缺部分
+            return
+
+
+class _SpillWriter:
+    """后台写盘线程: 淘汰的记录批次入队后由该线程压缩写入日志"""
+
+    def __init__(self, journal: SpillJournal):
+        self.journal = journal
+        self._queue: 'queue.SimpleQueue' = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self.errors = 0
+
+    def submit(self, records: List[Any]):
+        """提交一批记录(首次提交时启动写线程)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='SpillWriter', daemon=True)
+            self._thread.start()
+        self._queue.put(records)
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """等待此前提交的批次全部写完，超时返回False"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _run(self):
+        get = self._queue.get
+        while True:
+            item = get()
+            if item is None:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            try:
+                self.journal.write(item)
+            except Exception:
+                self.errors += 1
+
+    def stop(self, timeout: float = 5.0):
+        """写完已入队的批次后停止写线程"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+
+class RecordHistory:
+    """定长环形记录缓冲区
+
+    使用示例:
+        trades = RecordHistory(10000, journal='logs/trades.jsonl.gz')
+        trades.append(trade)
+        trades.by_order_id('12345')
+        trades.by_symbol('600000.SH')
+        trades.close()  # 退出前写完全部淘汰记录
+    """
+
+    def __init__(self, capacity: int, journal: Union[str, Path, SpillJournal, None] = None,
+                 key_attr: str = 'order_id', symbol_attr: str = 'symbol',
+                 spill_batch: int = DEFAULT_SPILL_BATCH):
+        """初始化记录缓冲区
+
+        Args:
+            capacity: 容量上限
+            journal: 溢出日志路径或实例，None表示淘汰的记录直接丢弃
+            key_attr: 作为主键索引的属性名
+            symbol_attr: 作为股票代码索引的属性名
+            spill_batch: 淘汰记录批量提交给写线程的数量
+        """
+        if capacity <= 0:
+            raise ValueError(f"容量必须为正数: {capacity}")
+        self.capacity = int(capacity)
+        if journal is not None and not isinstance(journal, SpillJournal):
+            journal = SpillJournal(journal)
+        self.journal: Optional[SpillJournal] = journal
+        self.key_attr = key_attr
+        self.symbol_attr = symbol_attr
+        self.spill_batch = max(1, spill_batch)
+
+        self._buffer: List[Any] = [None] * self.capacity  # 预分配槽位，序号seq写入槽位 seq % capacity
+        self._seq = 0  # 已追加的记录总数(全局序号)
+        self._size = 0  # 当前缓冲区内的记录数
+        self._by_key: Dict[Any, Deque[int]] = {}  # 主键 -> 全局序号
+        self._by_symbol: Dict[Any, Deque[int]] = {}  # 股票代码 -> 全局序号
+        self._pending_spill: List[Any] = []  # 尚未提交给写线程的淘汰记录
+        self._writer = _SpillWriter(journal) if journal is not None else None
+        self._lock = RLock()
+
+    @classmethod
+    def for_trades(cls, data_management_config, journal=None) -> 'RecordHistory':
+        """按 max_trades_history 创建成交记录缓冲区"""
+        return cls(data_management_config.max_trades_history, journal)
+
+    @classmethod
+    def for_orders(cls, data_management_config, journal=None) -> 'RecordHistory':
+        """按 max_order_records 创建订单记录缓冲区"""
+        return cls(data_management_config.max_order_records, journal)
+
+    @classmethod
+    def for_temp_orders(cls, data_management_config, journal=None) -> 'RecordHistory':
+        """按 max_temp_orders 创建临时订单缓冲区"""
+        return cls(data_management_config.max_temp_orders, journal)
+
+    # ==================== 写入 ====================
+    def append(self, record: Any) -> int:
+        """追加一条记录，返回其全局序号"""
+        with self._lock:
+            seq = self._seq
+            slot = seq % self.capacity
+            evicted = self._buffer[slot]
+            if evicted is None:
+                self._size += 1
+            else:
+                self._unindex(evicted, seq - self.capacity)
+                if self.journal is not None:
+                    self._pending_spill.append(evicted)
+                    if len(self._pending_spill) >= self.spill_batch:
+                        self._spill()
+            self._buffer[slot] = record
+            self._index(record, seq)
+            self._seq = seq + 1
+            return seq
+
+    def extend(self, records) -> None:
+        """批量追加记录"""
+        with self._lock:
+            for record in records:
+                self.append(record)
+
+    def _index(self, record: Any, seq: int):
+        key = getattr(record, self.key_attr, None)
+        if key is not None:
+            self._by_key.setdefault(key, deque()).append(seq)
+        symbol = getattr(record, self.symbol_attr, None)
+        if symbol is not None:
+            self._by_symbol.setdefault(symbol, deque()).append(seq)
+
+    def _unindex(self, record: Any, seq: int):
+        # 被淘汰的一定是该主键/股票下最旧的记录，从队首移除即可
+        for index, attr in ((self._by_key, self.key_attr), (self._by_symbol, self.symbol_attr)):
+            value = getattr(record, attr, None)
+            if value is None:
+                continue
+            seqs = index.get(value)
+            if seqs and seqs[0] == seq:
+                seqs.popleft()
+                if not seqs:
+                    del index[value]
+
+    def _spill(self):
+        # 持锁时只交换待写列表并入队，保证批次按淘汰顺序写入；压缩和写盘在写线程中完成
+        pending, self._pending_spill = self._pending_spill, []
+        self._writer.submit(pending)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """将已淘汰的记录写入日志，等待写线程写完后返回(超时返回False)"""
+        if self._writer is None:
+            return True
+        with self._lock:
+            if self._pending_spill:
+                self._spill()
+        return self._writer.drain(timeout)
+
+    def spill_all(self, timeout: Optional[float] = None) -> bool:
+        """将缓冲区内全部记录写入日志并清空(如收盘归档)，等待写线程写完后返回"""
+        with self._lock:
+            if self._writer is not None:
+                self._pending_spill.extend(self._iter_unlocked())
+                if self._pending_spill:
+                    self._spill()
+            self.clear()
+        return self._writer.drain(timeout) if self._writer is not None else True
+
+    def close(self, timeout: float = 5.0):
+        """写完已淘汰的记录后停止写线程(缓冲区内的记录保留在内存中)"""
+        if self._writer is None:
+            return
+        with self._lock:
+            if self._pending_spill:
+                self._spill()
+        self._writer.stop(timeout)
+
+    @property
+    def spill_errors(self) -> int:
+        """写线程写盘失败的批次数"""
+        return self._writer.errors if self._writer is not None else 0
+
+    def clear(self):
+        """清空缓冲区(不写盘)"""
+        with self._lock:
+            self._buffer = [None] * self.capacity
+            self._size = 0
+            self._by_key.clear()
+            self._by_symbol.clear()
+
+    # ==================== 查询 ====================
+    def _get_seq(self, seq: int) -> Any:
+        return self._buffer[seq % self.capacity]
+
+    def by_order_id(self, key: Any) -> List[Any]:
+        """按主键(默认 order_id)查询内存中的记录，按时间顺序返回"""
+        with self._lock:
+            return [self._get_seq(s) for s in self._by_key.get(key, ())]
+
+    def latest_by_order_id(self, key: Any) -> Optional[Any]:
+        """按主键查询最新一条记录"""
+        with self._lock:
+            seqs = self._by_key.get(key)
+            return self._get_seq(seqs[-1]) if seqs else None
+
+    def by_symbol(self, symbol: Any) -> List[Any]:
+        """按股票代码查询内存中的记录，按时间顺序返回"""
+        with self._lock:
+            return [self._get_seq(s) for s in self._by_symbol.get(symbol, ())]
+
+    def latest(self, n: Optional[int] = None) -> List[Any]:
+        """返回最近 n 条记录(默认全部)，按时间顺序"""
+        with self._lock:
+            records = list(self._iter_unlocked())
+        return records if n is None else records[-n:]
+
+    def filter(self, predicate: Callable[[Any], bool]) -> List[Any]:
+        """按条件筛选内存中的记录"""
+        with self._lock:
+            return [r for r in self._iter_unlocked() if predicate(r)]
+
+    def _iter_unlocked(self) -> Iterator[Any]:
+        buffer = self._buffer
+        head = self._seq % self.capacity
+        for record in buffer[head:] + buffer[:head]:
+            if record is not None:
+                yield record
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.latest())
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def total_appended(self) -> int:
+        """累计追加的记录数(含已淘汰)"""
+        return self._seq
+
+    def __repr__(self) -> str:
+        return f"RecordHistory(size={len(self)}, capacity={self.capacity}, total={self._seq})"
@@ -0,0 +1,378 @@
+"""
+行情录制与回放 - 用录制的行情离线驱动实盘代码路径
+
+录制文件格式(.tick):
+    文件头(64字节): 魔数 | 记录数 | 股票代码表偏移 | 股票代码表长度
+    记录区: TICK_DTYPE 定长记录，按到达顺序追加
+    股票代码表: UTF-8 编码、换行分隔，记录中的 symbol 字段为其下标
+
+读取时整个记录区通过 numpy.memmap 映射，回放按批返回零拷贝切片。
+
+回放是确定性的: 批次划分只取决于文件内容(相同时间戳或 batch_interval 时间窗内的
+记录为一批，再按 batch_size 拆分)，虚拟时钟取行情时间，定时回调在虚拟时间上触发，
+因此 1 倍速、N 倍速和最大速度下回调的顺序与参数完全相同，只有墙钟节奏不同。
+
+使用示例:
+    with TickWriter('data/ticks/20240102.tick') as writer:   # 实盘行情回调中录制
+        writer.write(symbol, tick['time'] / 1000, tick['lastPrice'], tick['volume'])
+
+    clock = VirtualClock()
+    cache = QuoteCache(capacity=5000, clock=clock)
+    replayer = TickReplayer(TickFile('data/ticks/20240102.tick'), speed=10, clock=clock)
+    stats = replayer.run(on_ticks=feed.on_ticks, on_timer=aggregator.advance)
+"""
+import argparse
+import itertools
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Callable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from libs.monitoring.latency import LatencyRecorder, get_recorder
+
+# ==================== 文件格式常量 ====================
+TICK_FILE_MAGIC = b'PQTICK01'  # 文件魔数(含版本号)
+TICK_FILE_SUFFIX = '.tick'
+TICK_HEADER_SIZE = 64
+TICK_DTYPE = np.dtype([
+    ('ts', '<f8'),  # 时间戳(epoch秒)
+    ('symbol', '<u4'),  # 股票代码表下标
+    ('last', '<f8'),  # 最新价
+    ('volume', '<f8'),  # 成交量(QMT快照为当日累计量)
+    ('bid', '<f8'),  # 买一价
+    ('ask', '<f8'),  # 卖一价
+])
+
+_HEADER_STRUCT = struct.Struct('<8sQQQ')  # 魔数 + 记录数 + 代码表偏移 + 代码表长度
+
+DEFAULT_WRITE_BUFFER = 65536  # 写入缓冲的记录数
+DEFAULT_REPLAY_BATCH = 8192  # 回放单批最多记录数
+DEFAULT_SCAN_CHUNK = 1 << 20  # 划分批次时每次扫描的记录数
+
+TICK_DISPATCH = 'tick_dispatch'  # 回放回调耗时的延迟区间名
+
+
+class TickWriter:
+    """行情录制(缓冲追加写，关闭时写入股票代码表和文件头)
+
+    先写临时文件，close 时原子替换为目标文件，未正常关闭的录制不会产生半个文件。
+    """
+
+    def __init__(self, path: Union[str, Path], buffer_size: int = DEFAULT_WRITE_BUFFER):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        self._file = open(self._tmp_path, 'wb')
+        self._file.write(b'\0' * TICK_HEADER_SIZE)
+        self._buffer = np.zeros(buffer_size, dtype=TICK_DTYPE)
+        self._pending = 0
+        self._slots = {}
+        self.symbols: List[str] = []
+        self.count = 0
+
+    def _symbol_id(self, symbol: str) -> int:
+        slot = self._slots.get(symbol)
+        if slot is None:
+            slot = self._slots[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return slot
+
+    def write(self, symbol: str, ts: float, last: float, volume: float = 0.0,
+              bid: float = np.nan, ask: float = np.nan):
+        """追加一条行情"""
+        self._buffer[self._pending] = (ts, self._symbol_id(symbol), last, volume, bid, ask)
+        self._pending += 1
+        if self._pending == len(self._buffer):
+            self._flush_buffer()
+
+    def write_many(self, symbols: Sequence[str], ts, last, volume=None, bid=None, ask=None):
+        """批量追加行情(各参数为等长序列)"""
+        n = len(symbols)
+        records = np.empty(n, dtype=TICK_DTYPE)
+        records['symbol'] = [self._symbol_id(s) for s in symbols]
+        records['ts'] = ts
+        records['last'] = last
+        records['volume'] = 0.0 if volume is None else volume
+        records['bid'] = np.nan if bid is None else bid
+        records['ask'] = np.nan if ask is None else ask
+        self._flush_buffer()
+        self._file.write(records.tobytes())
+        self.count += n
+
+    def _flush_buffer(self):
+        if self._pending:
+            self._file.write(self._buffer[:self._pending].tobytes())
+            self.count += self._pending
+            self._pending = 0
+
+    def close(self) -> Path:
+        """写入代码表和文件头并原子替换目标文件"""
+        if self._file.closed:
+            return self.path
+        self._flush_buffer()
+        blob = '\n'.join(self.symbols).encode('utf-8')
+        offset = TICK_HEADER_SIZE + self.count * TICK_DTYPE.itemsize
+        self._file.write(blob)
+        self._file.seek(0)
+        self._file.write(_HEADER_STRUCT.pack(TICK_FILE_MAGIC, self.count, offset, len(blob)))
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def __enter__(self) -> 'TickWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class TickFile:
+    """只读映射的行情录制文件"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            magic, n, offset, length = _HEADER_STRUCT.unpack(f.read(_HEADER_STRUCT.size))
+            if magic != TICK_FILE_MAGIC:
+                raise ValueError(f"无效的行情录制文件: {self.path}")
+            f.seek(offset)
+            blob = f.read(length)
+        self.symbols: List[str] = blob.decode('utf-8').split('\n') if length else []
+        if n:
+            self.records = np.memmap(self.path, dtype=TICK_DTYPE, mode='r',
+                                     offset=TICK_HEADER_SIZE, shape=(n,))
+        else:
+            self.records = np.empty(0, dtype=TICK_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __repr__(self) -> str:
+        return f"TickFile({self.path.name}, records={len(self)}, symbols={len(self.symbols)})"
+
+    @property
+    def time_range(self) -> Tuple[float, float]:
+        if not len(self.records):
+            return (np.nan, np.nan)
+        return float(self.records['ts'][0]), float(self.records['ts'][-1])
+
+    def index_range(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[int, int]:
+        """时间区间 [start, end] 对应的记录下标范围(要求按时间顺序录制)"""
+        ts = self.records['ts']
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side='left'))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, end, side='right'))
+        return lo, hi
+
+
+class TickBatch(NamedTuple):
+    """一批回放行情(各数组为录制文件的零拷贝视图)"""
+    symbol_table: List[str]
+    symbol_ids: np.ndarray
+    ts: np.ndarray
+    last: np.ndarray
+    volume: np.ndarray
+    bid: np.ndarray
+    ask: np.ndarray
+
+    @property
+    def symbols(self) -> List[str]:
+        table = self.symbol_table
+        return [table[i] for i in self.symbol_ids.tolist()]
+
+    @property
+    def size(self) -> int:
+        return len(self.ts)
+
+
+class VirtualClock:
+    """虚拟时钟，回放时取行情时间，可作为 QuoteCache 等组件的 clock 参数"""
+
+    def __init__(self, start: float = 0.0):
+        self._now = float(start)
+
+    def time(self) -> float:
+        return self._now
+
+    __call__ = time
+
+    def advance_to(self, ts: float):
+        """推进到 ts(时钟只前进不后退)"""
+        if ts > self._now:
+            self._now = float(ts)
+
+
+class ReplayStats(NamedTuple):
+    """回放统计"""
+    records: int
+    batches: int
+    timers: int  # 定时回调次数
+    elapsed: float  # 墙钟耗时(秒)
+    virtual_elapsed: float  # 覆盖的行情时间(秒)
+    max_lag: float  # 回调落后于计划时间的最大值(秒，最大速度回放时为0)
+
+    @property
+    def rate(self) -> float:
+        return self.records / self.elapsed if self.elapsed > 0 else float('inf')
+
+
+class TickReplayer:
+    """行情回放器"""
+
+    def __init__(self, source: TickFile, speed: Optional[float] = 1.0,
+                 clock: Optional[VirtualClock] = None, batch_size: int = DEFAULT_REPLAY_BATCH,
+                 batch_interval: float = 0.0, recorder: Optional[LatencyRecorder] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        """初始化回放器
+
+        Args:
+            source: 行情录制文件
+            speed: 回放倍速，1为实时，None或0为最大速度
+            clock: 虚拟时钟(回放时推进到当前批次的行情时间)
+            batch_size: 单批最多记录数
+            batch_interval: 批次时间窗(秒)，0表示相同时间戳的记录为一批
+            recorder: 延迟记录器(记录每批回调耗时 tick_dispatch)
+            sleep: 等待函数(便于测试注入)
+        """
+        if speed is not None and speed < 0:
+            raise ValueError(f"回放倍速不能为负数: {speed}")
+        self.source = source
+        self.speed = speed or None
+        self.clock = clock or VirtualClock()
+        self.batch_size = max(1, int(batch_size))
+        self.batch_interval = batch_interval
+        self.recorder = recorder or get_recorder()
+        self._sleep = sleep
+
+    def _group_starts(self, lo: int, hi: int) -> Iterator[int]:
+        """批次起点下标(分块扫描映射，只依赖文件内容)"""
+        ts = self.source.records['ts']
+        yield lo
+        for start in range(lo, hi, DEFAULT_SCAN_CHUNK):
+            prev = max(start - 1, lo)  # 与上一块末尾比较
+            keys = np.asarray(ts[prev:min(start + DEFAULT_SCAN_CHUNK, hi)])
+            if self.batch_interval > 0:
+                keys = np.floor(keys / self.batch_interval)
+            yield from (np.flatnonzero(keys[1:] != keys[:-1]) + prev + 1).tolist()
+
+    def batches(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[TickBatch]:
+        """按回放顺序生成批次(不等待、不推进时钟)"""
+        lo, hi = self.source.index_range(start, end)
+        if lo >= hi:
+            return
+        records, table = self.source.records, self.source.symbols
+        starts = self._group_starts(lo, hi)
+        current = next(starts)
+        for following in itertools.chain(starts, (hi,)):
+            for i in range(current, following, self.batch_size):
+                part = records[i:min(i + self.batch_size, following)]
+                yield TickBatch(table, part['symbol'], part['ts'], part['last'], part['volume'],
+                                part['bid'], part['ask'])
+            current = following
+
+    def run(self, on_ticks: Optional[Callable[[TickBatch], None]] = None,
+            on_tick: Optional[Callable[..., None]] = None,
+            on_timer: Optional[Callable[[float], None]] = None, timer_interval: float = 1.0,
+            start: Optional[float] = None, end: Optional[float] = None) -> ReplayStats:
+        """回放行情
+
+        Args:
+            on_ticks: 批量回调，参数为 TickBatch(对应QMT整体行情推送)
+            on_tick: 逐条回调，参数为 (symbol, ts, last, volume, bid, ask)
+            on_timer: 定时回调，参数为虚拟时间，按 timer_interval 在虚拟时间上触发
+                (如 BarAggregator.advance)
+            timer_interval: 定时回调间隔(虚拟秒)
+            start/end: 回放的行情时间区间(epoch秒)
+
+        Returns:
+            ReplayStats
+        """
+        clock, recorder, speed = self.clock, self.recorder, self.speed
+        perf = time.perf_counter
+        records = batches = timers = 0
+        max_lag = 0.0
+        first_ts = last_ts = None
+        next_timer = None
+        wall_start = perf()
+
+        for batch in self.batches(start, end):
+            ts = float(batch.ts[0])
+            if first_ts is None:
+                first_ts = ts
+                if on_timer is not None:
+                    next_timer = (np.floor(ts / timer_interval) + 1) * timer_interval
+            # 先触发批次时间之前到期的定时回调
+            while next_timer is not None and next_timer <= ts:
+                clock.advance_to(next_timer)
+                on_timer(next_timer)
+                timers += 1
+                next_timer += timer_interval
+            if speed is not None:
+                delay = wall_start + (ts - first_ts) / speed - perf()
+                if delay > 0:
+                    self._sleep(delay)
+                elif -delay > max_lag:
+                    max_lag = -delay
+            clock.advance_to(ts)
+
+            started = time.perf_counter_ns()
+            if on_ticks is not None:
+                on_ticks(batch)
+            if on_tick is not None:
+                for row in zip(batch.symbols, batch.ts.tolist(), batch.last.tolist(),
+                               batch.volume.tolist(), batch.bid.tolist(), batch.ask.tolist()):
+                    on_tick(*row)
+            recorder.record(TICK_DISPATCH, time.perf_counter_ns() - started)
+            records += batch.size
+            batches += 1
+            last_ts = float(batch.ts[-1])
+
+        # 收尾: 触发最后一批之后的一次定时回调，便于完成最后的K线
+        if next_timer is not None:
+            clock.advance_to(next_timer)
+            on_timer(next_timer)
+            timers += 1
+        virtual = (last_ts - first_ts) if first_ts is not None else 0.0
+        return ReplayStats(records, batches, timers, perf() - wall_start, virtual, max_lag)
+
+
+def main():
+    """命令行: 查看录制文件或以指定倍速回放到K线合成与行情缓存"""
+    from libs.data.bar_aggregator import BarAggregator
+    from libs.data.quote_cache import QuoteCache
+
+    parser = argparse.ArgumentParser(description='行情录制文件回放')
+    parser.add_argument('path', help='.tick 录制文件')
+    parser.add_argument('--speed', type=float, default=0, help='回放倍速，0为最大速度')
+    parser.add_argument('--freqs', nargs='+', default=['1m'], help='合成的K线频率')
+    parser.add_argument('--info', action='store_true', help='只显示文件信息')
+    args = parser.parse_args()
+
+    source = TickFile(args.path)
+    first, last = source.time_range
+    print(f"{source}  时间: {first:.3f} ~ {last:.3f}")
+    if args.info:
+        return
+
+    clock = VirtualClock()
+    cache = QuoteCache(capacity=max(1, len(source.symbols)), clock=clock)
+    aggregator = BarAggregator(args.freqs, capacity=max(1, len(source.symbols)))
+
+    def on_ticks(batch: TickBatch):
+        symbols = batch.symbols
+        cache.update_many(symbols, batch.last, batch.bid, batch.ask, batch.volume)
+        aggregator.on_ticks(symbols, batch.ts, batch.last, batch.volume)
+
+    replayer = TickReplayer(source, speed=args.speed, clock=clock)
+    stats = replayer.run(on_ticks=on_ticks, on_timer=aggregator.advance)
+    aggregator.close_all()
+    print(f"记录: {stats.records:,}  批次: {stats.batches:,}  耗时: {stats.elapsed:.3f}s  "
+          f"吞吐: {stats.rate:,.0f} 条/秒  最大落后: {stats.max_lag * 1000:.1f}ms")
+    print(f"K线: {aggregator.bars_emitted:,}  {replayer.recorder.histogram(TICK_DISPATCH)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+引擎模块
+包含多策略多账户引擎、共享行情平面、共享账户状态、状态快照与引擎策略基类
+"""
+
+from .quote_plane import SharedQuotePlane, QuoteRows, decode_qmt_quotes
+from .account_state import (
+    SharedAccountState, AccountStateWriter, PositionState, AssetState, default_state_name
+)
+from .checkpoint import Checkpointer, Journal, Snapshot, read_snapshot, write_snapshot
+from .strategy import EngineStrategy, StrategyContext, QuoteView, OrderIntent, load_strategy_class
+from .multi_engine import (
+    MultiStrategyEngine, StrategySpec, StrategyError, SubscriptionIndex, gateway_handler
+)
+
+__all__ = [
+    'SharedQuotePlane', 'QuoteRows', 'decode_qmt_quotes',
+    'SharedAccountState', 'AccountStateWriter', 'PositionState', 'AssetState', 'default_state_name',
+    'Checkpointer', 'Journal', 'Snapshot', 'read_snapshot', 'write_snapshot',
+    'EngineStrategy', 'StrategyContext', 'QuoteView', 'OrderIntent', 'load_strategy_class',
+    'MultiStrategyEngine', 'StrategySpec', 'StrategyError', 'SubscriptionIndex', 'gateway_handler',
+]
@@ -0,0 +1,387 @@
+"""
+共享账户状态 - 持仓与资金的共享内存发布(单写者 + 逐行顺序锁)
+
+券商回调(持仓、资金推送)由一个写线程写入共享内存，策略线程、风控检查、界面显示
+以及独立的监控面板进程直接读取，读取方不加锁、不阻塞写入方。
+
+内存布局:
+    头部(HEADER_DTYPE):  标识 | 持仓槽位数 | 已用槽位数 | 账户ID | 资金顺序号 | 资金字段
+    持仓(POSITION_DTYPE): 每只股票一行，seq | 代码 | 数量字段 | 价格字段 | 更新时间
+
+并发与 SharedQuotePlane 相同: 写入一行前把该行 seq 加一(奇数表示写入中)，
+写完再加一；读者在复制前后各读一次 seq，不一致或为奇数的行重新读取。
+股票代码写入槽位后不再改变，已用槽位数在该行写完后才增加，读者可缓存代码到槽位的映射。
+"""
+import argparse
+import queue
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+import numpy as np
+
+from .quote_plane import read_retry_wait
+
+STATE_MAGIC = b'PQACCT01'
+DEFAULT_POSITION_CAPACITY = 4096  # 默认持仓槽位数
+SYMBOL_BYTES = 16
+READ_TIMEOUT_MESSAGE = "账户状态读取超时，写入进程可能已异常退出"
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'), ('capacity', '<i8'), ('count', '<i8'), ('account_id', 'S32'),
+    ('asset_seq', '<i8'), ('cash', '<f8'), ('frozen_cash', '<f8'), ('market_value', '<f8'),
+    ('total_asset', '<f8'), ('asset_ts', '<f8'),
+], align=True)
+
+POSITION_DTYPE = np.dtype([
+    ('seq', '<i8'), ('symbol', f'S{SYMBOL_BYTES}'), ('volume', '<i8'), ('can_use_volume', '<i8'),
+    ('frozen_volume', '<i8'), ('open_price', '<f8'), ('avg_price', '<f8'), ('market_value', '<f8'),
+    ('ts', '<f8'),
+], align=True)
+
+
+class PositionState(NamedTuple):
+    """一只股票的持仓快照"""
+    symbol: str
+    volume: int  # 持仓数量
+    can_use_volume: int  # 可卖数量
+    frozen_volume: int  # 冻结数量
+    open_price: float  # 开仓价
+    avg_price: float  # 成本价
+    market_value: float  # 市值
+    ts: float  # 更新时间
+
+
+class AssetState(NamedTuple):
+    """账户资金快照"""
+    account_id: str
+    cash: float  # 可用资金
+    frozen_cash: float  # 冻结资金
+    market_value: float  # 持仓市值
+    total_asset: float  # 总资产
+    ts: float  # 更新时间
+
+
+def default_state_name(account_id: str) -> str:
+    """账户对应的共享内存名称(监控面板按账户ID连接)"""
+    return f"pq_acct_{account_id}"
+
+
+def _position_state(row) -> PositionState:
+    _, symbol, *fields = row.item()
+    return PositionState(symbol.decode(), *fields)
+
+
+class SharedAccountState:
+    """共享内存账户状态
+
+    使用示例:
+        state = SharedAccountState.create('8886281695')              # 交易进程(唯一写者)
+        state.update_position('600000.SH', 1000, can_use_volume=0, avg_price=10.5)
+        state.update_asset(cash=90000.0, total_asset=100500.0)
+        view = SharedAccountState.attach(default_state_name('8886281695'), tracked=False)  # 监控进程
+        view.positions(), view.asset()
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self.owner = owner
+        header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=shm.buf)
+        if bytes(header['magic'][0]) != STATE_MAGIC:
+            raise ValueError(f"共享内存 {shm.name} 不是账户状态")
+        self._header = header
+        self.capacity = int(header['capacity'][0])
+        self._positions = np.ndarray((self.capacity,), dtype=POSITION_DTYPE, buffer=shm.buf,
+                                     offset=HEADER_DTYPE.itemsize)
+        self._seq = self._positions['seq']
+        self._slots: Dict[str, int] = {}  # 股票代码 -> 槽位(写者与读者各自缓存)
+        self._known = 0  # 已缓存映射的槽位数
+
+    @staticmethod
+    def nbytes(capacity: int) -> int:
+        return HEADER_DTYPE.itemsize + POSITION_DTYPE.itemsize * max(1, capacity)
+
+    @classmethod
+    def create(cls, account_id: str, capacity: int = DEFAULT_POSITION_CAPACITY,
+               name: Optional[str] = None) -> 'SharedAccountState':
+        """创建账户状态(交易进程，负责释放)
+
+        同名共享内存已存在时(上次异常退出的残留)先释放再创建。
+        """
+        name = name or default_state_name(account_id)
+        size = cls.nbytes(capacity)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=shm.buf)
+        header[0] = (STATE_MAGIC, max(1, capacity), 0, str(account_id).encode(), 0,
+                     np.nan, np.nan, np.nan, np.nan, 0.0)
+        np.ndarray((max(1, capacity),), dtype=POSITION_DTYPE, buffer=shm.buf,
+                   offset=HEADER_DTYPE.itemsize)['seq'] = 0
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, tracked: bool = True) -> 'SharedAccountState':
+        """连接已创建的账户状态(只读使用)
+
+        Args:
+            name: 共享内存名称，见 default_state_name()
+            tracked: 由创建方以 multiprocessing 启动的子进程保持True(与创建方共用资源跟踪器)；
+                独立启动的进程(如监控面板)传False，避免退出时资源跟踪器释放交易进程的共享内存
+        """
+        if not tracked and sys.version_info >= (3, 13):
+            return cls(shared_memory.SharedMemory(name=name, track=False), owner=False)
+        shm = shared_memory.SharedMemory(name=name)
+        if not tracked:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def account_id(self) -> str:
+        return bytes(self._header['account_id'][0]).decode()
+
+    @property
+    def count(self) -> int:
+        """已使用的持仓槽位数(含已清仓的股票)"""
+        return int(self._header['count'][0])
+
+    # ==================== 写入(单写者) ====================
+    def _new_slot(self, symbol: str) -> int:
+        """为新股票分配槽位(已用槽位数在该行写完后由调用方增加)"""
+        slot = self.count
+        if slot >= self.capacity:
+            raise RuntimeError(f"持仓槽位已满({self.capacity})，请增大 capacity")
+        if len(symbol.encode()) > SYMBOL_BYTES:
+            raise ValueError(f"股票代码过长: {symbol}")
+        return slot
+
+    def update_position(self, symbol: str, volume: int, can_use_volume: Optional[int] = None,
+                        frozen_volume: int = 0, open_price: float = np.nan, avg_price: float = np.nan,
+                        market_value: float = np.nan, ts: Optional[float] = None):
+        """写入一只股票的持仓(整行覆盖)
+
+        Args:
+            symbol: 股票代码
+            volume: 持仓数量，0表示已清仓
+            can_use_volume: 可卖数量，None表示等于持仓数量
+            其余参数: 对应 PositionState 字段，ts 为None表示当前时间
+        """
+        slot = self._slots.get(symbol)
+        added = slot is None
+        if added:
+            slot = self._new_slot(symbol)
+        seq = self._seq
+        s = int(seq[slot]) + 1
+        seq[slot] = s  # 奇数: 写入中
+        self._positions[slot] = (s, symbol.encode(), volume,
+                                 volume if can_use_volume is None else can_use_volume,
+                                 frozen_volume, open_price, avg_price, market_value,
+                                 time.time() if ts is None else ts)
+        seq[slot] = s + 1  # 偶数: 写入完成
+        if added:
+            self._slots[symbol] = slot
+            self._header['count'] = slot + 1
+
+    def update_asset(self, cash: float, frozen_cash: float = 0.0, market_value: float = np.nan,
+                     total_asset: float = np.nan, ts: Optional[float] = None):
+        """写入账户资金"""
+        header = self._header
+        s = int(header['asset_seq'][0]) + 1
+        header['asset_seq'] = s
+        header['cash'] = cash
+        header['frozen_cash'] = frozen_cash
+        header['market_value'] = market_value
+        header['total_asset'] = total_asset
+        header['asset_ts'] = time.time() if ts is None else ts
+        header['asset_seq'] = s + 1
+
+    # ==================== 读取(多读者) ====================
+    def position_array(self) -> np.ndarray:
+        """一致地复制全部已用槽位(结构化数组，字段见 POSITION_DTYPE)"""
+        count = self.count
+        seq = self._seq[:count]
+        before = seq.copy()
+        rows = self._positions[:count].copy()
+        torn = (before != seq) | (before & 1).astype(bool)
+        deadline = None
+        while torn.any():
+            deadline = read_retry_wait(deadline, READ_TIMEOUT_MESSAGE)
+            bad = np.flatnonzero(torn)
+            before = seq[bad].copy()
+            rows[bad] = self._positions[bad]
+            still = (before != seq[bad]) | (before & 1).astype(bool)
+            torn[:] = False
+            torn[bad[still]] = True
+        return rows
+
+    def positions(self, include_closed: bool = False) -> Dict[str, PositionState]:
+        """全部持仓快照 {股票代码: PositionState}
+
+        Args:
+            include_closed: 是否包含数量为0(已清仓)的股票
+        """
+        rows = self.position_array()
+        if not include_closed:
+            rows = rows[rows['volume'] != 0]
+        return {state.symbol: state for state in map(_position_state, rows)}
+
+    def position(self, symbol: str) -> Optional[PositionState]:
+        """单只股票的持仓快照，未持有过时返回None"""
+        slot = self._slots.get(symbol)
+        if slot is None:
+            count = self.count
+            if count > self._known:
+                names = self._positions['symbol'][self._known:count]
+                for i, name in enumerate(names.tolist(), self._known):
+                    self._slots[name.decode()] = i
+                self._known = count
+            slot = self._slots.get(symbol)
+            if slot is None:
+                return None
+        deadline = None
+        while True:
+            before = int(self._seq[slot])
+            row = self._positions[slot].copy()
+            if not before & 1 and before == int(self._seq[slot]):
+                return _position_state(row)
+            deadline = read_retry_wait(deadline, READ_TIMEOUT_MESSAGE)
+
+    def asset(self) -> AssetState:
+        """账户资金快照"""
+        header = self._header
+        deadline = None
+        while True:
+            before = int(header['asset_seq'][0])
+            row = header[0].copy()
+            if not before & 1 and before == int(header['asset_seq'][0]):
+                return AssetState(bytes(row['account_id']).decode(), float(row['cash']),
+                                  float(row['frozen_cash']), float(row['market_value']),
+                                  float(row['total_asset']), float(row['asset_ts']))
+            deadline = read_retry_wait(deadline, READ_TIMEOUT_MESSAGE)
+
+    def close(self):
+        """解除映射(创建方同时释放共享内存)"""
+        self._header = self._positions = self._seq = None
+        self._shm.close()
+        if self.owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __repr__(self) -> str:
+        return f"SharedAccountState(name={self.name!r}, positions={self.count}/{self.capacity})"
+
+
+class AccountStateWriter:
+    """在独立写线程中把券商回调写入共享账户状态
+
+    回调方法与 xtquant 的 XtQuantTraderCallback 同名，可直接注册为回调(或由现有回调转发)，
+    回调线程只做入队，不等待写入。
+
+    使用示例:
+        writer = AccountStateWriter(SharedAccountState.create(account_id)).start()
+        writer.on_stock_position(xt_position)
+        writer.stop()
+    """
+
+    def __init__(self, state: SharedAccountState):
+        self.state = state
+        self._queue: 'queue.SimpleQueue' = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self.applied = 0
+        self.errors = 0
+
+    def start(self) -> 'AccountStateWriter':
+        """启动写线程"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='AccountStateWriter', daemon=True)
+            self._thread.start()
+        return self
+
+    def on_stock_position(self, position: Any):
+        """持仓推送(字段同 XtPosition: stock_code, volume, can_use_volume, ...)"""
+        self._queue.put(('position', position))
+
+    def on_stock_asset(self, asset: Any):
+        """资金推送(字段同 XtAsset: cash, frozen_cash, market_value, total_asset)"""
+        self._queue.put(('asset', asset))
+
+    def on_positions(self, positions: Iterable[Any]):
+        """整体持仓查询结果(如 query_stock_positions 的返回值)"""
+        for position in positions:
+            self._queue.put(('position', position))
+
+    def _apply(self, kind: str, item: Any):
+        get = getattr
+        if kind == 'position':
+            self.state.update_position(
+                item.stock_code, int(item.volume), int(get(item, 'can_use_volume', item.volume)),
+                int(get(item, 'frozen_volume', 0)), float(get(item, 'open_price', np.nan)),
+                float(get(item, 'avg_price', np.nan)), float(get(item, 'market_value', np.nan)))
+        else:
+            self.state.update_asset(float(item.cash), float(get(item, 'frozen_cash', 0.0)),
+                                    float(get(item, 'market_value', np.nan)),
+                                    float(get(item, 'total_asset', np.nan)))
+
+    def _run(self):
+        get = self._queue.get
+        while True:
+            message = get()
+            if message is None:
+                return
+            try:
+                self._apply(*message)
+                self.applied += 1
+            except Exception:
+                self.errors += 1
+
+    def stop(self, timeout: float = 5.0):
+        """写完已入队的回调后停止写线程"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+
+def main():
+    """命令行: 监控面板，定时显示交易进程发布的持仓与资金"""
+    parser = argparse.ArgumentParser(description='账户持仓与资金监控')
+    parser.add_argument('account', help='账户ID(或 --name 指定共享内存名称)')
+    parser.add_argument('--name', default=None, help='共享内存名称，默认按账户ID生成')
+    parser.add_argument('--interval', type=float, default=1.0, help='刷新间隔(秒)')
+    parser.add_argument('--once', action='store_true', help='只显示一次')
+    args = parser.parse_args()
+
+    state = SharedAccountState.attach(args.name or default_state_name(args.account), tracked=False)
+    try:
+        while True:
+            asset = state.asset()
+            print(f"[{time.strftime('%H:%M:%S')}] 账户 {asset.account_id}  总资产: {asset.total_asset:,.2f}  "
+                  f"可用: {asset.cash:,.2f}  市值: {asset.market_value:,.2f}")
+            for p in sorted(state.positions().values()):
+                print(f"  {p.symbol:<12} 持仓: {p.volume:>10,}  可卖: {p.can_use_volume:>10,}  "
+                      f"成本: {p.avg_price:>10.3f}  市值: {p.market_value:>14,.2f}")
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        state.close()
+
+
+if __name__ == '__main__':
+    main()
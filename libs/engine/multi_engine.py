@@ -0,0 +1,780 @@
+"""
+多策略多账户引擎 - 一份行情订阅，按订阅关系分发给多个策略实例
+
+行情处理流程:
+    1. 主进程解码一次行情推送(QMT整体行情或回放批次)，写入共享行情平面
+    2. 按 股票槽位 -> 订阅者 的索引只通知订阅了这些股票的分片
+    3. 分片(主进程内或工作进程)一次性读取本批行情，再按同样的索引把下标
+       引用分发给各策略，策略之间不复制数据
+
+workers=0 时全部策略在主进程内同步运行；workers>0 时策略按配置或轮询分配到
+工作进程，进程间只传递更新的槽位号，行情数据通过共享内存读取。通知由每个
+工作进程一个的发送线程写入管道，发布行情的线程不会被处理慢的工作进程阻塞；
+积压超过 max_pending 条时合并积压的通知(行情只关心最新值)，不会无限排队。
+工作进程按行情平面的 seq 丢弃已经分发过的行，处理滞后时同一条行情不会重复送达。
+工作进程退出(管道断开)后通过 on_error 报告一次，之后不再向其发送，也不再做快照。
+
+策略产生的下单意图按账户路由到注册的下单通道(如 GatewayThread)，
+未注册通道的账户只记录意图(用于回放和演练)。
+
+配置 checkpoint 后，行情批次与下单意图写入增量日志，并定时对策略变量(含指标)、
+行情平面与 register_state() 登记的应用状态(持仓、未完成委托等)做快照。重启时加载
+快照并回放其后的日志恢复到退出前的状态，回放期间策略产生的下单意图不会再次发出。
+"""
+import multiprocessing
+import pickle
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Type, Union
+
+import numpy as np
+
+from libs.monitoring.latency import QUOTE_TO_SIGNAL, SIGNAL_TO_ORDER, LatencyRecorder, get_recorder
+
+from .checkpoint import Checkpointer, Snapshot
+from .quote_plane import QuoteRows, SharedQuotePlane, decode_qmt_quotes
+from .strategy import EngineStrategy, OrderIntent, QuoteView, StrategyContext, load_strategy_class
+
+_HEADER_DTYPE = np.dtype('<i8')  # 通知消息头: 行情到达时间(perf_counter_ns)，负数为控制消息
+_STOP_MESSAGE = b''
+_SNAPSHOT_HEADER = -1  # 控制消息: 回传策略状态
+_REPLAY_HEADER = -2  # 控制消息: 回放行情(消息内携带行情数据)
+_SNAPSHOT_MESSAGE = np.array([_SNAPSHOT_HEADER], dtype=_HEADER_DTYPE).tobytes()
+_REPLAY_PREFIX = np.array([_REPLAY_HEADER], dtype=_HEADER_DTYPE).tobytes()
+_QUOTE_FIELDS = 5  # last / bid / ask / volume / ts
+
+# 增量日志记录类型(其余类型为 register_state 登记的应用状态名称)
+QUOTES_RECORD = 'quotes'
+INTENT_RECORD = 'intent'
+SYMBOLS_RECORD = 'symbols'
+DEFAULT_JOIN_TIMEOUT = 10.0  # 停止时等待工作进程退出的时间(秒)
+DEFAULT_MAX_PENDING = 1024  # 每个工作进程积压的通知条数上限，超过后合并
+
+
+class StrategySpec(NamedTuple):
+    """策略实例定义(可在进程间传递)"""
+    name: str
+    strategy: str  # "模块:类名"
+    account: str
+    symbols: Tuple[str, ...]
+    params: Dict
+    worker: Optional[int] = None
+
+
+class StrategyError(NamedTuple):
+    """策略回调异常(工作进程经由下单队列回传)"""
+    strategy: str
+    stage: str  # on_start / on_quotes / on_stop
+    message: str
+
+
+class SubscriptionIndex:
+    """股票槽位 -> 订阅者 的索引(布尔矩阵，一批行情一次向量运算完成路由)"""
+
+    def __init__(self, capacity: int, subscribers: int):
+        self.matrix = np.zeros((max(1, capacity), max(1, subscribers)), dtype=bool)
+
+    def add(self, subscriber: int, slots: Iterable[int]):
+        self.matrix[np.fromiter(slots, dtype=np.intp), subscriber] = True
+
+    def route(self, slots: np.ndarray) -> List[Tuple[int, np.ndarray]]:
+        """返回 [(订阅者, 其订阅的行情在 slots 中的下标)]，只包含有命中的订阅者"""
+        hits = self.matrix[slots]
+        return [(int(s), np.flatnonzero(hits[:, s])) for s in np.flatnonzero(hits.any(axis=0))]
+
+
+class _Shard:
+    """一组策略实例及其订阅索引(主进程内或某个工作进程内)"""
+
+    def __init__(self, specs: Sequence[StrategySpec], slot_map: Dict[str, int], symbols: Sequence[str],
+                 submit: Callable[[OrderIntent, int], None], on_error: Callable[[StrategyError], None],
+                 recorder: LatencyRecorder, states: Optional[Dict[str, Dict]] = None):
+        self.symbols = symbols
+        self.submit = submit
+        self.on_error = on_error
+        self.recorder = recorder
+        self.states = states or {}  # 待恢复的策略状态(on_start 之后载入)
+        self.replaying = False
+        self.suppressed = 0  # 回放期间拦截的下单意图数
+        self.strategies: List[EngineStrategy] = []
+        self.index = SubscriptionIndex(len(symbols), len(specs))
+        for i, spec in enumerate(specs):
+            cls = load_strategy_class(spec.strategy)
+            context = StrategyContext(spec.name, spec.account, spec.symbols, self._submit)
+            self.strategies.append(cls(context, **spec.params))
+            self.index.add(i, (slot_map[s] for s in spec.symbols))
+
+    def _call(self, strategy: EngineStrategy, stage: str, *args):
+        try:
+            getattr(strategy, stage)(*args)
+        except Exception as e:
+            self.on_error(StrategyError(strategy.name, stage, f"{type(e).__name__}: {e}"))
+
+    def _submit(self, intent: OrderIntent):
+        if self.replaying:  # 回放的行情产生的意图在退出前已经发出
+            self.suppressed += 1
+            return
+        self.submit(intent, time.perf_counter_ns())  # 附带信号产生时间，用于 signal_to_order
+
+    def start(self):
+        for strategy in self.strategies:
+            self._call(strategy, 'on_start')
+            if strategy.name in self.states:
+                self._call(strategy, 'set_state', self.states[strategy.name])
+        self.states = {}
+
+    def get_states(self) -> Dict[str, Dict]:
+        """各策略的状态(策略名称 -> get_state())"""
+        states = {}
+        for strategy in self.strategies:
+            try:
+                states[strategy.name] = strategy.get_state()
+            except Exception as e:
+                self.on_error(StrategyError(strategy.name, 'get_state', f"{type(e).__name__}: {e}"))
+        return states
+
+    def dispatch(self, rows: QuoteRows, arrival_ns: int):
+        record_since = self.recorder.record_since
+        for i, index in self.index.route(rows.slots):
+            self._call(self.strategies[i], 'on_quotes', QuoteView(rows, index, self.symbols))
+            record_since(QUOTE_TO_SIGNAL, arrival_ns)
+
+    def replay(self, rows: QuoteRows):
+        """回放一批行情: 策略照常更新状态，下单意图被拦截，不记录延迟"""
+        self.replaying = True
+        try:
+            for i, index in self.index.route(rows.slots):
+                self._call(self.strategies[i], 'on_quotes', QuoteView(rows, index, self.symbols))
+        finally:
+            self.replaying = False
+
+    def stop(self):
+        for strategy in self.strategies:
+            self._call(strategy, 'on_stop')
+
+
+def _encode_replay(rows: QuoteRows) -> bytes:
+    """回放消息: 头部 | 行情字段(float64, 5×n) | 槽位号(int32, n)"""
+    values = np.stack([rows.last, rows.bid, rows.ask, rows.volume, rows.ts])
+    return _REPLAY_PREFIX + values.tobytes() + rows.slots.astype(np.int32).tobytes()
+
+
+def _decode_replay(message: bytes) -> QuoteRows:
+    offset = _HEADER_DTYPE.itemsize
+    n = (len(message) - offset) // (_QUOTE_FIELDS * 8 + 4)
+    values = np.frombuffer(message, np.float64, _QUOTE_FIELDS * n, offset).reshape(_QUOTE_FIELDS, n)
+    slots = np.frombuffer(message, np.int32, n, offset + values.nbytes).astype(np.intp)
+    return QuoteRows(slots, *values)
+
+
+def _header(message: bytes) -> int:
+    return int(np.frombuffer(message, _HEADER_DTYPE, 1)[0])
+
+
+def _merge_notifications(messages: List[bytes]) -> Tuple[int, np.ndarray]:
+    """合并一组行情通知，返回 (最早到达时间, 去重后的槽位号)"""
+    arrival = min(_header(m) for m in messages)
+    slots = np.concatenate([np.frombuffer(m, np.int32, offset=_HEADER_DTYPE.itemsize)
+                            for m in messages])
+    if len(messages) > 1:
+        slots = np.unique(slots)
+    return arrival, slots
+
+
+def _dispatch_notifications(shard: _Shard, plane: SharedQuotePlane, messages: List[bytes],
+                            seen: np.ndarray):
+    """合并一组行情通知，从行情平面读取一次后分发
+
+    seen 为各槽位已分发行情的 seq，读到的行 seq 未变化说明已随更早的通知分发过，丢弃。
+    """
+    if not messages:
+        return
+    arrival, slots = _merge_notifications(messages)
+    rows, versions = plane.read_versioned(slots)
+    fresh = versions != seen[rows.slots]
+    if not fresh.all():
+        if not fresh.any():
+            return
+        rows, versions = QuoteRows(*(a[fresh] for a in rows)), versions[fresh]
+    seen[rows.slots] = versions
+    shard.dispatch(rows, arrival)
+
+
+class _WorkerLink:
+    """到一个工作进程的通知管道，由后台线程发送
+
+    发布线程只把消息放入队列，不会被处理慢的工作进程阻塞；积压超过 max_pending 条时
+    把积压的行情通知合并为一条，控制消息保持原有顺序。管道断开后标记为失效，
+    之后的消息直接丢弃。
+    """
+
+    def __init__(self, index: int, conn, max_pending: int = DEFAULT_MAX_PENDING,
+                 on_broken: Optional[Callable[['_WorkerLink'], None]] = None):
+        self.index = index
+        self.conn = conn
+        self.max_pending = max(1, int(max_pending))
+        self.on_broken = on_broken
+        self.alive = True
+        self.error = ''
+        self.merged = 0  # 合并掉的通知条数
+        self._queue: Deque[bytes] = deque()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name=f'StrategyLink-{index}', daemon=True)
+        self._thread.start()
+
+    def send(self, message: bytes) -> bool:
+        """放入发送队列，管道已断开时返回False"""
+        if not self.alive:
+            return False
+        with self._cond:
+            self._queue.append(message)
+            if len(self._queue) > self.max_pending:
+                self._compact()
+            self._cond.notify()
+        return True
+
+    def _compact(self):
+        """合并积压的行情通知(控制消息前后的通知分别合并)"""
+        compacted: Deque[bytes] = deque()
+        run: List[bytes] = []
+        for message in self._queue:
+            if message and _header(message) >= 0:
+                run.append(message)
+                continue
+            if run:
+                compacted.append(self._merge(run))
+                run = []
+            compacted.append(message)
+        if run:
+            compacted.append(self._merge(run))
+        self.merged += len(self._queue) - len(compacted)
+        self._queue = compacted
+
+    @staticmethod
+    def _merge(messages: List[bytes]) -> bytes:
+        if len(messages) == 1:
+            return messages[0]
+        arrival, slots = _merge_notifications(messages)
+        return np.array([arrival], dtype=_HEADER_DTYPE).tobytes() + slots.astype(np.int32).tobytes()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closing:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                message = self._queue.popleft()
+            try:
+                self.conn.send_bytes(message)
+            except (BrokenPipeError, EOFError, OSError) as e:
+                self.alive = False
+                self.error = f"{type(e).__name__}: {e}"
+                with self._cond:
+                    self._queue.clear()
+                if self.on_broken is not None:
+                    self.on_broken(self)
+                return
+
+    def close(self, timeout: Optional[float] = None):
+        """发送完队列中的消息后结束发送线程，再关闭管道"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        self.conn.close()
+
+
+def _worker_main(worker_index: int, plane_name: str, symbols: Sequence[str],
+                 specs: Sequence[StrategySpec], states: Dict[str, Dict], conn, order_queue):
+    """工作进程入口: 读取槽位通知，从共享行情平面取数并分发给本进程的策略
+
+    控制消息(快照请求、回放行情)按到达顺序处理，其前后的行情通知分别合并。
+    """
+    plane = SharedQuotePlane.attach(plane_name, symbols)
+    recorder = LatencyRecorder()
+
+    def submit(intent: OrderIntent, signal_ns: int):
+        order_queue.put(('intent', intent, signal_ns))
+
+    shard = _Shard(specs, plane.slots, plane.symbols, submit, order_queue.put, recorder, states)
+    shard.start()
+    seen = np.zeros(plane.capacity, dtype=np.int64)  # 各槽位已分发行情的 seq
+    running = True
+    try:
+        while running:
+            messages = [conn.recv_bytes()]
+            while conn.poll():  # 合并积压的通知
+                messages.append(conn.recv_bytes())
+            pending: List[bytes] = []
+            for message in messages:
+                if message == _STOP_MESSAGE:
+                    running = False
+                    continue
+                header = _header(message)
+                if header >= 0:
+                    pending.append(message)
+                    continue
+                _dispatch_notifications(shard, plane, pending, seen)
+                pending = []
+                if header == _REPLAY_HEADER:
+                    shard.replay(_decode_replay(message))
+                elif header == _SNAPSHOT_HEADER:
+                    order_queue.put(('state', worker_index, shard.get_states(), shard.suppressed))
+            _dispatch_notifications(shard, plane, pending, seen)
+    finally:
+        shard.stop()
+        order_queue.put(('latency', recorder.histogram(QUOTE_TO_SIGNAL)))
+        order_queue.put(None)  # 结束标记
+        plane.close()
+
+
+def gateway_handler(runner) -> Callable[[OrderIntent], object]:
+    """把 GatewayThread 包装为账户的下单通道"""
+    def handle(intent: OrderIntent):
+        return runner.place(intent.symbol, intent.direction, intent.volume, intent.price,
+                            intent.price_type, intent.remark)
+    return handle
+
+
+class MultiStrategyEngine:
+    """多策略多账户引擎
+
+    使用示例:
+        engine = MultiStrategyEngine(workers=2)
+        engine.add_account('8886281695', gateway_handler(runner))
+        engine.add_strategy('strategies.multi:MomentumStrategy', name='mom_a',
+                            symbols=['600000.SH', '000001.SZ'], threshold=0.01)
+        engine.start()
+        xtdata.subscribe_whole_quote(engine.symbols, engine.on_qmt_quotes)
+        ...
+        engine.stop()
+
+    快照与恢复:
+        engine = MultiStrategyEngine(checkpoint=Checkpointer('data/checkpoint', interval=60))
+        engine.register_state('positions', book.dump_state, book.load_state, book.apply)
+        engine.start()          # 加载快照并回放增量日志
+        engine.journal('positions', ('fill', fill))   # 应用状态的增量变化
+    """
+
+    def __init__(self, workers: int = 0, recorder: Optional[LatencyRecorder] = None,
+                 on_error: Optional[Callable[[StrategyError], None]] = None,
+                 checkpoint: Optional[Checkpointer] = None, max_pending: int = DEFAULT_MAX_PENDING):
+        """初始化引擎
+
+        Args:
+            workers: 策略工作进程数，0表示在主进程内运行
+            recorder: 延迟记录器(记录 quote_to_signal / signal_to_order)，默认为全局记录器
+            on_error: 策略回调异常与工作进程退出的处理函数，默认记录到 errors
+            checkpoint: 状态快照与增量日志，None表示不启用
+            max_pending: 每个工作进程积压的通知条数上限，超过后合并
+        """
+        self.workers = max(0, int(workers))
+        self.max_pending = max_pending
+        self.recorder = recorder or get_recorder()
+        self.errors: List[StrategyError] = []  # 未指定 on_error 时记录策略异常
+        self.on_error = on_error or self.errors.append
+        self.orders: List[OrderIntent] = []  # 未注册下单通道的账户的下单意图
+        self._accounts: Dict[str, Optional[Callable[[OrderIntent], object]]] = {}
+        self._specs: List[StrategySpec] = []
+        self._plane: Optional[SharedQuotePlane] = None
+        self._local: Optional[_Shard] = None
+        self._links: List[_WorkerLink] = []
+        self._processes: List[multiprocessing.Process] = []
+        self._worker_index: Optional[SubscriptionIndex] = None
+        self._order_queue = None
+        self._drain_thread: Optional[threading.Thread] = None
+        self._route_lock = threading.Lock()
+        self._checkpoint = checkpoint
+        self._app_states: Dict[str, Tuple[Callable[[], object], Callable[[object], None],
+                                          Optional[Callable[[object], None]]]] = {}
+        self._pending_checkpoint: Optional[Tuple[int, bytes, Dict[int, Dict]]] = None
+        self._suppressed: Dict[int, int] = {}  # 工作进程编号 -> 回放时拦截的下单意图数
+        self.restore: Dict[str, float] = {}  # 最近一次启动的恢复统计
+        self.stats = {'batches': 0, 'quotes': 0, 'notifications': 0, 'orders': 0,
+                      'checkpoints': 0, 'suppressed': 0, 'dropped_notifications': 0, 'dead_workers': 0}
+
+    @classmethod
+    def from_config(cls, app_config, handlers: Optional[Dict[str, Callable]] = None,
+                    **kwargs) -> 'MultiStrategyEngine':
+        """根据 AppConfig 的 engine / accounts / strategies 创建引擎
+
+        Args:
+            app_config: 应用配置
+            handlers: 账户ID -> 下单通道
+        """
+        handlers = handlers or {}
+        kwargs.setdefault('workers', app_config.engine.workers)
+        kwargs.setdefault('checkpoint', Checkpointer.from_config(app_config.engine))
+        engine = cls(**kwargs)
+        accounts = app_config.accounts or [app_config.live]
+        for account in accounts:
+            engine.add_account(account.account_id, handlers.get(account.account_id))
+        for item in app_config.strategies:
+            engine.add_strategy(item.strategy, name=item.name or None, account=item.account or None,
+                                symbols=item.symbols, worker=item.worker, **item.parameters)
+        return engine
+
+    # ==================== 注册 ====================
+    def add_account(self, account_id: str, handler: Optional[Callable[[OrderIntent], object]] = None):
+        """注册账户及其下单通道(None表示只记录下单意图)"""
+        self._accounts[account_id] = handler
+
+    def add_strategy(self, strategy: Union[str, Type[EngineStrategy]], name: Optional[str] = None,
+                     account: Optional[str] = None, symbols: Sequence[str] = (),
+                     worker: Optional[int] = None, **params) -> StrategySpec:
+        """添加策略实例(需在 start 之前)
+
+        Args:
+            strategy: 策略类或 "模块:类名"(工作进程按名称加载，类需定义在模块顶层)
+            name: 实例名称，默认为 "类名_序号"
+            account: 下单账户，默认为第一个注册的账户
+            symbols: 订阅的股票
+            worker: 指定工作进程编号
+            **params: 策略参数
+        """
+        if self._plane is not None:
+            raise RuntimeError("引擎已启动，不能再添加策略")
+        if isinstance(strategy, type):
+            strategy = f"{strategy.__module__}:{strategy.__qualname__}"
+        load_strategy_class(strategy)  # 尽早发现配置错误
+        if account is None:
+            if not self._accounts:
+                raise ValueError("请先注册账户")
+            account = next(iter(self._accounts))
+        elif account not in self._accounts:
+            raise ValueError(f"策略下单账户未注册: {account}")
+        name = name or f"{strategy.rpartition(':')[2]}_{len(self._specs) + 1}"
+        if any(spec.name == name for spec in self._specs):
+            raise ValueError(f"策略实例名称重复: {name}")
+        spec = StrategySpec(name, strategy, account, tuple(dict.fromkeys(symbols)), dict(params), worker)
+        self._specs.append(spec)
+        return spec
+
+    def register_state(self, name: str, dump: Callable[[], object], load: Callable[[object], None],
+                       apply: Optional[Callable[[object], None]] = None):
+        """登记需要快照的应用状态(如持仓、未完成委托、临时订单记录)
+
+        Args:
+            name: 状态名称，同时作为 journal() 的记录类型
+            dump: 返回可 pickle 的状态(在发布行情的线程中调用)
+            load: 启动时载入快照中的状态
+            apply: 启动时按顺序回放快照之后的 journal(name, data) 记录
+        """
+        if name in (QUOTES_RECORD, INTENT_RECORD, SYMBOLS_RECORD):
+            raise ValueError(f"状态名称与引擎日志类型冲突: {name}")
+        self._app_states[name] = (dump, load, apply)
+
+    def journal(self, name: str, data):
+        """记录应用状态的一次增量变化(未启用快照时忽略)"""
+        if self._checkpoint is not None:
+            self._checkpoint.record(name, data)
+
+    @property
+    def symbols(self) -> List[str]:
+        """全部策略订阅的股票(行情订阅列表)"""
+        if self._plane is not None:
+            return list(self._plane.symbols)
+        return sorted({s for spec in self._specs for s in spec.symbols})
+
+    @property
+    def strategies(self) -> List[StrategySpec]:
+        return list(self._specs)
+
+    # ==================== 启停 ====================
+    def _assign(self) -> List[List[StrategySpec]]:
+        """把策略分配到工作进程: 指定编号的优先，其余按订阅数量均衡"""
+        shards: List[List[StrategySpec]] = [[] for _ in range(self.workers)]
+        load = [0] * self.workers
+        pending = []
+        for spec in self._specs:
+            if spec.worker is not None:
+                shard = spec.worker % self.workers
+                shards[shard].append(spec)
+                load[shard] += len(spec.symbols)
+            else:
+                pending.append(spec)
+        for spec in sorted(pending, key=lambda s: -len(s.symbols)):
+            shard = load.index(min(load))
+            shards[shard].append(spec)
+            load[shard] += len(spec.symbols)
+        return shards
+
+    def start(self) -> 'MultiStrategyEngine':
+        """创建共享行情平面并启动策略(工作进程)"""
+        if self._plane is not None:
+            return self
+        started = time.perf_counter()
+        snapshot, records = self._checkpoint.load() if self._checkpoint is not None else (None, iter(()))
+        self._plane = SharedQuotePlane.create(self.symbols)
+        slot_map, symbols = self._plane.slots, self._plane.symbols
+        states = self._restore(snapshot) if snapshot is not None else {}
+        if self.workers == 0:
+            self._local = _Shard(self._specs, slot_map, symbols, self._route, self.on_error, self.recorder,
+                                 states)
+            self._local.start()
+        else:
+            self._start_workers(states)
+        if self._checkpoint is not None:
+            self._replay(snapshot, records, started)
+        return self
+
+    def _start_workers(self, states: Dict[str, Dict]):
+        slot_map, symbols = self._plane.slots, self._plane.symbols
+
+        shards = self._assign()
+        context = multiprocessing.get_context()
+        self._order_queue = context.Queue()
+        self._worker_index = SubscriptionIndex(len(symbols), len(shards))
+        for i, specs in enumerate(shards):
+            self._worker_index.add(i, {slot_map[s] for spec in specs for s in spec.symbols})
+            reader, writer = context.Pipe(duplex=False)
+            shard_states = {spec.name: states[spec.name] for spec in specs if spec.name in states}
+            process = context.Process(target=_worker_main, name=f'StrategyWorker-{i}', daemon=True,
+                                      args=(i, self._plane.name, symbols, specs, shard_states, reader,
+                                            self._order_queue))
+            process.start()
+            reader.close()
+            self._links.append(_WorkerLink(i, writer, self.max_pending, self._link_broken))
+            self._processes.append(process)
+        self._drain_thread = threading.Thread(target=self._drain_orders, name='StrategyOrders', daemon=True)
+        self._drain_thread.start()
+
+    def stop(self, timeout: float = DEFAULT_JOIN_TIMEOUT):
+        """停止策略和工作进程，释放共享行情平面(启用快照时先做最后一次快照)"""
+        if self._plane is None:
+            return
+        self.checkpoint()
+        if self._local is not None:
+            self._local.stop()
+            self._local = None
+        for link in self._links:
+            link.send(_STOP_MESSAGE)
+        if self._drain_thread is not None:
+            self._drain_thread.join(timeout)
+            self._drain_thread = None
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        for link in self._links:
+            link.close(timeout)
+        self._links, self._processes = [], []
+        self._pending_checkpoint = None
+        if self._checkpoint is not None:
+            self._checkpoint.close()
+        self._plane.close()
+        self._plane = None
+
+    def __enter__(self) -> 'MultiStrategyEngine':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    # ==================== 行情输入 ====================
+    def publish(self, slots: np.ndarray, last, bid=None, ask=None, volume=None, ts=None):
+        """写入一批已解码的行情(按槽位)并分发"""
+        if len(slots) == 0:
+            return
+        arrival = time.perf_counter_ns()
+        checkpoint = self._checkpoint
+        if checkpoint is not None:
+            if ts is None:  # 日志中记录确定的行情时间，回放结果与实盘一致
+                ts = time.time()
+            checkpoint.record(QUOTES_RECORD, (slots, last, bid, ask, volume, ts))
+        plane = self._plane
+        plane.write(slots, last, bid, ask, volume, ts)
+        self.stats['batches'] += 1
+        self.stats['quotes'] += len(slots)
+        if self._local is not None:
+            self._local.dispatch(self._plane_rows(slots), arrival)
+        else:
+            header = np.array([arrival], dtype=_HEADER_DTYPE).tobytes()
+            for worker, index in self._worker_index.route(slots):
+                if self._links[worker].send(header + slots[index].astype(np.int32).tobytes()):
+                    self.stats['notifications'] += 1
+                else:
+                    self.stats['dropped_notifications'] += 1
+        if checkpoint is not None and checkpoint.due():
+            self.checkpoint()
+
+    def _plane_rows(self, slots: np.ndarray) -> QuoteRows:
+        plane = self._plane
+        return QuoteRows(slots, plane.last[slots], plane.bid[slots], plane.ask[slots],
+                         plane.volume[slots], plane.ts[slots])
+
+    def on_quotes(self, symbols: Sequence[str], last, bid=None, ask=None, volume=None, ts=None):
+        """输入一批行情(按股票代码，未被订阅的股票被忽略)"""
+        slots, index = self._plane.slots_for(symbols)
+        if len(slots) == 0:
+            return
+        take = (lambda a: None if a is None else np.asarray(a)[index])
+        ts = ts if ts is None or np.ndim(ts) == 0 else np.asarray(ts)[index]
+        self.publish(slots, np.asarray(last)[index], take(bid), take(ask), take(volume), ts)
+
+    def on_qmt_quotes(self, data: Dict[str, Dict]):
+        """QMT整体行情推送回调(xtdata.subscribe_whole_quote)"""
+        slots, last, bid, ask, volume, ts = decode_qmt_quotes(data, self._plane.slots)
+        self.publish(slots, last, bid, ask, volume, ts)
+
+    def on_ticks(self, batch):
+        """行情回放批次(TickBatch)回调"""
+        self.on_quotes(batch.symbols, batch.last, batch.bid, batch.ask, batch.volume, batch.ts)
+
+    # ==================== 下单路由 ====================
+    def _route(self, intent: OrderIntent, signal_ns: int = 0):
+        handler = self._accounts.get(intent.account)
+        with self._route_lock:
+            self.stats['orders'] += 1
+            if self._checkpoint is not None:
+                self._checkpoint.record(INTENT_RECORD, intent)
+            if handler is None:
+                self.orders.append(intent)
+                return
+        handler(intent)
+        if signal_ns:  # 策略产生意图到交给下单通道
+            self.recorder.record_since(SIGNAL_TO_ORDER, signal_ns)
+
+    def _drain_orders(self):
+        """把工作进程回传的下单意图、异常和延迟统计转交给主进程"""
+        remaining = len(self._processes)
+        while remaining:
+            item = self._order_queue.get()
+            if item is None:
+                remaining -= 1
+            elif isinstance(item, OrderIntent):
+                self._route(item)
+            elif isinstance(item, StrategyError):
+                self.on_error(item)
+            elif isinstance(item, tuple) and item[0] == 'intent':
+                self._route(item[1], item[2])
+            elif isinstance(item, tuple) and item[0] == 'latency':
+                self.recorder.merge(QUOTE_TO_SIGNAL, item[1])
+            elif isinstance(item, tuple) and item[0] == 'state':
+                self._collect_state(*item[1:])
+
+    # ==================== 快照与恢复 ====================
+    def checkpoint(self) -> bool:
+        """立即做一次状态快照(在发布行情的线程中调用)
+
+        主进程状态在切换日志段的同时采集；工作进程在处理完此前的全部行情通知后
+        回传策略状态，收齐后由后台线程写盘。上一次快照尚未收齐时返回False。
+        """
+        checkpoint = self._checkpoint
+        if checkpoint is None or self._plane is None:
+            return False
+        with self._route_lock:  # 与下单意图的日志记录互斥，保证意图不重复也不遗漏
+            if self._pending_checkpoint is not None:
+                return False
+            if not all(link.alive for link in self._links):
+                return False  # 已退出的工作进程无法回传策略状态
+            seq = checkpoint.begin()
+            state = {'engine': self._engine_state(),
+                     'app': {name: dump() for name, (dump, _, _) in self._app_states.items()}}
+            if self._local is None:
+                # 工作进程回传前主进程状态可能继续变化，先序列化固定在 seq 时刻
+                self._pending_checkpoint = (seq, pickle.dumps(state, protocol=5), {})
+        if self._local is not None:
+            state['strategies'] = self._local.get_states()
+            checkpoint.commit(seq, state)
+            self.stats['checkpoints'] += 1
+            return True
+        for link in self._links:
+            link.send(_SNAPSHOT_MESSAGE)
+        return True
+
+    def _link_broken(self, link: _WorkerLink):
+        """工作进程的管道断开(进程已退出): 报告一次，之后发往该进程的通知被丢弃"""
+        self.stats['dead_workers'] += 1
+        self.on_error(StrategyError(f'StrategyWorker-{link.index}', 'pipe', link.error))
+
+    def _engine_state(self) -> Dict:
+        plane = self._plane
+        return {'symbols': list(plane.symbols),
+                'quotes': np.stack([plane.last, plane.bid, plane.ask, plane.volume, plane.ts]),
+                'orders': list(self.orders)}
+
+    def _collect_state(self, worker: int, states: Dict[str, Dict], suppressed: int):
+        """汇总工作进程回传的策略状态，收齐后提交快照"""
+        with self._route_lock:
+            self._suppressed[worker] = suppressed
+            self.stats['suppressed'] = sum(self._suppressed.values())
+            pending = self._pending_checkpoint
+            if pending is None:
+                return
+            seq, frozen, parts = pending
+            parts[worker] = states
+            if len(parts) < len(self._processes):
+                return
+            state = pickle.loads(frozen)
+            state['strategies'] = {name: s for part in parts.values() for name, s in part.items()}
+            self._checkpoint.commit(seq, state)
+            self._pending_checkpoint = None
+            self.stats['checkpoints'] += 1
+
+    def _restore(self, snapshot: Snapshot) -> Dict[str, Dict]:
+        """载入快照中的行情平面、下单意图与应用状态，返回待恢复的策略状态"""
+        state = snapshot.state
+        engine_state = state.get('engine', {})
+        slots, index = self._plane.slots_for(engine_state.get('symbols', []))
+        if len(slots):
+            self._plane.write(slots, *engine_state['quotes'][:, index])
+        self.orders = list(engine_state.get('orders', []))
+        app_states = state.get('app', {})
+        for name, (_, load, _) in self._app_states.items():
+            if name in app_states:
+                load(app_states[name])
+        return state.get('strategies', {})
+
+    def _slot_mapping(self, symbols: Sequence[str]) -> Optional[np.ndarray]:
+        """日志中的槽位号 -> 当前槽位号(-1表示已不再订阅)，股票表未变化时返回None"""
+        if list(symbols) == self._plane.symbols:
+            return None
+        get = self._plane.slots.get
+        return np.array([get(s, -1) for s in symbols], dtype=np.intp)
+
+    def _replay(self, snapshot: Optional[Snapshot], records, started: float):
+        """回放快照之后的增量日志，随后记录当前股票表并做一次快照"""
+        mapping = self._slot_mapping(snapshot.state['engine']['symbols']) \
+            if snapshot is not None and 'engine' in snapshot.state else None
+        replayed = 0
+        for _, kind, data in records:
+            replayed += 1
+            if kind == QUOTES_RECORD:
+                self._replay_quotes(mapping, *data)
+            elif kind == INTENT_RECORD:
+                if self._accounts.get(data.account) is None:
+                    self.orders.append(data)
+            elif kind == SYMBOLS_RECORD:
+                mapping = self._slot_mapping(data)
+            else:
+                entry = self._app_states.get(kind)
+                if entry is not None and entry[2] is not None:
+                    entry[2](data)
+        if self._local is not None:
+            self.stats['suppressed'] = self._local.suppressed
+        self._checkpoint.record(SYMBOLS_RECORD, list(self._plane.symbols))
+        if snapshot is not None or replayed:
+            self.checkpoint()
+        self.restore = {'snapshot_seq': snapshot.seq if snapshot is not None else 0,
+                        'replayed': replayed, 'elapsed': time.perf_counter() - started}
+
+    def _replay_quotes(self, mapping: Optional[np.ndarray], slots, last, bid, ask, volume, ts):
+        if mapping is not None:
+            slots = mapping[np.asarray(slots)]
+            keep = slots >= 0
+            take = (lambda a: a if a is None or np.ndim(a) == 0 else np.asarray(a)[keep])
+            slots, last, bid, ask, volume, ts = slots[keep], *map(take, (last, bid, ask, volume, ts))
+            if len(slots) == 0:
+                return
+        self._plane.write(slots, last, bid, ask, volume, ts)
+        rows = self._plane_rows(slots)
+        if self._local is not None:
+            self._local.replay(rows)
+            return
+        for worker, index in self._worker_index.route(slots):
+            self._links[worker].send(_encode_replay(QuoteRows(*(a[index] for a in rows))))
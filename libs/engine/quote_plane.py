@@ -0,0 +1,207 @@
+"""
+共享行情平面 - 多进程共享的最新行情(共享内存 + 逐槽位顺序锁)
+
+主进程解码一次行情后写入共享内存，各策略工作进程直接映射同一块内存读取，
+进程间只传递更新的槽位号，不复制行情数据。
+
+内存布局(按列连续，每只股票一个槽位):
+    seq(int64) | last | bid | ask | volume | ts (float64)
+
+并发: 单写者、多读者。写入时先把槽位的 seq 加一(奇数表示写入中)，写完字段后
+再加一(偶数)；读者前后两次读取 seq，不一致或为奇数的行重新读取，保证读到的
+每一行都不是写了一半的数据。读者每次重试前让出CPU(同进程的写线程需要拿到GIL
+才能写完)，在 READ_TIMEOUT 内仍读不到一致数据时认为写者已异常退出。
+"""
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+PLANE_COLUMNS = ('seq', 'last', 'bid', 'ask', 'volume', 'ts')
+READ_TIMEOUT = 2.0  # 读者等待一致数据的时间上限(秒)，超过后认为写者异常
+
+# QMT 整体行情推送中的字段
+QMT_LAST = 'lastPrice'
+QMT_BID = 'bidPrice'
+QMT_ASK = 'askPrice'
+QMT_VOLUME = 'volume'
+QMT_TIME = 'time'  # 毫秒时间戳
+
+
+def read_retry_wait(deadline: Optional[float], message: str) -> float:
+    """顺序锁读者重试前调用: 让出CPU，超过 READ_TIMEOUT 时抛出 RuntimeError
+
+    Args:
+        deadline: 上一次返回的截止时间，首次重试传入None
+        message: 超时时的错误信息
+
+    Returns:
+        float: 截止时间(传给下一次调用)
+    """
+    now = time.monotonic()
+    if deadline is None:
+        deadline = now + READ_TIMEOUT
+    elif now > deadline:
+        raise RuntimeError(message)
+    time.sleep(0)
+    return deadline
+
+
+class QuoteRows(NamedTuple):
+    """一组槽位的行情(各数组与 slots 一一对应)"""
+    slots: np.ndarray
+    last: np.ndarray
+    bid: np.ndarray
+    ask: np.ndarray
+    volume: np.ndarray
+    ts: np.ndarray
+
+
+class SharedQuotePlane:
+    """共享内存行情平面
+
+    使用示例:
+        plane = SharedQuotePlane.create(symbols)          # 主进程
+        plane.write(slots, last, bid, ask, volume, ts)
+        reader = SharedQuotePlane.attach(plane.name, symbols)   # 工作进程
+        rows = reader.read(slots)
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, symbols: Sequence[str], owner: bool):
+        self._shm = shm
+        self.owner = owner
+        self.symbols: List[str] = list(symbols)
+        self.slots: Dict[str, int] = {s: i for i, s in enumerate(self.symbols)}
+        capacity = max(1, len(self.symbols))
+        columns = np.ndarray((len(PLANE_COLUMNS), capacity), dtype=np.float64, buffer=shm.buf)
+        self._columns = columns
+        self.seq = columns[0].view(np.int64)
+        self.last, self.bid, self.ask, self.volume, self.ts = columns[1:]
+
+    @staticmethod
+    def nbytes(capacity: int) -> int:
+        return len(PLANE_COLUMNS) * max(1, capacity) * 8
+
+    @classmethod
+    def create(cls, symbols: Sequence[str], name: Optional[str] = None) -> 'SharedQuotePlane':
+        """创建共享行情平面(主进程，负责释放)"""
+        shm = shared_memory.SharedMemory(name=name, create=True, size=cls.nbytes(len(symbols)))
+        plane = cls(shm, symbols, owner=True)
+        plane.seq[:] = 0
+        for column in (plane.last, plane.bid, plane.ask, plane.volume, plane.ts):
+            column[:] = np.nan
+        return plane
+
+    @classmethod
+    def attach(cls, name: str, symbols: Sequence[str]) -> 'SharedQuotePlane':
+        """在工作进程中映射已创建的行情平面(工作进程与主进程共用资源跟踪器，由创建方释放)"""
+        return cls(shared_memory.SharedMemory(name=name), symbols, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def capacity(self) -> int:
+        return len(self.symbols)
+
+    # ==================== 写入(单写者) ====================
+    def write(self, slots: np.ndarray, last, bid=None, ask=None, volume=None, ts=None):
+        """写入一批行情
+
+        Args:
+            slots: 槽位号数组(可重复，重复时以最后一条为准)
+            last/bid/ask/volume: 与 slots 等长的数组，None表示不更新该字段
+            ts: 行情时间数组或标量，None表示当前时间
+        """
+        seq = self.seq
+        seq[slots] += 1  # 奇数: 写入中
+        self.last[slots] = last
+        if bid is not None:
+            self.bid[slots] = bid
+        if ask is not None:
+            self.ask[slots] = ask
+        if volume is not None:
+            self.volume[slots] = volume
+        self.ts[slots] = time.time() if ts is None else ts
+        seq[slots] += 1  # 偶数: 写入完成
+
+    def slots_for(self, symbols: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """股票代码 -> (槽位号数组, 在输入中的下标数组)，未登记的股票被跳过"""
+        get = self.slots.get
+        index, slots = [], []
+        for i, symbol in enumerate(symbols):
+            slot = get(symbol)
+            if slot is not None:
+                index.append(i)
+                slots.append(slot)
+        return np.array(slots, dtype=np.intp), np.array(index, dtype=np.intp)
+
+    # ==================== 读取(多读者) ====================
+    def read(self, slots: np.ndarray) -> QuoteRows:
+        """一致地读取一组槽位的行情"""
+        return self.read_versioned(slots)[0]
+
+    def read_versioned(self, slots: np.ndarray) -> Tuple[QuoteRows, np.ndarray]:
+        """一致地读取一组槽位的行情及其 seq(读者据此判断某行是否已经处理过)"""
+        slots = np.asarray(slots, dtype=np.intp)
+        seq = self.seq
+        before = seq[slots]
+        rows = self._columns[1:, slots]
+        after = seq[slots]
+        torn = (before != after) | (before & 1).astype(bool)
+        deadline = None
+        while torn.any():
+            deadline = read_retry_wait(deadline, "行情平面读取超时，写入进程可能已异常退出")
+            bad = np.flatnonzero(torn)
+            bad_slots = slots[bad]
+            before[bad] = seq[bad_slots]
+            rows[:, bad] = self._columns[1:, bad_slots]
+            after = seq[bad_slots]
+            torn_bad = (before[bad] != after) | (before[bad] & 1).astype(bool)
+            torn[:] = False
+            torn[bad[torn_bad]] = True
+        return QuoteRows(slots, rows[0], rows[1], rows[2], rows[3], rows[4]), before
+
+    def close(self):
+        """解除映射(创建方同时释放共享内存)"""
+        self._columns = self.seq = self.last = self.bid = self.ask = self.volume = self.ts = None
+        self._shm.close()
+        if self.owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __repr__(self) -> str:
+        return f"SharedQuotePlane(name={self.name!r}, symbols={self.capacity})"
+
+
+def decode_qmt_quotes(data: Mapping[str, Mapping], slot_map: Mapping[str, int]):
+    """解码QMT整体行情推送(只解码已登记的股票)
+
+    Args:
+        data: {股票代码: 行情字典}，字段见 QMT_* 常量，买卖价为五档列表
+        slot_map: 股票代码 -> 槽位号
+
+    Returns:
+        (槽位号, 最新价, 买一价, 卖一价, 成交量, 时间戳秒) 数组元组
+    """
+    slots, last, bid, ask, volume, ts = [], [], [], [], [], []
+    nan = float('nan')
+    for symbol, quote in data.items():
+        slot = slot_map.get(symbol)
+        if slot is None:
+            continue
+        slots.append(slot)
+        last.append(quote.get(QMT_LAST, nan))
+        bids = quote.get(QMT_BID)
+        asks = quote.get(QMT_ASK)
+        bid.append(bids[0] if bids else nan)
+        ask.append(asks[0] if asks else nan)
+        volume.append(quote.get(QMT_VOLUME, nan))
+        ts.append(quote.get(QMT_TIME, 0) / 1000.0)
+    return (np.array(slots, dtype=np.intp), np.array(last, dtype=np.float64),
+            np.array(bid, dtype=np.float64), np.array(ask, dtype=np.float64),
+            np.array(volume, dtype=np.float64), np.array(ts, dtype=np.float64))
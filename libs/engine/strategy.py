@@ -0,0 +1,171 @@
+"""
+多策略引擎的策略基类与下单意图
+
+策略只接收自己订阅的股票的行情。同一批行情只读取一次，各策略拿到的 QuoteView
+是对这批数据的下标引用，访问字段时才按下标取值。
+下单通过 buy / sell 生成 OrderIntent，由引擎按账户路由到对应的下单通道。
+"""
+import importlib
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Type
+
+import numpy as np
+
+from libs.config.consts import PriceType, TradeDirection
+
+from .quote_plane import QuoteRows
+
+
+class OrderIntent(NamedTuple):
+    """策略产生的下单意图"""
+    strategy: str  # 策略实例名称
+    account: str  # 账户ID
+    symbol: str
+    direction: TradeDirection
+    volume: int
+    price: Optional[float] = None  # None表示市价
+    price_type: PriceType = PriceType.LIMIT
+    remark: str = ''
+
+
+class QuoteView:
+    """一个策略可见的行情(对整批行情的下标引用)"""
+
+    __slots__ = ('_rows', '_index', '_symbols')
+
+    def __init__(self, rows: QuoteRows, index: np.ndarray, symbol_table: Sequence[str]):
+        self._rows = rows
+        self._index = index
+        self._symbols = symbol_table
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def slots(self) -> np.ndarray:
+        return self._rows.slots[self._index]
+
+    @property
+    def symbols(self) -> List[str]:
+        table = self._symbols
+        return [table[i] for i in self.slots.tolist()]
+
+    @property
+    def last(self) -> np.ndarray:
+        return self._rows.last[self._index]
+
+    @property
+    def bid(self) -> np.ndarray:
+        return self._rows.bid[self._index]
+
+    @property
+    def ask(self) -> np.ndarray:
+        return self._rows.ask[self._index]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self._rows.volume[self._index]
+
+    @property
+    def ts(self) -> np.ndarray:
+        return self._rows.ts[self._index]
+
+    def items(self):
+        """逐只迭代 (股票代码, 最新价)"""
+        return zip(self.symbols, self.last.tolist())
+
+
+class StrategyContext:
+    """策略运行上下文: 实例名称、账户、订阅股票与下单通道"""
+
+    __slots__ = ('name', 'account', 'symbols', '_submit')
+
+    def __init__(self, name: str, account: str, symbols: Sequence[str],
+                 submit: Callable[[OrderIntent], None]):
+        self.name = name
+        self.account = account
+        self.symbols = list(symbols)
+        self._submit = submit
+
+    def submit(self, intent: OrderIntent):
+        self._submit(intent)
+
+
+class EngineStrategy:
+    """多策略引擎的策略基类
+
+    子类通过 params 声明默认参数(与向量化策略一致)，实现 on_quotes 处理行情:
+
+        class MomentumStrategy(EngineStrategy):
+            params = {'threshold': 0.01}
+
+            def on_quotes(self, quotes):
+                for symbol, price in quotes.items():
+                    ...
+                    self.buy(symbol, 100, price)
+    """
+
+    params: Dict[str, Any] = {}
+    _STATE_EXCLUDE = frozenset({'context', 'p'})  # 不进入快照的属性(由引擎按配置重建)
+
+    def __init__(self, context: StrategyContext, **params):
+        self.context = context
+        self.p = dict(self.params)
+        self.p.update(params)
+
+    def get_state(self) -> Dict[str, Any]:
+        """快照用的策略变量
+
+        默认为全部实例属性(不含 context 和参数)。属性对象提供 dump_state() 时保存其返回值，
+        如 SymbolIndicators 只保存各股票的指标而不保存工厂函数。
+        """
+        return {key: value.dump_state() if hasattr(value, 'dump_state') else value
+                for key, value in vars(self).items() if key not in self._STATE_EXCLUDE}
+
+    def set_state(self, state: Dict[str, Any]):
+        """从快照恢复策略变量(在 on_start 之后调用，覆盖 on_start 中的初始化)"""
+        for key, value in state.items():
+            current = getattr(self, key, None)
+            if hasattr(current, 'load_state'):
+                current.load_state(value)
+            else:
+                setattr(self, key, value)
+
+    @property
+    def name(self) -> str:
+        return self.context.name
+
+    @property
+    def account(self) -> str:
+        return self.context.account
+
+    def on_start(self):
+        """引擎启动后、第一批行情前调用"""
+
+    def on_quotes(self, quotes: QuoteView):
+        """订阅股票的行情更新"""
+
+    def on_stop(self):
+        """引擎停止时调用"""
+
+    def buy(self, symbol: str, volume: int, price: Optional[float] = None, remark: str = ''):
+        self._order(symbol, TradeDirection.BUY, volume, price, remark)
+
+    def sell(self, symbol: str, volume: int, price: Optional[float] = None, remark: str = ''):
+        self._order(symbol, TradeDirection.SELL, volume, price, remark)
+
+    def _order(self, symbol: str, direction: TradeDirection, volume: int, price: Optional[float],
+               remark: str):
+        price_type = PriceType.MARKET if price is None else PriceType.LIMIT
+        self.context.submit(OrderIntent(self.context.name, self.context.account, symbol, direction,
+                                        int(volume), price, price_type, remark))
+
+
+def load_strategy_class(path: str) -> Type[EngineStrategy]:
+    """按 "模块:类名" 加载策略类"""
+    module_name, sep, class_name = path.partition(':')
+    if not sep or not module_name or not class_name:
+        raise ValueError(f"策略类格式应为 '模块:类名': {path!r}")
+    cls = getattr(importlib.import_module(module_name), class_name, None)
+    if not (isinstance(cls, type) and issubclass(cls, EngineStrategy)):
+        raise TypeError(f"{path} 不是 EngineStrategy 子类")
+    return cls
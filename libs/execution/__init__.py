@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+执行模块
+包含异步下单网关、订单超时定时轮、本地模拟券商与券商回报录制回放
+"""
+
+from .order_gateway import (
+    AsyncOrderGateway, GatewayThread, BrokerClient, BrokerError, OrderRequest, OrderAck, RateLimiter
+)
+from .timer_wheel import OrderExpiry, TimerHandle, TimerWheel
+from .fake_broker import FakeBroker, FakeBrokerServer, RemoteBroker
+from .replay_broker import RecordingBroker, ReplayBroker
+
+__all__ = [
+    'AsyncOrderGateway', 'GatewayThread', 'BrokerClient', 'BrokerError', 'OrderRequest', 'OrderAck',
+    'RateLimiter',
+    'TimerWheel', 'TimerHandle', 'OrderExpiry',
+    'FakeBroker', 'FakeBrokerServer', 'RemoteBroker',
+    'RecordingBroker', 'ReplayBroker',
+]
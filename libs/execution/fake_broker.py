@@ -0,0 +1,259 @@
+"""
+本地模拟券商 - 用于在没有QMT的环境下测试下单网关的吞吐和尾延迟
+
+FakeBroker:       进程内模拟券商，可配置回报延迟分布和按比例注入的错误消息
+FakeBrokerServer: 基于 asyncio TCP 的模拟券商服务(JSON行协议)，请求可流水线并发
+RemoteBroker:     连接 FakeBrokerServer 的券商客户端
+
+协议(每行一个JSON):
+    请求 {"id": 1, "op": "submit", "order": {...OrderRequest.to_dict()}}
+         {"id": 2, "op": "query", "client_id": "GW00000001-1"}
+    回报 {"id": 1, "ok": true, "order_id": "FB00000001"}
+         {"id": 1, "ok": false, "error": "系统繁忙"}
+         {"id": 2, "ok": true, "order_id": null}        (券商没有该订单)
+
+命令行启动服务:
+    python -m libs.execution.fake_broker --port 58620 --latency 0.002 --error 系统繁忙=0.05
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+from typing import Dict, Optional, Tuple
+
+from .order_gateway import BrokerClient, BrokerError, OrderRequest
+
+DEFAULT_FAKE_BROKER_PORT = 58620  # 模拟券商默认端口
+
+
+class FakeBroker(BrokerClient):
+    """进程内模拟券商"""
+
+    def __init__(self, latency: float = 0.002, latency_sigma: float = 0.5,
+                 error_rates: Optional[Dict[str, float]] = None, seed: Optional[int] = None):
+        """初始化模拟券商
+
+        Args:
+            latency: 回报延迟中位数(秒)
+            latency_sigma: 对数正态分布的sigma，越大尾延迟越长
+            error_rates: 错误消息 -> 出现概率，如 {'系统繁忙': 0.05, '资金不足': 0.01}
+            seed: 随机种子
+        """
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.error_rates = dict(error_rates or {})
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(1)
+        self.orders: Dict[str, str] = {}  # client_id -> 券商委托编号(按 client_id 去重)
+        self.requests = 0  # 收到的请求次数(含重试)
+
+    def _sample_latency(self) -> float:
+        if self.latency <= 0:
+            return 0.0
+        return self.latency * self._rng.lognormvariate(0.0, self.latency_sigma)
+
+    def _sample_error(self) -> Optional[str]:
+        roll = self._rng.random()
+        for message, rate in self.error_rates.items():
+            if roll < rate:
+                return message
+            roll -= rate
+        return None
+
+    async def submit_order(self, request: OrderRequest) -> str:
+        self.requests += 1
+        await asyncio.sleep(self._sample_latency())
+        existing = self.orders.get(request.client_id)
+        if existing is not None:
+            return existing  # 重发的订单直接返回原委托编号
+        error = self._sample_error()
+        if error is not None:
+            raise BrokerError(error)
+        order_id = f"FB{next(self._ids):08d}"
+        self.orders[request.client_id] = order_id
+        return order_id
+
+    async def query_order(self, client_id: str) -> Optional[str]:
+        await asyncio.sleep(self._sample_latency())
+        return self.orders.get(client_id)
+
+
+class FakeBrokerServer:
+    """模拟券商TCP服务"""
+
+    def __init__(self, broker: Optional[FakeBroker] = None, host: str = '127.0.0.1',
+                 port: int = DEFAULT_FAKE_BROKER_PORT):
+        """初始化服务
+
+        Args:
+            broker: 处理请求的模拟券商，默认使用 FakeBroker()
+            host: 监听地址
+            port: 监听端口，0表示自动分配
+        """
+        self.broker = broker or FakeBroker()
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    async def start(self) -> Tuple[str, int]:
+        """启动服务，返回实际监听的(地址, 端口)"""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.host, self.port = self._server.sockets[0].getsockname()[:2]
+        return self.host, self.port
+
+    async def stop(self):
+        """停止服务"""
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            if self._connections:
+                await asyncio.gather(*self._connections.values(), return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self):
+        """启动并持续运行服务"""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections[writer] = asyncio.current_task()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.ensure_future(self._process(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except ConnectionError:
+            pass
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+            self._connections.pop(writer, None)
+
+    async def _process(self, line: bytes, writer: asyncio.StreamWriter):
+        message = json.loads(line)
+        response = {'id': message.get('id')}
+        try:
+            op = message.get('op')
+            if op == 'submit':
+                response['order_id'] = await self.broker.submit_order(OrderRequest.from_dict(message['order']))
+            elif op == 'query':
+                response['order_id'] = await self.broker.query_order(message['client_id'])
+            else:
+                raise BrokerError(f"不支持的操作: {op}")
+            response['ok'] = True
+        except BrokerError as e:
+            response['ok'] = False
+            response['error'] = str(e)
+        if not writer.is_closing():
+            writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+
+
+class RemoteBroker(BrokerClient):
+    """FakeBrokerServer 的客户端: 单连接上流水线发送请求，按请求编号匹配回报"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = DEFAULT_FAKE_BROKER_PORT,
+                 connect_timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+
+    async def connect(self):
+        """建立连接"""
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.connect_timeout)
+        self._reader_task = asyncio.ensure_future(self._read_loop())
+
+    async def _read_loop(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                future = self._pending.pop(message.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(BrokerError('网络连接失败'))
+            self._pending.clear()
+
+    async def _call(self, payload: Dict) -> Dict:
+        """发送一个请求并等待对应的回报"""
+        if self._writer is None:
+            await self.connect()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        payload['id'] = request_id
+        self._writer.write(json.dumps(payload, ensure_ascii=False).encode('utf-8') + b'\n')
+        try:
+            response = await future
+        finally:
+            self._pending.pop(request_id, None)
+        if not response.get('ok'):
+            raise BrokerError(response.get('error', ''))
+        return response
+
+    async def submit_order(self, request: OrderRequest) -> str:
+        return (await self._call({'op': 'submit', 'order': request.to_dict()}))['order_id']
+
+    async def query_order(self, client_id: str) -> Optional[str]:
+        return (await self._call({'op': 'query', 'client_id': client_id})).get('order_id')
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+
+
+def _parse_error_rates(values) -> Dict[str, float]:
+    rates = {}
+    for value in values or []:
+        message, _, rate = value.rpartition('=')
+        rates[message] = float(rate)
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地模拟券商服务')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=DEFAULT_FAKE_BROKER_PORT, help='监听端口')
+    parser.add_argument('--latency', type=float, default=0.002, help='回报延迟中位数(秒)')
+    parser.add_argument('--sigma', type=float, default=0.5, help='延迟对数正态分布sigma')
+    parser.add_argument('--error', action='append', metavar='消息=概率',
+                        help='注入错误，如 --error 系统繁忙=0.05 (可重复)')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子')
+    args = parser.parse_args()
+
+    broker = FakeBroker(args.latency, args.sigma, _parse_error_rates(args.error), args.seed)
+    server = FakeBrokerServer(broker, args.host, args.port)
+    print(f"模拟券商服务监听 {args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,400 @@
+"""
+异步下单网关 - 基于 asyncio 的流水线下单
+
+多笔订单同时在途，不再逐笔同步等待券商回报。每笔订单的失败按
+get_error_type 分类后依据 ERROR_HANDLING_STRATEGY 处理:
+    RETRY               带抖动的指数退避后重试(最多 max_retry_attempts 次)
+    REJECT              立即失败
+    ALLOW_BROKER_HANDLE 视为已交由券商处理，不重试也不拒绝
+
+每笔订单有独立截止时间(system_timing.order_timeout_seconds)，
+向券商的提交按令牌桶限流(network.max_orders_per_second)。
+提交请求超时后订单可能已到达券商，先按 client_id 查询(BrokerClient.query_order)，
+确认券商未收到才重发；已受理的按 ACCEPTED 返回，券商不支持查询或查询失败时
+按 ALLOW_BROKER_HANDLE 处理(SUBMITTED)，不盲目重发以免重复委托。
+传入 expiry(OrderExpiry) 时，已报单但截止时间前未进入终态的订单由定时轮
+触发超时回调(如撤单)，订单终态后调用 order_done() 取消。
+重试沿用同一个 client_id，券商端可据此去重，避免超时重发造成重复委托。
+
+使用示例:
+    gateway = AsyncOrderGateway.from_config(config_manager, broker)
+    ack = await gateway.place('600000.SH', TradeDirection.BUY, 1000, 10.52)
+    acks = await gateway.place_many(requests)
+"""
+import asyncio
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from libs.config.consts import (
+    ERROR_HANDLING_STRATEGY, MAX_RETRY_ATTEMPTS, ErrorStrategy, OrderError, OrderStatus,
+    PriceType, TradeDirection, get_error_type,
+)
+from libs.monitoring.latency import ORDER_TO_ACK, LatencyRecorder, get_recorder
+
+from .timer_wheel import OrderExpiry
+
+LATENCY_SAMPLE_SIZE = 100000  # 保留的最近订单延迟样本数
+
+
+class BrokerError(Exception):
+    """券商返回的下单错误，消息文本用于错误分类"""
+
+    def __init__(self, message: str, broker_order_id: Optional[str] = None):
+        super().__init__(message)
+        self.broker_order_id = broker_order_id  # 券商已受理但返回警告时的委托编号
+
+
+class OrderRequest(NamedTuple):
+    """下单请求"""
+    client_id: str  # 客户端订单号(重试时保持不变)
+    symbol: str
+    direction: TradeDirection
+    volume: int
+    price: Optional[float] = None  # 市价单为None
+    price_type: PriceType = PriceType.LIMIT
+    remark: str = ''
+
+    def to_dict(self) -> Dict:
+        return {
+            'client_id': self.client_id, 'symbol': self.symbol, 'direction': self.direction.value,
+            'volume': self.volume, 'price': self.price, 'price_type': self.price_type.value,
+            'remark': self.remark,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'OrderRequest':
+        return cls(data['client_id'], data['symbol'], TradeDirection(data['direction']),
+                   int(data['volume']), data.get('price'), PriceType(data.get('price_type', 'LIMIT')),
+                   data.get('remark', ''))
+
+
+class OrderAck(NamedTuple):
+    """下单最终结果"""
+    request: OrderRequest
+    status: OrderStatus  # ACCEPTED: 券商已受理; SUBMITTED: 交由券商处理; REJECTED; EXPIRED: 超过截止时间
+    broker_order_id: Optional[str]
+    error_type: Optional[OrderError]
+    message: str
+    attempts: int  # 实际提交次数
+    latency: float  # 从提交到得到结果的耗时(秒)
+
+
+class BrokerClient:
+    """券商接口基类，实现方需提供异步的 submit_order，可选提供 query_order"""
+
+    async def submit_order(self, request: OrderRequest) -> str:
+        """提交订单，成功返回券商委托编号，失败抛出 BrokerError"""
+        raise NotImplementedError
+
+    async def query_order(self, client_id: str) -> Optional[str]:
+        """按客户端订单号查询，返回券商委托编号，券商没有该订单时返回None
+
+        不支持查询的券商接口保持默认实现(抛出 NotImplementedError)。
+        """
+        raise NotImplementedError
+
+    async def close(self):
+        """释放连接"""
+
+
+class RateLimiter:
+    """异步令牌桶限流器(先到先得)"""
+
+    def __init__(self, rate: Optional[float], burst: Optional[int] = None):
+        """初始化限流器
+
+        Args:
+            rate: 每秒允许的次数，None或0表示不限流
+            burst: 令牌桶容量，默认为 max(1, rate)
+        """
+        self.rate = rate if rate and rate > 0 else None
+        self.burst = burst if burst is not None else max(1, int(self.rate or 1))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self):
+        """获取一个令牌，必要时等待"""
+        if self.rate is None:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+class AsyncOrderGateway:
+    """异步下单网关"""
+
+    def __init__(self, broker: BrokerClient, max_retries: int = MAX_RETRY_ATTEMPTS,
+                 retry_delay: float = 1.0, max_retry_delay: float = 10.0,
+                 order_timeout: float = 30.0, request_timeout: float = 5.0,
+                 max_orders_per_second: Optional[float] = 50, max_inflight: int = 64,
+                 strategies: Optional[Dict[OrderError, ErrorStrategy]] = None,
+                 seed: Optional[int] = None, recorder: Optional[LatencyRecorder] = None,
+                 expiry: Optional[OrderExpiry] = None):
+        """初始化下单网关
+
+        Args:
+            broker: 券商接口
+            max_retries: 可重试错误时的最大提交次数(含首次提交，即 network.max_retry_attempts)
+            retry_delay: 指数退避的基础延迟(秒)
+            max_retry_delay: 退避延迟上限(秒)
+            order_timeout: 每笔订单的截止时间(秒，从提交起算)
+            request_timeout: 单次券商请求超时(秒)
+            max_orders_per_second: 下单限流，None表示不限流
+            max_inflight: 同时等待券商回报的最大订单数
+            strategies: 错误处理策略，默认 ERROR_HANDLING_STRATEGY
+            seed: 退避抖动的随机种子
+            recorder: 延迟记录器(记录 order_to_ack 区间)，默认为全局记录器
+            expiry: 订单超时登记，已报单的订单在截止时间触发 on_order_timeout(client_id, ack)
+        """
+        self.broker = broker
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.order_timeout = order_timeout
+        self.request_timeout = request_timeout
+        self.max_inflight = max_inflight
+        self.strategies = strategies if strategies is not None else ERROR_HANDLING_STRATEGY
+        self._limiter = RateLimiter(max_orders_per_second)
+        self._inflight: Optional[asyncio.Semaphore] = None
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._id_prefix = f"GW{int(time.time() * 1000) % 100000000:08d}-"
+
+        self.stats: Dict[str, int] = {
+            'submitted': 0, 'accepted': 0, 'broker_handled': 0,
+            'rejected': 0, 'expired': 0, 'retries': 0, 'timeout_queries': 0, 'watch_errors': 0,
+        }
+        self.last_watch_error: Optional[str] = None
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLE_SIZE)
+        self.recorder = recorder or get_recorder()
+        self.expiry = expiry
+
+    @classmethod
+    def from_config(cls, config_manager, broker: BrokerClient, **kwargs) -> 'AsyncOrderGateway':
+        """根据配置快照中的 network / system_timing 创建网关"""
+        snapshot = config_manager.snapshot
+        network = snapshot.network
+        params = dict(
+            max_retries=network.max_retry_attempts,
+            retry_delay=network.retry_delay_seconds,
+            max_retry_delay=network.max_retry_delay_seconds,
+            request_timeout=network.request_timeout,
+            max_orders_per_second=network.max_orders_per_second,
+            max_inflight=network.max_inflight_orders,
+            order_timeout=snapshot.system_timing.order_timeout_seconds,
+        )
+        params.update(kwargs)
+        return cls(broker, **params)
+
+    # ==================== 下单接口 ====================
+    def new_request(self, symbol: str, direction: TradeDirection, volume: int,
+                    price: Optional[float] = None, price_type: PriceType = PriceType.LIMIT,
+                    remark: str = '') -> OrderRequest:
+        """创建带唯一 client_id 的下单请求"""
+        if price is None and price_type == PriceType.LIMIT:
+            price_type = PriceType.MARKET
+        return OrderRequest(f"{self._id_prefix}{next(self._ids)}", symbol, direction, int(volume),
+                            price, price_type, remark)
+
+    async def place(self, symbol: str, direction: TradeDirection, volume: int,
+                    price: Optional[float] = None, price_type: PriceType = PriceType.LIMIT,
+                    remark: str = '') -> OrderAck:
+        """提交一笔订单并等待最终结果"""
+        return await self.execute(self.new_request(symbol, direction, volume, price, price_type, remark))
+
+    def submit(self, request: OrderRequest) -> 'asyncio.Task[OrderAck]':
+        """提交订单但不等待，返回可 await 的任务(需在事件循环中调用)"""
+        return asyncio.ensure_future(self.execute(request))
+
+    async def place_many(self, requests: Iterable[OrderRequest]) -> List[OrderAck]:
+        """批量提交订单(流水线并发)，结果与请求顺序一致"""
+        return list(await asyncio.gather(*(self.execute(r) for r in requests)))
+
+    async def execute(self, request: OrderRequest) -> OrderAck:
+        """执行一笔订单: 限流、提交、按错误策略重试，直到成功、失败或超过截止时间"""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = start + self.order_timeout
+        if self._inflight is None:
+            self._inflight = asyncio.Semaphore(self.max_inflight)
+        if self.expiry is not None:
+            self.expiry.attach(loop)  # 提交前绑定，绑定失败时订单尚未发出
+        self.stats['submitted'] += 1
+        attempts = 0
+        error_type: Optional[OrderError] = None
+        message = ''
+
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return self._finish(request, OrderStatus.EXPIRED, None, error_type,
+                                    message or '订单超时', attempts, start)
+            sent = False
+            try:
+                async with self._inflight:
+                    await asyncio.wait_for(self._limiter.acquire(), remaining)
+                    attempts += 1
+                    timeout = min(self.request_timeout, deadline - loop.time())
+                    if timeout <= 0:
+                        raise asyncio.TimeoutError
+                    sent = True
+                    broker_order_id = await asyncio.wait_for(self.broker.submit_order(request), timeout)
+                ack = self._finish(request, OrderStatus.ACCEPTED, broker_order_id, None, '', attempts, start)
+                self._watch(ack, deadline, loop)
+                return ack
+            except asyncio.TimeoutError:
+                if sent:
+                    status, broker_order_id, message = await self._resolve_timeout(request)
+                    if status is not None:
+                        error_type = OrderError.NETWORK if status == OrderStatus.SUBMITTED else None
+                        ack = self._finish(request, status, broker_order_id, error_type, message, attempts, start)
+                        self._watch(ack, deadline, loop)
+                        return ack
+                if loop.time() >= deadline:
+                    continue  # 下一轮按超时处理
+                error_type, message, broker_order_id = OrderError.NETWORK, '券商请求超时', None
+            except BrokerError as e:
+                message = str(e)
+                error_type, broker_order_id = get_error_type(message), e.broker_order_id
+
+            strategy = self.strategies.get(error_type, ErrorStrategy.REJECT)
+            if strategy == ErrorStrategy.ALLOW_BROKER_HANDLE:
+                ack = self._finish(request, OrderStatus.SUBMITTED, broker_order_id, error_type,
+                                   message, attempts, start)
+                self._watch(ack, deadline, loop)
+                return ack
+            if strategy != ErrorStrategy.RETRY or attempts >= self.max_retries:
+                return self._finish(request, OrderStatus.REJECTED, None, error_type, message, attempts, start)
+
+            delay = self.backoff(attempts)
+            if loop.time() + delay >= deadline:
+                return self._finish(request, OrderStatus.EXPIRED, None, error_type, message, attempts, start)
+            self.stats['retries'] += 1
+            await asyncio.sleep(delay)
+
+    async def _resolve_timeout(self, request: OrderRequest) -> Tuple[Optional[OrderStatus], Optional[str], str]:
+        """提交超时后按 client_id 查询订单是否已到达券商
+
+        Returns:
+            tuple: (状态, 券商委托编号, 说明)，状态为None表示券商确认未收到，可以安全重发
+        """
+        self.stats['timeout_queries'] += 1
+        try:
+            broker_order_id = await asyncio.wait_for(self.broker.query_order(request.client_id),
+                                                     self.request_timeout)
+        except NotImplementedError:
+            return OrderStatus.SUBMITTED, None, '券商请求超时，券商接口不支持查询，交由券商处理'
+        except (asyncio.TimeoutError, BrokerError) as e:
+            return OrderStatus.SUBMITTED, None, f"券商请求超时且查询失败({str(e) or '超时'})，交由券商处理"
+        if broker_order_id is not None:
+            return OrderStatus.ACCEPTED, broker_order_id, ''
+        return None, None, ''
+
+    def _watch(self, ack: OrderAck, deadline: float, loop: asyncio.AbstractEventLoop):
+        """已交给券商的订单登记超时定时器(截止时间仍从提交起算)
+
+        订单已在券商处生效，登记失败不能影响回报，只计入 watch_errors。
+        """
+        if self.expiry is None:
+            return
+        try:
+            self.expiry.watch_order(ack.request.client_id, ack, timeout=deadline - loop.time())
+        except Exception as e:
+            self.stats['watch_errors'] += 1
+            self.last_watch_error = f"{ack.request.client_id}: {type(e).__name__}: {e}"
+
+    def order_done(self, client_id: str) -> bool:
+        """订单已成交、撤单或被拒绝，取消其超时定时器(需在事件循环线程中调用)"""
+        return self.expiry is not None and self.expiry.done(client_id)
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次失败后的退避时间: 指数增长并带一半幅度的随机抖动"""
+        delay = min(self.max_retry_delay, self.retry_delay * (2 ** (attempt - 1)))
+        return delay / 2 + self._rng.uniform(0, delay / 2)
+
+    def _finish(self, request: OrderRequest, status: OrderStatus, broker_order_id: Optional[str],
+                error_type: Optional[OrderError], message: str, attempts: int, start: float) -> OrderAck:
+        latency = asyncio.get_running_loop().time() - start
+        self.latencies.append(latency)
+        self.recorder.record(ORDER_TO_ACK, int(latency * 1e9))
+        key = {OrderStatus.ACCEPTED: 'accepted', OrderStatus.SUBMITTED: 'broker_handled',
+               OrderStatus.REJECTED: 'rejected', OrderStatus.EXPIRED: 'expired'}[status]
+        self.stats[key] += 1
+        return OrderAck(request, status, broker_order_id, error_type, message, attempts, latency)
+
+    # ==================== 统计 ====================
+    def latency_percentiles(self, percentiles: Sequence[float] = (50, 90, 99, 99.9)) -> Dict[float, float]:
+        """最近订单延迟的分位数(秒)"""
+        samples = sorted(self.latencies)
+        if not samples:
+            return {p: float('nan') for p in percentiles}
+        last = len(samples) - 1
+        return {p: samples[min(last, int(round(p / 100.0 * last)))] for p in percentiles}
+
+    async def close(self):
+        """关闭券商连接"""
+        await self.broker.close()
+
+
+class GatewayThread:
+    """在后台线程中运行网关的事件循环，供同步(多线程)代码提交订单
+
+    使用示例:
+        runner = GatewayThread(gateway).start()
+        future = runner.place('600000.SH', TradeDirection.BUY, 1000, 10.52)
+        ack = future.result()
+        runner.stop()
+    """
+
+    def __init__(self, gateway: AsyncOrderGateway):
+        self.gateway = gateway
+        self.loop = asyncio.new_event_loop()
+        if gateway.expiry is not None:
+            gateway.expiry.attach(self.loop)  # 事件循环启动前绑定定时轮
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'GatewayThread':
+        """启动事件循环线程"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='OrderGateway', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def place(self, symbol: str, direction: TradeDirection, volume: int, price: Optional[float] = None,
+              price_type: PriceType = PriceType.LIMIT, remark: str = ''):
+        """线程安全地提交订单，返回 concurrent.futures.Future[OrderAck]"""
+        coro = self.gateway.place(symbol, direction, volume, price, price_type, remark)
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def order_done(self, client_id: str):
+        """线程安全地取消订单的超时定时器(订单进入终态时调用)"""
+        self.loop.call_soon_threadsafe(self.gateway.order_done, client_id)
+
+    def stop(self, timeout: float = 5.0):
+        """关闭券商连接并停止事件循环"""
+        if self._thread is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.gateway.close(), self.loop).result(timeout)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,136 @@
+"""
+券商回报录制与回放 - 离线复现实盘下单结果
+
+RecordingBroker: 包装实盘券商接口，把每次提交(含重试)的结果按顺序写入 JSON 行文件
+ReplayBroker:    按提交顺序返回录制的结果(委托编号或错误消息)和回报延迟
+
+回放时第 n 次请求得到录制中第 n 次请求的结果，与行情回放配合即可逐笔复现
+生产环境中的拒单、超时重试等事件。提交的股票/方向/数量与录制不一致、
+或请求类型(提交/超时后的查询)与录制不一致时计入 mismatches，仍按录制结果返回，
+便于发现策略行为的偏离。
+
+文件格式(每行一个JSON，查询记录带 "op": "query"):
+    {"seq": 1, "ts": 1704159000.123, "order": {...OrderRequest.to_dict()},
+     "ok": true, "order_id": "12345", "latency": 0.0042}
+    {"seq": 2, ..., "ok": false, "error": "系统繁忙", "latency": 0.0100}
+    {"seq": 3, "ts": ..., "op": "query", "client_id": "GW...-7", "ok": true, "order_id": null, "latency": 0.0031}
+"""
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+from .order_gateway import BrokerClient, BrokerError, OrderRequest
+
+
+class RecordingBroker(BrokerClient):
+    """录制券商回报的包装器"""
+
+    def __init__(self, broker: BrokerClient, path: Union[str, Path],
+                 clock: Callable[[], float] = time.time):
+        """初始化录制器
+
+        Args:
+            broker: 实际的券商接口
+            path: 录制文件路径(追加写)
+            clock: 时间函数
+        """
+        self.broker = broker
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8', buffering=1 << 16)
+        self._clock = clock
+        self.seq = 0
+
+    async def submit_order(self, request: OrderRequest) -> str:
+        return await self._record({'order': request.to_dict()}, self.broker.submit_order(request))
+
+    async def query_order(self, client_id: str) -> Optional[str]:
+        return await self._record({'op': 'query', 'client_id': client_id}, self.broker.query_order(client_id))
+
+    async def _record(self, fields: Dict, call) -> Optional[str]:
+        self.seq += 1
+        event = {'seq': self.seq, 'ts': self._clock(), **fields}
+        started = time.perf_counter()
+        try:
+            order_id = await call
+        except BrokerError as e:
+            event.update(ok=False, error=str(e), order_id=e.broker_order_id)
+            raise
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            # 网关的请求超时会取消本协程，回放时按超时复现
+            event.update(ok=False, error='timeout', order_id=None)
+            raise
+        else:
+            event.update(ok=True, order_id=order_id)
+            return order_id
+        finally:
+            event['latency'] = round(time.perf_counter() - started, 6)
+            self._file.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+    def flush(self):
+        self._file.flush()
+
+    async def close(self):
+        self._file.close()
+        await self.broker.close()
+
+
+class ReplayBroker(BrokerClient):
+    """按录制顺序回放券商回报"""
+
+    def __init__(self, path: Union[str, Path], speed: Optional[float] = None):
+        """初始化回放券商
+
+        Args:
+            path: RecordingBroker 录制的文件
+            speed: 回报延迟的回放倍速，None或0表示不等待(最大速度)
+        """
+        self.path = Path(path)
+        with open(self.path, 'r', encoding='utf-8', buffering=1 << 20) as f:
+            self.events: List[Dict] = [json.loads(line) for line in f if line.strip()]
+        self.speed = speed or None
+        self._next = 0
+        self.mismatches = 0  # 提交内容与录制不一致的次数
+        self.extra = 0  # 超出录制数量的提交次数
+
+    @property
+    def remaining(self) -> int:
+        return len(self.events) - self._next
+
+    async def submit_order(self, request: OrderRequest) -> str:
+        if self._next >= len(self.events):
+            # 录制已用完: 视为受理，保证回放可以继续
+            self.extra += 1
+            return f"RP-EXTRA{self.extra:08d}"
+        event = self._next_event()
+        recorded = event.get('order', {})
+        if event.get('op', 'submit') != 'submit' or \
+                (recorded.get('symbol'), recorded.get('direction'), recorded.get('volume')) != \
+                (request.symbol, request.direction.value, request.volume):
+            self.mismatches += 1
+        return await self._result(event)
+
+    async def query_order(self, client_id: str) -> Optional[str]:
+        if self._next >= len(self.events):
+            self.extra += 1
+            return None  # 录制已用完: 视为券商未收到，由网关重发
+        event = self._next_event()
+        if event.get('op') != 'query':
+            self.mismatches += 1
+        return await self._result(event)
+
+    def _next_event(self) -> Dict:
+        event = self.events[self._next]
+        self._next += 1
+        return event
+
+    async def _result(self, event: Dict) -> Optional[str]:
+        if self.speed is not None and event.get('latency'):
+            await asyncio.sleep(event['latency'] / self.speed)
+        if event.get('ok'):
+            return event['order_id']
+        if event.get('error') == 'timeout':
+            raise asyncio.TimeoutError()
+        raise BrokerError(event.get('error', ''), event.get('order_id'))
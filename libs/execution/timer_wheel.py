@@ -0,0 +1,383 @@
+"""
+分层定时轮 - 订单超时与临时订单过期的 O(1) 调度
+
+代替按 auto_clean_interval 周期性全量扫描所有 Order / TemporaryOrder:
+每笔订单提交时登记一个定时器，进入终态时取消，登记和取消都是 O(1)，
+与在途订单数量无关。回调在到期后的第一个刻度触发，不会提前，
+最多迟到一个刻度(system_timing.timer_tick_ms)加上事件循环自身的调度延迟。
+
+时间按刻度离散化，共 levels 层，每层 2**bits 个槽:
+    第0层每槽 1 个刻度
+    第k层每槽 2**(bits*k) 个刻度
+高层的槽在轮到时整体下沉(cascade)到低层，每个定时器最多下沉 levels-1 次。
+超出最高层范围的定时器先挂在最高层最远的槽，下沉时重新计算位置。
+没有定时器时不唤醒事件循环。
+
+定时轮不是线程安全的，只应在驱动它的事件循环线程中调用，
+其他线程通过 loop.call_soon_threadsafe 转交。
+
+使用示例:
+    wheel = TimerWheel(tick=0.05).attach(loop)
+    handle = wheel.schedule(30.0, on_timeout, order_id)
+    handle.cancel()
+
+    expiry = OrderExpiry.from_config(config_manager, on_order_timeout=cancel_order)
+    expiry.watch_order(order_id)      # 提交时登记
+    expiry.done(order_id)             # 成交/撤单/拒绝时取消
+"""
+import asyncio
+import math
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+DEFAULT_TICK = 0.05  # 默认刻度(秒)
+DEFAULT_BITS = 8  # 每层 256 个槽
+DEFAULT_LEVELS = 4  # 4层覆盖 2**32 个刻度(50ms刻度约6.8年)
+
+_PENDING, _FIRED, _CANCELLED = 0, 1, 2
+
+
+class TimerHandle:
+    """已登记的定时器，可通过 cancel() 取消"""
+
+    __slots__ = ('when', 'callback', 'args', '_expires', '_slot', '_level', '_wheel', '_state')
+
+    def __init__(self, wheel: 'TimerWheel', when: float, expires: int, callback: Callable, args: Tuple):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self._expires = expires
+        self._slot: Optional[Dict['TimerHandle', None]] = None
+        self._level = 0
+        self._wheel = wheel
+        self._state = _PENDING
+
+    def cancel(self) -> bool:
+        """取消定时器，返回是否成功阻止了回调(已触发或已取消时返回False)"""
+        return self._wheel.cancel(self)
+
+    @property
+    def pending(self) -> bool:
+        return self._state == _PENDING
+
+    @property
+    def cancelled(self) -> bool:
+        return self._state == _CANCELLED
+
+    def __repr__(self) -> str:
+        state = ('pending', 'fired', 'cancelled')[self._state]
+        return f"TimerHandle(when={self.when:.3f}, {state}, callback={getattr(self.callback, '__name__', self.callback)})"
+
+
+class TimerWheel:
+    """分层定时轮"""
+
+    def __init__(self, tick: float = DEFAULT_TICK, bits: int = DEFAULT_BITS, levels: int = DEFAULT_LEVELS,
+                 clock: Callable[[], float] = time.monotonic,
+                 on_error: Optional[Callable[[TimerHandle, Exception], None]] = None):
+        """初始化定时轮
+
+        Args:
+            tick: 刻度(秒)，即回调的最大延迟
+            bits: 每层槽数的二进制位数(每层 2**bits 个槽)
+            levels: 层数
+            clock: 时钟函数(秒)，attach() 后改用事件循环的时钟
+            on_error: 回调抛出异常时的处理函数，默认交给事件循环的异常处理器
+        """
+        if tick <= 0:
+            raise ValueError(f"刻度必须为正数: {tick}")
+        if bits < 1 or levels < 1:
+            raise ValueError(f"无效的定时轮尺寸: bits={bits}, levels={levels}")
+        self.tick = float(tick)
+        self.bits = bits
+        self.levels = levels
+        self.on_error = on_error
+        self._mask = (1 << bits) - 1
+        self._slots: List[List[Dict[TimerHandle, None]]] = [
+            [{} for _ in range(1 << bits)] for _ in range(levels)]
+        self._level_counts = [0] * levels
+        self._count = 0
+        self._clock = clock
+        self._tick = self._now_tick()  # 最后处理过的刻度
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self.stats: Dict[str, int] = {'scheduled': 0, 'cancelled': 0, 'fired': 0, 'cascaded': 0, 'errors': 0}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _now_tick(self) -> int:
+        return int(self._clock() / self.tick)
+
+    def time(self) -> float:
+        """定时轮当前使用的时钟"""
+        return self._clock()
+
+    # ==================== 登记与取消 ====================
+    def schedule(self, delay: float, callback: Callable, *args: Any) -> TimerHandle:
+        """delay 秒后调用 callback(*args)"""
+        return self.schedule_at(self._clock() + max(0.0, delay), callback, *args)
+
+    def schedule_at(self, when: float, callback: Callable, *args: Any) -> TimerHandle:
+        """在时钟到达 when 后调用 callback(*args)"""
+        if self._count == 0:
+            # 空闲期间没有推进刻度，直接对齐到当前时间，避免之后逐刻度追赶
+            self._tick = max(self._tick, self._now_tick())
+        expires = max(math.ceil(when / self.tick), self._tick + 1)
+        handle = TimerHandle(self, when, expires, callback, args)
+        self._place(handle, self._tick)
+        self._count += 1
+        self.stats['scheduled'] += 1
+        if self._loop is not None and self._wakeup is None:
+            self._arm()
+        return handle
+
+    def cancel(self, handle: TimerHandle) -> bool:
+        """取消定时器，返回是否成功阻止了回调"""
+        if handle._state != _PENDING:
+            return False
+        handle._state = _CANCELLED
+        slot = handle._slot
+        if slot is not None:  # 正在触发的一批中的定时器已离开槽位，只需标记
+            del slot[handle]
+            handle._slot = None
+            self._level_counts[handle._level] -= 1
+            self._count -= 1
+        self.stats['cancelled'] += 1
+        if self._count == 0:
+            self._disarm()
+        return True
+
+    def _place(self, handle: TimerHandle, base: int):
+        """按到期刻度与基准刻度的距离选择层和槽
+
+        第k层的槽以 2**(bits*k) 个刻度为一块，选择块距离小于槽数的最低层，
+        保证定时器所在的槽在到期前恰好被处理(第0层)或下沉(更高层)一次。
+        """
+        expires = handle._expires
+        bits = self.bits
+        top = self.levels - 1
+        for level in range(self.levels):
+            shift = bits * level
+            block = expires >> shift
+            if block - (base >> shift) <= self._mask or level == top:
+                if level == top and block - (base >> shift) > self._mask:
+                    block = (base >> shift) + self._mask  # 超出范围: 挂在最远的槽，下沉时重新计算
+                slot = self._slots[level][block & self._mask]
+                break
+        slot[handle] = None
+        handle._slot = slot
+        handle._level = level
+        self._level_counts[level] += 1
+
+    # ==================== 推进 ====================
+    def advance(self, now: Optional[float] = None) -> int:
+        """将定时轮推进到 now(默认为当前时钟)，触发所有到期回调，返回触发数量"""
+        target = int((self._clock() if now is None else now) / self.tick)
+        fired = 0
+        bits, mask = self.bits, self._mask
+        while self._tick < target:
+            if self._count == 0:
+                self._tick = target
+                break
+            # 低层全空时直接跳到下一个需要下沉的刻度
+            level = 0
+            while self._level_counts[level] == 0:
+                level += 1
+            shift = bits * level
+            t = ((self._tick >> shift) + 1) << shift
+            if t > target:
+                self._tick = target
+                break
+            self._tick = t
+            if t & mask == 0:
+                self._cascade(t)
+            slot = self._slots[0][t & mask]
+            if slot:
+                fired += self._fire(slot, t)
+        return fired
+
+    def _cascade(self, t: int):
+        """刻度 t 是第k层块的起点时，把该块的定时器下沉到低层"""
+        bits, mask = self.bits, self._mask
+        for level in range(self.levels - 1, 0, -1):
+            shift = bits * level
+            if t & ((1 << shift) - 1):
+                continue
+            slot = self._slots[level][(t >> shift) & mask]
+            if not slot:
+                continue
+            moved = list(slot)
+            slot.clear()
+            self._level_counts[level] -= len(moved)
+            self.stats['cascaded'] += len(moved)
+            for handle in moved:
+                self._place(handle, t)
+
+    def _fire(self, slot: Dict[TimerHandle, None], t: int) -> int:
+        due = list(slot)
+        slot.clear()
+        self._level_counts[0] -= len(due)
+        if self.levels == 1 and any(handle._expires > t for handle in due):
+            # 只有一层时超出范围的定时器挂在第0层，未到期的重新挂回
+            later = [handle for handle in due if handle._expires > t]
+            due = [handle for handle in due if handle._expires <= t]
+            for handle in later:
+                self._place(handle, t)
+        self._count -= len(due)
+        for handle in due:
+            handle._slot = None
+        fired = 0
+        for handle in due:
+            if handle._state != _PENDING:  # 同一批中先触发的回调取消了它
+                continue
+            handle._state = _FIRED
+            fired += 1
+            try:
+                handle.callback(*handle.args)
+            except Exception as e:
+                self.stats['errors'] += 1
+                self._report(handle, e)
+        self.stats['fired'] += fired
+        return fired
+
+    def _report(self, handle: TimerHandle, error: Exception):
+        if self.on_error is not None:
+            self.on_error(handle, error)
+        elif self._loop is not None:
+            self._loop.call_exception_handler({'message': '定时器回调异常', 'exception': error,
+                                               'handle': handle})
+        else:
+            raise error
+
+    # ==================== 事件循环驱动 ====================
+    def attach(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> 'TimerWheel':
+        """由事件循环驱动定时轮(改用 loop.time() 作为时钟)，有定时器时每个刻度唤醒一次
+
+        应在事件循环开始处理订单之前调用; 已登记的定时器按剩余时间换算到新时钟。
+        loop 为 None 时使用当前正在运行的事件循环(须在协程或回调中调用)，
+        事件循环启动前绑定需显式传入 loop。
+        """
+        loop = loop or asyncio.get_running_loop()
+        if self._loop is loop:
+            return self
+        if self._loop is not None:
+            raise RuntimeError("定时轮已绑定到另一个事件循环")
+        offset = loop.time() - self._clock()
+        pending = [handle for level in self._slots for slot in level for handle in slot]
+        for level in self._slots:
+            for slot in level:
+                slot.clear()
+        self._level_counts = [0] * self.levels
+        self._loop = loop
+        self._clock = loop.time
+        self._tick = self._now_tick()
+        for handle in pending:
+            handle.when += offset
+            handle._expires = max(math.ceil(handle.when / self.tick), self._tick + 1)
+            self._place(handle, self._tick)
+        if self._count:
+            self._arm()
+        return self
+
+    def detach(self):
+        """解除与事件循环的绑定(不取消已登记的定时器)"""
+        self._disarm()
+        self._loop = None
+
+    def _arm(self):
+        self._wakeup = self._loop.call_at((self._tick + 1) * self.tick, self._on_wakeup)
+
+    def _disarm(self):
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+
+    def _on_wakeup(self):
+        self._wakeup = None
+        self.advance()
+        if self._count and self._wakeup is None and self._loop is not None:
+            self._arm()
+
+
+class OrderExpiry:
+    """按订单号登记订单超时与临时订单过期
+
+    同一订单号重复登记时替换旧的定时器; 订单进入终态(成交、撤单、拒绝)
+    或临时订单转为正式订单时调用 done()。回调签名为 callback(key, *args)，
+    触发前登记已被移除，回调中可以重新登记。
+    """
+
+    ORDER = 'order'
+    TEMP_ORDER = 'temp_order'
+
+    def __init__(self, wheel: Optional[TimerWheel] = None, order_timeout: float = 30.0,
+                 temp_order_expire: float = 60.0,
+                 on_order_timeout: Optional[Callable[..., Any]] = None,
+                 on_temp_expire: Optional[Callable[..., Any]] = None):
+        """初始化
+
+        Args:
+            wheel: 定时轮，默认新建一个
+            order_timeout: 订单超时时间(秒)
+            temp_order_expire: 临时订单过期时间(秒)
+            on_order_timeout: 订单超时回调 callback(order_id, *args)
+            on_temp_expire: 临时订单过期回调 callback(temp_id, *args)
+        """
+        self.wheel = wheel if wheel is not None else TimerWheel()
+        self.order_timeout = order_timeout
+        self.temp_order_expire = temp_order_expire
+        self.callbacks = {self.ORDER: on_order_timeout, self.TEMP_ORDER: on_temp_expire}
+        self._handles: Dict[Tuple[str, Hashable], TimerHandle] = {}
+        self.stats: Dict[str, int] = {'order_timeouts': 0, 'temp_expired': 0}
+
+    @classmethod
+    def from_config(cls, config_manager, on_order_timeout: Optional[Callable[..., Any]] = None,
+                    on_temp_expire: Optional[Callable[..., Any]] = None, **kwargs) -> 'OrderExpiry':
+        """根据配置快照中的 system_timing 创建"""
+        timing = config_manager.snapshot.system_timing
+        if 'wheel' not in kwargs:
+            kwargs['wheel'] = TimerWheel(tick=timing.timer_tick_ms / 1000.0)
+        params = dict(order_timeout=timing.order_timeout_seconds,
+                      temp_order_expire=timing.temp_order_expire_minutes * 60.0)
+        params.update(kwargs)
+        return cls(on_order_timeout=on_order_timeout, on_temp_expire=on_temp_expire, **params)
+
+    def attach(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> 'OrderExpiry':
+        """由事件循环驱动(见 TimerWheel.attach)"""
+        self.wheel.attach(loop)
+        return self
+
+    def watch_order(self, order_id: Hashable, *args: Any, timeout: Optional[float] = None) -> TimerHandle:
+        """登记订单超时，timeout 默认为 order_timeout"""
+        return self._watch(self.ORDER, order_id, self.order_timeout if timeout is None else timeout, args)
+
+    def watch_temp_order(self, temp_id: Hashable, *args: Any, ttl: Optional[float] = None) -> TimerHandle:
+        """登记临时订单过期，ttl 默认为 temp_order_expire"""
+        return self._watch(self.TEMP_ORDER, temp_id, self.temp_order_expire if ttl is None else ttl, args)
+
+    def done(self, key: Hashable, kind: str = ORDER) -> bool:
+        """订单进入终态或临时订单已处理，取消定时器，返回是否存在未触发的定时器"""
+        handle = self._handles.pop((kind, key), None)
+        return handle is not None and handle.cancel()
+
+    def pending(self, kind: Optional[str] = None) -> int:
+        """未触发的定时器数量"""
+        if kind is None:
+            return len(self._handles)
+        return sum(1 for k, _ in self._handles if k == kind)
+
+    def _watch(self, kind: str, key: Hashable, delay: float, args: Tuple) -> TimerHandle:
+        old = self._handles.pop((kind, key), None)
+        if old is not None:
+            old.cancel()
+        handle = self.wheel.schedule(delay, self._expire, kind, key, args)
+        self._handles[(kind, key)] = handle
+        return handle
+
+    def _expire(self, kind: str, key: Hashable, args: Tuple):
+        del self._handles[(kind, key)]
+        self.stats['order_timeouts' if kind == self.ORDER else 'temp_expired'] += 1
+        callback = self.callbacks[kind]
+        if callback is not None:
+            callback(key, *args)
@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+因子模块
+包含因子表达式、时序/截面/分组算子以及全市场分块计算与缓存的因子引擎
+"""
+
+from .expr import Expr, Field, Const, Op, OPS, F, parse, as_expr
+from .engine import FactorEngine, FactorSet, group_codes, load_groups
+
+__all__ = [
+    'Expr', 'Field', 'Const', 'Op', 'OPS', 'F', 'parse', 'as_expr',
+    'FactorEngine', 'FactorSet', 'group_codes', 'load_groups',
+]
@@ -0,0 +1,401 @@
+"""
+截面因子引擎 - 全市场因子的分块(核外)计算与按表达式哈希的磁盘缓存
+
+FactorEngine.compute() 把一组因子表达式在 (时间 × 品种) 面板上求值:
+    - 按时间分块计算，每块只读取 [块起点 - 预热行数, 块终点) 的数据，
+      时序算子的预热行数由表达式的 lookback 推出，分块结果与整段计算一致；
+      块大小由 memory_limit_mb 推算，内存占用与面板长度无关
+    - 一批因子共享的子表达式(如 ts_mean(close, 20))每块只计算一次，用完即释放
+    - 结果逐块写入 .npy 内存映射文件，缓存键为 表达式规范化文本 + 所引用字段数据
+      + 时间轴/品种 的 SHA-256；再次计算时直接打开，数据变化后自动失效。
+      被多个因子共用的时序/截面中间结果以 float64 落盘(缓存键含落盘类型)，后续表达式
+      直接读取，结果与现场计算完全一致；作为输入读取的落盘结果只使用 float64 文件
+
+结果 FactorSet 中每个因子为 (时间, 品种) 只读数组，可直接用于 VectorStrategy.signals()，
+matrix()/iter_chunks() 展平为 (样本, 因子) 矩阵供 scikit-learn / LightGBM 等使用。
+
+10年 × 5000只股票的日线面板约 2500 × 5000，200 个因子以 float32 落盘约 10GB，
+计算时常驻内存为面板本身(可用 open_panel 内存映射)加 memory_limit_mb。
+"""
+import csv
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import weakref
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from libs.data.bar_store import PRICE_COLUMNS, BarPanel
+
+from .expr import Const, Expr, Field, Op, as_expr
+
+DEFAULT_MEMORY_LIMIT_MB = 2048  # 分块计算的内存预算(MB)
+INTERMEDIATE_DTYPE = np.dtype(np.float64)  # 中间结果落盘类型(与计算精度一致)
+FACTOR_SUFFIX = '.npy'
+_HASH_BLOCK_ROWS = 4096  # 计算字段摘要时每次读取的行数
+
+
+# ==================== 计算结果 ====================
+class FactorSet:
+    """一组因子的计算结果，每个因子为 (时间, 品种) 的只读内存映射数组"""
+
+    def __init__(self, names: List[str], exprs: List[Expr], symbols: List[str], ts: np.ndarray,
+                 paths: List[Path], temp_dir: Optional[str] = None):
+        self.names = names
+        self.exprs = dict(zip(names, exprs))
+        self.symbols = symbols
+        self.ts = ts
+        self.paths = dict(zip(names, paths))
+        self._arrays: Dict[str, np.ndarray] = {}
+        if temp_dir is not None:  # 未配置缓存目录时，结果释放后删除临时目录
+            weakref.finalize(self, shutil.rmtree, temp_dir, True)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        array = self._arrays.get(name)
+        if array is None:
+            array = self._arrays[name] = np.load(self.paths[name], mmap_mode='r')
+        return array
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.paths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.ts), len(self.symbols)
+
+    def matrix(self, names: Optional[Sequence[str]] = None, start: int = 0, stop: Optional[int] = None,
+               dropna: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """把行区间 [start, stop) 展平为 (样本, 因子) 矩阵
+
+        Args:
+            names: 因子名称，默认全部
+            start: 起始行号
+            stop: 结束行号(不含)，默认到最后
+            dropna: 剔除任一因子缺失的样本
+
+        Returns:
+            (X, index): X 形状 (样本数, 因子数)；index 形状 (样本数, 2)，为 (行号, 品种列号)
+        """
+        names = list(names) if names is not None else self.names
+        stop = len(self.ts) if stop is None else stop
+        columns = [np.asarray(self[name][start:stop]).reshape(-1) for name in names]
+        X = np.stack(columns, axis=1) if columns else np.empty(((stop - start) * len(self.symbols), 0))
+        rows, cols = np.divmod(np.arange(X.shape[0]), len(self.symbols))
+        index = np.stack([rows + start, cols], axis=1)
+        if dropna and X.shape[1]:
+            keep = ~np.isnan(X).any(axis=1)
+            X, index = X[keep], index[keep]
+        return X, index
+
+    def iter_chunks(self, chunk_rows: int, names: Optional[Sequence[str]] = None,
+                    dropna: bool = True) -> Iterator[Tuple[int, int, np.ndarray, np.ndarray]]:
+        """按时间分块产出 (start, stop, X, index)，用于增量训练或逐块预测"""
+        for start in range(0, len(self.ts), chunk_rows):
+            stop = min(len(self.ts), start + chunk_rows)
+            yield (start, stop) + self.matrix(names, start, stop, dropna)
+
+    def __repr__(self) -> str:
+        return f"FactorSet(factors={len(self.names)}, bars={len(self.ts)}, symbols={len(self.symbols)})"
+
+
+# ==================== 因子引擎 ====================
+class FactorEngine:
+    """截面因子引擎
+
+    使用示例:
+        panel = open_panel('data/panels/daily')
+        industry, _ = load_groups('data/industry.csv', panel.symbols)
+        engine = FactorEngine(panel, fields={'industry': industry}, cache_dir='data/cache/factors')
+        factors = engine.compute({
+            'reversal': '-rank(pct_change(close, 5))',
+            'vol_ind': 'group_zscore(ts_std(pct_change(close, 1), 20), industry)',
+        })
+        X, index = factors.matrix()
+    """
+
+    def __init__(self, panel: BarPanel, fields: Optional[Mapping[str, np.ndarray]] = None,
+                 cache_dir: Union[str, Path, None] = None, memory_limit_mb: float = DEFAULT_MEMORY_LIMIT_MB,
+                 chunk_rows: int = 0, dtype: str = 'float32', cache_intermediates: bool = True):
+        """初始化因子引擎
+
+        Args:
+            panel: K线面板，open/high/low/close/volume 可直接在表达式中引用
+            fields: 额外字段，形状为 (时间, 品种) 或 (品种,)(不随时间变化，如行业代码)
+            cache_dir: 因子缓存目录，None 时写入临时目录(随结果释放)
+            memory_limit_mb: 分块计算的内存预算(MB)，用于推算块大小
+            chunk_rows: 每块行数，0 表示按内存预算自动推算
+            dtype: 因子落盘的数据类型(计算过程与中间结果均为 float64)
+            cache_intermediates: 是否落盘被多个因子共用的时序/截面中间结果
+        """
+        self.panel = panel
+        self.fields: Dict[str, np.ndarray] = {name: getattr(panel, name) for name in PRICE_COLUMNS}
+        for name, values in (fields or {}).items():
+            values = np.asarray(values) if not isinstance(values, np.ndarray) else values
+            if values.shape not in (panel.shape, panel.shape[1:]):
+                raise ValueError(f"字段 {name} 的形状 {values.shape} 与面板 {panel.shape} 不匹配")
+            self.fields[name] = values
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.memory_limit_mb = memory_limit_mb
+        self.chunk_rows = chunk_rows
+        self.dtype = np.dtype(dtype)
+        self.cache_intermediates = cache_intermediates
+        self._digests: Dict[str, str] = {}
+        self.stats: Dict[str, float] = {}
+
+    @classmethod
+    def from_config(cls, panel: BarPanel, factor_config, fields: Optional[Mapping[str, np.ndarray]] = None,
+                    **kwargs) -> 'FactorEngine':
+        """根据 FactorConfig 创建因子引擎(配置了 industry_file 时自动加载 industry 字段)"""
+        fields = dict(fields or {})
+        if factor_config.industry_file and 'industry' not in fields:
+            fields['industry'], _ = load_groups(factor_config.industry_file, panel.symbols)
+        kwargs.setdefault('cache_dir', factor_config.cache_dir or None)
+        kwargs.setdefault('memory_limit_mb', factor_config.memory_limit_mb)
+        kwargs.setdefault('chunk_rows', factor_config.chunk_rows)
+        kwargs.setdefault('dtype', factor_config.dtype)
+        kwargs.setdefault('cache_intermediates', factor_config.cache_intermediates)
+        return cls(panel, fields, **kwargs)
+
+    # ==================== 缓存键 ====================
+    def _digest(self, name: str) -> str:
+        """字段数据的摘要(按块读取，内存映射的字段不会整体载入)"""
+        digest = self._digests.get(name)
+        if digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            if name == '':  # 时间轴与品种
+                h.update(np.ascontiguousarray(self.panel.ts, dtype=np.int64).tobytes())
+                h.update('\n'.join(self.panel.symbols).encode('utf-8'))
+            else:
+                values = self.fields[name]
+                h.update(f"{values.dtype.str}{values.shape}".encode('ascii'))
+                for start in range(0, max(len(values), 1), _HASH_BLOCK_ROWS):
+                    h.update(np.ascontiguousarray(values[start:start + _HASH_BLOCK_ROWS]).tobytes())
+            digest = self._digests[name] = h.hexdigest()
+        return digest
+
+    def key(self, expr: Union[str, Expr], dtype: Optional[np.dtype] = None) -> str:
+        """因子缓存键: 表达式 + 落盘类型(默认为因子的 dtype) + 时间轴/品种 + 所引用字段的数据摘要"""
+        expr = as_expr(expr)
+        dtype = self.dtype if dtype is None else np.dtype(dtype)
+        content = json.dumps([str(expr), dtype.str, self._digest(''),
+                              [[name, self._digest(name)] for name in expr.fields()]])
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def _path_for(self, root: Path, key: str) -> Path:
+        return root / key[:2] / f"{key}{FACTOR_SUFFIX}"
+
+    # ==================== 计算 ====================
+    def compute(self, factors: Union[Mapping[str, Union[str, Expr]], Sequence[Union[str, Expr]]],
+                refresh: bool = False, progress: Optional[Callable[[int, int], None]] = None) -> FactorSet:
+        """计算一组因子(已缓存的直接打开)
+
+        Args:
+            factors: 因子名称 -> 表达式(文本或 Expr)，也可以是表达式列表(以规范化文本为名称)
+            refresh: 为True时忽略缓存重新计算
+            progress: 进度回调 progress(已完成块数, 总块数)
+        """
+        started = time.perf_counter()
+        if not isinstance(factors, Mapping):
+            factors = {str(as_expr(f)): f for f in factors}
+        names = list(factors)
+        roots = [as_expr(factors[name]) for name in names]
+        for root in roots:
+            missing = [name for name in root.fields() if name not in self.fields]
+            if missing:
+                raise ValueError(f"因子 {root} 引用了未提供的字段: {', '.join(missing)}")
+
+        temp_dir = None
+        cache_root = self.cache_dir
+        if cache_root is None:
+            temp_dir = tempfile.mkdtemp(prefix='factors_')
+            cache_root = Path(temp_dir)
+
+        # 需要落盘的节点: 全部因子 + 被多个节点共用的时序/截面/分组中间结果
+        nodes = set().union(*(root.walk() for root in roots))
+        consumers: Dict[Expr, int] = {}
+        for node in nodes:
+            for child in set(node.children()):
+                consumers[child] = consumers.get(child, 0) + 1
+        stored = list(dict.fromkeys(roots))
+        dtypes = {node: self.dtype for node in stored}
+        if self.cache_intermediates:
+            dtypes.update((node, INTERMEDIATE_DTYPE) for node, count in consumers.items()
+                          if count > 1 and isinstance(node, Op) and node.spec.kind != 'elementwise'
+                          and node not in dtypes)
+            stored = list(dtypes)
+        paths = {node: self._path_for(cache_root, self.key(node, dtypes[node])) for node in stored}
+        cached = {node for node in stored if not refresh and paths[node].exists()}
+        pending = [node for node in stored if node not in cached]
+        # 作为输入读取的落盘结果: 只用 float64 文件，与现场计算一致
+        inputs = {node: paths[node] for node in cached if dtypes[node] == INTERMEDIATE_DTYPE}
+        if pending and not refresh:
+            # 之前批次落盘的中间结果(或以 float64 落盘的因子)直接读取，不再展开计算
+            for node in nodes - set(inputs):
+                if isinstance(node, Op) and node.spec.kind != 'elementwise':
+                    path = self._path_for(cache_root, self.key(node, INTERMEDIATE_DTYPE))
+                    if path.exists():
+                        inputs[node] = path
+
+        self.stats = {'factors': len(roots), 'cached': sum(root in cached for root in set(roots)),
+                      'computed': 0, 'intermediates': len(stored) - len(set(roots)), 'chunks': 0,
+                      'chunk_rows': 0, 'elapsed': 0.0}
+        if pending:
+            self._compute_pending(pending, inputs, paths, dtypes, progress)
+        self.stats['computed'] = sum(node in pending for node in set(roots))
+        self.stats['elapsed'] = time.perf_counter() - started
+        return FactorSet(names, roots, list(self.panel.symbols), self.panel.ts,
+                         [paths[root] for root in roots], temp_dir)
+
+    def _plan(self, pending: List[Expr], cached: Mapping[Expr, Path]):
+        """求值顺序(子节点在前)、各节点需要的预热行数、每块内被使用的次数"""
+        order: List[Expr] = []
+        visited = set()
+
+        def visit(node: Expr):
+            if node in visited:
+                return
+            visited.add(node)
+            if node not in cached:
+                for child in node.children():
+                    visit(child)
+            order.append(node)
+
+        for node in pending:
+            visit(node)
+        need = {node: 0 for node in order}
+        uses = {node: 0 for node in order}
+        for node in reversed(order):
+            if node in cached:
+                continue
+            for child in node.children():
+                need[child] = max(need[child], need[node] + node.own_lookback)
+                uses[child] += 1
+        for node in pending:
+            uses[node] += 1  # 写出结果
+        return order, need, uses
+
+    def _auto_chunk_rows(self, order: List[Expr], uses: Dict[Expr, int], max_need: int) -> int:
+        if self.chunk_rows > 0:
+            return self.chunk_rows
+        # 同时存活的数组: 共用节点 + 求值路径上的临时数组(滑动窗口/累加等约为输入的数倍)
+        shared = sum(1 for node in order if uses[node] > 1 and not isinstance(node, Const))
+        live = min(len(order), shared + 8) + 6
+        budget_rows = int(self.memory_limit_mb * 1024 * 1024 // (max(1, self.panel.shape[1]) * 8 * live))
+        return max(1, budget_rows - max_need)
+
+    def _compute_pending(self, pending: List[Expr], inputs: Dict[Expr, Path], paths: Dict[Expr, Path],
+                         dtypes: Dict[Expr, np.dtype], progress: Optional[Callable[[int, int], None]]):
+        n_rows, n_symbols = self.panel.shape
+        order, need, uses = self._plan(pending, inputs)
+        chunk_rows = self._auto_chunk_rows(order, uses, max(need.values()))
+        n_chunks = max(1, -(-n_rows // chunk_rows))
+        self.stats.update(chunk_rows=chunk_rows, chunks=n_chunks)
+
+        sources = {node: np.load(inputs[node], mmap_mode='r') for node in order if node in inputs}
+        # 块按时间顺序产出，恰好是 .npy 行优先布局的顺序: 顺序追加写入，不经内存映射，
+        # 已写出的数据不会以脏页形式留在进程内存中
+        outputs, tmp_paths = {}, {}
+        try:
+            for node in pending:
+                paths[node].parent.mkdir(parents=True, exist_ok=True)
+                tmp_paths[node] = paths[node].with_name(f"{paths[node].stem}.{os.getpid()}.tmp")
+                outputs[node] = open(tmp_paths[node], 'wb')
+                header = {'descr': np.lib.format.dtype_to_descr(dtypes[node]), 'fortran_order': False,
+                          'shape': (n_rows, n_symbols)}
+                np.lib.format.write_array_header_1_0(outputs[node], header)
+            with np.errstate(all='ignore'):
+                for chunk, lo in enumerate(range(0, n_rows, chunk_rows)):
+                    hi = min(n_rows, lo + chunk_rows)
+                    self._compute_chunk(order, need, dict(uses), sources, outputs, dtypes, lo, hi)
+                    if progress is not None:
+                        progress(chunk + 1, n_chunks)
+            for node in pending:
+                outputs.pop(node).close()
+                os.replace(tmp_paths[node], paths[node])
+        finally:
+            for f in outputs.values():
+                f.close()
+            for tmp_path in tmp_paths.values():
+                if tmp_path.exists():
+                    tmp_path.unlink()
+
+    def _compute_chunk(self, order: List[Expr], need: Dict[Expr, int], remaining: Dict[Expr, int],
+                       sources: Dict[Expr, np.ndarray], outputs: Dict[Expr, BinaryIO],
+                       dtypes: Dict[Expr, np.dtype], lo: int, hi: int):
+        """计算行区间 [lo, hi) 的全部待算节点，每个节点的值覆盖 [max(0, lo - need), hi)"""
+        n_symbols = self.panel.shape[1]
+        values: Dict[Expr, object] = {}
+        starts = {node: max(0, lo - need[node]) for node in order}
+
+        def take(node: Expr):
+            value = values[node]
+            remaining[node] -= 1
+            if remaining[node] == 0:
+                del values[node]
+            return value
+
+        for node in order:
+            start = starts[node]
+            if node in sources:
+                value = np.array(sources[node][start:hi], dtype=np.float64)
+            elif isinstance(node, Const):
+                value = node.value
+            elif isinstance(node, Field):
+                data = self.fields[node.name]
+                value = (np.broadcast_to(data.astype(np.float64), (hi - start, n_symbols)) if data.ndim == 1
+                         else np.array(data[start:hi], dtype=np.float64))
+            else:
+                spec = node.spec
+                arg_start = max(0, start - node.own_lookback)
+                args = []
+                for child in node.children():
+                    arg = take(child)
+                    if isinstance(arg, np.ndarray):
+                        arg = arg[arg_start - starts[child]:]
+                    elif spec.kind != 'elementwise':
+                        arg = np.full((hi - arg_start, n_symbols), arg)
+                    args.append(arg)
+                value = spec.func(*args, *node.params)
+                if isinstance(value, np.ndarray) and start > arg_start:
+                    value = value[start - arg_start:]
+                if np.ndim(value) == 0:
+                    value = float(value)  # 全为常数的逐元素运算
+            if node in outputs:
+                rows = value[lo - start:] if isinstance(value, np.ndarray) else np.full((hi - lo, n_symbols), value)
+                outputs[node].write(np.ascontiguousarray(rows, dtype=dtypes[node]).tobytes())
+                remaining[node] -= 1
+            if remaining[node] > 0:
+                values[node] = value
+
+
+# ==================== 分组数据 ====================
+def group_codes(labels: Sequence[Optional[str]]) -> Tuple[np.ndarray, List[str]]:
+    """分组名称 -> (分组代码(缺失为NaN), 分组名称列表)"""
+    names = sorted({label for label in labels if label})
+    lookup = {name: i for i, name in enumerate(names)}
+    codes = np.array([lookup.get(label, np.nan) if label else np.nan for label in labels], dtype=np.float64)
+    return codes, names
+
+
+def load_groups(path: Union[str, Path], symbols: Iterable[str]) -> Tuple[np.ndarray, List[str]]:
+    """读取 "股票代码,分组名称" 格式的CSV(如申万一级行业)，按 symbols 顺序返回分组代码
+
+    首行为表头(symbol,industry)时自动跳过，文件中缺失的股票分组代码为NaN。
+    """
+    mapping = {}
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.reader(f):
+            if len(row) >= 2 and row[0].strip() and row[0].strip().lower() != 'symbol':
+                mapping[row[0].strip()] = row[1].strip()
+    return group_codes([mapping.get(symbol) for symbol in symbols])
@@ -0,0 +1,304 @@
+"""
+因子表达式 - 表达式树、文本解析与规范化哈希
+
+因子可以用 Python 运算符组合，也可以写成文本由 parse() 解析:
+    alpha = F.rank(F.ts_mean(F.close, 5) / F.close) - F.rank(F.volume)
+    alpha = parse("rank(ts_mean(close, 5) / close) - rank(volume)")
+
+表达式的规范化文本(str(expr))唯一确定其计算结果，引擎据此计算缓存键；
+相同的子表达式(如多个因子共用的 ts_mean(close, 20))在一次计算中只算一次。
+lookback 为计算一行结果需要的历史行数，分块计算时据此确定预热区间。
+"""
+import ast
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, NamedTuple, Tuple, Union
+
+import numpy as np
+
+from . import ops
+
+Number = Union[int, float]
+
+
+class OpSpec(NamedTuple):
+    """算子定义"""
+    func: Callable
+    kind: str  # 'elementwise' 逐元素 | 'ts' 时序 | 'cs' 截面 | 'group' 分组
+    arity: int  # 表达式参数个数，-1 表示不定(至少1个)
+    params: int = 0  # 末尾整数/数值参数个数(时序算子的窗口等)
+
+
+def _where(cond, a, b):
+    return np.where(np.isnan(cond), np.nan, np.where(cond > 0, a, b))
+
+
+def _compare(func):
+    def compare(a, b):
+        return np.where(np.isnan(a) | np.isnan(b), np.nan, func(a, b).astype(np.float64))
+    return compare
+
+
+def _divide(a, b):
+    result = np.full(np.broadcast(a, b).shape, np.nan)
+    np.divide(a, b, out=result, where=b != 0)
+    return result
+
+
+def _log(x):
+    result = np.full(x.shape, np.nan)
+    np.log(x, out=result, where=x > 0)
+    return result
+
+
+def _signed_power(x, e):
+    return np.sign(x) * np.abs(x) ** e
+
+
+OPS: Dict[str, OpSpec] = {
+    # 运算符
+    'add': OpSpec(np.add, 'elementwise', 2),
+    'sub': OpSpec(np.subtract, 'elementwise', 2),
+    'mul': OpSpec(np.multiply, 'elementwise', 2),
+    'div': OpSpec(_divide, 'elementwise', 2),
+    'pow': OpSpec(np.power, 'elementwise', 2),
+    'neg': OpSpec(np.negative, 'elementwise', 1),
+    'gt': OpSpec(_compare(np.greater), 'elementwise', 2),
+    'ge': OpSpec(_compare(np.greater_equal), 'elementwise', 2),
+    'lt': OpSpec(_compare(np.less), 'elementwise', 2),
+    'le': OpSpec(_compare(np.less_equal), 'elementwise', 2),
+    # 逐元素函数
+    'abs': OpSpec(np.abs, 'elementwise', 1),
+    'log': OpSpec(_log, 'elementwise', 1),
+    'sign': OpSpec(np.sign, 'elementwise', 1),
+    'sqrt': OpSpec(lambda x: np.sqrt(np.where(x >= 0, x, np.nan)), 'elementwise', 1),
+    'maximum': OpSpec(np.fmax, 'elementwise', 2),
+    'minimum': OpSpec(np.fmin, 'elementwise', 2),
+    'where': OpSpec(_where, 'elementwise', 3),
+    'signed_power': OpSpec(_signed_power, 'elementwise', 1, 1),
+    # 时序
+    'delay': OpSpec(ops.delay, 'ts', 1, 1),
+    'delta': OpSpec(ops.delta, 'ts', 1, 1),
+    'pct_change': OpSpec(ops.pct_change, 'ts', 1, 1),
+    'ts_sum': OpSpec(ops.ts_sum, 'ts', 1, 1),
+    'ts_mean': OpSpec(ops.ts_mean, 'ts', 1, 1),
+    'ts_std': OpSpec(ops.ts_std, 'ts', 1, 1),
+    'ts_zscore': OpSpec(ops.ts_zscore, 'ts', 1, 1),
+    'ts_min': OpSpec(ops.ts_min, 'ts', 1, 1),
+    'ts_max': OpSpec(ops.ts_max, 'ts', 1, 1),
+    'ts_argmin': OpSpec(ops.ts_argmin, 'ts', 1, 1),
+    'ts_argmax': OpSpec(ops.ts_argmax, 'ts', 1, 1),
+    'ts_rank': OpSpec(ops.ts_rank, 'ts', 1, 1),
+    'ts_product': OpSpec(ops.ts_product, 'ts', 1, 1),
+    'decay_linear': OpSpec(ops.decay_linear, 'ts', 1, 1),
+    'ts_ffill': OpSpec(ops.ts_ffill, 'ts', 1, 1),
+    'ts_cov': OpSpec(ops.ts_cov, 'ts', 2, 1),
+    'ts_corr': OpSpec(ops.ts_corr, 'ts', 2, 1),
+    # 截面
+    'rank': OpSpec(ops.rank, 'cs', 1),
+    'zscore': OpSpec(ops.zscore, 'cs', 1),
+    'demean': OpSpec(ops.demean, 'cs', 1),
+    'scale': OpSpec(ops.scale, 'cs', 1),
+    'winsorize': OpSpec(ops.winsorize, 'cs', 1, 1),
+    'neutralize': OpSpec(ops.neutralize, 'cs', -1),
+    # 分组(第二个参数为分组代码字段，如 industry)
+    'group_mean': OpSpec(ops.group_mean, 'group', 2),
+    'group_demean': OpSpec(ops.group_demean, 'group', 2),
+    'group_zscore': OpSpec(ops.group_zscore, 'group', 2),
+    'group_rank': OpSpec(ops.group_rank, 'group', 2),
+}
+
+# 预热行数为 参数-1 的算子(窗口)，其余时序算子(delay/delta/pct_change/ts_ffill)为 参数
+_WINDOW_OPS = frozenset(name for name, spec in OPS.items()
+                        if spec.kind == 'ts' and name not in ('delay', 'delta', 'pct_change', 'ts_ffill'))
+
+
+# ==================== 表达式树 ====================
+class Expr:
+    """表达式节点基类(不可变，可哈希)"""
+
+    __slots__ = ('_text',)
+
+    def __str__(self) -> str:
+        return self._text
+
+    def __repr__(self) -> str:
+        return f"Expr({self._text})"
+
+    def __hash__(self) -> int:
+        return hash(self._text)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Expr) and self._text == other._text
+
+    @property
+    def lookback(self) -> int:
+        """计算一行结果需要的历史行数(不含当前行)"""
+        return 0
+
+    def children(self) -> Tuple['Expr', ...]:
+        return ()
+
+    def walk(self) -> Iterator['Expr']:
+        """后序遍历(子节点在前)"""
+        for child in self.children():
+            yield from child.walk()
+        yield self
+
+    def fields(self) -> Tuple[str, ...]:
+        """引用的数据字段(已排序去重)"""
+        return tuple(sorted({node.name for node in self.walk() if isinstance(node, Field)}))
+
+    # 运算符
+    def __add__(self, other): return Op('add', self, other)
+    def __radd__(self, other): return Op('add', other, self)
+    def __sub__(self, other): return Op('sub', self, other)
+    def __rsub__(self, other): return Op('sub', other, self)
+    def __mul__(self, other): return Op('mul', self, other)
+    def __rmul__(self, other): return Op('mul', other, self)
+    def __truediv__(self, other): return Op('div', self, other)
+    def __rtruediv__(self, other): return Op('div', other, self)
+    def __pow__(self, other): return Op('pow', self, other)
+    def __rpow__(self, other): return Op('pow', other, self)
+    def __neg__(self): return Op('neg', self)
+    def __abs__(self): return Op('abs', self)
+    def __gt__(self, other): return Op('gt', self, other)
+    def __ge__(self, other): return Op('ge', self, other)
+    def __lt__(self, other): return Op('lt', self, other)
+    def __le__(self, other): return Op('le', self, other)
+
+
+class Field(Expr):
+    """数据字段: 面板列(open/high/low/close/volume)或额外提供的字段(如 industry、market_cap)"""
+
+    __slots__ = ('name',)
+
+    def __init__(self, name: str):
+        self.name = name
+        self._text = name
+
+
+class Const(Expr):
+    """常数"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value: Number):
+        self.value = float(value)
+        self._text = repr(self.value)
+
+
+class Op(Expr):
+    """算子节点"""
+
+    __slots__ = ('name', 'args', 'params', '_lookback')
+
+    def __init__(self, name: str, *args):
+        spec = OPS.get(name)
+        if spec is None:
+            raise ValueError(f"未知的因子算子: {name}")
+        n_args = len(args) - spec.params
+        if (spec.arity >= 0 and n_args != spec.arity) or n_args < 1:
+            expected = f"{spec.arity}个" if spec.arity >= 0 else "至少1个"
+            raise ValueError(f"{name} 需要{expected}表达式参数和{spec.params}个数值参数，实际 {len(args)} 个参数")
+        self.name = name
+        self.args = tuple(as_expr(a) for a in args[:n_args])
+        self.params = tuple(args[n_args:])
+        for param in self.params:
+            if not isinstance(param, (int, float, np.integer, np.floating)) or isinstance(param, bool):
+                raise ValueError(f"{name} 的参数必须为数值: {param}")
+        if spec.kind == 'ts':
+            window = self.params[0]
+            if int(window) != window or window < (0 if name == 'delay' else 1):
+                raise ValueError(f"{name} 的窗口必须为正整数: {window}")
+            self.params = (int(window),)
+        self._lookback = self.own_lookback + max(arg.lookback for arg in self.args)
+        self._text = f"{name}({','.join([str(a) for a in self.args] + [_format_param(p) for p in self.params])})"
+
+    @property
+    def spec(self) -> OpSpec:
+        return OPS[self.name]
+
+    @property
+    def own_lookback(self) -> int:
+        """本算子自身需要的历史行数"""
+        if self.spec.kind != 'ts':
+            return 0
+        return self.params[0] - 1 if self.name in _WINDOW_OPS else self.params[0]
+
+    @property
+    def lookback(self) -> int:
+        return self._lookback
+
+    def children(self) -> Tuple[Expr, ...]:
+        return self.args
+
+
+def _format_param(value: Number) -> str:
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def as_expr(value) -> Expr:
+    """文本、数值或表达式 -> 表达式"""
+    if isinstance(value, Expr):
+        return value
+    if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool):
+        return Const(value)
+    if isinstance(value, str):
+        return parse(value)
+    raise TypeError(f"无法转换为因子表达式: {value!r}")
+
+
+def _make_function(name: str):
+    def function(*args):
+        return Op(name, *args)
+    function.__name__ = name
+    function.__doc__ = (OPS[name].func.__doc__ or '').strip() or name
+    return function
+
+
+FUNCTIONS: Dict[str, Callable[..., Op]] = {
+    name: _make_function(name) for name in OPS
+    if name not in ('add', 'sub', 'mul', 'div', 'pow', 'neg', 'gt', 'ge', 'lt', 'le')
+}
+# 供 Python 代码直接组合表达式: F.rank(F.ts_mean(F.close, 20))，额外字段使用 Field('industry')
+F = SimpleNamespace(**FUNCTIONS, **{name: Field(name) for name in ('open', 'high', 'low', 'close', 'volume')})
+
+
+# ==================== 文本解析 ====================
+_BINARY_OPS = {ast.Add: 'add', ast.Sub: 'sub', ast.Mult: 'mul', ast.Div: 'div', ast.Pow: 'pow'}
+_COMPARE_OPS = {ast.Gt: 'gt', ast.GtE: 'ge', ast.Lt: 'lt', ast.LtE: 'le'}
+
+
+def parse(text: str) -> Expr:
+    """解析因子表达式文本
+
+    支持 + - * / ** 运算符、比较运算、数值常数、字段名和 OPS 中的算子，
+    只解析白名单语法，不执行任意代码。
+    """
+    try:
+        tree = ast.parse(text.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"因子表达式语法错误: {text!r}: {e.msg}") from e
+    return as_expr(_convert(tree.body, text))
+
+
+def _convert(node: ast.AST, text: str):
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return node.value
+    if isinstance(node, ast.Name):
+        return Field(node.id)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        operand = _convert(node.operand, text)
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        return -operand if not isinstance(operand, Expr) else Op('neg', operand)
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        return Op(_BINARY_OPS[type(node.op)], _convert(node.left, text), _convert(node.right, text))
+    if isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in _COMPARE_OPS:
+        return Op(_COMPARE_OPS[type(node.ops[0])], _convert(node.left, text), _convert(node.comparators[0], text))
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        if node.func.id not in FUNCTIONS:
+            raise ValueError(f"未知的因子算子: {node.func.id} (表达式 {text!r})")
+        return Op(node.func.id, *(_convert(arg, text) for arg in node.args))
+    raise ValueError(f"不支持的因子表达式语法: {ast.dump(node)} (表达式 {text!r})")
+
@@ -0,0 +1,401 @@
+"""
+因子算子 - 面板(时间 × 品种)上的向量化计算内核
+
+所有算子输入输出均为 float64 二维数组，形状 (行数, 品种数)，缺失值为NaN。
+
+约定:
+    - 时序算子(ts_*)沿时间轴按窗口计算，窗口内存在缺失值(停牌)时结果为NaN，
+      与 pandas rolling(window) 默认一致；前 window-1 行为NaN。
+      结果只依赖最近 window 行，因此分块计算时只需多读 window-1 行预热数据
+    - 截面算子沿品种轴逐行计算，忽略缺失值；无法计算的比率(标准差为0等)记为0
+    - 分组算子的分组代码为非负整数(以浮点存储)，缺失值或负数表示不属于任何分组
+"""
+from typing import Tuple
+
+import numpy as np
+
+
+# ==================== 工具 ====================
+def _nan_like(x: np.ndarray) -> np.ndarray:
+    return np.full(x.shape, np.nan)
+
+
+def _lags(x: np.ndarray, window: int):
+    """依次产出 (k, 滞后k行的视图)，视图对齐到结果的 [window-1, 行数) 行
+
+    逐个滞后累加，临时内存与输入同阶(不展开 行数×品种数×窗口 的滑动窗口)。
+    """
+    n = x.shape[0]
+    for k in range(window):
+        yield k, x[window - 1 - k:n - k]
+
+
+def _rolling_total(values: np.ndarray, window: int) -> np.ndarray:
+    """无缺失值数组的窗口求和(前 window-1 行为NaN)"""
+    csum = np.cumsum(values, axis=0)
+    result = np.empty(values.shape)
+    result[:window - 1] = np.nan
+    result[window - 1] = csum[window - 1]
+    np.subtract(csum[window:], csum[:-window], out=result[window:])
+    return result
+
+
+def _incomplete(valid: np.ndarray, window: int) -> np.ndarray:
+    """窗口内存在缺失值(或不足 window 行)的位置"""
+    if valid.all():
+        result = np.zeros(valid.shape, dtype=bool)
+    else:
+        missing = np.cumsum(~valid, axis=0, dtype=np.int32)
+        missing[window:] -= missing[:-window].copy()
+        result = missing > 0
+    result[:window - 1] = True
+    return result
+
+
+def _rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    """窗口求和(窗口内有NaN时为NaN)"""
+    if window > x.shape[0]:
+        return _nan_like(x)
+    valid = ~np.isnan(x)
+    result = _rolling_total(np.where(valid, x, 0.0), window)
+    result[_incomplete(valid, window)] = np.nan
+    return result
+
+
+def _centered(x: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """各列减去本段均值，缺失处为0(降低累加求方差时的数值抵消误差，不改变方差和协方差)"""
+    filled = np.where(valid, x, 0.0)
+    count = valid.sum(axis=0)
+    center = np.divide(filled.sum(axis=0), count, out=np.zeros(x.shape[1]), where=count > 0)
+    filled -= center
+    filled[~valid] = 0.0
+    return filled
+
+
+def _rolling_moments(x: np.ndarray, y: np.ndarray, window: int):
+    """窗口离差积和/离差平方和: 返回 (Sxy, Sxx, Syy, 不完整窗口掩码)，两序列任一缺失即视为缺失"""
+    valid = ~np.isnan(x) & ~np.isnan(y)
+    cx = _centered(x, valid)
+    cy = cx if y is x else _centered(y, valid)
+    sum_x = _rolling_total(cx, window)
+    sum_y = sum_x if y is x else _rolling_total(cy, window)
+    sxx = _rolling_total(cx * cx, window) - sum_x * sum_x / window
+    if y is x:
+        return sxx, sxx, sxx, _incomplete(valid, window)
+    sxy = _rolling_total(cx * cy, window) - sum_x * sum_y / window
+    syy = _rolling_total(cy * cy, window) - sum_y * sum_y / window
+    return sxy, sxx, syy, _incomplete(valid, window)
+
+
+def _apply_lags(x: np.ndarray, window: int, func) -> np.ndarray:
+    """result[window-1:] = func(x, window)，其余行为NaN"""
+    result = _nan_like(x)
+    if window <= x.shape[0]:
+        result[window - 1:] = func(x, window)
+    return result
+
+
+def _any_nan(x: np.ndarray, window: int) -> np.ndarray:
+    """结果行 [window-1, 行数) 的窗口内是否有缺失值"""
+    return _incomplete(~np.isnan(x), window)[window - 1:]
+
+
+# ==================== 时序算子 ====================
+def delay(x: np.ndarray, periods: int) -> np.ndarray:
+    """periods 行之前的值"""
+    result = _nan_like(x)
+    if periods == 0:
+        result[:] = x
+    elif periods < x.shape[0]:
+        result[periods:] = x[:-periods]
+    return result
+
+
+def delta(x: np.ndarray, periods: int) -> np.ndarray:
+    """x - delay(x, periods)"""
+    return x - delay(x, periods)
+
+
+def pct_change(x: np.ndarray, periods: int) -> np.ndarray:
+    """x / delay(x, periods) - 1 (基期不为正时为NaN)"""
+    base = delay(x, periods)
+    result = _nan_like(x)
+    np.divide(x, base, out=result, where=base > 0)
+    return result - 1.0
+
+
+def ts_sum(x: np.ndarray, window: int) -> np.ndarray:
+    return _rolling_sum(x, window)
+
+
+def ts_mean(x: np.ndarray, window: int) -> np.ndarray:
+    return _rolling_sum(x, window) / window
+
+
+def ts_std(x: np.ndarray, window: int) -> np.ndarray:
+    """窗口样本标准差(ddof=1)"""
+    if window > x.shape[0]:
+        return _nan_like(x)
+    if window < 2:
+        return np.where(np.isnan(x), np.nan, 0.0)
+    _, sxx, _, incomplete = _rolling_moments(x, x, window)
+    result = np.sqrt(np.maximum(sxx, 0.0) / (window - 1))
+    result[incomplete] = np.nan
+    return result
+
+
+def ts_zscore(x: np.ndarray, window: int) -> np.ndarray:
+    """(x - 窗口均值) / 窗口标准差，标准差为0时为0"""
+    std = ts_std(x, window)
+    result = np.where(np.isnan(std), np.nan, 0.0)
+    np.divide(x - ts_mean(x, window), std, out=result, where=std > 0)
+    return result
+
+
+def ts_min(x: np.ndarray, window: int) -> np.ndarray:
+    def func(x, window):
+        result = x[window - 1:].copy()
+        for _, lagged in _lags(x, window):
+            np.minimum(result, lagged, out=result)
+        return result
+    return _apply_lags(x, window, func)
+
+
+def ts_max(x: np.ndarray, window: int) -> np.ndarray:
+    def func(x, window):
+        result = x[window - 1:].copy()
+        for _, lagged in _lags(x, window):
+            np.maximum(result, lagged, out=result)
+        return result
+    return _apply_lags(x, window, func)
+
+
+def _arg_extreme(x: np.ndarray, window: int, better) -> np.ndarray:
+    """窗口内极值距今的行数，相同值取最近一行"""
+    best = x[window - 1:].copy()
+    result = np.zeros(best.shape)
+    for k, lagged in _lags(x, window):
+        mask = better(lagged, best)
+        best[mask] = lagged[mask]
+        result[mask] = k
+    result[_any_nan(x, window)] = np.nan
+    return result
+
+
+def ts_argmax(x: np.ndarray, window: int) -> np.ndarray:
+    """窗口内最大值距今的行数(0表示当前行)"""
+    return _apply_lags(x, window, lambda x, window: _arg_extreme(x, window, np.greater))
+
+
+def ts_argmin(x: np.ndarray, window: int) -> np.ndarray:
+    """窗口内最小值距今的行数(0表示当前行)"""
+    return _apply_lags(x, window, lambda x, window: _arg_extreme(x, window, np.less))
+
+
+def ts_rank(x: np.ndarray, window: int) -> np.ndarray:
+    """当前值在窗口内的百分位排名 (0, 1]，相同值取平均排名"""
+    def func(x, window):
+        last = x[window - 1:]
+        less = np.zeros(last.shape)
+        equal = np.zeros(last.shape)
+        for _, lagged in _lags(x, window):
+            less += lagged < last
+            equal += lagged == last
+        result = (less + (equal + 1) / 2.0) / window
+        result[_any_nan(x, window)] = np.nan
+        return result
+    return _apply_lags(x, window, func)
+
+
+def ts_product(x: np.ndarray, window: int) -> np.ndarray:
+    def func(x, window):
+        result = np.ones(x[window - 1:].shape)
+        for _, lagged in _lags(x, window):
+            result *= lagged
+        return result
+    return _apply_lags(x, window, func)
+
+
+def decay_linear(x: np.ndarray, window: int) -> np.ndarray:
+    """线性衰减加权平均，权重 1..window (当前行权重最大)"""
+    def func(x, window):
+        total = window * (window + 1) / 2.0
+        result = np.zeros(x[window - 1:].shape)
+        for k, lagged in _lags(x, window):
+            result += lagged * ((window - k) / total)
+        return result
+    return _apply_lags(x, window, func)
+
+
+def ts_cov(x: np.ndarray, y: np.ndarray, window: int) -> np.ndarray:
+    """窗口样本协方差(ddof=1)"""
+    if window > x.shape[0]:
+        return _nan_like(x)
+    if window < 2:
+        return np.where(np.isnan(x) | np.isnan(y), np.nan, 0.0)
+    sxy, _, _, incomplete = _rolling_moments(x, y, window)
+    result = sxy / (window - 1)
+    result[incomplete] = np.nan
+    return result
+
+
+def ts_corr(x: np.ndarray, y: np.ndarray, window: int) -> np.ndarray:
+    """窗口皮尔逊相关系数，任一序列方差为0时为0"""
+    if window > x.shape[0] or window < 2:
+        return _nan_like(x)
+    sxy, sxx, syy, incomplete = _rolling_moments(x, y, window)
+    scale = np.sqrt(np.maximum(sxx, 0.0) * np.maximum(syy, 0.0))
+    result = np.zeros(x.shape)
+    np.divide(sxy, scale, out=result, where=scale > 0)
+    result[incomplete] = np.nan
+    return np.clip(result, -1.0, 1.0)
+
+
+def ts_ffill(x: np.ndarray, limit: int) -> np.ndarray:
+    """向前填充缺失值，最多沿用 limit 行之前的值(停牌期间沿用最近价格)"""
+    result = x.copy()
+    for periods in range(1, limit + 1):
+        missing = np.isnan(result)
+        if not missing.any():
+            break
+        result[missing] = delay(x, periods)[missing]
+    return result
+
+
+# ==================== 截面算子 ====================
+def _average_ranks(sorted_values: np.ndarray, boundaries: np.ndarray) -> np.ndarray:
+    """已排序的行内，相同值取平均排名(从1开始)，boundaries 为新分段的起点标记"""
+    n = sorted_values.shape[-1]
+    positions = np.broadcast_to(np.arange(n), sorted_values.shape)
+    new_run = np.ones(sorted_values.shape, dtype=bool)
+    new_run[..., 1:] = (sorted_values[..., 1:] != sorted_values[..., :-1]) | boundaries[..., 1:]
+    first = np.maximum.accumulate(np.where(new_run, positions, 0), axis=-1)
+    run_end = np.ones(sorted_values.shape, dtype=bool)
+    run_end[..., :-1] = new_run[..., 1:]
+    last = np.minimum.accumulate(np.where(run_end, positions, n - 1)[..., ::-1], axis=-1)[..., ::-1]
+    return (first + last) / 2.0 + 1.0
+
+
+def rank(x: np.ndarray) -> np.ndarray:
+    """截面百分位排名 (0, 1]，相同值取平均排名"""
+    valid = ~np.isnan(x)
+    order = np.argsort(x, axis=1, kind='stable')  # NaN 排在最后
+    sorted_values = np.take_along_axis(x, order, axis=1)
+    ranks = np.empty(x.shape)
+    np.put_along_axis(ranks, order, _average_ranks(sorted_values, np.zeros(x.shape, dtype=bool)), axis=1)
+    count = valid.sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(valid, ranks / count, np.nan)
+
+
+def demean(x: np.ndarray) -> np.ndarray:
+    """减去截面均值"""
+    return x - _row_stat(x, np.nanmean)
+
+
+def zscore(x: np.ndarray) -> np.ndarray:
+    """截面标准化 (x - 均值) / 标准差(ddof=0)，标准差为0时为0"""
+    std = _row_stat(x, np.nanstd)
+    result = np.where(np.isnan(x), np.nan, 0.0)
+    np.divide(demean(x), std, out=result, where=(std > 0) & ~np.isnan(x))
+    return result
+
+
+def scale(x: np.ndarray) -> np.ndarray:
+    """缩放使截面绝对值之和为1"""
+    total = _row_stat(np.abs(x), np.nansum)
+    result = np.where(np.isnan(x), np.nan, 0.0)
+    np.divide(x, total, out=result, where=(total > 0) & ~np.isnan(x))
+    return result
+
+
+def winsorize(x: np.ndarray, n_std: float) -> np.ndarray:
+    """截面去极值: 截断到 均值 ± n_std 倍标准差"""
+    mean = _row_stat(x, np.nanmean)
+    std = _row_stat(x, np.nanstd)
+    return np.clip(x, mean - n_std * std, mean + n_std * std)
+
+
+def _row_stat(x: np.ndarray, func) -> np.ndarray:
+    """逐行统计量(全为NaN的行结果为NaN，不产生警告)"""
+    result = np.full((x.shape[0], 1), np.nan)
+    rows = ~np.all(np.isnan(x), axis=1)
+    if rows.any():
+        result[rows, 0] = func(x[rows], axis=1)
+    return result
+
+
+def neutralize(y: np.ndarray, *exposures: np.ndarray) -> np.ndarray:
+    """截面回归中性化: y 对常数项和各暴露(如对数市值)逐行做最小二乘，返回残差"""
+    design = np.stack([np.ones(y.shape)] + list(exposures), axis=-1)  # (行, 品种, k)
+    valid = ~np.isnan(y) & ~np.isnan(design).any(axis=-1)
+    design = np.where(valid[..., None], design, 0.0)
+    target = np.where(valid, y, 0.0)
+    xtx = np.einsum('rnk,rnl->rkl', design, design)
+    xty = np.einsum('rnk,rn->rk', design, target)
+    beta = np.einsum('rkl,rl->rk', np.linalg.pinv(xtx), xty)
+    residual = y - np.einsum('rnk,rk->rn', design, beta)
+    return np.where(valid, residual, np.nan)
+
+
+# ==================== 分组算子 ====================
+def _group_index(x: np.ndarray, groups: np.ndarray) -> Tuple[np.ndarray, np.ndarray, int]:
+    """返回 (有效掩码, 展平后的 行号×分组数+分组代码, 分组数)"""
+    groups = np.broadcast_to(groups, x.shape)
+    valid = ~np.isnan(x) & ~np.isnan(groups) & (np.nan_to_num(groups, nan=-1.0) >= 0)
+    codes = np.where(valid, groups, 0).astype(np.int64)
+    n_groups = int(codes.max()) + 1 if codes.size else 1
+    flat = np.arange(x.shape[0]).reshape(-1, 1) * n_groups + codes
+    return valid, flat, n_groups
+
+
+def _group_sums(x: np.ndarray, groups: np.ndarray):
+    """返回 (有效掩码, 展平分组索引, 各分组计数, 各分组求和)"""
+    valid, flat, n_groups = _group_index(x, groups)
+    size = x.shape[0] * n_groups
+    count = np.bincount(flat[valid], minlength=size)
+    total = np.bincount(flat[valid], weights=x[valid], minlength=size)
+    return valid, flat, count, total
+
+
+def group_mean(x: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """所属分组(如行业)的截面均值"""
+    valid, flat, count, total = _group_sums(x, groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+    return np.where(valid, mean[flat], np.nan)
+
+
+def group_demean(x: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """减去所属分组的截面均值(行业中性化)"""
+    return x - group_mean(x, groups)
+
+
+def group_zscore(x: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """分组内截面标准化(ddof=0)，标准差为0时为0"""
+    valid, flat, count, total = _group_sums(x, groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        deviation = x - (total / count)[flat]
+        variance = np.bincount(flat[valid], weights=deviation[valid] ** 2, minlength=count.size) / count
+    std = np.sqrt(variance)[flat]
+    result = np.where(valid, 0.0, np.nan)
+    np.divide(deviation, std, out=result, where=valid & (std > 0))
+    return result
+
+
+def group_rank(x: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """分组内截面百分位排名 (0, 1]"""
+    valid, flat, n_groups = _group_index(x, groups)
+    values, keys = x[valid], flat[valid]
+    order = np.lexsort((values, keys))
+    sorted_keys = keys[order]
+    boundaries = np.ones(len(order), dtype=bool)
+    boundaries[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    ranks = _average_ranks(values[order], boundaries)
+    group_start = np.maximum.accumulate(np.where(boundaries, np.arange(len(order)), 0))
+    count = np.bincount(keys, minlength=x.shape[0] * n_groups)
+    result = np.full(x.shape, np.nan)
+    flat_result = np.empty(len(order))
+    flat_result[order] = (ranks - group_start) / count[sorted_keys]
+    result[valid] = flat_result
+    return result
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+指标模块
+包含O(1)增量更新的流式技术指标
+"""
+
+from .streaming import (
+    Indicator, SMA, EMA, RollingStd, RollingMax, RollingMin, ATR, RSI, SymbolIndicators
+)
+
+__all__ = [
+    'Indicator', 'SMA', 'EMA', 'RollingStd', 'RollingMax', 'RollingMin', 'ATR', 'RSI',
+    'SymbolIndicators',
+]
@@ -0,0 +1,367 @@
+"""
+增量技术指标 - 每个新数据点 O(1) 更新
+
+所有指标使用 __slots__ 和预分配的环形缓冲区，实时行情与历史回放走同一个 update()，
+回放只是对历史序列逐个调用 update()。未积累足够数据时 value 为 NaN。
+
+使用示例:
+    fast = SMA(10)
+    for price in prices:
+        fast.update(price)
+    if fast.ready:
+        print(fast.value)
+"""
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+NAN = float('nan')
+
+
+class Indicator:
+    """增量指标基类"""
+
+    __slots__ = ('period', 'value', 'count')
+
+    def __init__(self, period: int):
+        """初始化指标
+
+        Args:
+            period: 计算周期
+        """
+        if period <= 0:
+            raise ValueError(f"指标周期必须为正数: {period}")
+        self.period = int(period)
+        self.value = NAN  # 当前指标值
+        self.count = 0  # 已接收的数据点数量
+
+    @property
+    def ready(self) -> bool:
+        """是否已积累足够数据"""
+        return self.value == self.value  # NaN != NaN
+
+    def update(self, value: float) -> float:
+        """输入一个新数据点并返回最新指标值"""
+        raise NotImplementedError
+
+    def replay(self, values: Iterable[float]) -> float:
+        """按顺序回放历史数据(与实时更新同一路径)，返回最终指标值"""
+        update = self.update
+        for value in values:
+            update(value)
+        return self.value
+
+    def reset(self):
+        """重置为初始状态"""
+        self.value = NAN
+        self.count = 0
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(period={self.period}, value={self.value})"
+
+
+class _WindowIndicator(Indicator):
+    """基于定长环形缓冲区的指标基类"""
+
+    __slots__ = ('_buffer', '_pos')
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self._buffer: List[float] = [0.0] * self.period  # 预分配环形缓冲区
+        self._pos = 0  # 下一个写入位置
+
+    def reset(self):
+        super().reset()
+        self._buffer = [0.0] * self.period
+        self._pos = 0
+
+    def window(self) -> List[float]:
+        """按时间顺序返回当前窗口内的数据"""
+        if self.count < self.period:
+            return self._buffer[:self.count]
+        return self._buffer[self._pos:] + self._buffer[:self._pos]
+
+
+class SMA(_WindowIndicator):
+    """简单移动平均
+
+    维护窗口累计和，每轮缓冲区写满一圈时重新求和一次以消除浮点累计误差(均摊O(1))。
+    """
+
+    __slots__ = ('_total',)
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self._total = 0.0
+
+    def update(self, value: float) -> float:
+        buffer = self._buffer
+        pos = self._pos
+        self._total += value - buffer[pos]
+        buffer[pos] = value
+        pos += 1
+        if pos == self.period:
+            pos = 0
+            self._total = sum(buffer)
+        self._pos = pos
+        self.count += 1
+        if self.count >= self.period:
+            self.value = self._total / self.period
+        return self.value
+
+    def reset(self):
+        super().reset()
+        self._total = 0.0
+
+
+class EMA(Indicator):
+    """指数移动平均，以前 period 个数据的简单平均作为初始值"""
+
+    __slots__ = ('alpha', '_seed')
+
+    def __init__(self, period: int, alpha: float = None):
+        """初始化EMA
+
+        Args:
+            period: 周期
+            alpha: 平滑系数，默认为 2 / (period + 1)
+        """
+        super().__init__(period)
+        self.alpha = alpha if alpha is not None else 2.0 / (self.period + 1)
+        self._seed = 0.0
+
+    def update(self, value: float) -> float:
+        self.count += 1
+        if self.count > self.period:
+            self.value += self.alpha * (value - self.value)
+        else:
+            self._seed += value
+            if self.count == self.period:
+                self.value = self._seed / self.period
+        return self.value
+
+    def reset(self):
+        super().reset()
+        self._seed = 0.0
+
+
+class RollingStd(_WindowIndicator):
+    """滚动标准差
+
+    Args:
+        ddof: 自由度修正，0为总体标准差，1为样本标准差
+    """
+
+    __slots__ = ('ddof', '_total', '_total_sq')
+
+    def __init__(self, period: int, ddof: int = 0):
+        if period <= ddof:
+            raise ValueError(f"周期 {period} 必须大于 ddof {ddof}")
+        super().__init__(period)
+        self.ddof = ddof
+        self._total = 0.0
+        self._total_sq = 0.0
+
+    def update(self, value: float) -> float:
+        buffer = self._buffer
+        pos = self._pos
+        old = buffer[pos]
+        self._total += value - old
+        self._total_sq += value * value - old * old
+        buffer[pos] = value
+        pos += 1
+        if pos == self.period:
+            pos = 0
+            self._total = sum(buffer)
+            self._total_sq = sum(v * v for v in buffer)
+        self._pos = pos
+        self.count += 1
+        if self.count >= self.period:
+            n = self.period
+            mean = self._total / n
+            variance = (self._total_sq - n * mean * mean) / (n - self.ddof)
+            self.value = variance ** 0.5 if variance > 0.0 else 0.0
+        return self.value
+
+    def reset(self):
+        super().reset()
+        self._total = 0.0
+        self._total_sq = 0.0
+
+
+class RollingMax(Indicator):
+    """滚动最大值(单调队列，均摊O(1))"""
+
+    __slots__ = ('_deque',)
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self._deque: deque = deque()  # (序号, 值)，值单调递减
+
+    def _dominates(self, new: float, old: float) -> bool:
+        return new >= old
+
+    def update(self, value: float) -> float:
+        dq = self._deque
+        index = self.count
+        while dq and self._dominates(value, dq[-1][1]):
+            dq.pop()
+        dq.append((index, value))
+        if dq[0][0] <= index - self.period:
+            dq.popleft()
+        self.count += 1
+        if self.count >= self.period:
+            self.value = dq[0][1]
+        return self.value
+
+    def reset(self):
+        super().reset()
+        self._deque.clear()
+
+
+class RollingMin(RollingMax):
+    """滚动最小值(单调队列，均摊O(1))"""
+
+    __slots__ = ()
+
+    def _dominates(self, new: float, old: float) -> bool:
+        return new <= old
+
+
+class ATR(Indicator):
+    """平均真实波幅(Wilder平滑)，以前 period 个真实波幅的简单平均作为初始值"""
+
+    __slots__ = ('_prev_close', '_seed')
+
+    def __init__(self, period: int = 14):
+        super().__init__(period)
+        self._prev_close = NAN
+        self._seed = 0.0
+
+    def update(self, high: float, low: float = None, close: float = None) -> float:
+        """输入一根K线
+
+        Args:
+            high: 最高价(也可传入 (high, low, close) 元组，便于 replay)
+            low: 最低价
+            close: 收盘价
+        """
+        if low is None:
+            high, low, close = high
+        prev_close = self._prev_close
+        if prev_close == prev_close:
+            true_range = max(high, prev_close) - min(low, prev_close)
+        else:
+            true_range = high - low
+        self._prev_close = close
+        self.count += 1
+        period = self.period
+        if self.count > period:
+            self.value += (true_range - self.value) / period
+        else:
+            self._seed += true_range
+            if self.count == period:
+                self.value = self._seed / period
+        return self.value
+
+    def reset(self):
+        super().reset()
+        self._prev_close = NAN
+        self._seed = 0.0
+
+
+class RSI(Indicator):
+    """相对强弱指标(Wilder平滑)，需要 period + 1 个价格才产生第一个值"""
+
+    __slots__ = ('_prev', '_avg_gain', '_avg_loss')
+
+    def __init__(self, period: int = 14):
+        super().__init__(period)
+        self._prev = NAN
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+
+    def update(self, value: float) -> float:
+        prev = self._prev
+        self._prev = value
+        if prev != prev:
+            return self.value
+        change = value - prev
+        gain = change if change > 0.0 else 0.0
+        loss = -change if change < 0.0 else 0.0
+        self.count += 1
+        period = self.period
+        if self.count > period:
+            self._avg_gain += (gain - self._avg_gain) / period
+            self._avg_loss += (loss - self._avg_loss) / period
+        else:
+            self._avg_gain += gain / period
+            self._avg_loss += loss / period
+            if self.count < period:
+                return self.value
+        if self._avg_loss == 0.0:
+            self.value = 100.0 if self._avg_gain > 0.0 else 50.0
+        else:
+            self.value = 100.0 - 100.0 / (1.0 + self._avg_gain / self._avg_loss)
+        return self.value
+
+    def reset(self):
+        super().reset()
+        self._prev = NAN
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+
+
+class SymbolIndicators:
+    """按股票代码管理同一种指标的多个实例(实时订阅场景)
+
+    使用示例:
+        fast_ma = SymbolIndicators(lambda: SMA(10))
+        fast_ma.update('600000.SH', 10.52)
+    """
+
+    __slots__ = ('_factory', '_indicators')
+
+    def __init__(self, factory: Callable[[], Indicator]):
+        """初始化
+
+        Args:
+            factory: 为新股票创建指标实例的工厂函数
+        """
+        self._factory = factory
+        self._indicators: Dict[str, Indicator] = {}
+
+    def get(self, symbol: str) -> Indicator:
+        """获取股票对应的指标实例(不存在时创建)"""
+        indicator = self._indicators.get(symbol)
+        if indicator is None:
+            indicator = self._indicators[symbol] = self._factory()
+        return indicator
+
+    def update(self, symbol: str, *values: float) -> float:
+        """更新股票指标并返回最新值"""
+        indicator = self._indicators.get(symbol)
+        if indicator is None:
+            indicator = self._indicators[symbol] = self._factory()
+        return indicator.update(*values)
+
+    def value(self, symbol: str) -> float:
+        """获取股票当前指标值(未订阅时返回NaN)"""
+        indicator = self._indicators.get(symbol)
+        return indicator.value if indicator is not None else NAN
+
+    def items(self) -> Iterator[Tuple[str, Indicator]]:
+        return iter(self._indicators.items())
+
+    def dump_state(self) -> Dict[str, Indicator]:
+        """快照用的状态(各股票的指标实例，不含工厂函数)"""
+        return dict(self._indicators)
+
+    def load_state(self, indicators: Dict[str, Indicator]):
+        """从快照恢复各股票的指标实例"""
+        self._indicators = dict(indicators)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._indicators
+
+    def __len__(self) -> int:
+        return len(self._indicators)
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+监控模块
+包含热路径延迟直方图、性能阈值告警与资源采样
+"""
+
+from .latency import (
+    LatencyHistogram, LatencyRecorder, get_recorder,
+    QUOTE_TO_SIGNAL, SIGNAL_TO_ORDER, ORDER_TO_ACK
+)
+from .monitor import PerformanceMonitor, PerformanceAlert, ResourceSample
+
+__all__ = [
+    'LatencyHistogram', 'LatencyRecorder', 'get_recorder',
+    'QUOTE_TO_SIGNAL', 'SIGNAL_TO_ORDER', 'ORDER_TO_ACK',
+    'PerformanceMonitor', 'PerformanceAlert', 'ResourceSample',
+]
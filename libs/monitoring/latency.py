@@ -0,0 +1,266 @@
+"""
+延迟直方图 - HDR风格的对数线性分桶，记录 O(1)、无锁
+
+每个2的幂区间再等分为 2^precision_bits 个子桶，相对误差约 1/2^precision_bits，
+可覆盖纳秒到小时级的延迟。每个线程写入自己的直方图(无锁、无竞争)，
+读取统计时再把各线程的直方图合并。
+
+使用示例:
+    recorder = get_recorder()
+    with recorder.span('signal_to_order'):
+        place_order(...)
+
+    @recorder.timed('quote_to_signal')
+    def on_quote(quote): ...
+
+    recorder.record_since('order_to_ack', order.sent_ns)   # 跨线程的区间
+    recorder.summary()
+"""
+import threading
+import time
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_PRECISION_BITS = 5  # 每个2的幂区间的子桶位数(32个子桶，相对误差约3%)
+DEFAULT_PERCENTILES = (50, 90, 99, 99.9)  # 默认输出的分位数
+
+# 区间名称
+QUOTE_TO_SIGNAL = 'quote_to_signal'  # 行情到信号
+SIGNAL_TO_ORDER = 'signal_to_order'  # 信号到下单
+ORDER_TO_ACK = 'order_to_ack'  # 下单到券商回报
+
+_perf_ns = time.perf_counter_ns
+
+
+class LatencyHistogram:
+    """对数线性分桶的延迟直方图(单线程写入)"""
+
+    __slots__ = ('precision_bits', '_sub_count', '_counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self, precision_bits: int = DEFAULT_PRECISION_BITS):
+        self.precision_bits = precision_bits
+        self._sub_count = 1 << precision_bits
+        self._counts: List[int] = [0] * (self._sub_count * 2)  # 按需扩展
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        shift = value.bit_length() - self.precision_bits - 1
+        if shift <= 0:
+            return value
+        return shift * self._sub_count + (value >> shift)
+
+    def _lower_bound(self, index: int) -> int:
+        shift = index // self._sub_count - 1
+        if shift <= 0:
+            return index
+        return (index - shift * self._sub_count) << shift
+
+    def record(self, value: int):
+        """记录一个延迟值(纳秒，非负整数)"""
+        if value < 0:
+            value = 0
+        shift = value.bit_length() - self.precision_bits - 1
+        index = value if shift <= 0 else shift * self._sub_count + (value >> shift)
+        counts = self._counts
+        try:
+            counts[index] += 1
+        except IndexError:
+            counts.extend([0] * (index + 1 - len(counts)))
+            counts[index] += 1
+        if value > self.max:
+            self.max = value
+        if value < self.min or not self.count:
+            self.min = value
+        self.count += 1
+        self.total += value
+
+    def merge(self, other: 'LatencyHistogram'):
+        """合并另一个直方图(相同精度)"""
+        if other.count == 0:
+            return
+        counts = self._counts
+        if len(other._counts) > len(counts):
+            counts.extend([0] * (len(other._counts) - len(counts)))
+        for i, c in enumerate(other._counts):
+            if c:
+                counts[i] += c
+        self.min = other.min if self.count == 0 else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+
+    def percentile(self, p: float) -> int:
+        """分位数(纳秒，返回所在桶的上界，不超过最大值)"""
+        if self.count == 0:
+            return 0
+        target = max(1, int(round(p / 100.0 * self.count)))
+        seen = 0
+        for index, c in enumerate(self._counts):
+            seen += c
+            if seen >= target:
+                return min(self.max, self._lower_bound(index + 1) - 1)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def reset(self):
+        self._counts = [0] * (self._sub_count * 2)
+        self.count = self.total = self.min = self.max = 0
+
+    def summary(self, percentiles=DEFAULT_PERCENTILES) -> Dict[str, float]:
+        """统计摘要(毫秒)"""
+        result = {'count': self.count, 'mean_ms': self.mean / 1e6,
+                  'min_ms': self.min / 1e6, 'max_ms': self.max / 1e6}
+        for p in percentiles:
+            result[f'p{p:g}_ms'] = self.percentile(p) / 1e6
+        return result
+
+    def __repr__(self) -> str:
+        return (f"LatencyHistogram(count={self.count}, p50={self.percentile(50) / 1e6:.3f}ms, "
+                f"p99={self.percentile(99) / 1e6:.3f}ms, max={self.max / 1e6:.3f}ms)")
+
+
+class _Span:
+    """计时上下文管理器"""
+
+    __slots__ = ('_recorder', '_name', '_start')
+
+    def __init__(self, recorder: 'LatencyRecorder', name: str):
+        self._recorder = recorder
+        self._name = name
+
+    def __enter__(self):
+        self._start = _perf_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._recorder.record(self._name, _perf_ns() - self._start)
+        return False
+
+
+class LatencyRecorder:
+    """按区间名称记录延迟，每个线程各自持有直方图"""
+
+    def __init__(self, precision_bits: int = DEFAULT_PRECISION_BITS, enabled: bool = True):
+        """初始化记录器
+
+        Args:
+            precision_bits: 直方图子桶位数
+            enabled: 是否启用(关闭时记录调用直接返回)
+        """
+        self.precision_bits = precision_bits
+        self.enabled = enabled
+        self._local = threading.local()
+        self._all: List[Tuple[int, Dict[str, LatencyHistogram]]] = []  # (线程ID, 该线程的直方图)
+        self._register_lock = threading.Lock()
+        self._slow_ns: Optional[int] = None  # 超过该耗时时调用 _on_slow
+        self._on_slow: Optional[Callable[[str, int], None]] = None
+
+    def _histograms(self) -> Dict[str, LatencyHistogram]:
+        histograms = getattr(self._local, 'histograms', None)
+        if histograms is None:
+            histograms = self._local.histograms = {}
+            with self._register_lock:
+                self._all.append((threading.get_ident(), histograms))
+        return histograms
+
+    def record(self, name: str, elapsed_ns: int):
+        """记录一个区间耗时(纳秒)"""
+        if not self.enabled:
+            return
+        try:
+            histogram = self._local.histograms[name]
+        except (AttributeError, KeyError):
+            histogram = self._histograms()[name] = LatencyHistogram(self.precision_bits)
+        histogram.record(elapsed_ns)
+        if self._slow_ns is not None and elapsed_ns > self._slow_ns:
+            self._on_slow(name, elapsed_ns)
+
+    def record_since(self, name: str, start_ns: int):
+        """记录从 start_ns(time.perf_counter_ns 时间戳)到现在的耗时"""
+        self.record(name, _perf_ns() - start_ns)
+
+    def span(self, name: str) -> _Span:
+        """计时上下文管理器"""
+        return _Span(self, name)
+
+    def timed(self, name: Optional[str] = None):
+        """计时装饰器，默认以函数名作为区间名"""
+        def decorator(func):
+            metric = name or func.__qualname__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = _perf_ns()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(metric, _perf_ns() - start)
+            return wrapper
+        return decorator
+
+    def set_slow_threshold(self, threshold_ns: Optional[int], callback: Optional[Callable[[str, int], None]]):
+        """设置慢区间阈值，超过时在记录线程中调用 callback(区间名, 耗时纳秒)"""
+        self._on_slow = callback
+        self._slow_ns = threshold_ns if callback is not None else None
+
+    def merge(self, name: str, histogram: LatencyHistogram):
+        """并入外部直方图(如工作进程回传的统计)"""
+        histograms = self._histograms()
+        target = histograms.get(name)
+        if target is None:
+            target = histograms[name] = LatencyHistogram(self.precision_bits)
+        target.merge(histogram)
+
+    # ==================== 读取 ====================
+    def names(self) -> List[str]:
+        with self._register_lock:
+            per_thread = [h for _, h in self._all]
+        return sorted({name for histograms in per_thread for name in list(histograms)})
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        """合并各线程后的直方图(快照，读取期间其他线程的新记录可能部分计入)"""
+        merged = LatencyHistogram(self.precision_bits)
+        with self._register_lock:
+            per_thread = [h for _, h in self._all]
+        for histograms in per_thread:
+            histogram = histograms.get(name)
+            if histogram is not None:
+                merged.merge(histogram)
+        return merged
+
+    def summary(self, percentiles=DEFAULT_PERCENTILES) -> Dict[str, Dict[str, float]]:
+        """各区间的统计摘要(毫秒)"""
+        return {name: self.histogram(name).summary(percentiles) for name in self.names()}
+
+    def items(self) -> Iterator[Tuple[str, LatencyHistogram]]:
+        for name in self.names():
+            yield name, self.histogram(name)
+
+    def reset(self):
+        """清空所有线程的统计"""
+        with self._register_lock:
+            for _, histograms in self._all:
+                for histogram in list(histograms.values()):
+                    histogram.reset()
+
+
+_recorder: Optional[LatencyRecorder] = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder() -> LatencyRecorder:
+    """全局延迟记录器"""
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = LatencyRecorder()
+    return _recorder
@@ -0,0 +1,189 @@
+"""
+性能监控 - 热路径延迟阈值告警与进程CPU/内存采样
+
+对应配置文件的 performance 段:
+    enable_monitoring        是否启用
+    response_time_threshold  延迟告警阈值(毫秒)，作用于所有计时区间
+    cpu_threshold            进程CPU使用率告警阈值(%)
+    memory_threshold         系统内存使用率告警阈值(%)
+
+告警以与 error_manager 错误信息相同的形式(code / message / suggestion)
+传给注册的回调，因此可以直接复用 main.setup_error_handling 中的错误回调。
+同一指标的告警按 alert_interval 限频，避免慢请求风暴刷屏。
+"""
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from .latency import LatencyRecorder, get_recorder
+
+DEFAULT_SAMPLE_INTERVAL = 5.0  # 资源采样间隔(秒)
+DEFAULT_ALERT_INTERVAL = 60.0  # 同一指标两次告警的最小间隔(秒)
+
+
+class PerformanceAlert(NamedTuple):
+    """性能告警(字段与错误管理器的错误信息一致)"""
+    code: str  # SLOW_RESPONSE / HIGH_CPU / HIGH_MEMORY
+    message: str
+    suggestion: str
+    metric: str  # 指标名称(计时区间名或 cpu / memory)
+    value: float  # 观测值(毫秒或百分比)
+    threshold: float
+
+
+class ResourceSample(NamedTuple):
+    """一次资源采样"""
+    ts: float
+    cpu_percent: float  # 本进程CPU使用率(%)
+    rss_bytes: int  # 本进程常驻内存
+    memory_percent: float  # 系统内存使用率(%)
+
+
+class PerformanceMonitor:
+    """性能监控器
+
+    使用示例:
+        monitor = PerformanceMonitor.from_config(config_manager.config.performance)
+        monitor.register_callback(error_callback)
+        monitor.start()
+        ...
+        monitor.stop()
+    """
+
+    def __init__(self, recorder: Optional[LatencyRecorder] = None, response_time_threshold: float = 100.0,
+                 cpu_threshold: float = 80.0, memory_threshold: float = 80.0,
+                 sample_interval: float = DEFAULT_SAMPLE_INTERVAL,
+                 alert_interval: float = DEFAULT_ALERT_INTERVAL):
+        """初始化监控器
+
+        Args:
+            recorder: 延迟记录器，默认为全局记录器
+            response_time_threshold: 延迟告警阈值(毫秒)
+            cpu_threshold: CPU使用率告警阈值(%)
+            memory_threshold: 内存使用率告警阈值(%)
+            sample_interval: 资源采样间隔(秒)
+            alert_interval: 同一指标的告警最小间隔(秒)
+        """
+        self.recorder = recorder or get_recorder()
+        self.response_time_threshold = response_time_threshold
+        self.cpu_threshold = cpu_threshold
+        self.memory_threshold = memory_threshold
+        self.sample_interval = sample_interval
+        self.alert_interval = alert_interval
+
+        self._threshold_ns = int(response_time_threshold * 1e6)
+        self._callbacks: List[Callable[[PerformanceAlert], None]] = []
+        self._last_alert: Dict[str, float] = {}
+        self._alert_lock = threading.Lock()
+        self.slow_counts: Dict[str, int] = {}  # 各区间超过阈值的次数
+        self.samples: List[ResourceSample] = []
+        self.max_samples = 720  # 保留最近的采样数量
+
+        self._process = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.recorder.set_slow_threshold(self._threshold_ns, self._on_latency)
+
+    @classmethod
+    def from_config(cls, performance_config, recorder: Optional[LatencyRecorder] = None,
+                    **kwargs) -> 'PerformanceMonitor':
+        """根据 PerformanceConfig 创建监控器(enable_monitoring 为 False 时关闭计时)"""
+        recorder = recorder or get_recorder()
+        recorder.enabled = performance_config.enable_monitoring
+        params = dict(
+            response_time_threshold=performance_config.response_time_threshold,
+            cpu_threshold=performance_config.cpu_threshold,
+            memory_threshold=performance_config.memory_threshold,
+            sample_interval=performance_config.sample_interval,
+        )
+        params.update(kwargs)
+        return cls(recorder, **params)
+
+    def register_callback(self, callback: Callable[[PerformanceAlert], None]):
+        """注册告警回调(与 error_manager.register_callback 的回调兼容)"""
+        self._callbacks.append(callback)
+
+    # ==================== 延迟阈值 ====================
+    def _on_latency(self, name: str, elapsed_ns: int):
+        if elapsed_ns <= self._threshold_ns:
+            return
+        self.slow_counts[name] = self.slow_counts.get(name, 0) + 1
+        elapsed_ms = elapsed_ns / 1e6
+        self._alert(PerformanceAlert(
+            'SLOW_RESPONSE',
+            f"{name} 耗时 {elapsed_ms:.1f}ms 超过阈值 {self.response_time_threshold:g}ms "
+            f"(累计 {self.slow_counts[name]} 次)",
+            '建议: 1) 检查行情/券商连接延迟 2) 使用 --profile 定位热点 3) 适当调整 response_time_threshold',
+            name, elapsed_ms, self.response_time_threshold))
+
+    def _alert(self, alert: PerformanceAlert):
+        now = time.monotonic()
+        with self._alert_lock:
+            last = self._last_alert.get(alert.metric)
+            if last is not None and now - last < self.alert_interval:
+                return
+            self._last_alert[alert.metric] = now
+        for callback in list(self._callbacks):
+            try:
+                callback(alert)
+            except Exception:
+                pass
+
+    # ==================== 资源采样 ====================
+    def start(self) -> bool:
+        """启动资源采样线程(未安装 psutil 时只做延迟告警)"""
+        if self._thread is not None:
+            return True
+        try:
+            import psutil
+        except ImportError:
+            return False
+        self._process = psutil.Process()
+        self._process.cpu_percent(None)  # 初始化CPU计数基准
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='PerformanceMonitor', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """停止资源采样线程"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.sample_interval + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.sample_interval):
+            self.sample()
+
+    def sample(self) -> Optional[ResourceSample]:
+        """采样一次CPU与内存并检查阈值"""
+        if self._process is None:
+            return None
+        import psutil
+        sample = ResourceSample(time.time(), self._process.cpu_percent(None),
+                                self._process.memory_info().rss, psutil.virtual_memory().percent)
+        self.samples.append(sample)
+        if len(self.samples) > self.max_samples:
+            del self.samples[:len(self.samples) - self.max_samples]
+
+        if sample.cpu_percent > self.cpu_threshold:
+            self._alert(PerformanceAlert(
+                'HIGH_CPU', f"CPU使用率 {sample.cpu_percent:.0f}% 超过阈值 {self.cpu_threshold:g}%",
+                '建议: 1) 减少订阅品种或降低行情频率 2) 检查策略计算热点',
+                'cpu', sample.cpu_percent, self.cpu_threshold))
+        if sample.memory_percent > self.memory_threshold:
+            self._alert(PerformanceAlert(
+                'HIGH_MEMORY',
+                f"内存使用率 {sample.memory_percent:.0f}% 超过阈值 {self.memory_threshold:g}% "
+                f"(进程 {sample.rss_bytes / 1024 / 1024:.0f}MB)",
+                '建议: 1) 调低 data_management 中的缓存上限 2) 检查历史记录是否持续增长',
+                'memory', sample.memory_percent, self.memory_threshold))
+        return sample
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """延迟统计摘要(毫秒)及超阈值次数"""
+        summary = self.recorder.summary()
+        for name, stats in summary.items():
+            stats['slow'] = self.slow_counts.get(name, 0)
+        return summary
@@ -0,0 +1,40 @@
+"""
+性能分析 - 用 cProfile 运行一次回测并导出统计
+
+导出的 .prof 文件为标准 pstats 格式，可直接用于火焰图/调用图工具:
+    snakeviz profile.prof
+    flameprof profile.prof > profile.svg
+    gprof2dot -f pstats profile.prof | dot -Tsvg -o profile.svg
+"""
+import cProfile
+import io
+import pstats
+from pathlib import Path
+from typing import Any, Callable, Tuple, Union
+
+DEFAULT_PROFILE_PATH = 'profile.prof'  # 默认导出路径
+DEFAULT_TOP_FUNCTIONS = 25  # 摘要中列出的函数数量
+
+
+def profile_call(func: Callable, path: Union[str, Path] = DEFAULT_PROFILE_PATH, *args,
+                 top: int = DEFAULT_TOP_FUNCTIONS, **kwargs) -> Tuple[Any, str]:
+    """在 cProfile 下执行函数，导出 pstats 文件
+
+    Args:
+        func: 被分析的函数
+        path: .prof 导出路径
+        top: 摘要中按累计耗时列出的函数数量
+
+    Returns:
+        (函数返回值, 累计耗时排名前 top 的文本摘要)
+    """
+    profiler = cProfile.Profile()
+    try:
+        result = profiler.runcall(func, *args, **kwargs)
+    finally:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(path))
+    buffer = io.StringIO()
+    pstats.Stats(profiler, stream=buffer).strip_dirs().sort_stats('cumulative').print_stats(top)
+    return result, buffer.getvalue()
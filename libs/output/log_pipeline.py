@@ -0,0 +1,540 @@
+"""
+日志管道 - 队列化、批量写出、不阻塞调用方的日志与输出
+
+生产者(下单线程、行情回调、错误回调)只把结构化记录追加到队列
+(collections.deque.append 为原子操作，无需加锁)，不做格式化和IO；
+后台写线程每 flush_interval 秒批量取出记录，格式化后按日志流写入各自的
+滚动文件和控制台，每批每个输出只调用一次 write/flush。
+
+- app / trade / error 三个日志流各自独立的文件(logs/app.log 等)，
+  ERROR 及以上级别的记录同时写入 error 流
+- 级别未启用的记录在调用处直接返回；消息按 msg % args 延迟到写线程格式化
+  (因此 args 中的可变对象应在记录后保持不变)
+- 队列超过 max_queue_size 时丢弃新记录并计数，绝不阻塞下单路径；ERROR 及以上的
+  日志和 DeferredOutput 的 error/critical 调用不丢弃，改为在调用线程同步写出。
+  丢弃数由写线程以 WARNING 写入日志，也可从 dropped 读取
+- DeferredOutput 把 output_manager 的调用(彩色、表情格式化与打印)转到写线程执行
+
+使用示例:
+    configure(config_manager.config.logging)  # 启动时按 logging 配置初始化
+    trade_log = get_trade_logger()
+    trade_log.info("成交 %s %d股 @ %.2f", symbol, volume, price)
+
+    output = DeferredOutput(output_manager)
+    output.error("[NETWORK] 连接中断")   # 立即返回
+"""
+import atexit
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+LOG_STREAMS = ('app', 'trade', 'error')  # 日志流
+DEFAULT_LOG_DIR = 'logs'  # 默认日志目录
+DEFAULT_MAX_FILE_SIZE = 10 * 1024 * 1024  # 单个日志文件最大字节数
+DEFAULT_BACKUP_COUNT = 5  # 滚动备份数量
+DEFAULT_FLUSH_INTERVAL = 0.2  # 写线程批量写出间隔(秒)
+DEFAULT_MAX_QUEUE_SIZE = 100000  # 队列中最多积压的记录数
+
+# 队列记录类型
+_RECORD_LOG = 0  # (类型, 时间, 级别, 日志流, 名称, 消息, 参数, 附加字段, 异常信息, 线程)
+_RECORD_CALL = 1  # (类型, 函数, 位置参数, 关键字参数)
+_RECORD_FLUSH = 2  # (类型, Event)
+
+# 队列已满时仍同步执行的 DeferredOutput 方法(错误信息不丢弃)
+_URGENT_CALLS = frozenset({'error', 'critical', 'exception'})
+
+# 热路径使用的局部别名
+_DEBUG, _INFO, _WARNING, _ERROR = logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR
+_time = time.time
+_get_ident = threading.get_ident
+
+
+def parse_level(level: Union[int, str]) -> int:
+    """将级别名称(DEBUG/INFO/...)转换为 logging 数值级别"""
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).upper())
+    if not isinstance(value, int):
+        raise ValueError(f"无效的日志级别: {level}")
+    return value
+
+
+# ==================== 输出 ====================
+class RotatingFileSink:
+    """按大小滚动的日志文件(仅由写线程访问，无需加锁)"""
+
+    def __init__(self, path: Union[str, Path], max_bytes: int = DEFAULT_MAX_FILE_SIZE,
+                 backup_count: int = DEFAULT_BACKUP_COUNT):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'ab')
+        self._size = self._file.tell()
+
+    def write(self, text: str):
+        data = text.encode('utf-8')
+        if self.max_bytes > 0 and self._size > 0 and self._size + len(data) > self.max_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._size += len(data)
+
+    def _rotate(self):
+        self._file.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                source = self.path.with_name(f"{self.path.name}.{i}")
+                if source.exists():
+                    os.replace(source, self.path.with_name(f"{self.path.name}.{i + 1}"))
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        self._file = open(self.path, 'wb')
+        self._size = 0
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ConsoleSink:
+    """控制台输出"""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def write(self, text: str):
+        (self.stream or sys.stdout).write(text)
+
+    def flush(self):
+        (self.stream or sys.stdout).flush()
+
+    def close(self):
+        pass
+
+
+# ==================== 生产者接口 ====================
+class PipelineLogger:
+    """写入日志管道的轻量日志器(接口与 logging.Logger 的常用方法一致)"""
+
+    __slots__ = ('name', 'stream', 'level', '_pipeline')
+
+    def __init__(self, pipeline: 'LogPipeline', stream: str, name: Optional[str] = None,
+                 level: Optional[int] = None):
+        self._pipeline = pipeline
+        self.stream = stream
+        self.name = name or stream
+        self.level = pipeline.level if level is None else parse_level(level)
+
+    def isEnabledFor(self, level: int) -> bool:
+        return level >= self.level
+
+    def log(self, level: int, msg: Any, *args, exc_info=None, **fields):
+        """记录一条日志，fields 为附加的结构化字段"""
+        if level < self.level:
+            return
+        if exc_info is True:
+            exc_info = sys.exc_info()
+        self._pipeline.enqueue((_RECORD_LOG, _time(), level, self.stream, self.name, msg, args,
+                                fields, exc_info, _get_ident()))
+
+    def debug(self, msg: Any, *args, **fields):
+        if self.level <= _DEBUG:
+            self._pipeline.enqueue((_RECORD_LOG, _time(), _DEBUG, self.stream, self.name, msg, args,
+                                    fields, None, _get_ident()))
+
+    def info(self, msg: Any, *args, **fields):
+        if self.level <= _INFO:
+            self._pipeline.enqueue((_RECORD_LOG, _time(), _INFO, self.stream, self.name, msg, args,
+                                    fields, None, _get_ident()))
+
+    def warning(self, msg: Any, *args, **fields):
+        if self.level <= _WARNING:
+            self._pipeline.enqueue((_RECORD_LOG, _time(), _WARNING, self.stream, self.name, msg, args,
+                                    fields, None, _get_ident()))
+
+    def error(self, msg: Any, *args, **fields):
+        if self.level <= _ERROR:
+            self._pipeline.enqueue((_RECORD_LOG, _time(), _ERROR, self.stream, self.name, msg, args,
+                                    fields, None, _get_ident()))
+
+    def critical(self, msg: Any, *args, **fields):
+        self.log(logging.CRITICAL, msg, *args, **fields)
+
+    def exception(self, msg: Any, *args, **fields):
+        """记录错误及当前异常堆栈(堆栈在写线程格式化)"""
+        self.log(logging.ERROR, msg, *args, exc_info=True, **fields)
+
+    def __repr__(self) -> str:
+        return f"PipelineLogger(name={self.name!r}, stream={self.stream!r}, level={logging.getLevelName(self.level)})"
+
+
+class PipelineHandler(logging.Handler):
+    """标准库 logging 的桥接处理器: 记录直接入队，消息在写线程格式化"""
+
+    def __init__(self, pipeline: 'LogPipeline', stream: str = 'app', level: int = logging.NOTSET):
+        super().__init__(level)
+        self.pipeline = pipeline
+        self.stream = stream
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # 跳过 Handler.handle 中的锁，入队本身是线程安全的
+        if self.filter(record):
+            self.emit(record)
+            return True
+        return False
+
+    def emit(self, record: logging.LogRecord):
+        self.pipeline.enqueue((_RECORD_LOG, record.created, record.levelno, self.stream, record.name,
+                               record.msg, record.args, None, record.exc_info, record.thread))
+
+
+class DeferredOutput:
+    """output_manager 的非阻塞代理: 方法调用入队，由写线程按顺序执行
+
+    原输出的彩色/表情格式化和打印全部在写线程完成，调用方立即返回；
+    队列已满时 error/critical 调用在当前线程同步执行，其余调用丢弃并计数。
+    """
+
+    def __init__(self, target: Any, pipeline: Optional['LogPipeline'] = None):
+        """初始化代理
+
+        Args:
+            target: 被代理的输出对象(如 output_manager)
+            pipeline: 使用的日志管道，默认为全局管道
+        """
+        self._target = target
+        self._pipeline = pipeline
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        urgent = name in _URGENT_CALLS
+
+        def deferred(*args, **kwargs):
+            (self._pipeline or get_pipeline()).submit_call(attr, args, kwargs, urgent)
+
+        self.__dict__[name] = deferred
+        return deferred
+
+
+# ==================== 日志管道 ====================
+class LogPipeline:
+    """日志管道: 无锁入队 + 后台线程批量格式化、滚动和写出"""
+
+    def __init__(self, log_dir: Union[str, Path] = DEFAULT_LOG_DIR, level: Union[int, str] = 'INFO',
+                 max_file_size: int = DEFAULT_MAX_FILE_SIZE, backup_count: int = DEFAULT_BACKUP_COUNT,
+                 console_output: bool = True, file_output: bool = True,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE, console_stream=None):
+        """初始化日志管道
+
+        Args:
+            log_dir: 日志目录
+            level: 默认日志级别
+            max_file_size: 单个日志文件最大字节数
+            backup_count: 滚动备份数量
+            console_output: 是否输出到控制台
+            file_output: 是否输出到文件
+            flush_interval: 批量写出间隔(秒)
+            max_queue_size: 队列最多积压的记录数，超过后丢弃新记录
+            console_stream: 控制台输出流，默认 sys.stdout
+        """
+        self._apply_options(log_dir, level, max_file_size, backup_count, console_output, file_output,
+                            flush_interval, max_queue_size, console_stream)
+
+        self._queue: Deque[tuple] = deque()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._loggers: Dict[Tuple[str, str], PipelineLogger] = {}
+        self._file_sinks: Dict[str, RotatingFileSink] = {}
+        self._time_cache: Tuple[int, str] = (-1, '')
+
+        self.dropped = 0  # 因队列积压而丢弃的记录数
+        self.sync_writes = 0  # 队列积压时同步写出的错误记录与调用数
+        self.written = 0  # 已写出的日志记录数
+        self._reported_dropped = 0  # 已写入日志的丢弃数
+        self._sync_lock = threading.Lock()
+
+    def _apply_options(self, log_dir, level, max_file_size, backup_count, console_output, file_output,
+                       flush_interval, max_queue_size, console_stream):
+        self.log_dir = Path(log_dir)
+        self.level = parse_level(level)
+        self.max_file_size = max_file_size
+        self.backup_count = backup_count
+        self.console_output = console_output
+        self.file_output = file_output
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self._console = ConsoleSink(console_stream) if console_output else None
+
+    def reconfigure(self, log_dir: Union[str, Path] = DEFAULT_LOG_DIR, level: Union[int, str] = 'INFO',
+                    max_file_size: int = DEFAULT_MAX_FILE_SIZE, backup_count: int = DEFAULT_BACKUP_COUNT,
+                    console_output: bool = True, file_output: bool = True,
+                    flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                    max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE, console_stream=None):
+        """在写线程中切换配置(参数同 __init__)，已创建的日志器沿用并更新级别"""
+        def apply():
+            self._close_sinks()
+            self._apply_options(log_dir, level, max_file_size, backup_count, console_output, file_output,
+                                flush_interval, max_queue_size, console_stream)
+            for logger in self._loggers.values():
+                logger.level = self.level
+
+        if self._thread is None:
+            apply()
+        else:
+            self.submit_call(apply)
+            self.flush()
+
+    @staticmethod
+    def _config_options(logging_config) -> Dict[str, Any]:
+        return dict(
+            log_dir=logging_config.log_dir,
+            level=logging_config.log_level,
+            max_file_size=logging_config.max_file_size,
+            backup_count=logging_config.backup_count,
+            console_output=logging_config.console_output,
+            file_output=logging_config.file_output,
+            flush_interval=logging_config.flush_interval,
+            max_queue_size=logging_config.max_queue_size,
+        )
+
+    @classmethod
+    def from_config(cls, logging_config, **kwargs) -> 'LogPipeline':
+        """根据 LoggingConfig 创建日志管道"""
+        params = cls._config_options(logging_config)
+        params.update(kwargs)
+        return cls(**params)
+
+    # ==================== 生产者 ====================
+    def enqueue(self, record: tuple) -> bool:
+        """记录入队(任意线程调用，不阻塞)
+
+        队列已满时 ERROR 及以上的日志在当前线程同步写出，其余记录丢弃并计数。
+
+        Returns:
+            bool: 是否已入队或已写出，False表示被丢弃
+        """
+        queue = self._queue
+        if len(queue) < self.max_queue_size:
+            queue.append(record)
+            if self._thread is None:
+                self.start()
+            return True
+        if record[0] == _RECORD_LOG and record[2] >= _ERROR:
+            self._write_sync(record)
+            return True
+        self.dropped += 1
+        return False
+
+    def submit_call(self, func: Callable, args: tuple = (), kwargs: Optional[dict] = None,
+                    urgent: bool = False):
+        """将一次函数调用交给写线程执行，队列已满时 urgent 的调用在当前线程同步执行"""
+        kwargs = kwargs or {}
+        if urgent and len(self._queue) >= self.max_queue_size:
+            with self._sync_lock:
+                self.sync_writes += 1
+                func(*args, **kwargs)
+            return
+        self.enqueue((_RECORD_CALL, func, args, kwargs))
+
+    def _write_sync(self, record: tuple):
+        """队列积压时同步写出一条错误日志(追加到 error 流文件，并输出到标准错误)"""
+        text = self._format(record)
+        with self._sync_lock:
+            self.sync_writes += 1
+            if self.file_output:
+                self.log_dir.mkdir(parents=True, exist_ok=True)
+                with open(self.log_dir / 'error.log', 'ab') as f:
+                    f.write(text.encode('utf-8'))
+            if self.console_output:
+                sys.stderr.write(text)
+                sys.stderr.flush()
+
+    def get_logger(self, stream: str = 'app', name: Optional[str] = None,
+                   level: Optional[Union[int, str]] = None) -> PipelineLogger:
+        """获取写入指定日志流的日志器(同名复用)"""
+        if stream not in LOG_STREAMS:
+            raise ValueError(f"未知日志流: {stream}，可选: {LOG_STREAMS}")
+        key = (stream, name or stream)
+        logger = self._loggers.get(key)
+        if logger is None:
+            logger = self._loggers[key] = PipelineLogger(self, stream, name, level)
+        elif level is not None:
+            logger.level = parse_level(level)
+        return logger
+
+    def handler(self, stream: str = 'app') -> PipelineHandler:
+        """创建桥接标准库 logging 的处理器"""
+        return PipelineHandler(self, stream)
+
+    # ==================== 生命周期 ====================
+    def start(self):
+        """启动写线程(首次入队时自动调用)"""
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='LogPipeline', daemon=True)
+            self._thread.start()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """等待此前入队的记录全部写出"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.append((_RECORD_FLUSH, done))
+        self._wakeup.set()
+        return done.wait(timeout)
+
+    def stop(self, timeout: float = 5.0):
+        """写出剩余记录并停止写线程"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        thread.join(timeout)
+        self._thread = None
+        self._close_sinks()
+
+    def _close_sinks(self):
+        for sink in self._file_sinks.values():
+            sink.close()
+        self._file_sinks.clear()
+
+    # ==================== 写线程 ====================
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        queue = self._queue
+        if not queue:
+            return
+        lines: Dict[str, List[str]] = {}
+        console: List[str] = []
+        flushed: List[threading.Event] = []
+        written = 0
+        dropped = self.dropped
+        if dropped > self._reported_dropped:
+            text = self._format((_RECORD_LOG, _time(), _WARNING, 'app', 'LogPipeline',
+                                 "日志队列积压，累计丢弃 %d 条记录", (dropped,), None, None, 0))
+            lines.setdefault('app', []).append(text)
+            if self._console is not None:
+                console.append(text)
+            self._reported_dropped = dropped
+        for _ in range(len(queue)):
+            record = queue.popleft()
+            kind = record[0]
+            if kind == _RECORD_LOG:
+                text = self._format(record)
+                stream = record[3]
+                lines.setdefault(stream, []).append(text)
+                if record[2] >= logging.ERROR and stream != 'error':
+                    lines.setdefault('error', []).append(text)
+                if self._console is not None:
+                    console.append(text)
+                written += 1
+            elif kind == _RECORD_CALL:
+                try:
+                    record[1](*record[2], **record[3])
+                except Exception:
+                    traceback.print_exc()
+            else:
+                flushed.append(record[1])
+
+        if self.file_output:
+            for stream, texts in lines.items():
+                sink = self._file_sinks.get(stream)
+                if sink is None:
+                    sink = self._file_sinks[stream] = RotatingFileSink(
+                        self.log_dir / f"{stream}.log", self.max_file_size, self.backup_count)
+                sink.write(''.join(texts))
+                sink.flush()
+        if console:
+            self._console.write(''.join(console))
+            self._console.flush()
+        self.written += written
+        for event in flushed:
+            event.set()
+
+    def _format(self, record: tuple) -> str:
+        _, created, level, _, name, msg, args, fields, exc_info, thread = record
+        try:
+            message = str(msg) % args if args else str(msg)
+        except Exception as e:
+            message = f"{msg!r} % {args!r} (格式化失败: {e})"
+        if fields:
+            message += ' ' + ' '.join(f"{k}={v}" for k, v in fields.items())
+        if exc_info:
+            message += '\n' + ''.join(traceback.format_exception(*exc_info)).rstrip()
+
+        second = int(created)
+        if self._time_cache[0] != second:
+            self._time_cache = (second, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second)))
+        millis = int((created - second) * 1000)
+        return f"{self._time_cache[1]}.{millis:03d} {logging.getLevelName(level):<8} [{name}] {message}\n"
+
+    def __repr__(self) -> str:
+        return (f"LogPipeline(level={logging.getLevelName(self.level)}, queued={len(self._queue)}, "
+                f"written={self.written}, dropped={self.dropped}, sync_writes={self.sync_writes})")
+
+
+# ==================== 全局管道 ====================
+_pipeline: Optional[LogPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline() -> LogPipeline:
+    """获取全局日志管道(未配置时使用默认参数创建)"""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = LogPipeline()
+    return _pipeline
+
+
+def configure(logging_config=None, **kwargs) -> LogPipeline:
+    """按 LoggingConfig 配置全局日志管道(已获取的日志器继续有效)"""
+    params = LogPipeline._config_options(logging_config) if logging_config is not None else {}
+    params.update(kwargs)
+    pipeline = get_pipeline()
+    pipeline.reconfigure(**params)
+    return pipeline
+
+
+def get_app_logger(name: Optional[str] = None) -> PipelineLogger:
+    """应用日志"""
+    return get_pipeline().get_logger('app', name)
+
+
+def get_trade_logger(name: Optional[str] = None) -> PipelineLogger:
+    """交易日志"""
+    return get_pipeline().get_logger('trade', name)
+
+
+def get_error_logger(name: Optional[str] = None) -> PipelineLogger:
+    """错误日志"""
+    return get_pipeline().get_logger('error', name)
+
+
+@atexit.register
+def _shutdown():
+    if _pipeline is not None:
+        _pipeline.stop()
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+风控模块
+包含基于 RiskConfig 的向量化事前风控引擎
+"""
+
+from .risk_engine import (
+    RiskEngine, RiskCheckResult, RiskRejectCode, RISK_REJECT_REASONS,
+    round_price, price_limits, direction_signs
+)
+
+__all__ = [
+    'RiskEngine', 'RiskCheckResult', 'RiskRejectCode', 'RISK_REJECT_REASONS',
+    'round_price', 'price_limits', 'direction_signs',
+]
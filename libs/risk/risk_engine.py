@@ -0,0 +1,482 @@
+"""
+向量化事前风控引擎 - 基于 RiskConfig 批量检查候选订单
+
+增量维护账户状态(现金、逐股持仓市值、当日盈亏、权益高水位)，
+一次调用对一整批候选订单完成全部风控检查，返回逐单的通过/拒绝结果和
+OrderError 形式的拒绝原因，适用于调仓时成百上千笔订单的集中下单。
+
+检查顺序(命中第一个失败项即为拒绝原因):
+    1. 数量按 DEFAULT_VOLUME_UNIT 取整(卖出清仓允许零股)，不足一手拒绝
+    2. 价格有效性与涨跌停价格带(按板块 LIMIT_UP_RATIO)
+    3. 卖出数量不超过持仓
+    4. 买入: 当日亏损 max_daily_loss、回撤 max_drawdown 触发后暂停开仓
+    5. 买入: 单笔风险 position_risk_pct(按 stop_loss 估算止损亏损)
+    6. 买入: 单只股票持仓 max_single_position
+    7. 买入: 持仓股票数 max_positions_count
+    8. 买入: 总持仓 max_total_positions
+    9. 买入: 可用资金
+
+批内的累计类检查(6~9)按订单顺序累计: 前面订单的买入金额计入后面订单的额度，
+一旦累计超限，其后的同类订单均被拒绝(偏保守，保证结果与订单顺序确定相关)。
+卖出回笼的资金不计入同批买单的可用资金。
+"""
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from libs.config.consts import (
+    DEFAULT_PRICE_PRECISION, DEFAULT_VOLUME_UNIT, OrderError, TradeDirection,
+    get_price_limit_ratio,
+)
+
+DEFAULT_SYMBOL_CAPACITY = 256  # 初始股票槽位数量(不足时自动翻倍)
+
+
+class RiskRejectCode(IntEnum):
+    """风控拒绝代码(0 表示通过)"""
+    OK = 0
+    LOT_SIZE = 1  # 不足一手
+    INVALID_PRICE = 2  # 价格无效
+    PRICE_BAND = 3  # 超出涨跌停
+    SELL_EXCEEDS_POSITION = 4  # 卖出超过持仓
+    DAILY_LOSS = 5  # 当日亏损超限
+    DRAWDOWN = 6  # 回撤超限
+    POSITION_RISK = 7  # 单笔风险超限
+    SINGLE_POSITION = 8  # 单只股票持仓超限
+    POSITIONS_COUNT = 9  # 持仓股票数超限
+    TOTAL_POSITIONS = 10  # 总持仓超限
+    INSUFFICIENT_CASH = 11  # 资金不足
+
+
+# 拒绝代码 -> (OrderError, 说明)
+RISK_REJECT_REASONS = {
+    RiskRejectCode.OK: (None, ''),
+    RiskRejectCode.LOT_SIZE: (OrderError.VOLUME_LIMIT, f'委托数量不足一手({DEFAULT_VOLUME_UNIT}股)'),
+    RiskRejectCode.INVALID_PRICE: (OrderError.PRICE_LIMIT, '委托价格无效'),
+    RiskRejectCode.PRICE_BAND: (OrderError.PRICE_LIMIT, '委托价格超出涨跌停范围'),
+    RiskRejectCode.SELL_EXCEEDS_POSITION: (OrderError.VOLUME_LIMIT, '卖出数量超过持仓'),
+    RiskRejectCode.DAILY_LOSS: (OrderError.ACCOUNT, '当日亏损超过 max_daily_loss，暂停开仓'),
+    RiskRejectCode.DRAWDOWN: (OrderError.ACCOUNT, '回撤超过 max_drawdown，暂停开仓'),
+    RiskRejectCode.POSITION_RISK: (OrderError.VOLUME_LIMIT, '单笔风险超过 position_risk_pct'),
+    RiskRejectCode.SINGLE_POSITION: (OrderError.VOLUME_LIMIT, '单只股票持仓超过 max_single_position'),
+    RiskRejectCode.POSITIONS_COUNT: (OrderError.VOLUME_LIMIT, '持仓股票数超过 max_positions_count'),
+    RiskRejectCode.TOTAL_POSITIONS: (OrderError.VOLUME_LIMIT, '总持仓超过 max_total_positions'),
+    RiskRejectCode.INSUFFICIENT_CASH: (OrderError.INSUFFICIENT_FUNDS, '可用资金不足'),
+}
+
+_PRICE_SCALE = 10 ** DEFAULT_PRICE_PRECISION
+
+
+def round_price(prices: np.ndarray) -> np.ndarray:
+    """按 DEFAULT_PRICE_PRECISION 四舍五入价格(交易所规则为四舍五入，而非银行家舍入)"""
+    return np.floor(np.asarray(prices, dtype=np.float64) * _PRICE_SCALE + 0.5 + 1e-9) / _PRICE_SCALE
+
+
+def price_limits(prev_close: np.ndarray, ratio: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """根据昨收价和涨跌幅计算跌停价、涨停价"""
+    prev_close = np.asarray(prev_close, dtype=np.float64)
+    return round_price(prev_close * (1.0 - ratio)), round_price(prev_close * (1.0 + ratio))
+
+
+def direction_signs(directions) -> np.ndarray:
+    """将交易方向(TradeDirection / 'BUY'/'SELL' / ±1)转换为 +1/-1 数组"""
+    if isinstance(directions, np.ndarray) and directions.dtype.kind in 'if':
+        return np.sign(directions).astype(np.int8)
+    signs = np.empty(len(directions), dtype=np.int8)
+    for i, direction in enumerate(directions):
+        if isinstance(direction, TradeDirection):
+            direction = direction.value
+        if direction == 'BUY' or direction == 1:
+            signs[i] = 1
+        elif direction == 'SELL' or direction == -1:
+            signs[i] = -1
+        else:
+            raise ValueError(f"无效的交易方向: {direction}")
+    return signs
+
+
+class RiskCheckResult:
+    """一批订单的风控检查结果，各数组与输入订单一一对应"""
+
+    __slots__ = ('symbols', 'accepted', 'volumes', 'codes')
+
+    def __init__(self, symbols: List[str], accepted: np.ndarray, volumes: np.ndarray, codes: np.ndarray):
+        self.symbols = symbols
+        self.accepted = accepted  # 是否通过
+        self.volumes = volumes  # 取整后的委托数量
+        self.codes = codes  # RiskRejectCode 数值
+
+    @property
+    def all_accepted(self) -> bool:
+        """是否全部通过"""
+        return bool(self.accepted.all())
+
+    def reason(self, index: int) -> Optional[OrderError]:
+        """第 index 笔订单的拒绝原因(通过时为None)"""
+        return RISK_REJECT_REASONS[RiskRejectCode(int(self.codes[index]))][0]
+
+    def message(self, index: int) -> str:
+        """第 index 笔订单的拒绝说明"""
+        return RISK_REJECT_REASONS[RiskRejectCode(int(self.codes[index]))][1]
+
+    def rejected(self) -> List[Tuple[int, str, OrderError, str]]:
+        """被拒绝的订单列表: (序号, 股票代码, 错误类型, 说明)"""
+        result = []
+        for i in np.flatnonzero(~self.accepted):
+            error_type, message = RISK_REJECT_REASONS[RiskRejectCode(int(self.codes[i]))]
+            result.append((int(i), self.symbols[i], error_type, message))
+        return result
+
+    def __len__(self) -> int:
+        return len(self.accepted)
+
+    def __repr__(self) -> str:
+        return f"RiskCheckResult(orders={len(self)}, accepted={int(self.accepted.sum())})"
+
+
+class RiskEngine:
+    """向量化事前风控引擎
+
+    使用示例:
+        risk = RiskEngine.from_config(config_manager, initial_equity=1000000)  # 跟随配置热更新
+        risk.set_prev_close(['600000.SH', '300750.SZ'], [10.0, 180.0])
+        result = risk.check(symbols, directions, volumes, prices)
+        for i, symbol, error_type, message in result.rejected():
+            ...
+        risk.on_fill('600000.SH', TradeDirection.BUY, 1000, 10.02)
+    """
+
+    def __init__(self, risk_config, initial_equity: float, volume_unit: int = DEFAULT_VOLUME_UNIT,
+                 capacity: int = DEFAULT_SYMBOL_CAPACITY, config_manager=None):
+        """初始化风控引擎
+
+        Args:
+            risk_config: RiskConfig 风险管理配置
+            initial_equity: 初始权益(现金)
+            volume_unit: 交易单位(股/手)
+            capacity: 初始股票槽位数量
+            config_manager: 配置管理器，提供时每次检查读取其最新快照的 risk(热更新即时生效)
+        """
+        self._config = risk_config
+        self._config_manager = config_manager
+        self.volume_unit = int(volume_unit)
+
+        self._slots: Dict[str, int] = {}  # 股票代码 -> 槽位
+        self._symbols: List[str] = []
+        capacity = max(1, int(capacity))
+        self._position = np.zeros(capacity, dtype=np.int64)  # 持仓数量(股)
+        self._price = np.zeros(capacity)  # 最新价
+        self._limit_down = np.full(capacity, -np.inf)  # 跌停价
+        self._limit_up = np.full(capacity, np.inf)  # 涨停价
+
+        self.cash = float(initial_equity)
+        self._market_value = 0.0
+        self._day_start_equity = float(initial_equity)  # 当日初始权益
+        self._high_water_mark = float(initial_equity)  # 权益高水位
+
+    @classmethod
+    def from_config(cls, config_manager, initial_equity: Optional[float] = None, **kwargs) -> 'RiskEngine':
+        """根据 ConfigManager 当前模式创建风控引擎(实盘模式需传入账户权益)"""
+        if initial_equity is None:
+            initial_equity = getattr(config_manager.current_config, 'initial_cash', None)
+            if initial_equity is None:
+                raise ValueError("实盘模式需要提供 initial_equity (账户总资产)")
+        return cls(config_manager.snapshot.risk, initial_equity, config_manager=config_manager, **kwargs)
+
+    @property
+    def config(self):
+        """当前风控配置(绑定配置管理器时为最新快照中的 risk)"""
+        if self._config_manager is not None:
+            return self._config_manager.snapshot.risk
+        return self._config
+
+    @config.setter
+    def config(self, risk_config):
+        """替换风控配置(不再跟随配置管理器)"""
+        self._config = risk_config
+        self._config_manager = None
+
+    # ==================== 槽位管理 ====================
+    def _resolve(self, symbols: Sequence[str]) -> np.ndarray:
+        """将股票代码解析为槽位号，新股票自动分配槽位"""
+        slots = self._slots
+        get = slots.get
+        index = [get(s, -1) for s in symbols]
+        if -1 in index:
+            for i, symbol in enumerate(symbols):
+                if index[i] < 0:
+                    index[i] = self._add_symbol(symbol)
+        return np.array(index, dtype=np.intp)
+
+    def _add_symbol(self, symbol: str) -> int:
+        slot = self._slots.get(symbol)
+        if slot is not None:
+            return slot
+        slot = len(self._symbols)
+        if slot >= len(self._position):
+            self._grow()
+        self._slots[symbol] = slot
+        self._symbols.append(symbol)
+        return slot
+
+    def _grow(self):
+        size = len(self._position)
+        self._position = np.concatenate([self._position, np.zeros(size, dtype=np.int64)])
+        self._price = np.concatenate([self._price, np.zeros(size)])
+        self._limit_down = np.concatenate([self._limit_down, np.full(size, -np.inf)])
+        self._limit_up = np.concatenate([self._limit_up, np.full(size, np.inf)])
+
+    # ==================== 状态维护 ====================
+    def set_prev_close(self, symbols: Sequence[str], prev_close: Sequence[float],
+                       st: Optional[Sequence[bool]] = None):
+        """设置昨收价并计算涨跌停价格带(每日开盘前调用)
+
+        Args:
+            symbols: 股票代码列表
+            prev_close: 昨收价
+            st: 是否为ST股票
+        """
+        symbols = list(symbols)
+        slots = self._resolve(symbols)
+        st = st if st is not None else [False] * len(symbols)
+        ratio = np.array([get_price_limit_ratio(s, bool(flag)) for s, flag in zip(symbols, st)])
+        prev_close = np.asarray(prev_close, dtype=np.float64)
+        self._limit_down[slots], self._limit_up[slots] = price_limits(prev_close, ratio)
+        unset = self._price[slots] == 0.0
+        self._price[slots[unset]] = prev_close[unset]
+        self._mark()
+
+    def update_prices(self, symbols: Sequence[str], prices: Sequence[float]):
+        """更新最新价并重新计算持仓市值、高水位"""
+        slots = self._resolve(list(symbols))
+        prices = np.asarray(prices, dtype=np.float64)
+        valid = prices > 0.0
+        self._price[slots[valid]] = prices[valid]
+        self._mark()
+
+    def on_fill(self, symbol: str, direction, volume: int, price: float, commission: float = 0.0):
+        """成交回报: 增量更新现金与持仓"""
+        slot = self._resolve([symbol])[0]
+        sign = int(direction_signs([direction])[0])
+        self._position[slot] += sign * int(volume)
+        self.cash -= sign * volume * price + commission
+        self._price[slot] = price
+        self._mark()
+
+    def sync_account(self, cash: float, positions: Dict[str, Tuple[int, float]]):
+        """用券商账户数据整体同步现金和持仓(启动或对账时)
+
+        Args:
+            cash: 可用资金
+            positions: 股票代码 -> (持仓数量, 最新价)
+        """
+        self.cash = float(cash)
+        self._position[:] = 0
+        if positions:
+            symbols = list(positions)
+            slots = self._resolve(symbols)
+            self._position[slots] = [positions[s][0] for s in symbols]
+            self._price[slots] = [positions[s][1] for s in symbols]
+        self._mark()
+
+    def dump_state(self) -> Dict[str, Any]:
+        """快照用的持仓、价格、价格带与资金状态(不含配置)"""
+        count = len(self._symbols)
+        return {
+            'symbols': list(self._symbols),
+            'position': self._position[:count].copy(),
+            'price': self._price[:count].copy(),
+            'limit_down': self._limit_down[:count].copy(),
+            'limit_up': self._limit_up[:count].copy(),
+            'cash': self.cash,
+            'day_start_equity': self._day_start_equity,
+            'high_water_mark': self._high_water_mark,
+        }
+
+    def load_state(self, state: Dict[str, Any]):
+        """从快照恢复状态(覆盖当前持仓与资金)"""
+        self._slots, self._symbols = {}, []
+        self._position[:] = 0
+        self._price[:] = 0.0
+        self._limit_down[:] = -np.inf
+        self._limit_up[:] = np.inf
+        slots = self._resolve(state['symbols'])
+        self._position[slots] = state['position']
+        self._price[slots] = state['price']
+        self._limit_down[slots] = state['limit_down']
+        self._limit_up[slots] = state['limit_up']
+        self.cash = float(state['cash'])
+        self._day_start_equity = float(state['day_start_equity'])
+        self._high_water_mark = float(state['high_water_mark'])
+        self._mark()
+
+    def start_day(self):
+        """开始新交易日: 以当前权益作为当日盈亏基准"""
+        self._day_start_equity = self.equity
+
+    def _mark(self):
+        count = len(self._symbols)
+        self._market_value = float(np.dot(self._position[:count], self._price[:count]))
+        equity = self.cash + self._market_value
+        if equity > self._high_water_mark:
+            self._high_water_mark = equity
+
+    # ==================== 账户指标 ====================
+    @property
+    def market_value(self) -> float:
+        """持仓市值"""
+        return self._market_value
+
+    @property
+    def equity(self) -> float:
+        """账户权益"""
+        return self.cash + self._market_value
+
+    @property
+    def daily_pnl(self) -> float:
+        """当日盈亏"""
+        return self.equity - self._day_start_equity
+
+    @property
+    def high_water_mark(self) -> float:
+        """权益高水位"""
+        return self._high_water_mark
+
+    @property
+    def drawdown(self) -> float:
+        """当前回撤比例"""
+        return 1.0 - self.equity / self._high_water_mark if self._high_water_mark > 0 else 0.0
+
+    @property
+    def positions_count(self) -> int:
+        """持仓股票数"""
+        return int(np.count_nonzero(self._position[:len(self._symbols)]))
+
+    def position(self, symbol: str) -> int:
+        """某只股票的持仓数量"""
+        slot = self._slots.get(symbol)
+        return int(self._position[slot]) if slot is not None else 0
+
+    def get_price_limits(self, symbol: str) -> Tuple[float, float]:
+        """某只股票的(跌停价, 涨停价)，未设置昨收时为(-inf, inf)"""
+        slot = self._slots.get(symbol)
+        if slot is None:
+            return -np.inf, np.inf
+        return float(self._limit_down[slot]), float(self._limit_up[slot])
+
+    # ==================== 批量检查 ====================
+    def check(self, symbols: Sequence[str], directions, volumes: Sequence[int],
+              prices: Optional[Sequence[float]] = None) -> RiskCheckResult:
+        """批量检查候选订单
+
+        Args:
+            symbols: 股票代码列表
+            directions: 交易方向(TradeDirection / 'BUY'/'SELL' / ±1)
+            volumes: 委托数量(股)，买入按交易单位向下取整
+            prices: 委托价格，None 或 NaN 表示按最新价估算(市价单)
+
+        Returns:
+            RiskCheckResult: 逐单检查结果(不修改引擎状态，成交后通过 on_fill 更新)
+        """
+        symbols = list(symbols)
+        n = len(symbols)
+        unit = self.volume_unit
+        slots = self._resolve(symbols)
+        signs = direction_signs(directions)
+        buy = signs > 0
+        sell = ~buy
+        codes = np.zeros(n, dtype=np.int8)
+
+        def reject(mask, code):
+            codes[mask & (codes == 0)] = code
+
+        # 1. 数量取整: 买入按手取整，卖出非清仓部分按手取整(清仓允许零股)
+        position = self._position[slots]
+        volumes = np.asarray(volumes, dtype=np.int64)
+        rounded = volumes // unit * unit
+        volumes = np.where(sell & (volumes == position), volumes, rounded)
+        reject(volumes <= 0, RiskRejectCode.LOT_SIZE)
+
+        # 2. 价格有效性与涨跌停
+        last = self._price[slots]
+        if prices is None:
+            prices = last
+            is_limit = np.zeros(n, dtype=bool)
+        else:
+            prices = np.asarray(prices, dtype=np.float64)
+            is_limit = ~np.isnan(prices)
+            prices = np.where(is_limit, prices, last)
+        reject(~(prices > 0.0), RiskRejectCode.INVALID_PRICE)
+        reject(is_limit & ((prices < self._limit_down[slots]) | (prices > self._limit_up[slots])),
+               RiskRejectCode.PRICE_BAND)
+
+        # 3. 卖出数量(同批同一股票的卖单累计)
+        sell_volume = np.where(sell & (codes == 0), volumes, 0)
+        reject(sell & (_group_cumsum(slots, sell_volume) > position), RiskRejectCode.SELL_EXCEEDS_POSITION)
+
+        if buy.any():
+            self._check_buys(slots, buy, volumes, prices, position, codes, reject)
+
+        return RiskCheckResult(symbols, codes == 0, volumes, codes)
+
+    def _check_buys(self, slots, buy, volumes, prices, position, codes, reject):
+        cfg = self.config
+        equity = self.equity
+        notional = volumes * prices
+
+        # 4. 账户级熔断
+        if equity - self._day_start_equity < -cfg.max_daily_loss * self._day_start_equity:
+            reject(buy, RiskRejectCode.DAILY_LOSS)
+        if self.drawdown > cfg.max_drawdown:
+            reject(buy, RiskRejectCode.DRAWDOWN)
+
+        # 5. 单笔风险: 触发止损时的亏损不超过权益的 position_risk_pct
+        reject(buy & (notional * cfg.stop_loss > cfg.position_risk_pct * equity + 1e-9),
+               RiskRejectCode.POSITION_RISK)
+
+        # 6. 单只股票持仓(现有市值 + 批内同股票累计买入)
+        pending = np.where(buy & (codes == 0), notional, 0.0)
+        holding_value = position * self._price[slots]
+        single_limit = cfg.max_single_position * equity + 1e-9
+        reject(buy & (holding_value + _group_cumsum(slots, pending) > single_limit),
+               RiskRejectCode.SINGLE_POSITION)
+
+        # 7. 持仓股票数: 新开仓的股票按首次出现计数
+        candidate = buy & (codes == 0)
+        opening = candidate & (position == 0)
+        first = np.zeros(len(slots), dtype=bool)
+        if opening.any():
+            index = np.flatnonzero(opening)
+            _, first_pos = np.unique(slots[index], return_index=True)
+            first[index[first_pos]] = True
+        exceeded = first & (self.positions_count + np.cumsum(first) > cfg.max_positions_count)
+        if exceeded.any():
+            # 同一股票的后续买单随首单一起拒绝
+            reject(opening & np.isin(slots, slots[exceeded]), RiskRejectCode.POSITIONS_COUNT)
+
+        # 8. 总持仓 9. 可用资金(批内按顺序累计)
+        pending = np.cumsum(np.where(buy & (codes == 0), notional, 0.0))
+        reject(buy & (self._market_value + pending > cfg.max_total_positions * equity + 1e-9),
+               RiskRejectCode.TOTAL_POSITIONS)
+        pending = np.cumsum(np.where(buy & (codes == 0), notional, 0.0))
+        reject(buy & (pending > self.cash + 1e-9), RiskRejectCode.INSUFFICIENT_CASH)
+
+    def __repr__(self) -> str:
+        return (f"RiskEngine(equity={self.equity:.2f}, cash={self.cash:.2f}, "
+                f"positions={self.positions_count}, drawdown={self.drawdown:.2%})")
+
+
+def _group_cumsum(groups: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """按组(槽位)计算批内累计和，结果按原顺序返回"""
+    if len(groups) == 0:
+        return values.copy()
+    order = np.argsort(groups, kind='stable')
+    sorted_groups = groups[order]
+    cumsum = np.cumsum(values[order])
+    starts = np.r_[True, sorted_groups[1:] != sorted_groups[:-1]]
+    group_start = np.maximum.accumulate(np.where(starts, np.arange(len(groups)), 0))
+    base = (cumsum - values[order])[group_start]  # 每组之前的累计和
+    result = np.empty_like(cumsum)
+    result[order] = cumsum - base
+    return result
@@ -10,36 +10,22 @@ Author: AlphaBot
 Version: 2.0
 """
 
-# OPTIMIZED: 优化导入语句，移除未使用的导入
+# OPTIMIZED: 启动时只导入标准库，业务模块按运行模式延迟导入，
+# 保证 --help 和定时任务等短进程的冷启动开销
 import argparse
 import sys
 from pathlib import Path
 
-from libs.core.strategies.base_strategy import BaseStrategy
-from libs.utils.container import container
-from libs.config.consts import DEFAULT_TRADE_SIZE
-from trading_engine import TradingEngine
 
-
-# OPTIMIZED: 示例策略类 - 使用常量替代魔术数字
-class MyStrategy(BaseStrategy):
-    """示例交易策略
-    
-    简单的趋势跟踪策略，基于价格变化进行买卖决策
-    """
-    
-    def next(self):
-        """策略主逻辑
-        
-        每个数据周期调用一次，实现具体的交易逻辑
-        """
-        # 策略逻辑
-        if not self.position:
-            if self.data.close[0] > self.data.close[-1]:  # 简单上涨信号
-                self.buy_stock(self.data, size=DEFAULT_TRADE_SIZE)
-        else:
-            if self.data.close[0] < self.data.close[-1]:  # 简单下跌信号
-                self.sell_stock(self.data, size=self.position.size)
+def __getattr__(name):
+    """PEP 562: 兼容 main.MyStrategy 等旧引用，首次访问时才导入示例策略"""
+    if name == 'MyStrategy':
+        from strategies.my_strategy import MyStrategy
+        return MyStrategy
+    if name in ('MyVectorStrategy', 'VECTOR_STRATEGIES'):
+        import strategies.vector
+        return getattr(strategies.vector, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def parse_arguments():
@@ -54,16 +40,56 @@ def parse_arguments():
         epilog="""
 示例用法:
   python main.py --mode backtest --debug
+  python main.py --mode backtest --engine vector
+  python main.py --mode backtest --profile backtest.prof
+  python main.py --mode sweep --strategy SmaCrossStrategy --param fast_period=5:20:5 --param slow_period=30,60
+  python main.py --mode sweep --strategy SmaCrossStrategy --param signal_threshold=0~0.05 --samples 200
+  python main.py --mode walkforward --strategy SmaCrossStrategy --param fast_period=5:20:5 --workers 8
+  python main.py --mode download --workers 16
   python main.py --mode live --config custom_config.yaml
+  python main.py --mode live --replay data/ticks/20240102.tick --speed 10
         """
     )
     
-    parser.add_argument('--mode', choices=['backtest', 'live'], default='live',
-                       help='运行模式: backtest(回测) 或 live(实盘)')
+    parser.add_argument('--mode', choices=['backtest', 'live', 'sweep', 'walkforward', 'download'], default='live',
+                       help='运行模式: backtest(回测)、live(实盘)、sweep(参数扫描)、walkforward(滚动前向回测) '
+                            '或 download(下载历史K线到本地仓库)')
+    parser.add_argument('--engine', choices=['event', 'vector'], default='event',
+                       help='回测引擎: event(逐K线事件驱动) 或 vector(向量化批量回测)')
     parser.add_argument('--debug', action='store_true',
                        help='启用调试模式，显示完整错误堆栈信息')
     parser.add_argument('--config', type=str,
                        help='指定配置文件路径（可选）')
+    parser.add_argument('--profile', nargs='?', const='profile.prof', default=None, metavar='PATH',
+                       help='使用cProfile运行并导出pstats文件(可用于snakeviz/flameprof)，默认 profile.prof')
+    
+    # 行情回放
+    replay_group = parser.add_argument_group('行情回放 (--mode live，配置了 strategies 时)')
+    replay_group.add_argument('--replay', type=str, default=None, metavar='PATH',
+                              help='用录制的 .tick 文件代替实时行情驱动多策略引擎')
+    replay_group.add_argument('--speed', type=float, default=0,
+                              help='回放倍速，1为实时，0为最大速度 (默认: 0)')
+    
+    # 参数扫描
+    sweep_group = parser.add_argument_group('参数扫描 (--mode sweep / walkforward)')
+    sweep_group.add_argument('--strategy', type=str,
+                             help='扫描的向量化策略名称，默认使用配置 strategy.name')
+    sweep_group.add_argument('--param', action='append', default=[], metavar='NAME=SPEC',
+                             help='参数空间: 5,10,20 枚举 | 5:30:5 区间 | 0.0~0.05 连续(仅随机搜索)')
+    sweep_group.add_argument('--samples', type=int, default=0,
+                             help='随机搜索采样数，0表示网格搜索')
+    sweep_group.add_argument('--seed', type=int, default=None,
+                             help='随机搜索种子')
+    sweep_group.add_argument('--workers', type=int, default=None,
+                             help='工作进程数，默认为CPU核数 (download 模式为并发请求数，默认 data_source.max_workers)')
+    sweep_group.add_argument('--results', type=str, default='sweep_results.jsonl',
+                             help='结果文件路径，已存在时断点续跑')
+    sweep_group.add_argument('--metric', type=str, default=None,
+                             help='结果排序/选参指标，默认 sharpe(walkforward 默认使用配置 walk_forward.metric)')
+    
+    download_group = parser.add_argument_group('历史数据下载 (--mode download)')
+    download_group.add_argument('--full', action='store_true',
+                                help='忽略本地已有数据，按 backtest.start_date 整段重新下载')
     
     return parser.parse_args()
 
@@ -73,9 +99,13 @@ def setup_error_handling():
     
     OPTIMIZED: 简化错误处理逻辑，提升性能
     """
+    from libs.utils.container import container
+    from libs.output.log_pipeline import DeferredOutput
+    
     # 从依赖注入容器中获取管理器
     error_manager = container.get('error_manager')
-    output_manager = container.get('output_manager')
+    # OPTIMIZED: 错误回调的格式化与打印交由日志管道写线程执行，回调线程立即返回
+    output_manager = DeferredOutput(container.get('output_manager'))
     
     # OPTIMIZED: 简化错误回调函数
     def error_callback(error_info):
@@ -89,6 +119,365 @@ def setup_error_handling():
             output_manager.info(f"建议: {error_info.suggestion}")
     
     error_manager.register_callback(error_callback)
+    return error_callback
+
+
+def setup_logging(config_manager, debug=False):
+    """按 logging 配置初始化日志管道(应用/交易/错误日志流)
+    
+    Args:
+        config_manager: 配置管理器
+        debug: 是否以 DEBUG 级别记录
+    
+    Returns:
+        LogPipeline: 全局日志管道
+    """
+    from libs.output.log_pipeline import configure as configure_logging
+    
+    options = {'level': 'DEBUG'} if debug else {}
+    return configure_logging(config_manager.config.logging, **options)
+
+
+def setup_monitoring(config_manager, error_callback):
+    """按 performance 配置启动性能监控，告警复用错误回调
+    
+    Args:
+        config_manager: 配置管理器
+        error_callback: setup_error_handling 注册的错误回调
+    
+    Returns:
+        tuple: (PerformanceMonitor 或 None, 应用配置)
+    """
+    from libs.monitoring import PerformanceMonitor
+    
+    config = config_manager.config
+    monitor = PerformanceMonitor.from_config(config.performance)
+    if config.performance.enable_monitoring:
+        monitor.register_callback(error_callback)
+        monitor.start()
+        return monitor, config
+    return None, config
+
+
+def teardown_monitoring(config_manager, monitor, output_manager):
+    """停止配置监控与性能监控，输出延迟统计
+    
+    Args:
+        config_manager: 配置管理器
+        monitor: setup_monitoring 返回的 PerformanceMonitor 或 None
+        output_manager: 输出管理器
+    """
+    config_manager.stop_watching()
+    if monitor is None:
+        return
+    monitor.stop()
+    for name, stats in monitor.report().items():
+        output_manager.info(f"[延迟] {name}: n={stats['count']} p50={stats['p50_ms']:.3f}ms "
+                            f"p99={stats['p99_ms']:.3f}ms max={stats['max_ms']:.3f}ms 超阈值={stats['slow']}")
+
+
+def setup_config_watch(config_manager, output_manager):
+    """实盘运行期间监控配置文件，热更新后的快照由 RiskEngine 等读取方在下一次检查时生效
+    
+    Args:
+        config_manager: 配置管理器
+        output_manager: 输出管理器
+    
+    Returns:
+        bool: 是否已启动监控
+    """
+    def on_reload(snapshot):
+        risk = snapshot.risk
+        output_manager.info(f"风控参数(版本 {snapshot.version}): 单日亏损 {risk.max_daily_loss:.2%}  "
+                            f"单只持仓 {risk.max_single_position:.2%}  总持仓 {risk.max_total_positions:.2%}")
+    
+    config_manager.add_reload_listener(on_reload)
+    return config_manager.start_watching()
+
+
+def run_vector_backtest(config_path=None):
+    """使用向量化引擎对股票池批量回测
+    
+    Args:
+        config_path: 配置文件路径，None时自动查找
+    """
+    from libs.utils.container import container
+    from libs.config import ConfigManager
+    from libs.backtest.vector_engine import VectorBacktestEngine
+    from libs.data.bar_store import BarStore, load_panel
+    from strategies.vector import MyVectorStrategy
+    
+    output_manager = container.get('output_manager')
+    backtest_config = ConfigManager(config_path).config.backtest
+    
+    store = BarStore.from_config(backtest_config)
+    symbols = backtest_config.symbols or store.symbols(backtest_config.frequency)
+    panel = load_panel(store, symbols, backtest_config.frequency,
+                       backtest_config.start_date, backtest_config.end_date,
+                       cache_dir=backtest_config.panel_cache_dir or None)
+    output_manager.info(f"已加载 {len(panel.symbols)} 只股票 {len(panel.ts)} 根K线")
+    
+    engine = VectorBacktestEngine.from_config(backtest_config)
+    result = engine.run(MyVectorStrategy, panel)
+    
+    total_return = result.total_return
+    if len(total_return):
+        output_manager.info(f"平均收益率: {total_return.mean():.2%}  "
+                            f"最好: {total_return.max():.2%}  最差: {total_return.min():.2%}")
+    if engine.fill_simulator is not None:
+        stats = engine.fill_simulator.stats
+        output_manager.info(f"涨停未买入: {stats['blocked_buys']}  跌停未卖出: {stats['blocked_sells']}  "
+                            f"部分成交: {stats['capped']}")
+    return result
+
+
+def run_sweep(args):
+    """多进程参数扫描
+    
+    Args:
+        args: 命令行参数
+    """
+    from terminaltables3 import AsciiTable
+    from libs.utils.container import container
+    from libs.config import ConfigManager
+    from libs.analytics import LOWER_IS_BETTER
+    from libs.backtest.sweep import SweepRunner, parse_param_spec, grid_search, random_search
+    from libs.backtest.vector_engine import VectorBacktestEngine
+    from libs.data.bar_store import BarStore, load_panel
+    from strategies.vector import VECTOR_STRATEGIES
+    
+    output_manager = container.get('output_manager')
+    app_config = ConfigManager(args.config).config
+    backtest_config = app_config.backtest
+    
+    strategy_name = args.strategy or app_config.strategy.name
+    if strategy_name not in VECTOR_STRATEGIES:
+        raise ValueError(f"未知的向量化策略: {strategy_name}，可选: {', '.join(VECTOR_STRATEGIES)}")
+    strategy_cls = VECTOR_STRATEGIES[strategy_name]
+    
+    space = parse_param_spec(args.param)
+    param_sets = random_search(space, args.samples, args.seed) if args.samples > 0 else grid_search(space)
+    output_manager.info(f"策略: {strategy_name}  参数组合: {len(param_sets)}")
+    
+    store = BarStore.from_config(backtest_config)
+    symbols = backtest_config.symbols or store.symbols(backtest_config.frequency)
+    panel = load_panel(store, symbols, backtest_config.frequency,
+                       backtest_config.start_date, backtest_config.end_date,
+                       cache_dir=backtest_config.panel_cache_dir or None)
+    output_manager.info(f"已加载 {len(panel.symbols)} 只股票 {len(panel.ts)} 根K线")
+    
+    runner = SweepRunner(
+        strategy_cls, panel,
+        engine_kwargs=VectorBacktestEngine.config_kwargs(backtest_config),
+        results_path=args.results, max_workers=args.workers,
+        base_params=app_config.strategy.parameters,
+    )
+    metric = args.metric or 'sharpe'
+    ranked = runner.run(param_sets, metric=metric, ascending=metric in LOWER_IS_BETTER,
+                        progress=lambda done, total: output_manager.info(f"进度: {done}/{total}"))
+    
+    # 显示排名前十的参数组合
+    metric_names = ['sharpe', 'sortino', 'calmar', 'mean_return', 'max_drawdown', 'turnover', 'avg_trades']
+    rows = [['排名', '参数'] + metric_names]
+    for rank, record in enumerate(ranked[:10], 1):
+        metrics = record['metrics']
+        rows.append([rank, record['params']] + [f"{metrics.get(m, float('nan')):.4f}" for m in metric_names])
+    print(AsciiTable(rows, '参数扫描结果').table)
+    output_manager.info(f"完整结果: {args.results}")
+    return ranked
+
+
+def run_walk_forward(args):
+    """滚动前向回测: 逐训练窗口选参，在随后的测试窗口上做样本外评估
+    
+    Args:
+        args: 命令行参数(--param 未指定时使用配置 backtest.walk_forward.param_space)
+    """
+    import numpy as np
+    from terminaltables3 import AsciiTable
+    from libs.utils.container import container
+    from libs.config import ConfigManager
+    from libs.analytics import LOWER_IS_BETTER
+    from libs.backtest.sweep import parse_param_spec, grid_search, random_search
+    from libs.backtest.walk_forward import WalkForwardRunner
+    from libs.data.bar_store import BarStore, load_panel
+    from strategies.vector import VECTOR_STRATEGIES
+    
+    output_manager = container.get('output_manager')
+    app_config = ConfigManager(args.config).config
+    backtest_config = app_config.backtest
+    wf_config = backtest_config.walk_forward
+    
+    strategy_name = args.strategy or app_config.strategy.name
+    if strategy_name not in VECTOR_STRATEGIES:
+        raise ValueError(f"未知的向量化策略: {strategy_name}，可选: {', '.join(VECTOR_STRATEGIES)}")
+    strategy_cls = VECTOR_STRATEGIES[strategy_name]
+    
+    specs = args.param or [f"{name}={spec}" for name, spec in wf_config.param_space.items()]
+    space = parse_param_spec(specs)
+    param_sets = random_search(space, args.samples, args.seed) if args.samples > 0 else grid_search(space)
+    metric = args.metric or wf_config.metric
+    
+    store = BarStore.from_config(backtest_config)
+    symbols = backtest_config.symbols or store.symbols(backtest_config.frequency)
+    panel = load_panel(store, symbols, backtest_config.frequency,
+                       backtest_config.start_date, backtest_config.end_date,
+                       cache_dir=backtest_config.panel_cache_dir or None)
+    runner = WalkForwardRunner.from_config(
+        strategy_cls, panel, backtest_config, max_workers=args.workers,
+        base_params=app_config.strategy.parameters,
+    )
+    output_manager.info(f"策略: {strategy_name}  参数组合: {len(param_sets)}  "
+                        f"窗口: {len(runner.folds)}  股票: {len(panel.symbols)}  K线: {len(panel.ts)}")
+    report = runner.run(param_sets, metric=metric,
+                        ascending=metric in LOWER_IS_BETTER,
+                        progress=lambda done, total: output_manager.info(f"进度: {done}/{total}"))
+    
+    def day(row):
+        return str(np.datetime64(int(panel.ts[row]), 'ns'))[:10]
+    
+    rows = [['窗口', '训练区间', '测试区间', '参数', f'训练{metric}', f'测试{metric}', '测试收益']]
+    for item in report.folds:
+        fold = item.fold
+        rows.append([fold.index + 1, f"{day(fold.train_start)}~{day(fold.train_stop - 1)}",
+                     f"{day(fold.test_start)}~{day(fold.test_stop - 1)}", item.params,
+                     f"{item.train.get(metric, float('nan')):.4f}",
+                     f"{item.test.get(metric, float('nan')):.4f}",
+                     f"{item.test.get('mean_return', float('nan')):.2%}"])
+    print(AsciiTable(rows, '滚动前向回测').table)
+    for name, value in report.summary().items():
+        output_manager.info(f"{name}: {value:.4f}")
+    for error in report.errors[:10]:
+        output_manager.error(f"参数 {error['params']} 执行失败: {error['error']}")
+    return report
+
+
+def run_download(args):
+    """从 data_source.provider 批量下载历史K线，增量更新到 backtest.data_dir
+    
+    Args:
+        args: 命令行参数
+    """
+    from libs.utils.container import container
+    from libs.config import ConfigManager
+    from libs.data.bar_store import BarStore
+    from libs.data.providers import BulkFetcher, make_provider, refresh_store
+    
+    output_manager = container.get('output_manager')
+    app_config = ConfigManager(args.config).config
+    backtest_config = app_config.backtest
+    
+    provider = make_provider(app_config.data_source, app_config.network)
+    fetcher = BulkFetcher.from_config(provider, app_config.data_source, app_config.network,
+                                      max_workers=args.workers or app_config.data_source.max_workers)
+    store = BarStore.from_config(backtest_config)
+    try:
+        symbols = backtest_config.symbols or provider.list_symbols()
+        output_manager.info(f"数据源: {provider.name}  股票: {len(symbols)}  并发: {fetcher.max_workers}  "
+                            f"限流: {provider.rate_limit or '不限'}次/秒")
+        step = max(1, len(symbols) // 20)
+        
+        def progress(done, total):
+            if done % step == 0 or done == total:
+                output_manager.info(f"进度: {done}/{total}")
+        
+        report = refresh_store(fetcher, store, symbols, backtest_config.frequency,
+                               backtest_config.start_date, backtest_config.end_date,
+                               full=args.full, progress=progress)
+    finally:
+        store.close()
+        provider.close()
+    
+    stats = report.stats
+    output_manager.info(f"下载完成: 更新 {stats['written']} 只  已是最新 {stats['up_to_date']} 只  "
+                        f"缓存命中 {stats['cache_hits']}  重试 {stats['retries']}  "
+                        f"K线 {stats['bars']:,}  耗时 {stats['elapsed']:.1f}s")
+    for request, error in list(report.errors.items())[:20]:
+        output_manager.warning(f"下载失败 {request.symbol}: {error}")
+    if len(report.errors) > 20:
+        output_manager.warning(f"... 共 {len(report.errors)} 只股票下载失败")
+    return report
+
+
+def run_multi_strategy(args, config, output_manager):
+    """多策略引擎: 一份行情订阅分发给 strategies 中配置的全部策略实例
+    
+    Args:
+        args: 命令行参数(--replay 时用录制行情代替QMT实时行情)
+        config: 应用配置
+        output_manager: 输出管理器
+    """
+    from libs.engine import MultiStrategyEngine
+    
+    engine = MultiStrategyEngine.from_config(config)
+    output_manager.info(f"策略实例: {len(engine.strategies)}  订阅股票: {len(engine.symbols)}  "
+                        f"工作进程: {engine.workers}")
+    output_manager.warning("未注册下单通道，下单意图仅记录不报单")
+    with engine:
+        if args.replay:
+            from libs.data.tick_replay import TickFile, TickReplayer
+            stats = TickReplayer(TickFile(args.replay), speed=args.speed).run(on_ticks=engine.on_ticks)
+            output_manager.info(f"回放记录: {stats.records:,}  耗时: {stats.elapsed:.3f}s  "
+                                f"吞吐: {stats.rate:,.0f} 条/秒")
+        else:
+            from xtquant import xtdata
+            xtdata.subscribe_whole_quote(engine.symbols, engine.on_qmt_quotes)
+            xtdata.run()
+    for error in engine.errors:
+        output_manager.error(f"策略 {error.strategy} {error.stage} 异常: {error.message}")
+    output_manager.info(f"行情批次: {engine.stats['batches']:,}  行情: {engine.stats['quotes']:,}  "
+                        f"下单意图: {engine.stats['orders']:,}")
+    return engine
+
+
+def run_mode(args, output_manager, config=None):
+    """按运行模式执行回测、参数扫描、滚动前向回测、历史数据下载或实盘
+    
+    Args:
+        args: 命令行参数
+        output_manager: 输出管理器
+        config: 应用配置(实盘模式下配置了 strategies 时使用多策略引擎)
+    """
+    if args.mode == 'backtest' and args.engine == 'vector':
+        output_manager.info("开始向量化回测...")
+        run_vector_backtest(args.config)
+        return
+    
+    if args.mode == 'sweep':
+        output_manager.info("开始参数扫描...")
+        run_sweep(args)
+        return
+    
+    if args.mode == 'walkforward':
+        output_manager.info("开始滚动前向回测...")
+        run_walk_forward(args)
+        return
+    
+    if args.mode == 'download':
+        output_manager.info("开始下载历史数据...")
+        run_download(args)
+        return
+    
+    if args.mode == 'live' and config is not None and config.strategies:
+        output_manager.info("开始多策略实盘交易..." if not args.replay else "开始多策略行情回放...")
+        run_multi_strategy(args, config, output_manager)
+        return
+    
+    # 创建并启动交易引擎(事件驱动回测与实盘共用)
+    from trading_engine import TradingEngine
+    from strategies.my_strategy import MyStrategy
+    engine = TradingEngine()
+    
+    # 添加策略
+    engine.add_strategy(MyStrategy)
+    
+    # 根据模式运行
+    if args.mode == 'backtest':
+        output_manager.info("开始回测...")
+        engine.run_backtest()
+    else:
+        output_manager.info("开始实盘交易...")
+        engine.run_live()
 
 
 def main():
@@ -101,9 +490,10 @@ def main():
         args = parse_arguments()
         
         # 设置错误处理
-        setup_error_handling()
+        error_callback = setup_error_handling()
         
         # 获取输出管理器
+        from libs.utils.container import container
         output_manager = container.get('output_manager')
         
         # 显示启动信息
@@ -116,20 +506,29 @@ def main():
         if args.config:
             output_manager.info(f"配置文件: {args.config}")
         
-        # 创建并启动交易引擎
-        engine = TradingEngine()
-        
-        # 添加策略
-        engine.add_strategy(MyStrategy)
-        
-        # 根据模式运行
-        if args.mode == 'backtest':
-            output_manager.info("开始回测...")
-            engine.run_backtest()
-        else:
-            output_manager.info("开始实盘交易...")
-            engine.run_live()
+        from libs.config import ConfigManager
+        config_manager = ConfigManager(args.config)
+        log_pipeline = setup_logging(config_manager, args.debug)
+        monitor, config = setup_monitoring(config_manager, error_callback)
+        try:
+            if args.mode == 'live':
+                setup_config_watch(config_manager, output_manager)
+            profile_path = args.profile or ('profile.prof' if config.debug.enable_profiling else None)
             
+            if profile_path:
+                from libs.monitoring.profiling import profile_call
+                from libs.output.log_pipeline import get_app_logger
+                _, stats = profile_call(run_mode, profile_path, args, output_manager, config)
+                output_manager.info(f"性能分析结果已保存: {profile_path}")
+                get_app_logger('profile').info("性能分析摘要(按累计耗时排序):\n%s", stats)
+            else:
+                run_mode(args, output_manager, config)
+        finally:
+            # 异常或中断退出时同样停止监控并输出延迟报告
+            teardown_monitoring(config_manager, monitor, output_manager)
+        
+        if log_pipeline.dropped:
+            output_manager.warning(f"日志队列积压，共丢弃 {log_pipeline.dropped} 条记录")
         output_manager.success("系统运行完成")
         
     except KeyboardInterrupt:
@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+示例策略
+
+按运行模式分别导入，避免向量化回测加载事件驱动框架，反之亦然:
+    strategies.my_strategy      事件驱动(逐K线)策略
+    strategies.vector           向量化策略及策略注册表
+    strategies.multi            多策略引擎(逐笔行情)策略
+"""
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+示例策略 - 多策略引擎版本
+"""
+
+from libs.config.consts import DEFAULT_TRADE_SIZE
+from libs.engine.strategy import EngineStrategy
+
+
+class MomentumStrategy(EngineStrategy):
+    """示例交易策略的逐笔行情版本
+    
+    与 MyStrategy 逻辑一致: 无持仓时价格较上一笔上涨超过阈值则买入，
+    持仓时价格较上一笔下跌超过阈值则卖出
+    """
+    
+    params = {
+        'threshold': 0.0,  # 触发阈值(相对上一笔价格)
+        'size': DEFAULT_TRADE_SIZE,  # 每次交易数量
+    }
+    
+    def on_start(self):
+        self.prev = {}  # 股票代码 -> 上一笔价格
+        self.holding = set()  # 本策略持仓的股票
+    
+    def on_quotes(self, quotes):
+        threshold = self.p['threshold']
+        for symbol, price in quotes.items():
+            prev = self.prev.get(symbol)
+            self.prev[symbol] = price
+            if prev is None or not price > 0:
+                continue
+            if symbol not in self.holding and price > prev * (1 + threshold):
+                self.buy(symbol, self.p['size'], price)
+                self.holding.add(symbol)
+            elif symbol in self.holding and price < prev * (1 - threshold):
+                self.sell(symbol, self.p['size'], price)
+                self.holding.discard(symbol)
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+示例策略 - 事件驱动版本
+"""
+
+from libs.core.strategies.base_strategy import BaseStrategy
+from libs.config.consts import DEFAULT_TRADE_SIZE
+
+
+# OPTIMIZED: 示例策略类 - 使用常量替代魔术数字
+class MyStrategy(BaseStrategy):
+    """示例交易策略
+    
+    简单的趋势跟踪策略，基于价格变化进行买卖决策
+    """
+    
+    def next(self):
+        """策略主逻辑
+        
+        每个数据周期调用一次，实现具体的交易逻辑
+        """
+        # 策略逻辑
+        if not self.position:
+            if self.data.close[0] > self.data.close[-1]:  # 简单上涨信号
+                self.buy_stock(self.data, size=DEFAULT_TRADE_SIZE)
+        else:
+            if self.data.close[0] < self.data.close[-1]:  # 简单下跌信号
+                self.sell_stock(self.data, size=self.position.size)
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+示例策略 - 向量化版本及策略注册表
+"""
+
+from libs.config.consts import DEFAULT_TRADE_SIZE
+from libs.backtest.vector_engine import VectorStrategy, shift
+from libs.backtest.strategies import SmaCrossStrategy
+
+
+class MyVectorStrategy(VectorStrategy):
+    """示例交易策略的向量化版本
+    
+    与 MyStrategy 逻辑一致，信号以整列数组表达式给出，供向量化引擎批量回测
+    """
+    
+    size = DEFAULT_TRADE_SIZE
+    
+    def signals(self, data):
+        """计算进出场信号
+        
+        Args:
+            data: K线面板，各列形状为 (时间, 品种)
+        """
+        prev_close = shift(data.close, 1)
+        return data.close > prev_close, data.close < prev_close
+
+
+# 可用于向量化回测/参数扫描的策略，键与配置 strategy.name 对应
+VECTOR_STRATEGIES = {
+    'MyStrategy': MyVectorStrategy,
+    'SmaCrossStrategy': SmaCrossStrategy,
+}
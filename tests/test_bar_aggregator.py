@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""K线合成器累计成交量测试"""
+import numpy as np
+import pytest
+
+from libs.data.bar_aggregator import BarAggregator
+
+OPEN = 1704160800.0  # 2024-01-02 10:00 北京时间
+
+
+def day_volume(aggregator: BarAggregator, symbol: str = '600000.SH') -> float:
+    return aggregator.current(symbol, '1d').volume
+
+
+@pytest.mark.parametrize('cum, expected', [
+    ([1000, 900, 1100], 1100),           # 乱序
+    ([1000, 1000, 1000, 1200], 1200),    # 重复
+    ([500, 1000, 700, 1000, 1300], 1300),
+])
+def test_out_of_order_and_duplicate_ticks_within_batch(cum, expected):
+    aggregator = BarAggregator(freqs=('1d',))
+    n = len(cum)
+    aggregator.on_ticks(['600000.SH'] * n, OPEN + np.arange(n), np.full(n, 10.0), np.array(cum, dtype=float))
+    assert day_volume(aggregator) == expected
+
+
+@pytest.mark.parametrize('batch_size', [1, 2, 1000])
+def test_out_of_order_and_duplicate_ticks_across_batches(batch_size):
+    aggregator = BarAggregator(freqs=('1d',), batch_size=batch_size)
+    for i, cum in enumerate([1000, 900, 1000, 1100, 1050, 1100, 1400]):
+        aggregator.on_tick('600000.SH', OPEN + i, 10.0, cum)
+    aggregator.flush()
+    assert day_volume(aggregator) == 1400
+
+
+def test_cumulative_volume_restarts_each_day():
+    aggregator = BarAggregator(freqs=('1d',))
+    aggregator.on_ticks(['600000.SH', '000001.SZ'], [OPEN, OPEN], [10.0, 20.0], [5000.0, 300.0])
+    next_day = OPEN + 86400
+    aggregator.on_ticks(['600000.SH', '000001.SZ', '600000.SH'], [next_day, next_day, next_day + 1],
+                        [10.0, 20.0, 10.0], [200.0, 100.0, 150.0])
+    assert day_volume(aggregator) == 200
+    assert day_volume(aggregator, '000001.SZ') == 100
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""K线仓库面板对齐与内存映射缓存测试"""
+import numpy as np
+import pytest
+
+from libs.data import bar_store
+from libs.data.bar_store import BarPanel, BarStore, load_panel
+
+
+def write_symbols(store: BarStore, n_symbols: int = 6, n_bars: int = 40, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    base = np.datetime64('2023-01-02', 'ns')
+    for j in range(n_symbols):
+        days = np.sort(rng.choice(n_bars, size=rng.integers(5, n_bars), replace=False))
+        close = rng.uniform(5, 50, len(days))
+        store.write(f"{600000 + j}.SH", '1d', base + days * np.timedelta64(1, 'D'),
+                    close * 0.99, close * 1.02, close * 0.98, close, rng.uniform(1, 9, len(days)) * 100)
+
+
+@pytest.mark.parametrize('block_bytes', [8, 1 << 20])
+def test_cached_panel_matches_in_memory_alignment(tmp_path, monkeypatch, block_bytes):
+    monkeypatch.setattr(bar_store, 'PANEL_BLOCK_BYTES', block_bytes)
+    store = BarStore(tmp_path / 'bars')
+    write_symbols(store)
+    symbols = store.symbols('1d') + ['000001.SZ']  # 缺失品种跳过
+
+    expected = load_panel(store, symbols, '1d', '2023-01-05', '2023-02-01')
+    cached = load_panel(store, symbols, '1d', '2023-01-05', '2023-02-01', cache_dir=tmp_path / 'panels')
+
+    assert cached.symbols == expected.symbols and cached.freq == '1d'
+    np.testing.assert_array_equal(cached.ts, expected.ts)
+    for name in bar_store.PRICE_COLUMNS:
+        column = getattr(cached, name)
+        assert isinstance(column, np.memmap) and not column.flags.writeable
+        np.testing.assert_array_equal(column, getattr(expected, name))
+
+
+def test_panel_cache_reused_and_invalidated_by_rewrite(tmp_path):
+    store = BarStore(tmp_path / 'bars')
+    write_symbols(store, n_symbols=3)
+    symbols = store.symbols('1d')
+    cache_dir = tmp_path / 'panels'
+
+    first = load_panel(store, symbols, '1d', cache_dir=cache_dir)
+    load_panel(store, symbols, '1d', cache_dir=cache_dir)
+    assert len(list(cache_dir.iterdir())) == 1
+    load_panel(store, symbols[:2], '1d', cache_dir=cache_dir)
+    assert len(list(cache_dir.iterdir())) == 2
+
+    ts = np.asarray(first.ts[:3]).astype('datetime64[ns]')
+    store.write(symbols[0], '1d', ts, [1, 1, 1], [1, 1, 1], [1, 1, 1], [7.0, 8.0, 9.0], [1, 1, 1])
+    updated = load_panel(store, symbols, '1d', cache_dir=cache_dir)
+    assert len(list(cache_dir.iterdir())) == 3
+    np.testing.assert_array_equal(updated.close[:3, 0], [7.0, 8.0, 9.0])
+
+
+def test_empty_panel(tmp_path):
+    store = BarStore(tmp_path / 'bars')
+    panel = load_panel(store, ['600000.SH'], '1d', cache_dir=tmp_path / 'panels')
+    assert panel.shape == (0, 0) and panel.symbols == []
+    assert BarPanel.from_series([], '1d').shape == (0, 0)
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""因子引擎中间结果缓存精度测试"""
+import numpy as np
+
+from libs.data.bar_store import BarPanel
+from libs.factors import FactorEngine
+
+SHARED = {'a': 'ts_mean(close, 5) / close', 'b': 'ts_mean(close, 5) - close'}
+
+
+def make_panel(rows: int = 120, symbols: int = 8) -> BarPanel:
+    rng = np.random.default_rng(7)
+    close = np.cumprod(1 + rng.normal(0, 0.02, (rows, symbols)), axis=0) * 10
+    ts = np.arange(rows).astype('datetime64[D]').astype('datetime64[ns]').view(np.int64)
+    volume = rng.integers(1, 100, (rows, symbols)).astype(float) * 100
+    return BarPanel([f"{i:06d}.SZ" for i in range(symbols)], '1d', ts, close, close, close, close, volume)
+
+
+def test_results_do_not_depend_on_cached_intermediates(tmp_path):
+    panel = make_panel()
+    factor = {'f': 'ts_std(close, 5) / ts_mean(close, 5)'}
+    fresh = FactorEngine(panel, cache_dir=tmp_path / 'fresh').compute(factor)
+    # 先计算共用 ts_std 的一批因子，其中间结果落盘后被下一批读取
+    engine = FactorEngine(panel, cache_dir=tmp_path / 'shared')
+    engine.compute({'a': 'ts_std(close, 5) * 2', 'b': 'ts_std(close, 5) + 1'})
+    reused = engine.compute(factor)
+    assert engine.stats['computed'] == 1
+    np.testing.assert_array_equal(np.asarray(reused['f']), np.asarray(fresh['f']))
+
+
+def test_intermediates_are_stored_as_float64(tmp_path):
+    engine = FactorEngine(make_panel(), cache_dir=tmp_path, dtype='float32')
+    factors = engine.compute(SHARED)
+    assert engine.stats['intermediates'] == 1
+    assert all(factors[name].dtype == np.float32 for name in SHARED)
+    stored = [np.load(path, mmap_mode='r').dtype for path in tmp_path.rglob('*.npy')]
+    assert sorted(map(str, stored)) == ['float32', 'float32', 'float64']
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""日志管道队列积压测试"""
+from libs.output.log_pipeline import DeferredOutput, LogPipeline
+
+
+class Output:
+    def __init__(self):
+        self.calls = []
+
+    def info(self, message):
+        self.calls.append(('info', message))
+
+    def error(self, message):
+        self.calls.append(('error', message))
+
+
+def full_pipeline(tmp_path) -> LogPipeline:
+    pipeline = LogPipeline(log_dir=tmp_path, console_output=False, max_queue_size=2, flush_interval=60)
+    pipeline._thread = object()  # 写线程未运行，队列保持积压
+    logger = pipeline.get_logger('app')
+    logger.info("a")
+    logger.info("b")
+    return pipeline
+
+
+def test_errors_are_written_synchronously_when_queue_is_full(tmp_path):
+    pipeline = full_pipeline(tmp_path)
+    pipeline.get_logger('trade').info("dropped")
+    pipeline.get_logger('trade').error("下单失败 %s", "600000.SH")
+    assert pipeline.dropped == 1
+    assert pipeline.sync_writes == 1
+    assert "下单失败 600000.SH" in (tmp_path / 'error.log').read_text(encoding='utf-8')
+
+
+def test_deferred_output_runs_errors_inline_when_queue_is_full(tmp_path):
+    pipeline = full_pipeline(tmp_path)
+    target = Output()
+    output = DeferredOutput(target, pipeline)
+    output.info("丢弃")
+    output.error("[NETWORK] 连接中断")
+    assert target.calls == [('error', "[NETWORK] 连接中断")]
+    assert pipeline.dropped == 1
+
+
+def test_drop_count_is_logged(tmp_path):
+    pipeline = full_pipeline(tmp_path)
+    pipeline.get_logger('app').info("dropped")
+    pipeline._thread = None
+    pipeline._drain()
+    pipeline._close_sinks()
+    assert "累计丢弃 1 条记录" in (tmp_path / 'app.log').read_text(encoding='utf-8')
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""多策略引擎的通知去重、积压合并与工作进程退出测试"""
+import threading
+import time
+
+import numpy as np
+
+from libs.engine import multi_engine
+from libs.engine.multi_engine import MultiStrategyEngine, StrategyError, _WorkerLink
+from libs.engine.quote_plane import SharedQuotePlane
+from libs.engine.strategy import EngineStrategy
+from libs.monitoring.latency import SIGNAL_TO_ORDER, LatencyRecorder
+
+
+class RecordingStrategy(EngineStrategy):
+    def on_quotes(self, quotes):
+        for symbol, last in zip(quotes.symbols, quotes.last.tolist()):
+            self.buy(symbol, int(last))
+
+
+class FakeShard:
+    def __init__(self):
+        self.delivered = []
+
+    def dispatch(self, rows, arrival):
+        self.delivered.extend(rows.last.tolist())
+
+
+def notification(*slots: int) -> bytes:
+    return np.array([time.perf_counter_ns()], dtype='<i8').tobytes() + np.array(slots, dtype=np.int32).tobytes()
+
+
+def test_lagging_worker_does_not_redeliver_latest_quote():
+    plane = SharedQuotePlane.create(['600000.SH', '000001.SZ'])
+    try:
+        shard, seen = FakeShard(), np.zeros(plane.capacity, dtype=np.int64)
+        plane.write(np.array([0]), [1.0])
+        plane.write(np.array([0, 1]), [2.0, 5.0])  # 工作进程处理第一条通知前第二批已写入
+        multi_engine._dispatch_notifications(shard, plane, [notification(0)], seen)
+        multi_engine._dispatch_notifications(shard, plane, [notification(0, 1)], seen)
+        plane.write(np.array([0]), [3.0])
+        multi_engine._dispatch_notifications(shard, plane, [notification(0)], seen)
+        assert shard.delivered == [2.0, 5.0, 3.0]
+    finally:
+        plane.close()
+
+
+class BlockingConn:
+    def __init__(self):
+        self.release = threading.Event()
+        self.sent = []
+        self.closed = False
+
+    def send_bytes(self, message):
+        self.release.wait(5)
+        self.sent.append(message)
+
+    def close(self):
+        self.closed = True
+
+
+def test_link_does_not_block_and_merges_backlog():
+    conn = BlockingConn()
+    link = _WorkerLink(0, conn, max_pending=4)
+    started = time.perf_counter()
+    for i in range(100):
+        assert link.send(notification(i % 10))
+    link.send(multi_engine._SNAPSHOT_MESSAGE)
+    link.send(notification(42))
+    assert time.perf_counter() - started < 1.0
+    assert link.merged > 0
+    conn.release.set()
+    link.close(5)
+    assert conn.closed
+    slots = set()
+    for message in conn.sent[:-2]:
+        slots.update(np.frombuffer(message, np.int32, offset=8).tolist())
+    assert slots == set(range(10))
+    assert conn.sent[-2] == multi_engine._SNAPSHOT_MESSAGE
+    assert np.frombuffer(conn.sent[-1], np.int32, offset=8).tolist() == [42]
+
+
+def test_dead_worker_is_reported_and_skipped():
+    errors = []
+    engine = MultiStrategyEngine(workers=1, on_error=errors.append)
+    engine.add_account('A1')
+    engine.add_strategy(RecordingStrategy, symbols=['600000.SH'])
+    engine.start()
+    try:
+        engine._processes[0].kill()
+        engine._processes[0].join(5)
+        deadline = time.time() + 5
+        while not engine.stats['dead_workers'] and time.time() < deadline:
+            engine.on_quotes(['600000.SH'], [10.0])
+            time.sleep(0.01)
+        engine.on_quotes(['600000.SH'], [11.0])
+    finally:
+        engine.stop(timeout=1)
+    assert engine.stats['dead_workers'] == 1
+    assert engine.stats['dropped_notifications'] >= 1
+    assert [e.stage for e in errors] == ['pipe']
+    assert isinstance(errors[0], StrategyError)
+
+
+def test_signal_to_order_recorded_when_intent_is_routed():
+    recorder = LatencyRecorder()
+    placed = []
+    engine = MultiStrategyEngine(recorder=recorder)
+    engine.add_account('A1', placed.append)
+    engine.add_account('A2')  # 未注册下单通道: 只记录意图
+    engine.add_strategy(RecordingStrategy, account='A1', symbols=['600000.SH'])
+    engine.add_strategy(RecordingStrategy, account='A2', symbols=['600000.SH'])
+    with engine:
+        engine.on_quotes(['600000.SH'], [10.0])
+        engine.on_quotes(['600000.SH'], [11.0])
+    assert [intent.volume for intent in placed] == [10, 11]
+    assert recorder.histogram(SIGNAL_TO_ORDER).count == 2
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""下单网关超时查询与重试次数测试"""
+import asyncio
+
+from libs.config.consts import OrderStatus, TradeDirection
+from libs.execution import AsyncOrderGateway, FakeBroker
+from libs.execution.order_gateway import BrokerClient, BrokerError
+from libs.monitoring.latency import LatencyRecorder
+
+
+class SlowAckBroker(FakeBroker):
+    """订单即时到达券商，但回报晚于网关的请求超时"""
+
+    def __init__(self, ack_delay: float):
+        super().__init__(latency=0.0, seed=1)
+        self.ack_delay = ack_delay
+        self.submits = 0
+
+    async def submit_order(self, request):
+        self.submits += 1
+        order_id = await super().submit_order(request)
+        await asyncio.sleep(self.ack_delay)
+        return order_id
+
+
+class BusyBroker(BrokerClient):
+    def __init__(self):
+        self.submits = 0
+
+    async def submit_order(self, request):
+        self.submits += 1
+        raise BrokerError('系统繁忙')
+
+
+def make_gateway(broker, **kwargs):
+    kwargs.setdefault('max_orders_per_second', None)
+    return AsyncOrderGateway(broker, recorder=LatencyRecorder(), retry_delay=0.001, **kwargs)
+
+
+def place(gateway):
+    return asyncio.run(gateway.place('600000.SH', TradeDirection.BUY, 100, 10.0))
+
+
+def test_timeout_queries_broker_instead_of_resubmitting():
+    broker = SlowAckBroker(ack_delay=1.0)
+    gateway = make_gateway(broker, request_timeout=0.05, order_timeout=2.0)
+    ack = place(gateway)
+    assert ack.status == OrderStatus.ACCEPTED
+    assert ack.broker_order_id == broker.orders[ack.request.client_id]
+    assert broker.submits == 1
+    assert gateway.stats['timeout_queries'] == 1
+
+
+def test_timeout_without_query_support_is_left_to_broker():
+    class NoQueryBroker(BrokerClient):
+        submits = 0
+
+        async def submit_order(self, request):
+            self.submits += 1
+            await asyncio.sleep(1.0)
+
+    broker = NoQueryBroker()
+    ack = place(make_gateway(broker, request_timeout=0.05, order_timeout=2.0))
+    assert ack.status == OrderStatus.SUBMITTED
+    assert broker.submits == 1
+
+
+def test_max_retries_counts_total_submissions():
+    broker = BusyBroker()
+    ack = place(make_gateway(broker, max_retries=3))
+    assert ack.status == OrderStatus.REJECTED
+    assert broker.submits == 3
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""数据源响应缓存过期判断测试"""
+import os
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from libs.data.bar_store import BarSeries
+from libs.data.providers import ResponseCache
+from libs.data.providers.base import HistoryRequest
+
+
+def make_series(symbol: str) -> BarSeries:
+    ts = np.array(['2024-01-02'], dtype='datetime64[ns]').view(np.int64)
+    return BarSeries(symbol, '1d', ts, *(np.ones(1) for _ in range(5)))
+
+
+def write(cache: ResponseCache, request: HistoryRequest, written: datetime):
+    path = cache.put('fake', request, make_series(request.symbol))
+    os.utime(path, (written.timestamp(), written.timestamp()))
+
+
+def test_entry_written_before_range_closed_still_expires(tmp_path):
+    cache = ResponseCache(tmp_path)
+    yesterday = date.today() - timedelta(days=1)
+    request = HistoryRequest.make('600000.SH', start='2024-01-01', end=yesterday)
+    assert request.closed
+    write(cache, request, datetime.combine(yesterday, datetime.min.time()) + timedelta(hours=10))
+    assert cache.get('fake', request, max_age=60) is None
+
+
+def test_entry_written_after_range_closed_never_expires(tmp_path):
+    cache = ResponseCache(tmp_path)
+    end = date.today() - timedelta(days=10)
+    request = HistoryRequest.make('600000.SH', start='2024-01-01', end=end)
+    write(cache, request, datetime.combine(end + timedelta(days=1), datetime.min.time()) + timedelta(hours=1))
+    series = cache.get('fake', request, max_age=60)
+    assert series is not None and len(series) == 1
+
+
+def test_open_range_served_within_max_age(tmp_path):
+    cache = ResponseCache(tmp_path)
+    request = HistoryRequest.make('600000.SH', start='2024-01-01')
+    cache.put('fake', request, make_series(request.symbol))
+    assert cache.get('fake', request, max_age=60) is not None
+    write(cache, request, datetime.fromtimestamp(time.time() - 120))
+    if cache.written_closed(request, time.time() - 120):  # 测试恰好跨越零点
+        return
+    assert cache.get('fake', request, max_age=60) is None
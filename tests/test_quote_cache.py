@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""行情缓存淘汰与分段锁测试"""
+import threading
+
+import numpy as np
+import pytest
+
+from libs.data.quote_cache import QuoteCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.parametrize('ttl', [None, 60.0])
+def test_batch_inserts_do_not_evict_each_other(ttl):
+    clock = FakeClock()
+    cache = QuoteCache(capacity=4, ttl=ttl, clock=clock)
+    cache.update_many(['A', 'B', 'C', 'D'], [1.0, 2.0, 3.0, 4.0])
+    clock.now += 1
+    cache.get('A')
+    clock.now += 1
+    cache.update_many(['E', 'F'], [5.0, 6.0])
+    snap = cache.snapshot(['E', 'F', 'A'])
+    assert snap.valid.all()
+    assert snap.last.tolist() == [5.0, 6.0, 1.0]
+    assert len(cache) == 4 and cache.evictions == 2
+
+
+def test_batch_larger_than_capacity_keeps_latest_symbols():
+    cache = QuoteCache(capacity=3, clock=FakeClock())
+    symbols = [f'S{i}' for i in range(5)]
+    cache.update_many(symbols, np.arange(5, dtype=float))
+    snap = cache.snapshot(symbols)
+    assert snap.valid.sum() == 3
+    assert np.nansum(snap.last) == 2 + 3 + 4
+
+
+def test_snapshot_only_locks_needed_stripes():
+    cache = QuoteCache(capacity=8, stripes=4, clock=FakeClock())
+    cache.update_many(['A', 'B'], [1.0, 2.0])
+    used = {cache._slots['A'] % 4, cache._slots['B'] % 4}
+    other = next(i for i in range(4) if i not in used)
+    result = []
+    with cache._stripes[other]:
+        worker = threading.Thread(target=lambda: result.append(cache.snapshot(['A', 'B', 'X'])))
+        worker.start()
+        worker.join(2)
+        assert not worker.is_alive()
+    assert result[0].valid.tolist() == [True, True, False]
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""定长记录历史淘汰、索引维护与溢出日志测试"""
+import gzip
+import json
+import threading
+from types import SimpleNamespace
+
+from libs.data.record_history import RecordHistory, SpillJournal
+
+
+def make_record(i: int):
+    return SimpleNamespace(order_id=f'O{i // 2}', symbol=f'S{i % 3}', seq=i)
+
+
+class ThreadTrackingJournal(SpillJournal):
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = set()
+
+    def write(self, records):
+        self.threads.add(threading.get_ident())
+        super().write(records)
+
+
+def test_eviction_order_index_trimming_and_journal_round_trip(tmp_path):
+    journal = ThreadTrackingJournal(tmp_path / 'trades.jsonl.gz')
+    history = RecordHistory(4, journal=journal, spill_batch=3)
+    for i in range(11):
+        history.append(make_record(i))
+
+    assert [r.seq for r in history.latest()] == [7, 8, 9, 10]
+    assert history.by_order_id('O0') == []
+    assert [r.seq for r in history.by_order_id('O3')] == [7]
+    assert [r.seq for r in history.by_order_id('O4')] == [8, 9]
+    assert [r.seq for r in history.by_symbol('S1')] == [7, 10]
+    assert set(history._by_key) == {'O3', 'O4', 'O5'}
+    assert all(len(seqs) > 0 for seqs in history._by_symbol.values())
+
+    assert history.flush(5)
+    assert threading.get_ident() not in journal.threads
+    with gzip.open(journal.path, 'rt', encoding='utf-8') as f:
+        rows = [json.loads(line) for line in f]
+    assert [row['seq'] for row in rows] == list(range(7))
+    assert rows[0] == {'order_id': 'O0', 'symbol': 'S0', 'seq': 0}
+
+    assert history.spill_all(5)
+    assert len(history) == 0 and history.by_symbol('S1') == []
+    assert [row['seq'] for row in journal.read()] == list(range(11))
+    assert history.spill_errors == 0
+    history.close()
+
+
+def test_close_writes_pending_evictions(tmp_path):
+    history = RecordHistory(2, journal=tmp_path / 'orders.jsonl.gz', spill_batch=100)
+    for i in range(5):
+        history.append(make_record(i))
+    history.close()
+    assert [row['seq'] for row in history.journal.read()] == [0, 1, 2]
+    assert [r.seq for r in history.latest()] == [3, 4]
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""定时轮与下单网关超时登记测试"""
+import asyncio
+import random
+
+import pytest
+
+from libs.config.consts import OrderStatus, TradeDirection
+from libs.execution import AsyncOrderGateway, FakeBroker, GatewayThread, OrderExpiry, TimerWheel
+from libs.monitoring.latency import LatencyRecorder
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.parametrize('bits, levels', [(1, 1), (2, 3), (3, 2), (8, 4)])
+def test_wheel_never_fires_early_and_at_most_one_tick_late(bits, levels):
+    clock = FakeClock()
+    tick = 0.01
+    wheel = TimerWheel(tick=tick, bits=bits, levels=levels, clock=clock)
+    rng = random.Random(bits * 10 + levels)
+    fired, live = [], {}
+
+    for step in range(3000):
+        roll = rng.random()
+        if roll < 0.5:
+            delay = rng.choice([0.0, rng.uniform(0, 0.05), rng.uniform(0, 5), rng.uniform(0, 200)])
+            live[step] = wheel.schedule(delay, lambda i, when: fired.append((i, when, clock.now)),
+                                        step, clock.now + delay)
+        elif roll < 0.7 and live:
+            assert live.pop(rng.choice(list(live))).cancel()
+        else:
+            advance = rng.choice([0.003, 0.05, 1.0, 30.0])
+            clock.now += advance
+            fired.clear()
+            wheel.advance()
+            for i, when, now in fired:
+                assert now >= when
+                assert now - when < tick + advance
+                live.pop(i)
+        assert len(wheel) == len(live)
+
+    clock.now += 1e4
+    wheel.advance()
+    assert len(wheel) == 0
+    assert not any(handle.pending for handle in live.values())
+
+
+def test_attach_rebases_existing_timers():
+    clock = FakeClock(5.0)
+    expiry = OrderExpiry(TimerWheel(tick=0.01, clock=clock), temp_order_expire=0.05)
+    expired = []
+    expiry.callbacks[OrderExpiry.TEMP_ORDER] = expired.append
+    expiry.watch_temp_order('T1')
+
+    async def run():
+        expiry.attach(asyncio.get_running_loop())
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert expired == ['T1']
+
+
+def test_gateway_watches_orders_after_temp_order_registered():
+    timeouts = []
+    expiry = OrderExpiry(TimerWheel(tick=0.01), temp_order_expire=60.0,
+                         on_order_timeout=lambda client_id, ack: timeouts.append(client_id))
+    expiry.watch_temp_order('T1')  # 定时轮在绑定事件循环前已有定时器
+
+    async def run():
+        gateway = AsyncOrderGateway(FakeBroker(latency=0.0, seed=1), order_timeout=0.1,
+                                    max_orders_per_second=None, recorder=LatencyRecorder(), expiry=expiry)
+        requests = [gateway.new_request('600000.SH', TradeDirection.BUY, 100, 10.0) for _ in range(4)]
+        acks = await gateway.place_many(requests)
+        assert gateway.order_done(acks[0].request.client_id)
+        await asyncio.sleep(0.2)
+        return gateway, acks
+
+    gateway, acks = asyncio.run(run())
+    assert all(ack.status == OrderStatus.ACCEPTED for ack in acks)
+    assert sorted(timeouts) == sorted(ack.request.client_id for ack in acks[1:])
+    assert gateway.stats['watch_errors'] == 0
+    assert expiry.pending(OrderExpiry.TEMP_ORDER) == 1
+
+
+def test_gateway_returns_ack_when_watch_fails():
+    expiry = OrderExpiry(TimerWheel(tick=0.01))
+
+    def broken(*args, **kwargs):
+        raise RuntimeError('boom')
+
+    expiry.watch_order = broken
+
+    async def run():
+        gateway = AsyncOrderGateway(FakeBroker(latency=0.0, seed=1), max_orders_per_second=None,
+                                    recorder=LatencyRecorder(), expiry=expiry)
+        return gateway, await gateway.place('600000.SH', TradeDirection.BUY, 100, 10.0)
+
+    gateway, ack = asyncio.run(run())
+    assert ack.status == OrderStatus.ACCEPTED
+    assert gateway.stats['watch_errors'] == 1
+
+
+def test_gateway_thread_binds_wheel_before_start():
+    timeouts = []
+    expiry = OrderExpiry(TimerWheel(tick=0.01), order_timeout=0.1,
+                         on_order_timeout=lambda client_id, ack: timeouts.append(client_id))
+    expiry.watch_temp_order('T1')
+    gateway = AsyncOrderGateway(FakeBroker(latency=0.0, seed=1), order_timeout=0.1,
+                                max_orders_per_second=None, recorder=LatencyRecorder(), expiry=expiry)
+    runner = GatewayThread(gateway).start()
+    try:
+        ack = runner.place('600000.SH', TradeDirection.BUY, 100, 10.0).result(5)
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0.2), runner.loop).result(5)
+    finally:
+        runner.stop()
+    assert ack.status == OrderStatus.ACCEPTED
+    assert timeouts == [ack.request.client_id]
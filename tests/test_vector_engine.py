@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""向量化回测与逐K线参考实现一致性测试"""
+import numpy as np
+import pytest
+
+from benchmarks.bench_vector_engine import make_panel, reference_backtest
+from libs.backtest.vector_engine import VectorBacktestEngine
+from strategies.vector import MyVectorStrategy
+
+
+class OddLotStrategy(MyVectorStrategy):
+    size = 250  # 按整手向下取整为200股
+
+
+@pytest.mark.parametrize('fill_price', ['open', 'close'])
+@pytest.mark.parametrize('strategy_cls', [MyVectorStrategy, OddLotStrategy])
+def test_matches_per_bar_reference(fill_price, strategy_cls):
+    panel = make_panel(120, 15, halt_ratio=0.05, seed=4)
+    engine = VectorBacktestEngine(initial_cash=100000, commission=0.0003, fill_price=fill_price)
+    result = engine.run(strategy_cls, panel)
+    trades, fees, equity = reference_backtest(panel, strategy_cls.size, engine.initial_cash,
+                                              engine.commission, engine.volume_unit, fill_price)
+
+    assert np.count_nonzero(trades) > 100
+    np.testing.assert_array_equal(result.trades, trades)
+    np.testing.assert_allclose(result.commission, fees, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(result.equity, equity, rtol=0, atol=1e-6)
+    assert set(np.abs(result.trades[result.trades > 0])) == {engine.round_lot(strategy_cls.size)}
+
+    traded = result.trades != 0
+    expected_price = panel.open if fill_price == 'open' else panel.close
+    np.testing.assert_array_equal(result.fill_price[traded], expected_price[traded])
+    if fill_price == 'open':
+        # 第t根收盘的信号在第t+1根开盘成交，首根K线不会有成交
+        assert not traded[0].any()
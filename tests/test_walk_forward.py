@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""滚动前向选参测试"""
+import numpy as np
+
+from libs.backtest import SmaCrossStrategy, WalkForwardRunner, make_folds
+from libs.data.bar_store import BarPanel
+
+
+class TaggedSmaStrategy(SmaCrossStrategy):
+    params = {**SmaCrossStrategy.params, 'tag': 0}  # 标签不影响信号
+
+
+def make_panel(rows: int = 400, symbols: int = 5) -> BarPanel:
+    rng = np.random.default_rng(3)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (rows, symbols)), 0))
+    ts = (np.datetime64('2020-01-01', 'ns') + np.arange(rows) * np.timedelta64(1, 'D')).astype(np.int64)
+    return BarPanel([f"{i:06d}.SZ" for i in range(symbols)], '1d', ts, close, close, close, close,
+                    np.ones((rows, symbols)))
+
+
+def test_ties_pick_first_submitted_params_in_parallel():
+    panel = make_panel()
+    folds = make_folds(panel.shape[0], 200, 50)
+    # 参数组完全相同(只差不影响信号的标签)，各窗口指标全部相同
+    param_sets = [{'fast_period': 5, 'slow_period': 20, 'tag': i} for i in range(8)]
+    for workers in (1, 3):
+        report = WalkForwardRunner(TaggedSmaStrategy, panel, folds, max_workers=workers,
+                                   batch_size=1).run(param_sets)
+        assert not report.errors
+        assert [fold.params['tag'] for fold in report.folds] == [0] * len(folds)